@@ -162,7 +162,7 @@ tail -f logs/django.log | grep webhook
 python manage.py shell
 >>> from agents.models import AIAgent
 >>> agent = AIAgent.objects.first()
->>> print(agent.conversation_memory['automatic_learning'])
+>>> print(agent.conversation_memory['learning_summary'])
 
 # Check call sessions
 >>> from agents.models import CallSession  
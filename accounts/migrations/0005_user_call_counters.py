@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:09
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_call_counters(apps, schema_editor):
+    # Same subquery UPDATE as calls.call_stats.refresh_call_stats, once over every user
+    User = apps.get_model('accounts', 'User')
+    CallSession = apps.get_model('calls', 'CallSession')
+    calls = CallSession.objects.filter(user=models.OuterRef('pk')).order_by().values('user')
+    User.objects.update(
+        call_count=Coalesce(models.Subquery(calls.annotate(total=models.Count('pk')).values('total')), 0),
+        call_seconds=Coalesce(models.Subquery(calls.annotate(total=models.Sum('duration')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_stripe_customer_id'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('calls', '0004_phone_e164'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='call_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='call_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_call_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['call_count', 'id'], name='user_call_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['call_seconds', 'id'], name='user_call_seconds_idx'),
+        ),
+    ]
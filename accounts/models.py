@@ -29,6 +29,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     date_joined = models.DateTimeField(default=timezone.now)
     
+    # Call usage counters, kept in sync with calls.CallSession (calls.call_stats) for admin list sorting
+    call_count = models.PositiveIntegerField(default=0, editable=False)
+    call_seconds = models.PositiveIntegerField(default=0, editable=False)
+    
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
@@ -37,6 +41,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Admin user list keyset-sorted by usage on (counter, id)
+            models.Index(fields=['call_count', 'id'], name='user_call_count_idx'),
+            models.Index(fields=['call_seconds', 'id'], name='user_call_seconds_idx'),
+        ]
 
     def __str__(self):
         return self.email
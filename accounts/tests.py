@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from datetime import timedelta
+from decimal import Decimal
+
+from calls.call_stats import refresh_call_stats
+from calls.models import CallSession
+from subscriptions.models import Subscription, SubscriptionPlan
+from .models import User
+from .user_management_api import UserManagementAPIView
+
+
+class UserManagementAPITests(TestCase):
+    """
+    Admin user listing aggregates call stats in SQL and pages with cursors
+    """
+
+    QUERY_BUDGET = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='root@example.com', password=None, role='admin')
+        plan = SubscriptionPlan.objects.create(name='Pro', plan_type='pro', price=Decimal('99.00'))
+        joined = timezone.now() - timedelta(days=40)
+        for i in range(5):
+            user = User.objects.create_user(
+                email=f'member{i}@example.com', password=None, first_name=f'Member{i}',
+                is_active=i != 4, date_joined=joined + timedelta(days=i)
+            )
+            Subscription.objects.create(
+                user=user, plan=plan, status='active', current_period_end=timezone.now() + timedelta(days=30)
+            )
+            cls.add_calls(user, i, seconds=150)
+
+    @staticmethod
+    def add_calls(user, count, seconds):
+        CallSession.objects.bulk_create([
+            CallSession(user=user, call_type='outbound', caller_number='+15550000000',
+                        callee_number='+15550000001', duration=seconds)
+            for _ in range(count)
+        ])
+        refresh_call_stats([user.pk])  # bulk_create skips the post_save counters
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = UserManagementAPIView.as_view()(request)
+            response.render()
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data, len(queries)
+
+    def test_stats_are_aggregated_in_the_database(self):
+        data, queries = self.get(search='member3')
+
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+        member = data['users'][0]
+        self.assertEqual((member['totalCalls'], member['minutesUsed'], member['currentPlan']), (3, 7, 'Pro'))
+        self.assertEqual((data['totalUsers'], data['activeUsers'], data['bannedUsers']), (6, 5, 1))
+        self.assertEqual(data['stats']['totalRevenue'], 495.0)
+        self.assertEqual(data['stats']['avgCallsPerUser'], round(10 / 6, 2))
+
+    def test_query_count_does_not_grow_with_calls(self):
+        _, before = self.get()
+        self.add_calls(User.objects.get(email='member1@example.com'), 50, seconds=60)
+        data, after = self.get()
+
+        self.assertEqual(before, after)
+        self.assertEqual(next(u for u in data['users'] if u['email'] == 'member1@example.com')['totalCalls'], 51)
+
+    def test_sort_by_calls_pages_with_cursor(self):
+        first, _ = self.get(sort='totalCalls', page_size=4)
+        second, _ = self.get(sort='totalCalls', page_size=4, cursor=first['pagination']['next_cursor'])
+
+        calls = [user['totalCalls'] for user in first['users'] + second['users']]
+        self.assertEqual(calls, [4, 3, 2, 1, 0, 0])
+        self.assertIsNone(second['pagination']['next_cursor'])
+
+    def test_usage_sort_seeks_the_counter_index(self):
+        first, _ = self.get(sort='minutesUsed', page_size=2)
+        request = APIRequestFactory().get('/', {'sort': 'minutesUsed', 'page_size': 2, 'cursor': first['pagination']['next_cursor']})
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            UserManagementAPIView.as_view()(request).render()
+
+        page_query = next(q['sql'] for q in queries if 'call_seconds' in q['sql'] and 'ORDER BY' in q['sql'])
+        self.assertNotIn('HAVING', page_query)
+        self.assertNotIn('GROUP BY', page_query)
+
+    def test_counters_follow_call_sessions(self):
+        user = User.objects.get(email='member2@example.com')
+        call = CallSession.objects.create(
+            user=user, call_type='inbound', caller_number='+15550000002', callee_number='+15550000003'
+        )
+        call.duration = 90
+        call.save(update_fields=['duration'])
+        user.refresh_from_db()
+        self.assertEqual((user.call_count, user.call_seconds), (3, 390))
+
+        call.delete()
+        user.refresh_from_db()
+        self.assertEqual((user.call_count, user.call_seconds), (2, 300))
+
+    def test_server_side_filters(self):
+        banned, _ = self.get(status='banned')
+        self.assertEqual([user['email'] for user in banned['users']], ['member4@example.com'])
+
+        admins, _ = self.get(role='admin')
+        self.assertEqual([user['email'] for user in admins['users']], ['root@example.com'])
+
+    def test_invalid_sort_is_rejected(self):
+        request = APIRequestFactory().get('/', {'sort': 'password'})
+        force_authenticate(request, user=self.admin)
+        self.assertEqual(UserManagementAPIView.as_view()(request).status_code, 400)
@@ -1,7 +1,8 @@
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Count, Sum, Avg
+from django.db.models import Count, Q, Sum, Avg
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
 from drf_yasg.utils import swagger_auto_schema
@@ -9,9 +10,19 @@ from drf_yasg import openapi
 
 from .models import User
 from .permissions import IsAdmin
+from core.pagination import KeysetPaginator
+from dashboard.aggregates import count_if
 from subscriptions.models import Subscription
 from calls.models import CallSession
 
+# ?sort= values and the (non-null, indexed) User columns they order by
+SORT_FIELDS = {
+    'joinedAt': 'date_joined',
+    'email': 'email',
+    'totalCalls': 'call_count',
+    'minutesUsed': 'call_seconds',
+}
+
 
 class UserManagementAPIView(APIView):
     """
@@ -24,6 +35,16 @@ class UserManagementAPIView(APIView):
         tags=['Admin - User Management'],
         operation_summary="Get All Users with Statistics",
         operation_description="Get comprehensive user data with statistics for admin dashboard",
+        manual_parameters=[
+            openapi.Parameter('search', openapi.IN_QUERY, description="Match email or name", type=openapi.TYPE_STRING),
+            openapi.Parameter('role', openapi.IN_QUERY, description="Filter by role", type=openapi.TYPE_STRING),
+            openapi.Parameter('status', openapi.IN_QUERY, description="active or banned", type=openapi.TYPE_STRING),
+            openapi.Parameter('sort', openapi.IN_QUERY, description="joinedAt, email, totalCalls or minutesUsed", type=openapi.TYPE_STRING),
+            openapi.Parameter('order', openapi.IN_QUERY, description="asc or desc (default)", type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Users per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) count of matching users", type=openapi.TYPE_BOOLEAN),
+        ],
         responses={
             200: openapi.Response(
                 description="Users data with statistics",
@@ -53,6 +74,7 @@ class UserManagementAPIView(APIView):
                                 }
                             )
                         ),
+                        'pagination': openapi.Schema(type=openapi.TYPE_OBJECT),
                         'totalUsers': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'activeUsers': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'bannedUsers': openapi.Schema(type=openapi.TYPE_INTEGER),
@@ -71,19 +93,41 @@ class UserManagementAPIView(APIView):
         }
     )
     def get(self, request):
-        """Get all users with comprehensive statistics"""
+        """Get one page of users with statistics, aggregated in the database"""
+        params = request.query_params
         
-        # Get all users with related data
-        users = User.objects.select_related(
-            'subscription'
-        ).prefetch_related(
-            'calls'
-        ).all()
+        sort = params.get('sort', 'joinedAt')
+        if sort not in SORT_FIELDS:
+            return Response({
+                'success': False,
+                'error': f"Invalid sort. Use: {', '.join(SORT_FIELDS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        prefix = '' if params.get('order') == 'asc' else '-'
         
-        user_data = []
-        total_calls = 0
-        total_minutes = 0
+        # Page is a plain seek on User columns; usage sorts use the denormalized call counters
+        users = User.objects.select_related('subscription__plan')
+        
+        # Server-side filters
+        search = params.get('search', '').strip()
+        if search:
+            users = users.filter(
+                Q(email__icontains=search) | Q(first_name__icontains=search) | Q(last_name__icontains=search)
+            )
+        if params.get('role'):
+            users = users.filter(role=params['role'])
+        if params.get('status') in ('active', 'banned'):
+            users = users.filter(is_active=params['status'] == 'active')
+        
+        users, pagination = KeysetPaginator((f'{prefix}{SORT_FIELDS[sort]}', f'{prefix}id')).paginate(users, request)
         
+        # Exact call stats, aggregated only over this page's users - no CallSession row ever reaches Python
+        call_stats = {
+            row['user_id']: row for row in CallSession.objects.filter(user__in=[user.id for user in users])
+            .values('user_id').annotate(total_calls=Count('pk'), seconds_used=Coalesce(Sum('duration'), 0)).order_by()
+        }
+        
+        now = timezone.now()
+        user_data = []
         for user in users:
             # Get user's active subscription
             active_subscription = getattr(user, 'subscription', None)
@@ -94,21 +138,14 @@ class UserManagementAPIView(APIView):
             if active_subscription:
                 if active_subscription.status == 'cancelled':
                     billing_status = 'cancelled'
-                elif active_subscription.current_period_end and active_subscription.current_period_end < timezone.now():
+                elif active_subscription.current_period_end and active_subscription.current_period_end < now:
                     billing_status = 'overdue'
             else:
                 billing_status = 'cancelled'
             
-            # Get call statistics
-            user_calls = user.calls.all()
-            user_total_calls = user_calls.count()
-            user_minutes_used = sum((call.duration or 0) // 60 for call in user_calls)  # Convert seconds to minutes
-            
-            total_calls += user_total_calls
-            total_minutes += user_minutes_used
-            
             # Determine user status
             user_status = 'active' if user.is_active else 'banned'
+            stats = call_stats.get(user.id, {'total_calls': 0, 'seconds_used': 0})
             
             user_info = {
                 'id': str(user.id),
@@ -120,39 +157,37 @@ class UserManagementAPIView(APIView):
                 'company': getattr(user, 'company', None),  # Add if company field exists
                 'joinedAt': user.date_joined.isoformat(),
                 'lastLoginAt': user.last_login.isoformat() if user.last_login else None,
-                'totalCalls': user_total_calls,
-                'minutesUsed': user_minutes_used,
+                'totalCalls': stats['total_calls'],
+                'minutesUsed': stats['seconds_used'] // 60,
                 'currentPlan': current_plan,
                 'billingStatus': billing_status,
                 'avatar': user.avatar.url if user.avatar else None,
             }
             user_data.append(user_info)
         
-        # Calculate statistics
-        total_users = users.count()
-        active_users = users.filter(is_active=True).count()
-        banned_users = users.filter(is_active=False).count()
-        
-        # New users this month
-        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        new_users_this_month = users.filter(date_joined__gte=current_month_start).count()
-        
-        # Calculate total revenue (from active subscriptions)
-        active_subscriptions = Subscription.objects.filter(status='active').select_related('plan')
-        total_revenue = sum(float(sub.plan.price) for sub in active_subscriptions)
+        # Headline statistics over all users, one aggregate query each
+        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        counts = User.objects.aggregate(
+            total=Count('pk'),
+            active=count_if(is_active=True),
+            new_this_month=count_if(date_joined__gte=current_month_start)
+        )
+        total_calls = CallSession.objects.count()
+        total_revenue = Subscription.objects.filter(status='active').aggregate(total=Sum('plan__price'))['total'] or 0
         
         # Average calls per user
-        avg_calls_per_user = total_calls / total_users if total_users > 0 else 0
+        avg_calls_per_user = total_calls / counts['total'] if counts['total'] > 0 else 0
         
         response_data = {
             'success': True,
             'users': user_data,
-            'totalUsers': total_users,
-            'activeUsers': active_users,
-            'bannedUsers': banned_users,
+            'pagination': pagination,
+            'totalUsers': counts['total'],
+            'activeUsers': counts['active'],
+            'bannedUsers': counts['total'] - counts['active'],
             'stats': {
-                'newUsersThisMonth': new_users_this_month,
-                'totalRevenue': total_revenue,
+                'newUsersThisMonth': counts['new_this_month'],
+                'totalRevenue': float(total_revenue),
                 'avgCallsPerUser': round(avg_calls_per_user, 2),
             }
         }
@@ -159,8 +159,8 @@ if customer_profile.interest_level == "warm":
 
 # Objection aane par best response use karta hai
 if customer_says("I'm not interested"):
-    best_response = agent.conversation_memory['automatic_learning']['objection_database']['not_interested']['best_response']
-    agent_responds(best_response['response'])  # 75% success rate wala response
+    objection = AgentMemoryAggregate.objects.get(ai_agent=agent, kind='objection', key='not_interested')
+    agent_responds(objection.best_response)  # Sabse effective response
 
 # 6. CONTINUOUS IMPROVEMENT CYCLE
 """
@@ -0,0 +1,221 @@
+from django.conf import settings
+from django.db.models import CharField, Count, F, FloatField, Func, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Trim
+from rest_framework.exceptions import ValidationError
+from typing import Any, Dict, List, Tuple
+
+from core.pagination import KeysetPaginator
+from dashboard.aggregates import count_if
+from dashboard.response_cache import ADMIN_SCOPE, dashboard_cache
+from .auto_campaign_models import AutoCallCampaign
+from .ai_agent_models import AIAgent
+from .campaign_models import Campaign
+from .models import Agent
+
+HUMAN, AI = 'Human Agent', 'AI Agent'
+AI_DEPARTMENT = 'AI Operations'
+ACTIVE_STATUSES = ['available', 'on_call', 'active']
+PAUSED_STATUSES = ['offline', 'paused', 'break']
+
+# ?type= values and the agent type they select (None = both)
+TYPES = {None: None, 'human': HUMAN, HUMAN: HUMAN, 'ai': AI, AI: AI}
+
+# Columns shared by both branches of the UNION, in SELECT order
+COLUMNS = [
+    'agent_id', 'agent_type', 'display_name', 'agent_email', 'agent_status', 'agent_department',
+    'calls', 'successful', 'satisfaction', 'avg_duration', 'active_since', 'active_campaigns',
+]
+
+# ?sort= values and their keyset ordering (agent_id breaks ties)
+SORTS = {
+    'name': ('display_name', 'agent_id'),
+    'calls': ('-calls', '-agent_id'),
+    'recent': ('-active_since', '-agent_id'),
+}
+
+
+def _count(queryset) -> Coalesce:
+    """Correlated COUNT(*) subquery, 0 when nothing matches"""
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(n=Func(F('pk'), function='COUNT')).values('n')[:1]),
+        0, output_field=IntegerField()
+    )
+
+
+class AgentDirectory:
+    """
+    Human aur AI agents ki ek unified list
+    One UNION ALL query per page; summary and facets are SQL aggregates, cached per tenant
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.is_admin = user.role == 'admin'
+
+    def _humans(self):
+        return Agent.objects.all() if self.is_admin else Agent.objects.filter(user=self.user)
+
+    def _ais(self):
+        return AIAgent.objects.all() if self.is_admin else AIAgent.objects.filter(client=self.user)
+
+    def human_agents(self):
+        return self._humans().annotate(
+            agent_id=F('id'),
+            agent_type=Value(HUMAN, output_field=CharField()),
+            display_name=Trim(Concat('user__first_name', Value(' '), 'user__last_name', output_field=CharField())),
+            agent_email=F('user__email'),
+            agent_status=F('status'),
+            agent_department=F('department'),
+            calls=F('total_calls'),
+            successful=F('successful_calls'),
+            satisfaction=F('customer_satisfaction'),
+            avg_duration=F('average_call_duration'),
+            active_since=F('last_activity'),
+            active_campaigns=_count(Campaign.objects.filter(assigned_agent_human=OuterRef('pk'), status='active')),
+        )
+
+    def ai_agents(self):
+        return self._ais().annotate(
+            agent_id=F('id'),
+            agent_type=Value(AI, output_field=CharField()),
+            display_name=F('name'),
+            agent_email=F('client__email'),
+            agent_status=F('status'),
+            agent_department=Value(AI_DEPARTMENT, output_field=CharField()),
+            calls=F('calls_handled'),
+            successful=F('successful_conversions'),
+            # AI agents don't have satisfaction / duration tracking yet
+            satisfaction=Value(0.0, output_field=FloatField()),
+            avg_duration=Value(0.0, output_field=FloatField()),
+            active_since=F('updated_at'),
+            active_campaigns=_count(Campaign.objects.filter(assigned_agent_ai=OuterRef('pk'), status='active'))
+            + _count(AutoCallCampaign.objects.filter(ai_agent=OuterRef('pk'), status='active')),
+        )
+
+    def page(self, request) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Filtered, sorted page of the directory plus its pagination block"""
+        params = request.query_params
+        agent_type = params.get('type') or None
+        if agent_type not in TYPES:
+            raise ValidationError({'type': f"Must be one of: {', '.join(name for name in TYPES if name)}"})
+        branches = []
+        if TYPES[agent_type] in (None, HUMAN):
+            branches.append(self.human_agents())
+        if TYPES[agent_type] in (None, AI):
+            branches.append(self.ai_agents())
+
+        filters = Q()
+        if params.get('status'):
+            filters &= Q(agent_status=params['status'])
+        if params.get('department'):
+            filters &= Q(agent_department=params['department'])
+        if params.get('search'):
+            filters &= Q(display_name__icontains=params['search']) | Q(agent_email__icontains=params['search'])
+        branches = [branch.filter(filters).values(*COLUMNS) for branch in branches]
+
+        paginator = KeysetPaginator(SORTS.get(params.get('sort'), SORTS['name']))
+        rows, pagination = paginator.paginate_union(branches, request)
+        return self._hydrate(rows), pagination
+
+    def _hydrate(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Type specific fields for just this page - one small query per agent type"""
+        human_ids = [row['agent_id'] for row in rows if row['agent_type'] == HUMAN]
+        ai_ids = [row['agent_id'] for row in rows if row['agent_type'] == AI]
+        humans = {
+            agent['id']: agent for agent in Agent.objects.filter(id__in=human_ids).values(
+                'id', 'employee_id', 'team', 'skill_level', 'languages', 'specializations'
+            )
+        } if human_ids else {}
+        ais = {
+            agent['id']: agent for agent in AIAgent.objects.filter(id__in=ai_ids).values(
+                'id', 'training_level', 'personality_type', 'voice_model'
+            )
+        } if ai_ids else {}
+
+        agents = []
+        for row in rows:
+            agent_data = {
+                'id': str(row['agent_id']),
+                'name': row['display_name'],
+                'email': row['agent_email'],
+                'type': row['agent_type'],
+                'status': row['agent_status'],
+                'department': row['agent_department'],
+                'total_calls': row['calls'],
+                'successful_calls': row['successful'],
+                'average_call_duration': row['avg_duration'],
+                'customer_satisfaction': row['satisfaction'],
+                'last_activity': row['active_since'].isoformat() if row['active_since'] else None,
+                'calls_handled': row['calls'],
+                'active_campaigns': row['active_campaigns'],
+                'can_edit': True,
+            }
+            if row['agent_type'] == HUMAN:
+                detail = humans.get(row['agent_id'], {})
+                agent_data.update({
+                    'employee_id': detail.get('employee_id'),
+                    'team': detail.get('team'),
+                    'skill_level': detail.get('skill_level'),
+                    'languages': detail.get('languages'),
+                    'specializations': detail.get('specializations'),
+                    'can_delete': row['agent_status'] != 'on_call',
+                })
+            else:
+                detail = ais.get(row['agent_id'], {})
+                agent_data.update({
+                    'employee_id': f"AI-{str(row['agent_id'])[:8]}",
+                    'team': 'AI Team',
+                    'skill_level': 'advanced' if detail.get('training_level', 0) > 80 else 'intermediate',
+                    'languages': ['en'],  # Default for AI
+                    'specializations': [detail.get('personality_type')],
+                    'can_delete': row['agent_status'] != 'active',
+                    'training_level': detail.get('training_level'),
+                    'personality_type': detail.get('personality_type'),
+                    'voice_model': detail.get('voice_model'),
+                })
+            agents.append(agent_data)
+        return agents
+
+    def facets(self) -> Dict[str, Any]:
+        """Summary stats and filter options for the tenant, cached for AGENT_DIRECTORY_FACET_TTL seconds"""
+        scope = ADMIN_SCOPE if self.is_admin else str(self.user.pk)
+        value, _ = dashboard_cache.get_or_compute(
+            'agent_directory_facets', scope, '', settings.AGENT_DIRECTORY_FACET_TTL, self._compute_facets
+        )
+        return value
+
+    def _compute_facets(self) -> Dict[str, Any]:
+        humans = self._humans().aggregate(
+            total=Count('pk'), active=count_if(status__in=ACTIVE_STATUSES), paused=count_if(status__in=PAUSED_STATUSES),
+            calls=Sum('total_calls'), satisfaction=Sum('customer_satisfaction')
+        )
+        ais = self._ais().aggregate(
+            total=Count('pk'), active=count_if(status__in=ACTIVE_STATUSES), paused=count_if(status__in=PAUSED_STATUSES),
+            calls=Sum('calls_handled')
+        )
+        departments = list(
+            self._humans().exclude(department='').order_by('department')
+            .values_list('department', flat=True).distinct()
+        )
+        if ais['total']:
+            departments.append(AI_DEPARTMENT)
+
+        total_agents = humans['total'] + ais['total']
+        total_calls = (humans['calls'] or 0) + (ais['calls'] or 0)
+        return {
+            'summary': {
+                'total_agents': total_agents,
+                'active_agents': humans['active'] + ais['active'],
+                'paused_agents': humans['paused'] + ais['paused'],
+                'human_agents': humans['total'],
+                'ai_agents': ais['total'],
+                'avg_calls_per_agent': total_calls / total_agents if total_agents > 0 else 0,
+                'avg_customer_satisfaction': (humans['satisfaction'] or 0) / total_agents if total_agents > 0 else 0
+            },
+            'filters': {
+                'status_options': ['available', 'busy', 'on_call', 'break', 'offline', 'training', 'active', 'paused'],
+                'type_options': [HUMAN, AI],
+                'skill_levels': ['beginner', 'intermediate', 'advanced', 'expert'],
+                'departments': departments
+            }
+        }
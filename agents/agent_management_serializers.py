@@ -86,12 +86,12 @@ class ContactUploadSerializer(serializers.Serializer):
     contacts_file = serializers.FileField()
     
     def validate_contacts_file(self, value):
-        if not value.name.endswith('.csv'):
-            raise serializers.ValidationError("Only CSV files are supported")
+        if not value.name.lower().endswith(('.csv', '.xlsx')):
+            raise serializers.ValidationError("Only CSV and XLSX files are supported")
         
-        # Check file size (max 10MB)
-        if value.size > 10 * 1024 * 1024:
-            raise serializers.ValidationError("File size must be less than 10MB")
+        # Check file size (max 50MB)
+        if value.size > 50 * 1024 * 1024:
+            raise serializers.ValidationError("File size must be less than 50MB")
         
         return value
 
@@ -19,6 +19,7 @@ urlpatterns = [
     
     # Campaign Management URLs
     path('management/contacts/upload/', agent_management_views.upload_contacts, name='upload-contacts'),
+    path('management/contacts/imports/<uuid:import_id>/', agent_management_views.contact_import_status, name='contact-import-status'),
     path('management/campaigns/', agent_management_views.campaign_list, name='campaign-list'),
     path('management/campaigns/schedule/', agent_management_views.schedule_campaign, name='schedule-campaign'),
     path('management/campaigns/start-ai/', voice_call_integration.start_campaign_with_ai_voice, name='start-ai-campaign'),
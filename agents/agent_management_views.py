@@ -2,18 +2,23 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from datetime import timedelta
-import csv
-import io
 import json
+import logging
+import uuid
 from .models import Agent
+from .agent_directory import AgentDirectory
 from .ai_agent_models import AIAgent, CustomerProfile
 from .campaign_models import Campaign, CampaignContact, BusinessKnowledge
+from .contact_import_models import ContactImport
+from .tasks import import_contacts
 from accounts.models import User
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 @api_view(['GET'])
@@ -21,103 +26,17 @@ User = get_user_model()
 def agent_list_page(request):
     """
     Agent List Page - View all agents configured by the subscriber
+    Paginated & filterable (type, status, department, search, sort); summary/filters are cached facets
     """
-    user = request.user
-    
-    # Get all agents for the current user/organization
-    if user.role == 'admin':
-        # Admin can see all agents
-        agents = Agent.objects.select_related('user').all()
-        ai_agents = AIAgent.objects.select_related('client').all()
-    else:
-        # Users can only see their own agents
-        agents = Agent.objects.filter(user=user).select_related('user')
-        ai_agents = AIAgent.objects.filter(client=user).select_related('client')
-    
-    # Format human agents data
-    human_agents_data = []
-    for agent in agents:
-        agent_data = {
-            'id': str(agent.id),
-            'name': agent.user.get_full_name(),
-            'email': agent.user.email,
-            'employee_id': agent.employee_id,
-            'type': 'Human Agent',
-            'status': agent.status,
-            'department': agent.department,
-            'team': agent.team,
-            'skill_level': agent.skill_level,
-            'languages': agent.languages,
-            'specializations': agent.specializations,
-            'total_calls': agent.total_calls,
-            'successful_calls': agent.successful_calls,
-            'average_call_duration': agent.average_call_duration,
-            'customer_satisfaction': agent.customer_satisfaction,
-            'last_activity': agent.last_activity.isoformat() if agent.last_activity else None,
-            'calls_handled': agent.total_calls,
-            'active_campaigns': 0,  # Will be calculated later
-            'can_edit': True,
-            'can_delete': agent.status != 'on_call',
-        }
-        human_agents_data.append(agent_data)
-    
-    # Format AI agents data
-    ai_agents_data = []
-    for ai_agent in ai_agents:
-        agent_data = {
-            'id': str(ai_agent.id),
-            'name': ai_agent.name,
-            'email': ai_agent.client.email,
-            'employee_id': f'AI-{str(ai_agent.id)[:8]}',
-            'type': 'AI Agent',
-            'status': ai_agent.status,
-            'department': 'AI Operations',
-            'team': 'AI Team',
-            'skill_level': 'advanced' if ai_agent.training_level > 80 else 'intermediate',
-            'languages': ['en'],  # Default for AI
-            'specializations': [ai_agent.personality_type],
-            'total_calls': ai_agent.calls_handled,
-            'successful_calls': ai_agent.successful_conversions,
-            'average_call_duration': 0,  # AI agents don't have duration tracking yet
-            'customer_satisfaction': 0,  # Will be calculated from feedback
-            'last_activity': timezone.now().isoformat(),
-            'calls_handled': ai_agent.calls_handled,
-            'active_campaigns': 0,  # Will be calculated later
-            'can_edit': True,
-            'can_delete': ai_agent.status != 'active',
-            'training_level': ai_agent.training_level,
-            'personality_type': ai_agent.personality_type,
-            'voice_model': ai_agent.voice_model,
-        }
-        ai_agents_data.append(agent_data)
-    
-    # Combine all agents
-    all_agents = human_agents_data + ai_agents_data
-    
-    # Calculate summary statistics
-    total_agents = len(all_agents)
-    active_agents = len([a for a in all_agents if a['status'] in ['available', 'on_call', 'active']])
-    paused_agents = len([a for a in all_agents if a['status'] in ['offline', 'paused', 'break']])
-    human_agents_count = len(human_agents_data)
-    ai_agents_count = len(ai_agents_data)
+    directory = AgentDirectory(request.user)
+    agents, pagination = directory.page(request)
+    facets = directory.facets()
     
     return Response({
-        'agents': all_agents,
-        'summary': {
-            'total_agents': total_agents,
-            'active_agents': active_agents,
-            'paused_agents': paused_agents,
-            'human_agents': human_agents_count,
-            'ai_agents': ai_agents_count,
-            'avg_calls_per_agent': sum([a['total_calls'] for a in all_agents]) / total_agents if total_agents > 0 else 0,
-            'avg_customer_satisfaction': sum([a['customer_satisfaction'] for a in all_agents]) / total_agents if total_agents > 0 else 0
-        },
-        'filters': {
-            'status_options': ['available', 'busy', 'on_call', 'break', 'offline', 'training', 'active', 'paused'],
-            'type_options': ['Human Agent', 'AI Agent'],
-            'skill_levels': ['beginner', 'intermediate', 'advanced', 'expert'],
-            'departments': list(set([a.get('department', '') for a in all_agents if a.get('department')]))
-        }
+        'agents': agents,
+        'pagination': pagination,
+        'summary': facets['summary'],
+        'filters': facets['filters']
     }, status=status.HTTP_200_OK)
 
 
@@ -394,7 +313,8 @@ def agent_settings(request, agent_id):
 @permission_classes([permissions.IsAuthenticated])
 def upload_contacts(request):
     """
-    Upload contacts file (CSV) for outbound campaigns
+    Upload contacts file (CSV or XLSX) for outbound campaigns
+    The file is imported in the background - poll the returned status URL for progress
     """
     user = request.user
     
@@ -402,91 +322,82 @@ def upload_contacts(request):
         return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
     
     file = request.FILES['contacts_file']
+    file_type = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
     
-    if not file.name.endswith('.csv'):
-        return Response({'error': 'Only CSV files are supported'}, status=status.HTTP_400_BAD_REQUEST)
+    if file_type not in ('csv', 'xlsx'):
+        return Response({'error': 'Only CSV and XLSX files are supported'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Read CSV file
-        file_data = file.read().decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(file_data))
+        # Get user's AI agent (create one if doesn't exist)
+        ai_agent, created = AIAgent.objects.get_or_create(
+            client=user,
+            defaults={
+                'name': f'{user.first_name}\'s AI Agent',
+                'personality_type': 'friendly',
+                'status': 'training'
+            }
+        )
         
-        contacts_created = 0
-        contacts_updated = 0
-        errors = []
+        # Stream the upload to storage so the worker can read it in chunks
+        file_path = default_storage.save(f'contact_imports/{uuid.uuid4()}/{file.name}', file)
+        contact_import = ContactImport.objects.create(
+            user=user,
+            ai_agent=ai_agent,
+            file_name=file.name,
+            file_path=file_path,
+            file_type=file_type
+        )
         
-        for row_num, row in enumerate(csv_reader, start=1):
-            try:
-                # Expected columns: Name, Phone, Email, Notes, Preferred Time
-                name = row.get('Name', '').strip()
-                phone = row.get('Phone', '').strip()
-                email = row.get('Email', '').strip()
-                notes = row.get('Notes', '').strip()
-                preferred_time = row.get('Preferred Time', '').strip()
-                
-                if not name or not phone:
-                    errors.append(f'Row {row_num}: Name and Phone are required')
-                    continue
-                
-                # Check if contact already exists
-                existing_contact = CustomerProfile.objects.filter(
-                    phone_number=phone,
-                    ai_agent__client=user
-                ).first()
-                
-                if existing_contact:
-                    # Update existing contact
-                    existing_contact.name = name
-                    existing_contact.email = email or existing_contact.email
-                    existing_contact.notes = notes or existing_contact.notes
-                    if preferred_time:
-                        existing_contact.contact_preferences['preferred_time'] = preferred_time
-                    existing_contact.save()
-                    contacts_updated += 1
-                else:
-                    # Create new contact
-                    # Get user's AI agent (create one if doesn't exist)
-                    ai_agent, created = AIAgent.objects.get_or_create(
-                        client=user,
-                        defaults={
-                            'name': f'{user.first_name}\'s AI Agent',
-                            'personality_type': 'friendly',
-                            'status': 'training'
-                        }
-                    )
-                    
-                    CustomerProfile.objects.create(
-                        ai_agent=ai_agent,
-                        name=name,
-                        phone_number=phone,
-                        email=email,
-                        notes=notes,
-                        lead_status='cold',
-                        contact_preferences={
-                            'preferred_time': preferred_time,
-                            'uploaded_at': timezone.now().isoformat()
-                        }
-                    )
-                    contacts_created += 1
-                    
-            except Exception as e:
-                errors.append(f'Row {row_num}: {str(e)}')
+        try:
+            import_contacts.delay(str(contact_import.id))
+        except Exception as e:
+            # No broker available (local development) - import inline instead
+            logger.warning(f"Celery unavailable, importing contacts inline: {str(e)}")
+            import_contacts(str(contact_import.id))
+            contact_import.refresh_from_db()
         
         return Response({
-            'message': 'Contacts upload completed',
-            'summary': {
-                'contacts_created': contacts_created,
-                'contacts_updated': contacts_updated,
-                'total_processed': contacts_created + contacts_updated,
-                'errors_count': len(errors)
-            },
-            'errors': errors[:10]  # Show only first 10 errors
-        }, status=status.HTTP_200_OK)
+            'message': 'Contacts upload queued for import',
+            'import_id': str(contact_import.id),
+            'status': contact_import.status,
+            'status_url': f'/api/agents/management/contacts/imports/{contact_import.id}/'
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response({'error': f'File processing error: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def contact_import_status(request, import_id):
+    """
+    Progress and results of a contacts upload
+    """
+    try:
+        contact_import = ContactImport.objects.get(id=import_id, user=request.user)
+    except ContactImport.DoesNotExist:
+        return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'import_id': str(contact_import.id),
+        'file_name': contact_import.file_name,
+        'status': contact_import.status,
+        'progress_percentage': contact_import.progress_percentage,
+        'summary': {
+            'total_rows': contact_import.total_rows,
+            'processed_rows': contact_import.processed_rows,
+            'contacts_created': contact_import.contacts_created,
+            'contacts_updated': contact_import.contacts_updated,
+            'total_processed': contact_import.contacts_created + contact_import.contacts_updated,
+            'duplicates_skipped': contact_import.duplicates_skipped,
+            'errors_count': contact_import.invalid_rows
+        },
+        'errors': contact_import.errors[:10],  # Show only first 10 errors
+        'started_at': contact_import.started_at.isoformat() if contact_import.started_at else None,
+        'completed_at': contact_import.completed_at.isoformat() if contact_import.completed_at else None
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def schedule_campaign(request):
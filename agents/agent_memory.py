@@ -0,0 +1,402 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .ai_agent_models import AIAgent, CallSession
+from .agent_memory_models import (
+    AgentMemoryAggregate,
+    ObjectionResponse,
+    QuestionResponsePair,
+    SentimentTrigger,
+    SuccessfulPattern,
+)
+
+logger = logging.getLogger(__name__)
+
+# conversation_memory key holding the compact learning summary
+SUMMARY_KEY = 'learning_summary'
+
+# Blob keys written before the learning store existed (see migrate_agent_memory)
+LEGACY_MEMORY_KEYS = [
+    'automatic_learning',
+    'real_time_objections',
+    'successful_patterns',
+    'conversation_patterns',
+    'sentiment_learning',
+    'proven_techniques',
+    'focus_areas',
+    'objection_patterns',
+    'successful_techniques',
+    'emotional_patterns',
+    'learning_metrics',
+]
+
+CONVERTED_OUTCOMES = ['interested', 'converted', 'callback_requested']
+
+
+def memory_key(text: str) -> str:
+    """Same key shape the old JSON blob used, e.g. "Too expensive" -> "too_expensive" """
+    return (text or '').lower().replace(' ', '_')[:50]
+
+
+def prune_to_top(queryset, keep: int, *ordering):
+    """
+    Keep the first `keep` rows of queryset by ordering, delete the rest in one statement
+    Retention DB mein enforce hoti hai - Python mein list sort/slice nahi
+    """
+    keep_ids = queryset.order_by(*ordering).values('pk')[:keep]
+    return queryset.exclude(pk__in=Subquery(keep_ids)).delete()[0]
+
+
+def _pk(instance):
+    return instance.pk if instance is not None else None
+
+
+# Event builders - plain JSON so events can wait in the learning buffer
+
+def objection_event(text: str, response: str = '', effectiveness: Optional[float] = None,
+                    reaction: str = '', call_session_id=None) -> Dict[str, Any]:
+    return {
+        'type': 'objection', 'text': text or '', 'response': response or '', 'effectiveness': effectiveness,
+        'reaction': reaction or '', 'call_session_id': _str(call_session_id)
+    }
+
+
+def pattern_event(source: str, approach: str, effectiveness: float, call_session_id=None,
+                  unique: bool = False, **fields) -> Dict[str, Any]:
+    return {
+        'type': 'pattern', 'source': source, 'approach': approach or '', 'effectiveness': effectiveness,
+        'unique': unique, 'fields': fields, 'call_session_id': _str(call_session_id)
+    }
+
+
+def sentiment_event(previous: str, current: str, trigger: str, score: float, call_session_id=None) -> Dict[str, Any]:
+    return {
+        'type': 'sentiment', 'previous': previous or '', 'current': current or '', 'trigger': trigger or '',
+        'score': score or 0, 'call_session_id': _str(call_session_id)
+    }
+
+
+def question_event(question: str, response: str, effectiveness: float, call_session_id=None) -> Dict[str, Any]:
+    return {
+        'type': 'question', 'question': question or '', 'response': response or '',
+        'effectiveness': effectiveness, 'call_session_id': _str(call_session_id)
+    }
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+class AgentMemory:
+    """
+    Normalized learning store for one AI agent
+    Events append-only tables mein, per-key aggregates F() se incrementally update hote hain,
+    aur conversation_memory['learning_summary'] sirf ek chhota snapshot hai
+    """
+
+    def __init__(self, agent: AIAgent):
+        self.agent = agent
+
+    # Events
+
+    def record_objection(self, objection_text: str, response: str = '', effectiveness: Optional[float] = None,
+                         customer_reaction: str = '', call_session: Optional[CallSession] = None):
+        """Objection seen on a call, optionally with the agent's scored response"""
+        self.fold([objection_event(objection_text, response, effectiveness, customer_reaction, _pk(call_session))])
+
+    def record_successful_pattern(self, source: str, approach: str, effectiveness: float,
+                                  call_session: Optional[CallSession] = None, unique: bool = False, **fields):
+        """Approach that worked; unique=True skips approaches already in the top-K"""
+        self.fold([pattern_event(source, approach, effectiveness, _pk(call_session), unique, **fields)])
+
+    def record_sentiment_change(self, previous: str, current: str, trigger: str, score_change: float,
+                                call_session: Optional[CallSession] = None):
+        """Positive triggers keep the strongest K, negative triggers the most recent K"""
+        self.fold([sentiment_event(previous, current, trigger, score_change, _pk(call_session))])
+
+    def record_question_response(self, question: str, customer_response: str, effectiveness: float,
+                                 call_session: Optional[CallSession] = None):
+        self.fold([question_event(question, customer_response, effectiveness, _pk(call_session))])
+
+    def fold(self, events: List[Dict[str, Any]]):
+        """
+        Apply a batch of learning events (see *_event builders)
+        Ek batch = har table mein ek bulk INSERT, har key ka ek aggregate UPDATE, har retention ka ek DELETE
+        """
+        by_type = {}
+        for event in events:
+            by_type.setdefault(event['type'], []).append(event)
+
+        self._fold_objections(by_type.get('objection', []))
+        self._fold_patterns(by_type.get('pattern', []))
+        self._fold_sentiments(by_type.get('sentiment', []))
+        self._fold_questions(by_type.get('question', []))
+
+    def record_emotional_state(self, state: str, converted: bool):
+        if state:
+            self._bump('emotional_state', memory_key(state), label=state, conversions=1 if converted else 0)
+
+    def record_focus_area(self, area_type: str, suggestion: str = ''):
+        self._bump('focus_area', memory_key(area_type or 'general'), label=suggestion or None)
+
+    def record_failure(self, reason: str):
+        self._bump('failure', memory_key(reason), label=reason)
+
+    def record_satisfaction(self, score: float):
+        self._bump('satisfaction', 'calls', scores=[score])
+
+    def record_learning_session(self, performance_score: float):
+        self._bump('learning_session', 'dynamic', scores=[performance_score])
+
+    # Summary
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact learning snapshot, built on first use"""
+        cached = (self.agent.conversation_memory or {}).get(SUMMARY_KEY)
+        if cached is not None:
+            return cached
+        return self.refresh_summary()
+
+    def refresh_summary(self) -> Dict[str, Any]:
+        """Rebuild the snapshot from the store - call once per learning request, not per event"""
+        summary = self.build_summary()
+        self.update_memory({SUMMARY_KEY: summary})
+        return summary
+
+    def build_summary(self) -> Dict[str, Any]:
+        aggregates = {}
+        for row in AgentMemoryAggregate.objects.filter(ai_agent=self.agent).order_by('-frequency', '-last_seen_at'):
+            aggregates.setdefault(row.kind, []).append(row)
+
+        patterns = list(
+            SuccessfulPattern.objects.filter(ai_agent=self.agent)
+            .order_by('-effectiveness', '-created_at')
+            .values('approach', 'effectiveness', 'customer_interest_level', 'duration_seconds', 'source')
+        )
+        best_by_interest = {}
+        for pattern in patterns:
+            level = pattern['customer_interest_level']
+            if level and level not in best_by_interest:
+                best_by_interest[level] = pattern['approach']
+
+        positive = SentimentTrigger.objects.filter(ai_agent=self.agent, polarity='positive').order_by('-score_change')[:3]
+        negative = SentimentTrigger.objects.filter(ai_agent=self.agent, polarity='negative').order_by('-created_at')[:3]
+
+        recent_outcomes = list(
+            CallSession.objects.filter(ai_agent=self.agent).order_by('-initiated_at').values_list('outcome', flat=True)[:10]
+        )
+
+        satisfaction = next(iter(aggregates.get('satisfaction', [])), None)
+        sessions = next(iter(aggregates.get('learning_session', [])), None)
+        failures = sorted(aggregates.get('failure', []), key=lambda row: row.last_seen_at, reverse=True)
+
+        return {
+            'top_objections': [
+                {
+                    'key': row.key,
+                    'objection_text': row.label,
+                    'frequency': row.frequency,
+                    'avg_effectiveness': round(row.avg_score, 2),
+                    'best_response': row.best_response or None,
+                    'best_effectiveness': row.best_score,
+                }
+                for row in aggregates.get('objection', [])[:5]
+            ],
+            'best_patterns': patterns[:5],
+            'best_pattern_by_interest': best_by_interest,
+            'pattern_count': len(patterns),
+            'positive_triggers': [{'trigger': t.trigger, 'score_change': t.score_change} for t in positive],
+            'negative_triggers': [{'trigger': t.trigger, 'score_change': t.score_change} for t in negative],
+            'emotional_states': {
+                row.label: {'count': row.frequency, 'conversion_rate': round(row.conversion_rate, 4)}
+                for row in aggregates.get('emotional_state', [])
+            },
+            'focus_areas': {
+                row.key: {'count': row.frequency, 'latest_suggestion': row.label}
+                for row in aggregates.get('focus_area', [])
+            },
+            'failures': {
+                'count': sum(row.frequency for row in failures),
+                'latest': failures[0].label if failures else None,
+            },
+            'satisfaction': {
+                'count': satisfaction.scored if satisfaction else 0,
+                'average': round(satisfaction.avg_score, 2) if satisfaction else None,
+            },
+            'learning_sessions': {
+                'count': sessions.frequency if sessions else 0,
+                'improvement_score': round(sessions.avg_score, 2) if sessions else 0,
+            },
+            'recent_conversions': [outcome in CONVERTED_OUTCOMES for outcome in recent_outcomes],
+            'updated_at': timezone.now().isoformat(),
+        }
+
+    def update_memory(self, values: Dict[str, Any], remove: Iterable[str] = ()):
+        """
+        Merge keys into conversation_memory under a row lock
+        Baaki keys (business_knowledge, twilio_settings, ...) jaisi thi waisi rehti hain
+        """
+        with transaction.atomic():
+            memory = (
+                AIAgent.objects.select_for_update()
+                .values_list('conversation_memory', flat=True)
+                .get(pk=self.agent.pk)
+            ) or {}
+            for key in remove:
+                memory.pop(key, None)
+            memory.update(values)
+            AIAgent.objects.filter(pk=self.agent.pk).update(conversation_memory=memory)
+        self.agent.conversation_memory = memory
+        return memory
+
+    # Internals
+
+    def _fold_objections(self, events):
+        by_key = {}
+        for event in events:
+            key = memory_key(event['text'])
+            if key:
+                by_key.setdefault(key, []).append(event)
+
+        rows = []
+        for key, items in by_key.items():
+            scored = [item for item in items if item['effectiveness'] is not None]
+            responses = [item for item in scored if item['response']]
+            best = max(responses, key=lambda item: item['effectiveness']) if responses else None
+            self._bump(
+                'objection', key, label=items[-1]['text'], count=len(items),
+                scores=[item['effectiveness'] for item in scored],
+                best=(best['response'], best['effectiveness']) if best else None
+            )
+            rows.extend(
+                ObjectionResponse(
+                    ai_agent=self.agent,
+                    call_session_id=item['call_session_id'],
+                    objection_key=key,
+                    objection_text=item['text'],
+                    response=item['response'],
+                    effectiveness=item['effectiveness'],
+                    customer_reaction=item['reaction']
+                )
+                for item in scored
+            )
+
+        if rows:
+            ObjectionResponse.objects.bulk_create(rows)
+            for key in {row.objection_key for row in rows}:
+                prune_to_top(
+                    ObjectionResponse.objects.filter(ai_agent=self.agent, objection_key=key),
+                    settings.AGENT_MEMORY_OBJECTION_RESPONSES, '-effectiveness', '-created_at'
+                )
+
+    def _fold_patterns(self, events):
+        events = [event for event in events if event['approach']]
+        unique = {event['approach'] for event in events if event['unique']}
+        seen = set(
+            SuccessfulPattern.objects.filter(ai_agent=self.agent, approach__in=unique).values_list('approach', flat=True)
+        ) if unique else set()
+
+        rows = []
+        for event in events:
+            if event['unique']:
+                if event['approach'] in seen:
+                    continue
+                seen.add(event['approach'])
+            rows.append(SuccessfulPattern(
+                ai_agent=self.agent,
+                call_session_id=event['call_session_id'],
+                source=event['source'],
+                approach=event['approach'],
+                effectiveness=event['effectiveness'],
+                **event['fields']
+            ))
+
+        if rows:
+            SuccessfulPattern.objects.bulk_create(rows)
+            prune_to_top(
+                SuccessfulPattern.objects.filter(ai_agent=self.agent),
+                settings.AGENT_MEMORY_SUCCESSFUL_PATTERNS, '-effectiveness', '-created_at'
+            )
+
+    def _fold_sentiments(self, events):
+        rows = [
+            SentimentTrigger(
+                ai_agent=self.agent,
+                call_session_id=event['call_session_id'],
+                polarity='positive' if event['score'] > 0 else 'negative',
+                from_sentiment=event['previous'],
+                to_sentiment=event['current'],
+                trigger=event['trigger'],
+                score_change=event['score']
+            )
+            for event in events if event['score']
+        ]
+        if not rows:
+            return
+
+        SentimentTrigger.objects.bulk_create(rows)
+        for polarity in {row.polarity for row in rows}:
+            ordering = ('-score_change', '-created_at') if polarity == 'positive' else ('-created_at',)
+            prune_to_top(
+                SentimentTrigger.objects.filter(ai_agent=self.agent, polarity=polarity),
+                settings.AGENT_MEMORY_SENTIMENT_TRIGGERS, *ordering
+            )
+
+    def _fold_questions(self, events):
+        if not events:
+            return
+
+        QuestionResponsePair.objects.bulk_create([
+            QuestionResponsePair(
+                ai_agent=self.agent,
+                call_session_id=event['call_session_id'],
+                agent_question=event['question'],
+                customer_response=event['response'],
+                effectiveness=event['effectiveness']
+            )
+            for event in events
+        ])
+        prune_to_top(
+            QuestionResponsePair.objects.filter(ai_agent=self.agent),
+            settings.AGENT_MEMORY_QA_PAIRS, '-created_at'
+        )
+
+    def _bump(self, kind: str, key: str, label: Optional[str] = None, count: int = 1, scores: Iterable[float] = (),
+              conversions: int = 0, best: Optional[Tuple[str, float]] = None):
+        """One UPDATE per key per batch: frequency, running average and conversions computed in SQL"""
+        aggregate = self._aggregate(kind, key, label)
+        scores = list(scores)
+
+        changes = {
+            'frequency': F('frequency') + count,
+            'last_seen_at': timezone.now(),
+        }
+        if label:
+            changes['label'] = label
+        if conversions:
+            changes['conversions'] = F('conversions') + conversions
+        if scores:
+            changes.update({
+                'scored': F('scored') + len(scores),
+                'total_score': F('total_score') + sum(scores),
+                'avg_score': (F('total_score') + sum(scores)) / (F('scored') + float(len(scores))),
+            })
+        AgentMemoryAggregate.objects.filter(pk=aggregate.pk).update(**changes)
+
+        if best is not None:
+            # Conditional update - concurrent batches can't overwrite a better response
+            response, score = best
+            AgentMemoryAggregate.objects.filter(pk=aggregate.pk).filter(
+                Q(best_score__isnull=True) | Q(best_score__lt=score)
+            ).update(best_response=response, best_score=score)
+
+    def _aggregate(self, kind: str, key: str, label: Optional[str]) -> AgentMemoryAggregate:
+        # get_or_create retries the SELECT if another worker wins the INSERT race
+        aggregate, _ = AgentMemoryAggregate.objects.get_or_create(
+            ai_agent=self.agent, kind=kind, key=key, defaults={'label': label or ''}
+        )
+        return aggregate
@@ -0,0 +1,172 @@
+from django.db import models
+import uuid
+
+
+class ObjectionResponse(models.Model):
+    """
+    One agent response to a customer objection (append-only)
+    Har objection key ke top responses hi rakhe jaate hain - baaki prune
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='objection_responses')
+    call_session = models.ForeignKey('CallSession', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    objection_key = models.CharField(max_length=50)
+    objection_text = models.TextField(blank=True)
+    response = models.TextField(blank=True)
+    effectiveness = models.FloatField(default=0)
+    customer_reaction = models.CharField(max_length=50, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'agent_objection_responses'
+        indexes = [
+            models.Index(fields=['ai_agent', 'objection_key', '-effectiveness'], name='objection_resp_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.objection_key} - {self.effectiveness}"
+
+
+class SuccessfulPattern(models.Model):
+    """
+    Approach that worked on a call (append-only, top-K by effectiveness per agent)
+    """
+    SOURCES = [
+        ('real_time', 'Real-time Learning'),
+        ('call_outcome', 'Call Outcome'),
+        ('dynamic', 'Dynamic Learning'),
+        ('post_call', 'Post-call Analysis'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='successful_patterns')
+    call_session = models.ForeignKey('CallSession', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    source = models.CharField(max_length=20, choices=SOURCES)
+    approach = models.TextField()
+    context = models.TextField(blank=True)
+    customer_reaction = models.TextField(blank=True)
+    outcome = models.CharField(max_length=30, blank=True)
+    customer_interest_level = models.CharField(max_length=20, blank=True)
+    duration_seconds = models.IntegerField(default=0)
+    effectiveness = models.FloatField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'agent_successful_patterns'
+        indexes = [
+            models.Index(fields=['ai_agent', '-effectiveness'], name='success_pattern_rank_idx'),
+            models.Index(fields=['ai_agent', 'customer_interest_level', '-effectiveness'], name='success_pattern_interest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.approach[:50]} - {self.effectiveness}"
+
+
+class SentimentTrigger(models.Model):
+    """
+    Agent action that moved customer sentiment (append-only)
+    Positive: top-K by score, negative: most recent K
+    """
+    POLARITIES = [
+        ('positive', 'Positive'),
+        ('negative', 'Negative'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='sentiment_triggers')
+    call_session = models.ForeignKey('CallSession', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    polarity = models.CharField(max_length=10, choices=POLARITIES)
+    from_sentiment = models.CharField(max_length=30, blank=True)
+    to_sentiment = models.CharField(max_length=30, blank=True)
+    trigger = models.TextField(blank=True)
+    score_change = models.FloatField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'agent_sentiment_triggers'
+        indexes = [
+            models.Index(fields=['ai_agent', 'polarity', '-score_change'], name='sentiment_trigger_rank_idx'),
+            models.Index(fields=['ai_agent', 'polarity', '-created_at'], name='sentiment_trigger_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.from_sentiment} -> {self.to_sentiment} ({self.score_change})"
+
+
+class QuestionResponsePair(models.Model):
+    """
+    Agent question and the customer's answer (append-only, most recent K per agent)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='question_response_pairs')
+    call_session = models.ForeignKey('CallSession', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    agent_question = models.TextField()
+    customer_response = models.TextField(blank=True)
+    effectiveness = models.FloatField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'agent_question_response_pairs'
+        indexes = [
+            models.Index(fields=['ai_agent', '-created_at'], name='qa_pair_recent_idx'),
+        ]
+
+    @property
+    def led_to_positive_outcome(self):
+        return self.effectiveness > 6
+
+    def __str__(self):
+        return self.agent_question[:50]
+
+
+class AgentMemoryAggregate(models.Model):
+    """
+    Running per-key learning stats, updated in place with F() expressions
+    Events ki puri history scan kiye bina frequency / average / best response milta hai
+    """
+    KINDS = [
+        ('objection', 'Objection'),
+        ('emotional_state', 'Customer Emotional State'),
+        ('focus_area', 'Improvement Focus Area'),
+        ('failure', 'Failed Approach'),
+        ('satisfaction', 'Customer Satisfaction'),
+        ('learning_session', 'Learning Sessions'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='memory_aggregates')
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    key = models.CharField(max_length=50)
+    label = models.TextField(blank=True, help_text="Display text, e.g. the original objection")
+
+    frequency = models.IntegerField(default=0)
+    scored = models.IntegerField(default=0, help_text="Events that carried a score")
+    total_score = models.FloatField(default=0)
+    avg_score = models.FloatField(default=0)
+    conversions = models.IntegerField(default=0)
+    best_response = models.TextField(blank=True)
+    best_score = models.FloatField(null=True, blank=True)
+
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'agent_memory_aggregates'
+        constraints = [
+            models.UniqueConstraint(fields=['ai_agent', 'kind', 'key'], name='unique_agent_memory_key'),
+        ]
+
+    @property
+    def conversion_rate(self):
+        return self.conversions / self.frequency if self.frequency else 0
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} ({self.frequency})"
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Lower, Replace
 from django.contrib.auth import get_user_model
 import json
 import uuid
@@ -8,6 +10,14 @@ from django.utils import timezone
 User = get_user_model()
 
 
+def _digits_only(field):
+    """SQL expression stripping the usual phone punctuation, e.g. '+1 (555) 010-2030' -> '15550102030'"""
+    expression = F(field)
+    for char in ['+', ' ', '-', '(', ')', '.']:
+        expression = Replace(expression, Value(char), Value(''))
+    return expression
+
+
 class AIAgent(models.Model):
     """
     Dedicated AI Agent for each client - complete sales automation
@@ -74,172 +84,80 @@ class AIAgent(models.Model):
         """Check if agent is ready for live calls"""
         return self.status in ['active', 'learning'] and self.training_level >= 20
     
-    def update_learning_data(self, call_data):
-        """Update agent learning from call experience"""
-        # Add call insights to memory
-        if 'learning_insights' not in self.conversation_memory:
-            self.conversation_memory['learning_insights'] = []
-        
-        self.conversation_memory['learning_insights'].append({
-            'timestamp': datetime.now().isoformat(),
-            'call_outcome': call_data.get('outcome'),
-            'customer_response': call_data.get('customer_response'),
-            'improvement_notes': call_data.get('notes')
-        })
-        
-        # Update performance
-        self.calls_handled += 1
-        if call_data.get('outcome') == 'successful':
-            self.successful_conversions += 1
-        
-        self.conversion_rate = (self.successful_conversions / self.calls_handled) * 100
-        self.save()
-
     def update_learning_data(self, learning_data):
         """
         Automatic learning from call data
         Har call ke baad agent khud ko update karta hai
         """
-        current_memory = self.conversation_memory or {}
-        
-        # Initialize learning structure if not exists
-        if 'automatic_learning' not in current_memory:
-            current_memory['automatic_learning'] = {
-                'total_calls_learned_from': 0,
-                'successful_patterns': [],
-                'failed_patterns': [],
-                'objection_database': {},
-                'customer_behavior_insights': {},
-                'performance_metrics': {
-                    'avg_call_duration': 0,
-                    'conversion_trends': [],
-                    'best_performing_scripts': [],
-                    'sentiment_analysis_history': []
-                }
-            }
-        
-        learning = current_memory['automatic_learning']
-        
-        # Update call count
-        learning['total_calls_learned_from'] += 1
-        
-        # Process successful patterns
-        if learning_data.get('successful'):
-            pattern = {
-                'approach_used': learning_data.get('notes', '')[:200],
-                'customer_response': learning_data.get('customer_response', ''),
-                'outcome': learning_data.get('outcome'),
-                'duration': learning_data.get('call_duration', 0),
-                'customer_interest': learning_data.get('customer_interest_level'),
-                'timestamp': timezone.now().isoformat(),
-                'effectiveness_score': 8 if learning_data.get('outcome') == 'converted' else 6
-            }
-            learning['successful_patterns'].append(pattern)
-            
-            # Keep only top 20 successful patterns
-            learning['successful_patterns'] = sorted(
-                learning['successful_patterns'], 
-                key=lambda x: x['effectiveness_score'], 
-                reverse=True
-            )[:20]
-        
+        from .agent_memory import AgentMemory
+
+        memory = AgentMemory(self)
+        successful = bool(learning_data.get('successful'))
+
+        if successful:
+            memory.record_successful_pattern(
+                'call_outcome',
+                (learning_data.get('notes') or '')[:200],
+                8 if learning_data.get('outcome') == 'converted' else 6,
+                customer_reaction=learning_data.get('customer_response') or '',
+                outcome=learning_data.get('outcome') or '',
+                customer_interest_level=learning_data.get('customer_interest_level') or '',
+                duration_seconds=learning_data.get('call_duration') or 0
+            )
         else:
             # Learn from failures too
-            failed_pattern = {
-                'approach_tried': learning_data.get('notes', '')[:200],
-                'customer_response': learning_data.get('customer_response', ''),
-                'outcome': learning_data.get('outcome'),
-                'what_went_wrong': 'Low customer satisfaction' if learning_data.get('satisfaction', 5) < 4 else 'No interest generated',
-                'timestamp': timezone.now().isoformat()
-            }
-            learning['failed_patterns'].append(failed_pattern)
-            
-            # Keep only recent 15 failed patterns
-            if len(learning['failed_patterns']) > 15:
-                learning['failed_patterns'] = learning['failed_patterns'][-15:]
-        
-        # Update performance metrics
-        metrics = learning['performance_metrics']
-        
-        # Update average call duration
-        current_avg = metrics['avg_call_duration']
-        new_duration = learning_data.get('call_duration', 0)
-        total_calls = learning['total_calls_learned_from']
-        
-        metrics['avg_call_duration'] = ((current_avg * (total_calls - 1)) + new_duration) / total_calls
-        
-        # Track conversion trends (last 10 calls)
-        conversion_trends = metrics['conversion_trends']
-        conversion_trends.append({
-            'call_number': total_calls,
-            'converted': learning_data.get('successful', False),
-            'satisfaction': learning_data.get('satisfaction', 5),
-            'date': timezone.now().isoformat()
-        })
-        
-        # Keep only last 10 trends
-        if len(conversion_trends) > 10:
-            metrics['conversion_trends'] = conversion_trends[-10:]
-        
-        # Update sentiment analysis history
+            memory.record_failure(
+                'Low customer satisfaction' if (learning_data.get('satisfaction') or 5) < 4 else 'No interest generated'
+            )
+
         if learning_data.get('satisfaction'):
-            metrics['sentiment_analysis_history'].append({
-                'satisfaction_score': learning_data.get('satisfaction'),
-                'customer_interest': learning_data.get('customer_interest_level'),
-                'call_outcome': learning_data.get('outcome'),
-                'timestamp': timezone.now().isoformat()
-            })
-            
-            # Keep only last 20 sentiment records
-            if len(metrics['sentiment_analysis_history']) > 20:
-                metrics['sentiment_analysis_history'] = metrics['sentiment_analysis_history'][-20:]
-        
-        # Save updated memory
-        self.conversation_memory = current_memory
-        
-        # Update agent performance stats
-        self.calls_handled += 1
-        if learning_data.get('successful'):
-            self.successful_calls += 1
-        
-        self.save()
-        
-        return learning
+            memory.record_satisfaction(learning_data.get('satisfaction'))
+
+        # Counters in SQL so concurrent call outcomes don't overwrite each other
+        duration = learning_data.get('call_duration') or 0
+        AIAgent.objects.filter(pk=self.pk).update(
+            calls_handled=F('calls_handled') + 1,
+            successful_conversions=F('successful_conversions') + (1 if successful else 0),
+            avg_call_duration=(F('avg_call_duration') * F('calls_handled') + duration) / (F('calls_handled') + 1.0),
+            conversion_rate=(F('successful_conversions') + (1 if successful else 0)) * 100.0 / (F('calls_handled') + 1.0),
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['calls_handled', 'successful_conversions', 'avg_call_duration', 'conversion_rate'])
+
+        return memory.refresh_summary()
     
     def get_learning_recommendations(self):
         """
         Agent ke learning data se recommendations generate karna
         """
-        if not self.conversation_memory or 'automatic_learning' not in self.conversation_memory:
-            return []
-        
-        learning = self.conversation_memory['automatic_learning']
+        from .agent_memory import AgentMemory
+
+        summary = AgentMemory(self).summary()
         recommendations = []
         
         # Analyze success patterns
-        successful_patterns = learning.get('successful_patterns', [])
-        if len(successful_patterns) >= 3:
-            best_pattern = max(successful_patterns, key=lambda x: x['effectiveness_score'])
+        best_patterns = summary.get('best_patterns', [])
+        if summary.get('pattern_count', 0) >= 3:
+            best_pattern = best_patterns[0]
             recommendations.append({
                 'type': 'success_replication',
-                'message': f"Your most effective approach: '{best_pattern['approach_used'][:50]}...' - Use this pattern more often",
+                'message': f"Your most effective approach: '{best_pattern['approach'][:50]}...' - Use this pattern more often",
                 'priority': 'high'
             })
         
         # Analyze failed patterns
-        failed_patterns = learning.get('failed_patterns', [])
-        if len(failed_patterns) >= 2:
-            common_failure = failed_patterns[-1]  # Most recent failure
+        failures = summary.get('failures', {})
+        if failures.get('count', 0) >= 2:
             recommendations.append({
                 'type': 'failure_avoidance',
-                'message': f"Avoid approach that led to: '{common_failure['what_went_wrong']}' - Try alternative strategies",
+                'message': f"Avoid approach that led to: '{failures['latest']}' - Try alternative strategies",
                 'priority': 'medium'
             })
         
         # Analyze conversion trends
-        trends = learning.get('performance_metrics', {}).get('conversion_trends', [])
+        trends = summary.get('recent_conversions', [])
         if len(trends) >= 5:
-            recent_success_rate = sum(1 for t in trends[-5:] if t['converted']) / 5
+            recent_success_rate = sum(1 for converted in trends[:5] if converted) / 5
             if recent_success_rate < 0.2:  # Less than 20% success in last 5 calls
                 recommendations.append({
                     'type': 'performance_improvement',
@@ -254,15 +172,13 @@ class AIAgent(models.Model):
                 })
         
         # Analyze customer satisfaction
-        sentiment_history = learning.get('performance_metrics', {}).get('sentiment_analysis_history', [])
-        if len(sentiment_history) >= 3:
-            avg_satisfaction = sum(s['satisfaction_score'] for s in sentiment_history[-3:]) / 3
-            if avg_satisfaction < 3:
-                recommendations.append({
-                    'type': 'customer_satisfaction',
-                    'message': 'Customer satisfaction is low. Focus on being more empathetic and less pushy',
-                    'priority': 'high'
-                })
+        satisfaction = summary.get('satisfaction', {})
+        if satisfaction.get('count', 0) >= 3 and satisfaction['average'] < 3:
+            recommendations.append({
+                'type': 'customer_satisfaction',
+                'message': 'Customer satisfaction is low. Focus on being more empathetic and less pushy',
+                'priority': 'high'
+            })
         
         return recommendations
     
@@ -271,35 +187,25 @@ class AIAgent(models.Model):
         Agent apni strategy automatically adjust karta hai
         Learning data ke base par
         """
-        if not self.conversation_memory or 'automatic_learning' not in self.conversation_memory:
-            return False
-        
-        learning = self.conversation_memory['automatic_learning']
-        
-        # Get successful patterns
-        successful_patterns = learning.get('successful_patterns', [])
+        from .agent_memory import AgentMemory
+
+        memory = AgentMemory(self)
+        summary = memory.summary()
         
-        if len(successful_patterns) >= 3:
-            # Find most effective pattern
-            best_pattern = max(successful_patterns, key=lambda x: x['effectiveness_score'])
-            
-            # Update agent's default approach based on successful pattern
-            memory = self.conversation_memory
+        if summary.get('pattern_count', 0) >= 3:
+            # Most effective pattern comes first
+            best_pattern = summary['best_patterns'][0]
             
-            if 'adaptive_strategy' not in memory:
-                memory['adaptive_strategy'] = {}
-            
-            memory['adaptive_strategy'].update({
-                'primary_approach': best_pattern['approach_used'],
-                'target_call_duration': best_pattern['duration'],
-                'effective_with_interest_level': best_pattern['customer_interest'],
-                'last_strategy_update': timezone.now().isoformat(),
-                'confidence_level': min(len(successful_patterns) * 10, 100)  # Max 100%
+            memory.update_memory({
+                'adaptive_strategy': {
+                    'primary_approach': best_pattern['approach'],
+                    'target_call_duration': best_pattern['duration_seconds'],
+                    'effective_with_interest_level': best_pattern['customer_interest_level'],
+                    'last_strategy_update': timezone.now().isoformat(),
+                    'confidence_level': min(summary['pattern_count'] * 10, 100)  # Max 100%
+                }
             })
             
-            self.conversation_memory = memory
-            self.save()
-            
             return True
         
         return False
@@ -307,26 +213,18 @@ class AIAgent(models.Model):
     def get_personalized_script_for_customer(self, customer_profile):
         """
         Customer ke profile ke according personalized script generate karna
+        Reads the cached learning summary - no queries per customer once it exists
         """
-        if not self.conversation_memory:
-            return self.sales_script or "Hello, this is a sales call."
+        summary = (self.conversation_memory or {}).get('learning_summary') or {}
+        name = customer_profile.name or 'there'
         
-        learning = self.conversation_memory.get('automatic_learning', {})
-        successful_patterns = learning.get('successful_patterns', [])
-        
-        # Find patterns that worked for similar customers
-        matching_patterns = [
-            pattern for pattern in successful_patterns
-            if pattern['customer_interest'] == customer_profile.interest_level
-        ]
-        
-        if matching_patterns:
-            # Use the most effective pattern for similar customers
-            best_match = max(matching_patterns, key=lambda x: x['effectiveness_score'])
+        # Use the most effective pattern for similar customers
+        best_match = summary.get('best_pattern_by_interest', {}).get(customer_profile.interest_level)
+        if best_match:
             personalized_script = f"""
-            Hello {customer_profile.name or 'there'}, 
+            Hello {name}, 
             
-            {best_match['approach_used']}
+            {best_match}
             
             Based on our previous successful conversations with customers like you, 
             I believe this could be exactly what you're looking for.
@@ -334,12 +232,12 @@ class AIAgent(models.Model):
             return personalized_script.strip()
         
         # Fallback to general successful pattern
-        elif successful_patterns:
-            general_best = max(successful_patterns, key=lambda x: x['effectiveness_score'])
-            return f"Hello {customer_profile.name or 'there'}, {general_best['approach_used']}"
+        elif summary.get('best_patterns'):
+            return f"Hello {name}, {summary['best_patterns'][0]['approach']}"
         
         # Final fallback
-        return f"Hello {customer_profile.name or 'there'}, " + (self.sales_script or "I'm calling about an opportunity that might interest you.")
+        return f"Hello {name}, " + (self.sales_script or "I'm calling about an opportunity that might interest you.")
+
 
 class CustomerProfile(models.Model):
     """
@@ -365,6 +263,7 @@ class CustomerProfile(models.Model):
     
     # Customer Info
     phone_number = models.CharField(max_length=20, unique=True)
+    phone_e164 = models.CharField(max_length=16, null=True, blank=True, editable=False)  # Canonical form, set on save
     name = models.CharField(max_length=100, blank=True)
     email = models.EmailField(blank=True)
     
@@ -392,9 +291,28 @@ class CustomerProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Search columns - computed by the database on every write (bulk_create / update() included)
+    phone_digits = models.GeneratedField(
+        expression=_digits_only('phone_number'),
+        output_field=models.CharField(max_length=20),
+        db_persist=True
+    )
+    search_document = models.GeneratedField(
+        expression=Lower(Concat('name', Value(' '), 'email', Value(' '), _digits_only('phone_number'))),
+        output_field=models.TextField(),
+        db_persist=True
+    )
+    
     class Meta:
         db_table = 'customer_profiles'
         unique_together = ['ai_agent', 'phone_number']
+        indexes = [
+            # Type-ahead on short queries: phone prefix and name prefix within one agent's book
+            models.Index(fields=['ai_agent', 'phone_digits'], name='customer_phone_digits_idx'),
+            models.Index(fields=['ai_agent', 'name', 'id'], name='customer_name_idx'),
+            # Inbound caller matching and import dedupe are exact canonical lookups
+            models.Index(fields=['phone_e164'], name='customer_phone_e164_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name or self.phone_number} - {self.interest_level}"
@@ -456,6 +374,7 @@ class CallSession(models.Model):
     # Call Details
     call_type = models.CharField(max_length=20, choices=CALL_TYPES)
     phone_number = models.CharField(max_length=20)
+    phone_e164 = models.CharField(max_length=16, null=True, blank=True, editable=False)  # Canonical form, set on save
     
     # Timing
     initiated_at = models.DateTimeField(auto_now_add=True)
@@ -479,7 +398,7 @@ class CallSession(models.Model):
     followup_reason = models.CharField(max_length=200, blank=True)
     
     # Twilio Integration
-    twilio_call_sid = models.CharField(max_length=100, blank=True)
+    twilio_call_sid = models.CharField(max_length=100, blank=True, db_index=True)  # Webhooks look calls up by SID
     recording_url = models.URLField(blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -487,6 +406,9 @@ class CallSession(models.Model):
     class Meta:
         db_table = 'ai_call_sessions'
         ordering = ['-initiated_at']
+        indexes = [
+            models.Index(fields=['phone_e164'], name='ai_call_phone_e164_idx'),
+        ]
     
     def __str__(self):
         return f"{self.phone_number} - {self.outcome} - {self.initiated_at.date()}"
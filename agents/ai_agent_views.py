@@ -15,7 +15,9 @@ from .ai_agent_models import (
     AIAgentTraining, ScheduledCallback
 )
 from .homeai_integration import HomeAIService
+from .agent_memory import AgentMemory
 from .twilio_service import TwilioCallService
+from .call_admission import call_admission
 
 User = get_user_model()
 
@@ -370,6 +372,14 @@ class StartAICallAPIView(APIView):
             phone_number = data.get('phone_number')
             call_type = data.get('call_type')
             
+            concurrent_limit = call_admission.limit_for(request.user)
+            slot = call_admission.acquire(request.user.id, concurrent_limit)
+            if slot is None:
+                return Response({
+                    'error': f'Concurrent call limit reached ({concurrent_limit} calls). Try again when a call ends.',
+                    'concurrent_calls': concurrent_limit
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            
             # Get or create customer profile
             customer_profile, created = CustomerProfile.objects.get_or_create(
                 ai_agent=agent,
@@ -418,7 +428,9 @@ class StartAICallAPIView(APIView):
                 call_session.twilio_call_sid = f"demo_call_{call_session.id}"
                 call_session.connected_at = timezone.now()
                 call_session.save()
+                call_admission.bind(request.user.id, slot, call_session.twilio_call_sid)
             except Exception as e:
+                call_admission.release(request.user.id, slot)
                 call_session.outcome = 'failed'
                 call_session.agent_notes = f"Failed to connect: {str(e)}"
                 call_session.save()
@@ -502,6 +514,7 @@ class CallOutcomeAPIView(APIView):
                 call_session.duration_seconds = int(duration)
             
             call_session.save()
+            call_admission.release_call(call_session.twilio_call_sid)
             
             # Update customer profile
             customer_profile = call_session.customer_profile
@@ -554,7 +567,7 @@ class CallOutcomeAPIView(APIView):
             # Update agent status based on experience
             if agent.calls_handled >= 10 and agent.status == 'learning':
                 agent.status = 'active'
-                agent.save()
+                agent.save(update_fields=['status', 'updated_at'])
             
             response_data = {
                 'message': 'Call outcome updated and agent learned from experience',
@@ -685,85 +698,35 @@ class DynamicAgentLearningAPIView(APIView):
                 is_completed=True
             )
             
-            # Update agent's conversation memory with new learnings
-            current_memory = agent.conversation_memory or {}
-            
-            # Store objection handling patterns
-            if 'objection_patterns' not in current_memory:
-                current_memory['objection_patterns'] = {}
+            # Record learnings in the agent memory store
+            memory = AgentMemory(agent)
             
             for objection in learning_data.get('customer_objections', []):
-                objection_key = objection.lower().replace(' ', '_')[:50]
-                if objection_key not in current_memory['objection_patterns']:
-                    current_memory['objection_patterns'][objection_key] = {
-                        'count': 0,
-                        'successful_responses': [],
-                        'failed_responses': []
-                    }
-                current_memory['objection_patterns'][objection_key]['count'] += 1
-            
-            # Store successful techniques
-            if 'successful_techniques' not in current_memory:
-                current_memory['successful_techniques'] = []
+                memory.record_objection(objection, call_session=call_session)
             
             for response in learning_data.get('successful_responses', []):
-                technique = {
-                    'response': response,
-                    'context': learning_data.get('customer_behavior_pattern', ''),
-                    'effectiveness_score': performance_metrics.get('question_effectiveness', 5),
-                    'learned_from_call': str(call_session.id),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Avoid duplicates
-                if not any(t['response'] == response for t in current_memory['successful_techniques']):
-                    current_memory['successful_techniques'].append(technique)
-            
-            # Store emotional response patterns
-            if 'emotional_patterns' not in current_memory:
-                current_memory['emotional_patterns'] = {}
-            
-            emotional_state = learning_data.get('emotional_state')
-            if emotional_state:
-                if emotional_state not in current_memory['emotional_patterns']:
-                    current_memory['emotional_patterns'][emotional_state] = {
-                        'count': 0,
-                        'successful_approaches': [],
-                        'conversion_rate': 0
-                    }
-                current_memory['emotional_patterns'][emotional_state]['count'] += 1
-                
-                # Update conversion rate
-                if call_session.outcome in ['interested', 'converted']:
-                    current_rate = current_memory['emotional_patterns'][emotional_state]['conversion_rate']
-                    current_count = current_memory['emotional_patterns'][emotional_state]['count']
-                    new_rate = ((current_rate * (current_count - 1)) + 1) / current_count
-                    current_memory['emotional_patterns'][emotional_state]['conversion_rate'] = new_rate
-            
-            # Update learning metrics
-            if 'learning_metrics' not in current_memory:
-                current_memory['learning_metrics'] = {
-                    'total_learning_sessions': 0,
-                    'improvement_score': 0,
-                    'adaptive_responses_learned': 0,
-                    'last_learning_date': None
-                }
+                memory.record_successful_pattern(
+                    'dynamic',
+                    response,
+                    performance_metrics.get('question_effectiveness', 5),
+                    call_session=call_session,
+                    unique=True,  # Avoid duplicates
+                    context=learning_data.get('customer_behavior_pattern', '')
+                )
             
-            current_memory['learning_metrics']['total_learning_sessions'] += 1
-            current_memory['learning_metrics']['adaptive_responses_learned'] += len(learning_data.get('successful_responses', []))
-            current_memory['learning_metrics']['last_learning_date'] = datetime.now().isoformat()
+            memory.record_emotional_state(
+                learning_data.get('emotional_state'),
+                converted=call_session.outcome in ['interested', 'converted']
+            )
             
-            # Calculate improvement score based on performance
+            # Improvement score based on performance
             avg_performance = (
                 performance_metrics.get('question_effectiveness', 5) +
                 performance_metrics.get('objection_handling_score', 5)
             ) / 2
+            memory.record_learning_session(avg_performance)
             
-            current_memory['learning_metrics']['improvement_score'] = (
-                (current_memory['learning_metrics']['improvement_score'] + avg_performance) / 2
-            )
-            
-            agent.conversation_memory = current_memory
+            summary = memory.refresh_summary()
             
             # Update agent training level based on dynamic learning
             agent.training_level = min(agent.training_level + 2, 100)  # Incremental improvement
@@ -772,21 +735,21 @@ class DynamicAgentLearningAPIView(APIView):
             if agent.training_level >= 80 and agent.status != 'active':
                 agent.status = 'active'
             
-            agent.save()
+            agent.save(update_fields=['training_level', 'status', 'updated_at'])
             
             return Response({
                 'message': 'Dynamic learning completed successfully',
                 'learning_session_id': str(training.id),
                 'agent_improvements': {
                     'new_training_level': agent.training_level,
-                    'total_learning_sessions': current_memory['learning_metrics']['total_learning_sessions'],
-                    'improvement_score': round(current_memory['learning_metrics']['improvement_score'], 2),
+                    'total_learning_sessions': summary['learning_sessions']['count'],
+                    'improvement_score': summary['learning_sessions']['improvement_score'],
                     'new_techniques_learned': len(learning_data.get('successful_responses', [])),
                     'objection_patterns_updated': len(learning_data.get('customer_objections', []))
                 },
                 'agent_status': agent.status,
-                'learning_insights': self._generate_learning_insights(current_memory),
-                'next_optimization_suggestions': self._generate_optimization_suggestions(current_memory, performance_metrics)
+                'learning_insights': self._generate_learning_insights(summary),
+                'next_optimization_suggestions': self._generate_optimization_suggestions(summary, performance_metrics)
             }, status=status.HTTP_200_OK)
             
         except CallSession.DoesNotExist:
@@ -836,55 +799,39 @@ class DynamicAgentLearningAPIView(APIView):
         
         return improvement_areas
     
-    def _generate_learning_insights(self, memory):
+    def _generate_learning_insights(self, summary):
         """Generate insights from accumulated learning"""
         insights = []
         
-        # Objection patterns insight
-        if 'objection_patterns' in memory:
-            most_common_objection = max(
-                memory['objection_patterns'].items(),
-                key=lambda x: x[1]['count'],
-                default=(None, None)
-            )
-            if most_common_objection[0]:
-                insights.append(f"Most common objection: {most_common_objection[0]} (appeared {most_common_objection[1]['count']} times)")
+        # Objection patterns insight (top_objections is ordered by frequency)
+        if summary['top_objections']:
+            most_common_objection = summary['top_objections'][0]
+            insights.append(f"Most common objection: {most_common_objection['key']} (appeared {most_common_objection['frequency']} times)")
         
         # Emotional patterns insight
-        if 'emotional_patterns' in memory:
-            best_emotional_approach = max(
-                memory['emotional_patterns'].items(),
-                key=lambda x: x[1]['conversion_rate'],
-                default=(None, None)
-            )
-            if best_emotional_approach[0]:
-                insights.append(f"Best conversion rate with {best_emotional_approach[0]} customers: {best_emotional_approach[1]['conversion_rate']:.2%}")
+        best_emotional_approach = self._best_emotional_state(summary)
+        if best_emotional_approach:
+            insights.append(f"Best conversion rate with {best_emotional_approach[0]} customers: {best_emotional_approach[1]['conversion_rate']:.2%}")
         
         # Learning progress insight
-        if 'learning_metrics' in memory:
-            metrics = memory['learning_metrics']
-            insights.append(f"Total learning sessions: {metrics['total_learning_sessions']}")
-            insights.append(f"Current improvement score: {metrics['improvement_score']:.2f}/10")
+        metrics = summary['learning_sessions']
+        insights.append(f"Total learning sessions: {metrics['count']}")
+        insights.append(f"Current improvement score: {metrics['improvement_score']:.2f}/10")
         
         return insights
     
-    def _generate_optimization_suggestions(self, memory, performance_metrics):
+    def _generate_optimization_suggestions(self, summary, performance_metrics):
         """Generate suggestions for agent optimization"""
         suggestions = []
         
         # Based on successful techniques
-        if 'successful_techniques' in memory and len(memory['successful_techniques']) > 0:
+        if summary['pattern_count'] > 0:
             suggestions.append("Continue using recently learned successful responses")
         
         # Based on emotional patterns
-        if 'emotional_patterns' in memory:
-            best_approach = max(
-                memory['emotional_patterns'].items(),
-                key=lambda x: x[1]['conversion_rate'],
-                default=(None, None)
-            )
-            if best_approach[0]:
-                suggestions.append(f"Focus more on {best_approach[0]} customer approach - highest conversion rate")
+        best_approach = self._best_emotional_state(summary)
+        if best_approach:
+            suggestions.append(f"Focus more on {best_approach[0]} customer approach - highest conversion rate")
         
         # Based on performance metrics
         if performance_metrics.get('objection_handling_score', 5) < 7:
@@ -894,3 +841,11 @@ class DynamicAgentLearningAPIView(APIView):
             suggestions.append("Improve questioning techniques and timing")
         
         return suggestions
+    
+    def _best_emotional_state(self, summary):
+        """(state, stats) with the highest conversion rate, or None"""
+        return max(
+            summary['emotional_states'].items(),
+            key=lambda x: x[1]['conversion_rate'],
+            default=None
+        )
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AgentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'agents'
+
+    def ready(self):
+        from .customer_search import rebuild_search_index
+        from .phone_numbers import connect_phone_identity
+        post_migrate.connect(rebuild_search_index, sender=self)
+        connect_phone_identity()
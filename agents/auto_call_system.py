@@ -9,8 +9,11 @@ import json
 
 from .ai_agent_models import AIAgent, CustomerProfile, CallSession
 from .auto_campaign_models import AutoCallCampaign, AutoCampaignContact
+from .call_admission import call_admission
 from .twilio_service import TwilioCallService
 from .homeai_integration import HomeAIService
+from .pacing import CampaignPacer
+from .tasks import enroll_campaign_contacts
 
 logger = logging.getLogger(__name__)
 
@@ -47,35 +50,30 @@ class AutoCallCampaignAPIView(APIView):
                     'customer_filters': customer_filters,
                     'call_script': data.get('call_script', agent.sales_script),
                     'max_attempts_per_customer': data.get('max_attempts', 3),
-                    'time_between_attempts': data.get('retry_delay_hours', 24)
+                    'time_between_attempts': data.get('retry_delay_hours', 24),
+                    'enrollment': {
+                        'status': 'queued',
+                        'start_immediately': bool(data.get('start_immediately', False)),
+                        'immediate_call_count': data.get('immediate_call_count', 5)
+                    }
                 }
             )
             
-            # Get customers based on filters
-            customers = self._get_filtered_customers(agent, customer_filters)
-            
-            # Add customers to campaign
-            campaign_contacts = []
-            for customer in customers:
-                campaign_contacts.append(AutoCampaignContact(
-                    campaign=campaign,
-                    customer_profile=customer,
-                    status='pending',
-                    priority=self._calculate_customer_priority(customer),
-                    scheduled_datetime=timezone.now()
-                ))
-            
-            AutoCampaignContact.objects.bulk_create(campaign_contacts)
-            
-            # Start immediate calls if requested
-            if data.get('start_immediately', False):
-                self._start_immediate_calls(campaign, data.get('immediate_call_count', 5))
+            # Enroll matching customers in the background (set-based insert)
+            try:
+                enroll_campaign_contacts.delay(str(campaign.id))
+            except Exception as e:
+                # No broker available (local development) - enroll inline instead
+                logger.warning(f"Celery unavailable, enrolling campaign contacts inline: {str(e)}")
+                enroll_campaign_contacts(str(campaign.id))
+                campaign.refresh_from_db()
             
             return Response({
                 'message': 'Auto call campaign created successfully',
                 'campaign_id': str(campaign.id),
                 'campaign_name': campaign.name,
-                'total_customers': len(campaign_contacts),
+                'total_customers': campaign.total_contacts,
+                'enrollment_status': campaign.campaign_data['enrollment']['status'],
                 'status': campaign.status,
                 'calls_per_hour': campaign.calls_per_hour,
                 'next_actions': [
@@ -97,6 +95,7 @@ class AutoCallCampaignAPIView(APIView):
         try:
             agent = request.user.ai_agent
             campaigns = agent.auto_campaigns.filter(status__in=['active', 'paused']).order_by('-created_at')
+            pacer = CampaignPacer()
             
             campaign_data = []
             for campaign in campaigns:
@@ -112,6 +111,7 @@ class AutoCallCampaignAPIView(APIView):
                     'calls_in_progress': contacts.filter(status='calling').count(),
                     'success_rate': self._calculate_success_rate(contacts),
                     'calls_per_hour': campaign.calls_per_hour,
+                    'pacing_tokens_available': pacer.tokens_remaining(campaign),
                     'created_at': campaign.created_at.isoformat(),
                     'next_call_time': self._get_next_call_time(campaign)
                 })
@@ -159,67 +159,8 @@ class AutoCallCampaignAPIView(APIView):
         except AutoCallCampaign.DoesNotExist:
             return Response({'error': 'Campaign not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    def _get_filtered_customers(self, agent, filters):
-        """Get customers based on filters"""
-        customers = agent.customer_profiles.filter(is_do_not_call=False)
-        
-        # Filter by interest level
-        if filters.get('interest_levels'):
-            customers = customers.filter(interest_level__in=filters['interest_levels'])
-        
-        # Filter by last call date
-        if filters.get('days_since_last_call'):
-            days_ago = timezone.now() - timedelta(days=filters['days_since_last_call'])
-            customers = customers.filter(
-                models.Q(last_interaction__lt=days_ago) | models.Q(last_interaction__isnull=True)
-            )
-        
-        # Filter by call success
-        if filters.get('only_unconverted'):
-            customers = customers.filter(is_converted=False)
-        
-        # Limit results
-        limit = filters.get('max_customers', 100)
-        return customers[:limit]
-    
-    def _calculate_customer_priority(self, customer):
-        """Calculate customer priority for calling order"""
-        priority = 1  # Default
-        
-        # Hot leads get higher priority
-        if customer.interest_level == 'hot':
-            priority = 5
-        elif customer.interest_level == 'warm':
-            priority = 3
-        elif customer.interest_level == 'cold':
-            priority = 1
-        
-        # Recent interactions get boost
-        if customer.last_interaction:
-            days_since = (timezone.now() - customer.last_interaction).days
-            if days_since < 7:
-                priority += 1
-        
-        # Failed calls get lower priority
-        if customer.total_calls > customer.successful_calls * 2:
-            priority = max(1, priority - 1)
-        
-        return min(5, priority)  # Max priority is 5
-    
-    def _start_immediate_calls(self, campaign, count):
-        """Start immediate calls for campaign"""
-        contacts = campaign.contacts.filter(status='pending').order_by('-priority')[:count]
-        
-        for contact in contacts:
-            contact.status = 'calling'
-            contact.call_started_at = timezone.now()
-            contact.save()
-            
-            # Trigger actual call
-            self._initiate_call(contact)
-    
     def _initiate_call(self, contact):
-        """Actually initiate a call using Twilio"""
+        """Actually initiate a call using Twilio, returns True if the call was placed"""
         try:
             agent = contact.campaign.ai_agent
             customer = contact.customer_profile
@@ -265,12 +206,17 @@ class AutoCallCampaignAPIView(APIView):
                 call_session.save()
                 
                 contact.twilio_call_sid = call_result.get('call_sid')
+                contact.claimed_by = ''
+                contact.lease_expires_at = None
                 contact.save()
                 
                 logger.info(f"Auto call initiated: {customer.phone_number} via {call_result.get('call_sid')}")
+                return True
             else:
                 contact.status = 'failed'
-                contact.failure_reason = call_result.get('error', 'Unknown error')
+                contact.failure_reason = call_result.get('error', 'Unknown error')[:200]
+                contact.claimed_by = ''
+                contact.lease_expires_at = None
                 contact.save()
                 
                 call_session.outcome = 'failed'
@@ -280,8 +226,12 @@ class AutoCallCampaignAPIView(APIView):
         except Exception as e:
             logger.error(f"Call initiation error: {str(e)}")
             contact.status = 'failed'
-            contact.failure_reason = str(e)
+            contact.failure_reason = str(e)[:200]
+            contact.claimed_by = ''
+            contact.lease_expires_at = None
             contact.save()
+        
+        return False
     
     def _calculate_success_rate(self, contacts):
         """Calculate campaign success rate"""
@@ -337,8 +287,16 @@ class StartImmediateCallsAPIView(APIView):
                 ).order_by('-interest_level', '-last_interaction')[:call_count]
             
             calls_initiated = []
+            calls_rejected = []
+            concurrent_limit = call_admission.limit_for(request.user)
             
             for customer in customers:
+                # Plan ki concurrent call limit - full ho to baqi customers reject
+                slot = call_admission.acquire(request.user.id, concurrent_limit)
+                if slot is None:
+                    calls_rejected.append(customer.phone_number)
+                    continue
+                
                 # Create call session
                 call_session = CallSession.objects.create(
                     ai_agent=agent,
@@ -359,10 +317,12 @@ class StartImmediateCallsAPIView(APIView):
                     }
                 )
                 
-                if call_result.get('success'):
+                # initiate_call success flag nahi deta - placed call ki pehchan call_sid hai
+                if call_result.get('call_sid'):
                     call_session.twilio_call_sid = call_result.get('call_sid')
                     call_session.connected_at = timezone.now()
                     call_session.save()
+                    call_admission.bind(request.user.id, slot, call_session.twilio_call_sid)
                     
                     calls_initiated.append({
                         'customer_phone': customer.phone_number,
@@ -371,12 +331,20 @@ class StartImmediateCallsAPIView(APIView):
                         'status': 'initiated'
                     })
                 else:
+                    call_admission.release(request.user.id, slot)
                     call_session.outcome = 'failed'
                     call_session.save()
             
+            if calls_rejected and not calls_initiated:
+                return Response({
+                    'error': f'Concurrent call limit reached ({concurrent_limit} calls)',
+                    'calls_rejected': calls_rejected
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            
             return Response({
                 'message': f'Initiated {len(calls_initiated)} calls',
                 'calls_initiated': calls_initiated,
+                'calls_rejected': calls_rejected,
                 'total_requested': len(customers),
                 'success_count': len(calls_initiated)
             }, status=status.HTTP_200_OK)
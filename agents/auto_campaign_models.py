@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction, connection
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 User = get_user_model()
 
@@ -74,6 +76,72 @@ class AutoCallCampaign(models.Model):
         return 0
 
 
+class AutoCampaignContactQuerySet(models.QuerySet):
+    """
+    Lease-based claiming so several dialer workers never dial the same contact
+    Har worker ko alag contacts milte hain - double dial nahi hota
+    """
+    
+    def claim_batch(self, worker_id, limit, lease_seconds=300, now=None):
+        """
+        Atomically lease up to `limit` due pending contacts to a worker.
+        Uses SELECT ... FOR UPDATE SKIP LOCKED where supported, otherwise a
+        conditional UPDATE guarded on status='pending'.
+        """
+        if limit <= 0:
+            return []
+        
+        now = now or timezone.now()
+        lease_token = f"{worker_id}/{uuid.uuid4().hex[:12]}"[-100:]
+        due = self.filter(
+            status='pending',
+            scheduled_datetime__lte=now
+        ).order_by('-priority', 'scheduled_datetime')
+        claim_fields = {
+            'status': 'calling',
+            'claimed_by': lease_token,
+            'lease_expires_at': now + timedelta(seconds=lease_seconds),
+            'call_started_at': now,
+            'attempts': F('attempts') + 1,
+            'last_attempt_at': now,
+            'updated_at': now,
+        }
+        
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+                if ids:
+                    self.model.objects.filter(id__in=ids).update(**claim_fields)
+        else:
+            # SQLite serializes writers, so the status guard makes this update the claim
+            ids = list(due.values_list('id', flat=True)[:limit])
+            if ids:
+                self.model.objects.filter(id__in=ids, status='pending').update(**claim_fields)
+        
+        if not ids:
+            return []
+        
+        return list(
+            self.model.objects.filter(id__in=ids, claimed_by=lease_token)
+            .select_related('campaign__ai_agent', 'customer_profile')
+            .order_by('-priority', 'scheduled_datetime')
+        )
+    
+    def reclaim_expired(self, now=None):
+        """Return contacts whose worker crashed before dialing back to the pending pool"""
+        now = now or timezone.now()
+        return self.filter(
+            status='calling',
+            lease_expires_at__lt=now
+        ).update(
+            status='pending',
+            claimed_by='',
+            lease_expires_at=None,
+            call_started_at=None,
+            updated_at=now
+        )
+
+
 class AutoCampaignContact(models.Model):
     """
     Contacts for auto call campaigns
@@ -111,11 +179,33 @@ class AutoCampaignContact(models.Model):
     attempts = models.IntegerField(default=0)
     last_attempt_at = models.DateTimeField(null=True, blank=True)
     
+    # Dialer lease
+    claimed_by = models.CharField(max_length=100, blank=True, help_text="Dialer worker lease token")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = AutoCampaignContactQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-priority', 'scheduled_datetime']
+        indexes = [
+            # Dispatch query: campaign + pending + due, ordered by priority then schedule
+            models.Index(
+                fields=['campaign', '-priority', 'scheduled_datetime'],
+                condition=models.Q(status='pending'),
+                name='autocontact_dispatch_idx',
+            ),
+            # Per-status counts and in-flight calls per campaign
+            models.Index(fields=['campaign', 'status', 'call_started_at'], name='autocontact_status_idx'),
+            # Expired lease reclaim
+            models.Index(
+                fields=['lease_expires_at'],
+                condition=models.Q(status='calling'),
+                name='autocontact_lease_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.customer_profile.phone_number} - {self.status}"
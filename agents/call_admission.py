@@ -0,0 +1,196 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+import logging
+import time
+import uuid
+from typing import Iterable, Optional
+
+from .call_admission_models import CallSlot
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Drop expired slots, then admit only while the tenant is under its limit - one round trip, atomic
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+class _RedisCallCounter:
+    """
+    Per-tenant sorted set of slot tokens scored by expiry, plus CallSid -> slot keys
+    A slot whose terminal webhook never arrives simply ages out of the set
+    """
+
+    INFLIGHT_PREFIX = 'calls:inflight:'
+    SLOT_PREFIX = 'calls:slot:'
+
+    def __init__(self, client):
+        self.client = client
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+
+    def acquire(self, tenant_id: str, limit: int, token: str, ttl: int) -> bool:
+        now = time.time()
+        return bool(self._acquire(
+            keys=[self._key(tenant_id)], args=[now, limit, now + ttl, token, ttl]
+        ))
+
+    def bind(self, tenant_id: str, token: str, call_sid: str, ttl: int):
+        self.client.set(f'{self.SLOT_PREFIX}{call_sid}', f'{tenant_id}|{token}', ex=ttl)
+
+    def release(self, tenant_id: str, token: str):
+        self.client.zrem(self._key(tenant_id), token)
+
+    def release_calls(self, call_sids: Iterable[str]) -> int:
+        keys = [f'{self.SLOT_PREFIX}{sid}' for sid in call_sids]
+        if not keys:
+            return 0
+
+        slots = [slot.decode() for slot in self.client.mget(keys) if slot]
+        pipe = self.client.pipeline(transaction=False)
+        for slot in slots:
+            tenant_id, token = slot.split('|', 1)
+            pipe.zrem(self._key(tenant_id), token)
+        pipe.delete(*keys)
+        return sum(pipe.execute()[:len(slots)])
+
+    def in_flight(self, tenant_id: str) -> int:
+        return self.client.zcount(self._key(tenant_id), time.time(), '+inf')
+
+    def _key(self, tenant_id: str) -> str:
+        return f'{self.INFLIGHT_PREFIX}{tenant_id}'
+
+
+class _DatabaseCallCounter:
+    """CallSlot rows; admission is serialized per tenant by locking the user row"""
+
+    def acquire(self, tenant_id: str, limit: int, token: str, ttl: int) -> bool:
+        now = timezone.now()
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(pk=tenant_id).values_list('pk', flat=True))
+            slots = CallSlot.objects.filter(user_id=tenant_id)
+            slots.filter(expires_at__lte=now).delete()
+            if slots.count() >= limit:
+                return False
+            CallSlot.objects.create(user_id=tenant_id, token=token, expires_at=now + timedelta(seconds=ttl))
+        return True
+
+    def bind(self, tenant_id: str, token: str, call_sid: str, ttl: int):
+        CallSlot.objects.filter(token=token).update(call_sid=call_sid)
+
+    def release(self, tenant_id: str, token: str):
+        CallSlot.objects.filter(token=token).delete()
+
+    def release_calls(self, call_sids: Iterable[str]) -> int:
+        call_sids = [sid for sid in call_sids if sid]
+        if not call_sids:
+            return 0
+        deleted, _ = CallSlot.objects.filter(call_sid__in=call_sids).delete()
+        return deleted
+
+    def in_flight(self, tenant_id: str) -> int:
+        return CallSlot.objects.filter(user_id=tenant_id, expires_at__gt=timezone.now()).count()
+
+
+_db_counter = _DatabaseCallCounter()
+_redis_counter = None
+_redis_retry_at = 0.0
+
+
+class CallAdmission:
+    """
+    Per-tenant in-flight call counter enforcing SubscriptionPlan.concurrent_calls
+    Har dial path call se pehle slot leta hai; terminal Twilio status par slot wapas
+    """
+
+    @property
+    def backend(self) -> str:
+        return settings.CALL_ADMISSION_BACKEND
+
+    @property
+    def slot_ttl(self) -> int:
+        return settings.CALL_ADMISSION_SLOT_TTL_SECONDS
+
+    def limit_for(self, user) -> int:
+        """Concurrent call limit from the tenant's subscription plan"""
+        subscription = getattr(user, 'subscription', None)
+        if subscription is None:
+            return settings.DIALER_DEFAULT_CONCURRENT_CALLS
+        return subscription.plan.concurrent_calls
+
+    def acquire(self, tenant_id, limit: int) -> Optional[str]:
+        """Reserve a slot before dialing; returns its token, or None when the tenant is at its limit"""
+        token = uuid.uuid4().hex
+        admitted = self._call('acquire', str(tenant_id), limit, token, self.slot_ttl)
+        if not admitted:
+            logger.info(f"Call admission denied for tenant {tenant_id} (limit {limit})")
+            return None
+        return token
+
+    def bind(self, tenant_id, token: str, call_sid: str):
+        """Attach the Twilio CallSid so the terminal status webhook can release the slot"""
+        if token and call_sid:
+            self._call('bind', str(tenant_id), token, call_sid, self.slot_ttl)
+
+    def release(self, tenant_id, token: str):
+        """Dial failed - give the slot back"""
+        if token:
+            self._call('release', str(tenant_id), token)
+
+    def release_call(self, call_sid: str) -> bool:
+        return self.release_calls([call_sid]) > 0
+
+    def release_calls(self, call_sids: Iterable[str]) -> int:
+        return self._call('release_calls', [sid for sid in call_sids if sid]) or 0
+
+    def in_flight(self, tenant_id) -> int:
+        return self._call('in_flight', str(tenant_id)) or 0
+
+    def _call(self, method: str, *args):
+        counter = self._counter()
+        try:
+            return getattr(counter, method)(*args)
+        except Exception as e:
+            if counter is _db_counter:
+                raise
+            self._mark_redis_down(e)
+            return getattr(_db_counter, method)(*args)
+
+    def _counter(self):
+        if self.backend != 'redis' or time.monotonic() < _redis_retry_at:
+            return _db_counter
+        return self._get_redis_counter() or _db_counter
+
+    def _mark_redis_down(self, error: Exception):
+        """Count in the database for a while instead of paying the connect timeout on every dial"""
+        global _redis_retry_at
+        _redis_retry_at = time.monotonic() + 30
+        logger.warning(f"Redis call counter unavailable, using database slots: {str(error)}")
+
+    def _get_redis_counter(self):
+        global _redis_counter
+
+        if _redis_counter is None:
+            try:
+                import redis
+                _redis_counter = _RedisCallCounter(redis.Redis.from_url(
+                    settings.CALL_ADMISSION_REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+                ))
+            except Exception as e:
+                logger.warning(f"Redis client unavailable for call admission, using database slots: {str(e)}")
+                _redis_counter = False
+
+        return _redis_counter or None
+
+
+call_admission = CallAdmission()
@@ -0,0 +1,28 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class CallSlot(models.Model):
+    """
+    One admitted in-flight call, used when the Redis call counter is unavailable
+    Slot expire ho jaye to tenant ki capacity khud wapas aa jati hai
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='call_slots')
+    token = models.CharField(max_length=40, unique=True)
+    call_sid = models.CharField(max_length=100, blank=True, db_index=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'call_slots'
+        indexes = [
+            models.Index(fields=['user', 'expires_at'], name='callslot_user_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.call_sid or self.token}"
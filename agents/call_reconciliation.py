@@ -0,0 +1,282 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import datetime, timedelta
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from calls.call_stats import refresh_call_stats
+from calls.models import CallSession as InboxCallSession
+from subscriptions.metering import record_call_usage
+from .ai_agent_models import CallSession
+from .auto_campaign_models import AutoCampaignContact
+from .call_admission import call_admission
+from .models import Agent
+
+logger = logging.getLogger(__name__)
+
+# Twilio call statuses that mean the call is over
+FINAL_STATUSES = {'completed', 'busy', 'no-answer', 'failed', 'canceled'}
+NOT_FOUND = 'not-found'
+
+# calls.CallSession statuses that still count as in flight
+INBOX_IN_FLIGHT = ['initiated', 'ringing', 'answered']
+INBOX_STATUS = {
+    'completed': 'completed', 'busy': 'busy', 'no-answer': 'no_answer',
+    'failed': 'failed', 'canceled': 'cancelled', NOT_FOUND: 'failed',
+}
+
+
+class CallReconciler:
+    """
+    Repairs calls whose final Twilio webhook never arrived
+    Stale 'calling' sessions aur campaign contacts ka asli status Twilio se la kar bulk update karta hai,
+    taake dialer ki concurrent capacity free ho jaye
+    """
+
+    def __init__(self, client=None, max_workers: Optional[int] = None):
+        if client is None:
+            from .twilio_service import TwilioCallService
+            client = TwilioCallService().client
+        self.client = client
+        self.max_workers = max_workers or settings.RECONCILE_MAX_WORKERS
+        self.page_size = settings.RECONCILE_PAGE_SIZE
+        self.window = timedelta(hours=settings.RECONCILE_WINDOW_HOURS)
+        self.call_timeout = timedelta(minutes=settings.DIALER_CALL_TIMEOUT_MINUTES)
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or timezone.now()
+        stale_before = now - timedelta(minutes=settings.RECONCILE_STALE_MINUTES)
+
+        sessions = list(
+            CallSession.objects.filter(outcome='calling', initiated_at__lt=stale_before).select_related('ai_agent')
+        )
+        contacts = list(
+            AutoCampaignContact.objects.filter(status='calling', call_started_at__lt=stale_before)
+            .exclude(twilio_call_sid='')  # Not dialed yet - the lease reclaim handles those
+        )
+        inbox = list(InboxCallSession.objects.filter(status__in=INBOX_IN_FLIGHT, started_at__lt=stale_before))
+
+        sids = {row.twilio_call_sid for row in [*sessions, *contacts, *inbox] if row.twilio_call_sid}
+        started = [session.initiated_at for session in sessions] + \
+                  [contact.call_started_at for contact in contacts] + [call.started_at for call in inbox]
+
+        states = {}
+        if sids and self.client is not None:
+            states = self.fetch_states(sids, min(started), now)
+
+        stats = {
+            'stale_calls': len(sids),
+            'fetched': len(states),
+            'call_sessions': self._apply_call_sessions(sessions, states, now),
+            'campaign_contacts': self._apply_contacts(contacts, states, now),
+            'inbox_calls': self._apply_inbox_calls(inbox, states, now),
+        }
+        logger.info(f"Call reconciliation: {stats}")
+        return stats
+
+    # Twilio (no DB access in here - runs in worker threads)
+
+    def fetch_states(self, sids: Set[str], since: datetime, until: datetime) -> Dict[str, Dict[str, Any]]:
+        """
+        Final state for each SID: paged Calls list per date window in parallel,
+        then single fetches for anything the lists missed, then recordings for completed calls
+        """
+        windows = self._windows(since - timedelta(minutes=5), until)
+        states: Dict[str, Dict[str, Any]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='reconcile') as executor:
+            for window_states in executor.map(lambda window: self._list_calls(window, sids), windows):
+                states.update(window_states)
+
+            missing = sorted(sids - set(states))
+            for sid, state in zip(missing, executor.map(self._fetch_call, missing)):
+                if state:
+                    states[sid] = state
+
+            completed = {sid for sid, state in states.items() if state['status'] == 'completed'}
+            if completed:
+                for recordings in executor.map(lambda window: self._list_recordings(window, completed), windows):
+                    for sid, url in recordings.items():
+                        states[sid].setdefault('recording_url', url)
+
+        return states
+
+    def _windows(self, since: datetime, until: datetime) -> List[Tuple[datetime, datetime]]:
+        windows = []
+        while since < until:
+            windows.append((since, min(since + self.window, until)))
+            since += self.window
+        return windows
+
+    def _list_calls(self, window: Tuple[datetime, datetime], sids: Set[str]) -> Dict[str, Dict[str, Any]]:
+        try:
+            return {
+                call.sid: self._state(call)
+                for call in self.client.calls.stream(
+                    start_time_after=window[0], start_time_before=window[1], page_size=self.page_size
+                )
+                if call.sid in sids
+            }
+        except Exception as e:
+            logger.error(f"Twilio call list failed for {window[0]} - {window[1]}: {str(e)}")
+            return {}
+
+    def _fetch_call(self, sid: str) -> Optional[Dict[str, Any]]:
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            return self._state(self.client.calls(sid).fetch())
+        except TwilioRestException as e:
+            if e.status == 404:
+                return {'status': NOT_FOUND}
+            logger.error(f"Twilio call fetch failed for {sid}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Twilio call fetch failed for {sid}: {str(e)}")
+        return None
+
+    def _list_recordings(self, window: Tuple[datetime, datetime], sids: Set[str]) -> Dict[str, str]:
+        try:
+            return {
+                recording.call_sid: f"https://api.twilio.com{recording.uri.replace('.json', '.mp3')}"
+                for recording in self.client.recordings.stream(
+                    date_created_after=window[0], date_created_before=window[1], page_size=self.page_size
+                )
+                if recording.call_sid in sids
+            }
+        except Exception as e:
+            logger.error(f"Twilio recording list failed for {window[0]} - {window[1]}: {str(e)}")
+            return {}
+
+    def _state(self, call) -> Dict[str, Any]:
+        return {
+            'status': call.status,
+            'duration': int(call.duration) if call.duration else 0,
+            'start_time': call.start_time,
+            'end_time': call.end_time,
+        }
+
+    # Bulk apply
+
+    def _still_in_flight(self, model, rows: List[Any], **in_flight) -> List[Any]:
+        """
+        Rows no status webhook has settled since they were read - call inside the bulk update's transaction
+        Locks them, so a webhook arriving now waits for our write instead of being overwritten by it
+        """
+        if not rows:
+            return []
+        ids = set(
+            model.objects.select_for_update().filter(pk__in=[row.pk for row in rows], **in_flight)
+            .values_list('pk', flat=True)
+        )
+        return [row for row in rows if row.pk in ids]
+
+    def _final_state(self, sid: str, started_at: datetime, states: Dict[str, Dict[str, Any]], now: datetime) -> Optional[Dict[str, Any]]:
+        """The call's final state, a synthetic 'not-found' once it is past the call timeout, or None if still live"""
+        state = states.get(sid)
+        if state and state['status'] in FINAL_STATUSES:
+            return state
+        if (state is None or state['status'] == NOT_FOUND) and started_at < now - self.call_timeout:
+            return {'status': NOT_FOUND, 'duration': 0, 'start_time': None, 'end_time': None}
+        return None
+
+    def _apply_call_sessions(self, sessions: Iterable[CallSession], states, now) -> int:
+        updated = []
+        for session in sessions:
+            state = self._final_state(session.twilio_call_sid, session.initiated_at, states, now)
+            if state is None:
+                continue
+
+            session.ended_at = state['end_time'] or now
+            session.duration_seconds = state['duration']
+            if state['status'] == 'completed':
+                # Same rule as the status webhook
+                session.outcome = 'answered' if session.duration_seconds > 60 else 'no_answer'
+            elif state['status'] in ('busy', 'no-answer'):
+                session.outcome = state['status'].replace('-', '_')
+            else:
+                session.outcome = 'failed'
+            session.connected_at = session.connected_at or state['start_time']
+            session.recording_url = state.get('recording_url', '')
+            updated.append(session)
+
+        fields = ['outcome', 'ended_at', 'duration_seconds', 'connected_at', 'recording_url']
+        with transaction.atomic():
+            updated = self._still_in_flight(CallSession, updated, outcome='calling')
+            # Recording URL only where we found one, so a webhook-set URL is never blanked
+            with_recording = [session for session in updated if session.recording_url]
+            CallSession.objects.bulk_update(with_recording, fields, batch_size=500)
+            CallSession.objects.bulk_update(
+                [session for session in updated if not session.recording_url], fields[:-1], batch_size=500
+            )
+        call_admission.release_calls(session.twilio_call_sid for session in updated)
+
+        for session in updated:
+            if session.duration_seconds:
+                record_call_usage(
+                    session.ai_agent.client_id, session.twilio_call_sid, session.duration_seconds,
+                    agent_id=session.ai_agent_id
+                )
+        return len(updated)
+
+    def _apply_contacts(self, contacts: Iterable[AutoCampaignContact], states, now) -> int:
+        updated = []
+        for contact in contacts:
+            state = self._final_state(contact.twilio_call_sid, contact.call_started_at, states, now)
+            if state is None:
+                continue
+
+            contact.call_completed_at = state['end_time'] or now
+            contact.call_duration = state['duration']
+            contact.call_outcome = state['status']
+            if state['status'] == 'completed':
+                contact.status = 'completed'
+            else:
+                contact.status = 'failed'
+                contact.failure_reason = f"Twilio status: {state['status']}"
+            contact.claimed_by = ''
+            contact.lease_expires_at = None
+            contact.updated_at = now
+            updated.append(contact)
+
+        with transaction.atomic():
+            updated = self._still_in_flight(AutoCampaignContact, updated, status='calling')
+            AutoCampaignContact.objects.bulk_update(updated, [
+                'status', 'call_completed_at', 'call_duration', 'call_outcome', 'failure_reason',
+                'claimed_by', 'lease_expires_at', 'updated_at'
+            ], batch_size=500)
+        call_admission.release_calls(contact.twilio_call_sid for contact in updated)
+        return len(updated)
+
+    def _apply_inbox_calls(self, calls: Iterable[InboxCallSession], states, now) -> int:
+        updated = []
+        for call in calls:
+            state = self._final_state(call.twilio_call_sid, call.started_at, states, now)
+            if state is None:
+                continue
+
+            call.status = INBOX_STATUS[state['status']]
+            call.ended_at = state['end_time'] or now
+            call.duration = state['duration']
+            if state['status'] == 'completed':
+                call.answered_at = state['start_time']
+            call.twilio_recording_url = state.get('recording_url') or call.twilio_recording_url
+            updated.append(call)
+
+        with transaction.atomic():
+            updated = self._still_in_flight(InboxCallSession, updated, status__in=INBOX_IN_FLIGHT)
+            InboxCallSession.objects.bulk_update(
+                updated, ['status', 'ended_at', 'duration', 'answered_at', 'twilio_recording_url'], batch_size=500
+            )
+        call_admission.release_calls(call.twilio_call_sid for call in updated)
+        refresh_call_stats(call.user_id for call in updated)  # bulk_update skips the post_save counters
+
+        # Agents left 'on_call' by a lost webhook go back to available once they have no live call
+        agent_ids = {call.agent_id for call in updated if call.agent_id}
+        if agent_ids:
+            Agent.objects.filter(id__in=agent_ids, status='on_call').exclude(
+                Q(callsession__status__in=INBOX_IN_FLIGHT)
+            ).update(status='available')
+        return len(updated)
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, F, Value, Case, When, IntegerField
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from datetime import timedelta
+import logging
+import uuid
+
+from .auto_campaign_models import AutoCallCampaign, AutoCampaignContact
+
+logger = logging.getLogger(__name__)
+
+
+def customer_priority_expression(now=None):
+    """
+    Calling priority (1-5) computed in SQL
+    Hot leads 5, warm 3, baqi 1; recent interaction +1; zyada failed calls -1
+    """
+    now = now or timezone.now()
+
+    base = Case(
+        When(interest_level='hot', then=Value(5)),
+        When(interest_level='warm', then=Value(3)),
+        default=Value(1),
+        output_field=IntegerField()
+    )
+    recent_boost = Case(
+        When(last_interaction__gt=now - timedelta(days=7), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    failure_penalty = Case(
+        When(total_calls__gt=F('successful_calls') * 2, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+    return Least(Value(5), Greatest(Value(1), base + recent_boost - failure_penalty))
+
+
+def filtered_customers(agent, filters):
+    """Customers of an agent matching auto campaign filters (max_customers is applied by the caller)"""
+    customers = agent.customer_profiles.filter(is_do_not_call=False)
+
+    # Filter by interest level
+    if filters.get('interest_levels'):
+        customers = customers.filter(interest_level__in=filters['interest_levels'])
+
+    # Filter by last call date
+    if filters.get('days_since_last_call'):
+        days_ago = timezone.now() - timedelta(days=filters['days_since_last_call'])
+        customers = customers.filter(
+            Q(last_interaction__lt=days_ago) | Q(last_interaction__isnull=True)
+        )
+
+    # Filter by call success
+    if filters.get('only_unconverted'):
+        customers = customers.filter(is_converted=False)
+
+    return customers
+
+
+class CampaignEnrollmentService:
+    """
+    Set-based enrollment of customers into an auto call campaign
+    Customers Python mein load kiye baghair database hi mein contacts ban jate hain
+    """
+
+    def __init__(self, campaign: AutoCallCampaign):
+        self.campaign = campaign
+        self.chunk_size = getattr(settings, 'CAMPAIGN_ENROLLMENT_CHUNK_SIZE', 5000)
+
+    def enroll(self) -> int:
+        """Insert one pending contact per matching customer, returns the number enrolled"""
+        now = timezone.now()
+        filters = self.campaign.campaign_data.get('customer_filters', {})
+        limit = filters.get('max_customers', 100)
+        customers = filtered_customers(self.campaign.ai_agent, filters).annotate(
+            enrollment_priority=customer_priority_expression(now)
+        ).values_list('id', 'enrollment_priority')[:limit]
+
+        if connection.vendor == 'postgresql':
+            enrolled = self._insert_select(customers, now)
+        else:
+            enrolled = self._chunked_insert(customers, now)
+
+        AutoCallCampaign.objects.filter(id=self.campaign.id).update(total_contacts=F('total_contacts') + enrolled)
+        self.campaign.refresh_from_db(fields=['total_contacts'])
+        logger.info(f"Enrolled {enrolled} customers into campaign {self.campaign.id}")
+        return enrolled
+
+    def _insert_select(self, customers, now) -> int:
+        """Single INSERT ... SELECT - rows never leave the database"""
+        select_sql, select_params = customers.query.sql_with_params()
+        table = connection.ops.quote_name(AutoCampaignContact._meta.db_table)
+
+        sql = f"""
+            INSERT INTO {table} (
+                id, campaign_id, customer_profile_id, priority, status, scheduled_datetime,
+                call_outcome, call_duration, failure_reason, twilio_call_sid, attempts,
+                claimed_by, created_at, updated_at
+            )
+            SELECT
+                gen_random_uuid(), %s, enrollment.id, enrollment.enrollment_priority, 'pending', %s,
+                '', 0, '', '', 0,
+                '', %s, %s
+            FROM ({select_sql}) AS enrollment
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [self.campaign.id, now, now, now, *select_params])
+            return cursor.rowcount
+
+    def _chunked_insert(self, customers, now) -> int:
+        """Portable fallback - stream (id, priority) pairs and bulk insert in chunks"""
+        enrolled = 0
+        batch = []
+
+        with transaction.atomic():
+            for customer_id, priority in customers.iterator(chunk_size=self.chunk_size):
+                batch.append(AutoCampaignContact(
+                    id=uuid.uuid4(),
+                    campaign_id=self.campaign.id,
+                    customer_profile_id=customer_id,
+                    status='pending',
+                    priority=priority,
+                    scheduled_datetime=now
+                ))
+                if len(batch) >= self.chunk_size:
+                    AutoCampaignContact.objects.bulk_create(batch)
+                    enrolled += len(batch)
+                    batch = []
+
+            if batch:
+                AutoCampaignContact.objects.bulk_create(batch)
+                enrolled += len(batch)
+
+        return enrolled
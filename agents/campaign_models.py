@@ -122,6 +122,9 @@ class CampaignContact(models.Model):
     class Meta:
         unique_together = ['campaign', 'customer_profile']
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['campaign', 'call_status', 'next_attempt_at'], name='campcontact_dispatch_idx'),
+        ]
     
     def __str__(self):
         return f"{self.campaign.name} - {self.customer_profile.name}"
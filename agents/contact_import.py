@@ -0,0 +1,258 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+import csv
+import io
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .ai_agent_models import CustomerProfile
+from .contact_import_models import ContactImport
+from .phone_numbers import normalize_phone_number
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_ERRORS = 50
+UPSERT_ATTEMPTS = 3
+
+
+class ContactImportService:
+    """
+    Streaming CSV/XLSX contact import
+    File ko rows mein padh kar chunks mein CustomerProfile upsert karta hai
+    """
+
+    # Expected columns: Name, Phone, Email, Notes, Preferred Time
+    CALL_PREFERENCES = {choice for choice, _ in CustomerProfile.CALL_PREFERENCES}
+
+    def __init__(self, contact_import: ContactImport):
+        self.contact_import = contact_import
+        self.chunk_size = getattr(settings, 'CONTACT_IMPORT_CHUNK_SIZE', 1000)
+        self.seen_phones = set()
+
+    def run(self):
+        """Process the whole file, saving progress after every chunk"""
+        contact_import = self.contact_import
+        contact_import.status = 'processing'
+        contact_import.started_at = timezone.now()
+        contact_import.save(update_fields=['status', 'started_at'])
+
+        try:
+            with default_storage.open(contact_import.file_path, 'rb') as file:
+                contact_import.total_rows = self._count_rows(file)
+                contact_import.save(update_fields=['total_rows'])
+
+                chunk = []
+                for row_num, row in self._iter_rows(file):
+                    contact = self._parse_row(row_num, row)
+                    if contact:
+                        chunk.append(contact)
+                    contact_import.processed_rows += 1
+
+                    if len(chunk) >= self.chunk_size:
+                        self._upsert_chunk(chunk)
+                        chunk = []
+                        self._save_progress()
+
+                if chunk:
+                    self._upsert_chunk(chunk)
+
+            contact_import.status = 'completed'
+        except Exception as e:
+            logger.error(f"Contact import {contact_import.id} failed: {str(e)}")
+            contact_import.status = 'failed'
+            self._add_error(f'File processing error: {str(e)}')
+        finally:
+            contact_import.completed_at = timezone.now()
+            contact_import.save()
+            default_storage.delete(contact_import.file_path)
+
+        return contact_import
+
+    def _iter_rows(self, file) -> Iterator:
+        if self.contact_import.file_type == 'xlsx':
+            return self._iter_xlsx_rows(file)
+        return self._iter_csv_rows(file)
+
+    def _iter_csv_rows(self, file) -> Iterator:
+        """Read CSV incrementally - never loads the whole file into memory"""
+        file.seek(0)
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            for row_num, row in enumerate(csv.DictReader(text), start=1):
+                yield row_num, row
+        finally:
+            text.detach()
+
+    def _iter_xlsx_rows(self, file) -> Iterator:
+        """Read the first worksheet in openpyxl read-only (streaming) mode"""
+        from openpyxl import load_workbook
+
+        file.seek(0)
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else '' for cell in next(rows, [])]
+            for row_num, values in enumerate(rows, start=1):
+                yield row_num, {
+                    column: '' if value is None else str(value)
+                    for column, value in zip(header, values)
+                }
+        finally:
+            workbook.close()
+
+    def _count_rows(self, file) -> int:
+        """Cheap row count for progress reporting"""
+        if self.contact_import.file_type == 'xlsx':
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(file, read_only=True)
+            try:
+                return max(0, (workbook.worksheets[0].max_row or 1) - 1)
+            finally:
+                workbook.close()
+
+        # Parsed like _iter_csv_rows, so quoted newlines and blank lines don't inflate the total
+        file.seek(0)
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            return max(0, sum(1 for row in csv.reader(text) if row) - 1)
+        finally:
+            text.detach()
+
+    def _parse_row(self, row_num: int, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate and normalize a single row, deduping within the file"""
+        name = (row.get('Name') or '').strip()
+        raw_phone = (row.get('Phone') or '').strip()
+
+        if not name or not raw_phone:
+            self.contact_import.invalid_rows += 1
+            self._add_error(f'Row {row_num}: Name and Phone are required')
+            return None
+
+        phone = normalize_phone_number(raw_phone)
+        if not phone:
+            self.contact_import.invalid_rows += 1
+            self._add_error(f'Row {row_num}: Invalid phone number "{raw_phone}"')
+            return None
+
+        if phone in self.seen_phones:
+            self.contact_import.duplicates_skipped += 1
+            return None
+        self.seen_phones.add(phone)
+
+        preferred_time = (row.get('Preferred Time') or '').strip().lower()
+
+        return {
+            'name': name[:100],
+            'phone_number': phone,
+            'email': (row.get('Email') or '').strip()[:254],
+            'notes': (row.get('Notes') or '').strip(),
+            'call_preference_time': preferred_time if preferred_time in self.CALL_PREFERENCES else 'anytime',
+        }
+
+    def _upsert_chunk(self, chunk: List[Dict[str, Any]]):
+        """
+        Insert new contacts and update existing ones in a couple of statements
+        Ek chunk ke liye sirf 1 lookup aur 1-2 upserts
+        """
+        for attempt in range(1, UPSERT_ATTEMPTS + 1):
+            with_email, without_email, created, updated, foreign = self._plan_chunk(chunk)
+            try:
+                # Savepoint, so a lost race rolls back only this chunk's upserts
+                with transaction.atomic():
+                    self._write_chunk(with_email, without_email)
+            except IntegrityError as e:
+                # Another import or API call inserted one of these numbers after the owner lookup
+                logger.warning(f"Contact import {self.contact_import.id} chunk conflicted (attempt {attempt}): {str(e)}")
+                continue
+
+            self.contact_import.contacts_created += created
+            self.contact_import.contacts_updated += updated
+            self.contact_import.invalid_rows += len(foreign)
+            for phone in foreign:
+                self._add_error(f'{phone}: belongs to another account')
+            return
+
+        self.contact_import.invalid_rows += len(chunk)
+        self._add_error(f'{len(chunk)} contacts skipped: kept conflicting with concurrent changes')
+
+    def _plan_chunk(self, chunk: List[Dict[str, Any]]) -> Tuple[List[CustomerProfile], List[CustomerProfile], int, int, List[str]]:
+        """(with_email, without_email, created, updated, foreign phones) from the owners as they are right now"""
+        agent = self.contact_import.ai_agent
+        phones = [contact['phone_number'] for contact in chunk]
+
+        # phone_number is unique across all agents - never touch another account's customer.
+        # Matched on the canonical column, so '+1 (555) 010-2030' already on file is the same contact
+        owners = {}
+        stored_as = {}
+        for stored, canonical, owner in CustomerProfile.objects.filter(
+            Q(phone_e164__in=phones) | Q(phone_number__in=phones)
+        ).values_list('phone_number', 'phone_e164', 'ai_agent_id'):
+            key = canonical or stored
+            owners[key] = owner
+            stored_as[key] = stored
+
+        with_email, without_email, foreign = [], [], []
+        created = updated = 0
+        uploaded_at = timezone.now().isoformat()
+
+        for contact in chunk:
+            owner = owners.get(contact['phone_number'])
+            if owner is not None and owner != agent.id:
+                foreign.append(contact['phone_number'])
+                continue
+
+            if owner is None:
+                created += 1
+            else:
+                updated += 1
+
+            profile = CustomerProfile(
+                ai_agent=agent,
+                # Existing rows keep their stored number so the upsert hits the same unique key
+                phone_number=stored_as.get(contact['phone_number'], contact['phone_number']),
+                phone_e164=contact['phone_number'],
+                name=contact['name'],
+                email=contact['email'],
+                call_preference_time=contact['call_preference_time'],
+                interest_level='cold',
+                conversation_notes={
+                    'initial_notes': contact['notes'],
+                    'source': 'contact_upload',
+                    'uploaded_at': uploaded_at
+                }
+            )
+            (with_email if contact['email'] else without_email).append(profile)
+
+        return with_email, without_email, created, updated, foreign
+
+    def _write_chunk(self, with_email: List[CustomerProfile], without_email: List[CustomerProfile]):
+        # Blank emails in the file must not wipe emails we already have
+        update_fields = ['name', 'call_preference_time', 'phone_e164', 'updated_at']
+        if with_email:
+            CustomerProfile.objects.bulk_create(
+                with_email,
+                update_conflicts=True,
+                unique_fields=['ai_agent', 'phone_number'],
+                update_fields=update_fields + ['email']
+            )
+        if without_email:
+            CustomerProfile.objects.bulk_create(
+                without_email,
+                update_conflicts=True,
+                unique_fields=['ai_agent', 'phone_number'],
+                update_fields=update_fields
+            )
+
+    def _save_progress(self):
+        self.contact_import.save(update_fields=[
+            'processed_rows', 'contacts_created', 'contacts_updated',
+            'duplicates_skipped', 'invalid_rows', 'errors'
+        ])
+
+    def _add_error(self, message: str):
+        if len(self.contact_import.errors) < MAX_STORED_ERRORS:
+            self.contact_import.errors.append(message)
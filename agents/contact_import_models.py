@@ -0,0 +1,63 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+import uuid
+
+User = get_user_model()
+
+
+class ContactImport(models.Model):
+    """
+    Background contact list import (CSV/XLSX) with progress tracking
+    Upload ke baad Celery job contacts import karta hai
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    FILE_TYPES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contact_imports')
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, related_name='contact_imports')
+
+    # Uploaded file
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, help_text="Path in default storage")
+    file_type = models.CharField(max_length=10, choices=FILE_TYPES, default='csv')
+
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+
+    # Results
+    contacts_created = models.IntegerField(default=0)
+    contacts_updated = models.IntegerField(default=0)
+    duplicates_skipped = models.IntegerField(default=0)
+    invalid_rows = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, help_text="First errors encountered, for display")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'contact_imports'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} - {self.status}"
+
+    @property
+    def progress_percentage(self):
+        if self.status == 'completed':
+            return 100
+        if self.total_rows > 0:
+            return min(99, round((self.processed_rows / self.total_rows) * 100, 1))
+        return 0
@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.db import transaction, models
+from django.db.models.functions import Coalesce
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from datetime import datetime, timedelta
@@ -12,6 +13,10 @@ from datetime import datetime, timedelta
 from .ai_agent_models import (
     AIAgent, CustomerProfile, CallSession, ScheduledCallback
 )
+from .customer_search import lean_customers, search_customers
+from .phone_numbers import match_customer
+from core.pagination import KeysetPaginator
+from dashboard.aggregates import customer_summary_aggregates
 
 User = get_user_model()
 
@@ -34,7 +39,9 @@ class CustomerProfileCRUDAPIView(generics.ListCreateAPIView):
         parameters=[
             openapi.Parameter('interest_level', openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter('converted', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Search by name or phone'),
+            openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Search by name, email or phone (ranked)'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Opaque cursor from a previous page'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
         ],
         responses={200: "List of customer profiles"},
         tags=['AI Agents']
@@ -51,15 +58,21 @@ class CustomerProfileCRUDAPIView(generics.ListCreateAPIView):
             customers = customers.filter(interest_level=interest_level)
         if converted is not None:
             customers = customers.filter(is_converted=converted.lower() == 'true')
+        
         if search:
-            customers = customers.filter(
-                models.Q(name__icontains=search) | 
-                models.Q(phone_number__icontains=search) |
-                models.Q(email__icontains=search)
+            customers, ordering = search_customers(customers, search)
+        else:
+            # Most recent interaction first; never-contacted customers by creation time
+            customers = lean_customers(customers).annotate(
+                activity=Coalesce('last_interaction', 'created_at')
             )
+            ordering = ('-activity', '-id')
+        
+        summary = customers.order_by().aggregate(**customer_summary_aggregates())
+        page, pagination = KeysetPaginator(ordering).paginate(customers, request)
         
         customers_data = []
-        for customer in customers:
+        for customer in page:
             customers_data.append({
                 'id': str(customer.id),
                 'phone_number': customer.phone_number,
@@ -75,22 +88,14 @@ class CustomerProfileCRUDAPIView(generics.ListCreateAPIView):
                 'is_converted': customer.is_converted,
                 'conversion_date': customer.conversion_date.isoformat() if customer.conversion_date else None,
                 'is_do_not_call': customer.is_do_not_call,
-                'created_at': customer.created_at.isoformat(),
-                'conversation_notes': customer.conversation_notes,
-                'preferences': customer.preferences
+                'created_at': customer.created_at.isoformat()
             })
         
         return Response({
             'customers': customers_data,
-            'total_count': len(customers_data),
-            'summary': {
-                'total': customers.count(),
-                'hot_leads': customers.filter(interest_level='hot').count(),
-                'warm_leads': customers.filter(interest_level='warm').count(),
-                'cold_leads': customers.filter(interest_level='cold').count(),
-                'converted': customers.filter(is_converted=True).count(),
-                'do_not_call': customers.filter(is_do_not_call=True).count()
-            }
+            'total_count': summary['total'],
+            'pagination': pagination,
+            'summary': summary
         }, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
@@ -129,8 +134,9 @@ class CustomerProfileCRUDAPIView(generics.ListCreateAPIView):
         data = request.data
         phone_number = data.get('phone_number')
         
-        # Check if customer already exists
-        if CustomerProfile.objects.filter(ai_agent=agent, phone_number=phone_number).exists():
+        # Check if customer already exists, in any formatting of the number
+        if CustomerProfile.objects.filter(ai_agent=agent, phone_number=phone_number).exists() or \
+                match_customer(phone_number, ai_agent=agent) is not None:
             return Response({
                 'error': 'Customer with this phone number already exists',
                 'phone_number': phone_number
@@ -171,6 +177,52 @@ class CustomerProfileCRUDAPIView(generics.ListCreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CustomerSearchAPIView(APIView):
+    """
+    Customer type-ahead - ranked matches on name, email or phone digits
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description='Name, email or phone fragment'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Opaque cursor from a previous page'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: "Ranked customer matches"},
+        tags=['AI Agents']
+    )
+    def get(self, request):
+        try:
+            agent = request.user.ai_agent
+        except AIAgent.DoesNotExist:
+            return Response({
+                'error': 'No AI Agent found. Please create an AI Agent first.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        customers, ordering = search_customers(CustomerProfile.objects.filter(ai_agent=agent), query)
+        page, pagination = KeysetPaginator(ordering).paginate(customers, request)
+        
+        return Response({
+            'results': [
+                {
+                    'id': str(customer.id),
+                    'name': customer.name or 'Unknown',
+                    'phone_number': customer.phone_number,
+                    'email': customer.email,
+                    'interest_level': customer.interest_level,
+                    'is_do_not_call': customer.is_do_not_call,
+                    'last_interaction': customer.last_interaction.isoformat() if customer.last_interaction else None,
+                } for customer in page
+            ],
+            'pagination': pagination
+        }, status=status.HTTP_200_OK)
+
+
 class CustomerProfileDetailAPIView(APIView):
     """
     Detailed CRUD operations for specific customer profile
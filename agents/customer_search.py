@@ -0,0 +1,148 @@
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+import logging
+import re
+from typing import Tuple
+
+from .ai_agent_models import CustomerProfile
+
+logger = logging.getLogger(__name__)
+
+TABLE = CustomerProfile._meta.db_table
+FTS_TABLE = 'customer_search_fts'
+
+# Trigram indexes need at least this many characters; shorter queries use the prefix indexes
+MIN_TRIGRAM_LENGTH = 3
+
+PHONE_QUERY = re.compile(r'^[\d\s+().-]+$')
+
+# Columns a search result / list row actually needs (no notes / preferences JSON)
+LEAN_FIELDS = [
+    'id', 'ai_agent', 'phone_number', 'name', 'email', 'interest_level', 'communication_style',
+    'call_preference_time', 'total_calls', 'successful_calls', 'last_interaction', 'next_followup',
+    'is_converted', 'conversion_date', 'is_do_not_call', 'created_at',
+]
+
+
+def ensure_search_index(using: str = 'default'):
+    """
+    Create the customer search index if it is missing - run after every migrate
+    PostgreSQL: pg_trgm GIN index on search_document, plus pattern_ops btrees so the short-query
+    prefix LIKEs can seek under any collation
+    SQLite: FTS5 trigram table kept in sync by triggers (rebuilt whenever the triggers are gone,
+    e.g. after a migration recreated customer_profiles)
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if TABLE not in connection.introspection.table_names(cursor):
+            return
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+        if 'search_document' not in columns:
+            return
+
+        if connection.vendor == 'postgresql':
+            try:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS customer_search_trgm_idx '
+                    f'ON {TABLE} USING gin (search_document gin_trgm_ops)'
+                )
+            except Exception as e:
+                logger.warning(f"pg_trgm customer search index unavailable, search will scan: {str(e)}")
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS customer_name_prefix_idx '
+                f'ON {TABLE} (ai_agent_id, lower(name) text_pattern_ops)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS customer_phone_prefix_idx '
+                f'ON {TABLE} (ai_agent_id, phone_digits varchar_pattern_ops)'
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+                "('customer_search_insert', 'customer_search_update', 'customer_search_delete')"
+            )
+            if cursor.fetchone()[0] == 3:
+                return
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+            cursor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, tokenize='trigram')")
+            cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, document) SELECT rowid, search_document FROM {TABLE}')
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS customer_search_insert AFTER INSERT ON {TABLE} BEGIN '
+                f'INSERT INTO {FTS_TABLE}(rowid, document) VALUES (NEW.rowid, NEW.search_document); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS customer_search_update AFTER UPDATE OF name, email, phone_number '
+                f'ON {TABLE} BEGIN '
+                f'UPDATE {FTS_TABLE} SET document = NEW.search_document WHERE rowid = NEW.rowid; END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS customer_search_delete AFTER DELETE ON {TABLE} BEGIN '
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = OLD.rowid; END'
+            )
+
+
+def rebuild_search_index(sender=None, using: str = 'default', **kwargs):
+    """post_migrate hook"""
+    ensure_search_index(using)
+
+
+class CustomerSearch:
+    """
+    Ranked customer type-ahead over name, email and phone digits
+    Exact phone > name / phone prefix > anywhere match; trigram index se candidates, ranking SQL mein
+    """
+
+    ordering = ('rank', 'name', 'id')
+
+    def __init__(self, query: str):
+        self.raw = (query or '').strip()
+        self.name_prefix = self.raw.lower()
+        self.digits = re.sub(r'\D', '', self.raw) if PHONE_QUERY.match(self.raw) else ''
+        # Phone-like queries match the digits-only form stored in the index
+        self.term = self.digits or self.raw.lower()
+
+    def apply(self, customers: QuerySet) -> QuerySet:
+        """Filter `customers` to matches and annotate `rank` (lower is better)"""
+        if not self.term:
+            return customers.annotate(rank=Value(0, output_field=IntegerField()))
+
+        # lower(name) LIKE 'term%' matches the customer_name_prefix_idx expression (istartswith would be UPPER())
+        customers = customers.annotate(name_lower=Lower('name'))
+        if len(self.term) < MIN_TRIGRAM_LENGTH:
+            prefix = Q(name_lower__startswith=self.name_prefix)
+            if self.digits:
+                prefix |= Q(phone_digits__startswith=self.digits)
+            customers = customers.filter(prefix)
+        else:
+            customers = self._contains(customers)
+
+        ranks = []
+        if self.digits:
+            ranks.append(When(phone_digits=self.digits, then=Value(0)))
+            ranks.append(When(phone_digits__startswith=self.digits, then=Value(1)))
+        ranks.append(When(name_lower__startswith=self.name_prefix, then=Value(1)))
+        return customers.annotate(rank=Case(*ranks, default=Value(2), output_field=IntegerField()))
+
+    def _contains(self, customers: QuerySet) -> QuerySet:
+        vendor = connections[customers.db].vendor
+        if vendor == 'sqlite':
+            # Quoted FTS5 phrase - trigram tokenizer turns it into a substring match
+            phrase = '"' + self.term.replace('"', '""') + '"'
+            return customers.annotate(search_rowid=RawSQL(f'{TABLE}.rowid', [])).filter(
+                search_rowid__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [phrase])
+            )
+        # PostgreSQL: LIKE '%term%' is served by the pg_trgm GIN index
+        return customers.filter(search_document__contains=self.term)
+
+
+def lean_customers(customers: QuerySet) -> QuerySet:
+    return customers.only(*LEAN_FIELDS)
+
+
+def search_customers(customers: QuerySet, query: str) -> Tuple[QuerySet, Tuple[str, ...]]:
+    """Ranked, lean queryset for `query` plus the keyset ordering to page it with"""
+    search = CustomerSearch(query)
+    return lean_customers(search.apply(customers)), search.ordering
@@ -0,0 +1,220 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F
+from django.utils import timezone
+import logging
+import math
+import os
+import socket
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from .auto_campaign_models import AutoCallCampaign, AutoCampaignContact
+from .call_admission import call_admission
+from .pacing import CampaignPacer
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignDialer:
+    """
+    Concurrent outbound dialer for auto call campaigns
+    Har tick par sab active campaigns ke contacts bounded worker pool mein dial karta hai
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or getattr(settings, 'DIALER_MAX_WORKERS', 20)
+        self.lease_seconds = getattr(settings, 'DIALER_LEASE_SECONDS', 300)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.call_timeout_minutes = getattr(settings, 'DIALER_CALL_TIMEOUT_MINUTES', 30)
+        self.pacer = CampaignPacer()
+
+    def run_tick(self) -> Dict[str, Any]:
+        """
+        Dial every due contact across all active campaigns
+        Ek beat tick ka poora kaam - plan, fan-out, aur stats report
+        """
+        tick_started = time.monotonic()
+        now = timezone.now()
+
+        # Contacts leased by a worker that died before dialing go back to the pool
+        reclaimed = AutoCampaignContact.objects.reclaim_expired(now)
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} contacts with expired dialer leases")
+
+        campaigns = list(
+            AutoCallCampaign.objects.filter(status='active')
+            .select_related('ai_agent__client__subscription__plan')
+        )
+        campaigns = [campaign for campaign in campaigns if self._is_within_working_hours(campaign, now)]
+
+        batches = self._plan_batches(campaigns, now)
+        contacts = [contact for _, batch in batches for contact in batch]
+
+        results = self.dial_contacts(contacts)
+        stats = self._build_stats(results, tick_started)
+        stats['campaigns_processed'] = len(batches)
+        stats['contacts_reclaimed'] = reclaimed
+
+        logger.info(
+            f"Dialer tick completed: {stats['calls_started']} started, {stats['calls_failed']} failed, "
+            f"{stats['calls_requeued']} requeued "
+            f"across {stats['campaigns_processed']} campaigns in {stats['duration_seconds']}s "
+            f"({stats['calls_per_second']} calls/s, p95 dial latency {stats['p95_dial_latency_ms']}ms)"
+        )
+        return stats
+
+    def start_immediate_calls(self, campaign: AutoCallCampaign, count: int) -> int:
+        """Claim and dial up to `count` contacts of one campaign right now, returns calls started"""
+        contacts = campaign.contacts.claim_batch(self.worker_id, count, self.lease_seconds)
+        results = self.dial_contacts(contacts)
+        return sum(1 for success, _ in results if success)
+
+    def dial_contacts(self, contacts: List[AutoCampaignContact]) -> List[Tuple[Optional[bool], float]]:
+        """
+        Fan contacts out across the worker pool
+        Har contact ka (success, latency_ms) result wapas karta hai - success None matlab requeue hua
+        """
+        if not contacts:
+            return []
+
+        # Plan limits resolved once per account, before the worker threads start
+        limits = {}
+        for contact in contacts:
+            account = contact.campaign.ai_agent.client
+            if account.pk not in limits:
+                limits[account.pk] = call_admission.limit_for(account)
+
+        workers = min(self.max_workers, len(contacts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dialer') as executor:
+            return list(executor.map(
+                lambda contact: self._dial_contact(contact, limits[contact.campaign.ai_agent.client_id]), contacts
+            ))
+
+    def _dial_contact(self, contact: AutoCampaignContact, concurrent_limit: int) -> Tuple[Optional[bool], float]:
+        """Dial a single contact inside a worker thread"""
+        from .auto_call_system import AutoCallCampaignAPIView
+
+        started = time.monotonic()
+        account_id = contact.campaign.ai_agent.client_id
+        slot = None
+        try:
+            slot = call_admission.acquire(account_id, concurrent_limit)
+            if slot is None:
+                # Another dial path took the capacity since planning - retry on a later tick
+                self._requeue(contact)
+                return None, (time.monotonic() - started) * 1000
+
+            success = AutoCallCampaignAPIView()._initiate_call(contact)
+            if success:
+                call_admission.bind(account_id, slot, contact.twilio_call_sid)
+                logger.info(f"Started auto call for {contact.customer_profile.phone_number}")
+            else:
+                call_admission.release(account_id, slot)
+            return success, (time.monotonic() - started) * 1000
+        except Exception as e:
+            logger.error(f"Failed to start call for contact {contact.id}: {str(e)}")
+            call_admission.release(account_id, slot)
+            contact.status = 'failed'
+            contact.failure_reason = str(e)[:200]
+            contact.claimed_by = ''
+            contact.lease_expires_at = None
+            contact.save(update_fields=['status', 'failure_reason', 'claimed_by', 'lease_expires_at', 'updated_at'])
+            return False, (time.monotonic() - started) * 1000
+        finally:
+            # Worker threads get their own DB connection; release it after each dial
+            connection.close()
+
+    def _requeue(self, contact: AutoCampaignContact):
+        """Undo the claim without counting it as an attempt, and give its pacing token back"""
+        requeued = AutoCampaignContact.objects.filter(id=contact.id, claimed_by=contact.claimed_by).update(
+            status='pending',
+            claimed_by='',
+            lease_expires_at=None,
+            call_started_at=None,
+            attempts=F('attempts') - 1,
+            updated_at=timezone.now()
+        )
+        if requeued:
+            self.pacer.refund(contact.campaign, 1)
+
+    def _plan_batches(self, campaigns: List[AutoCallCampaign], now: datetime) -> List[Tuple[AutoCallCampaign, List[AutoCampaignContact]]]:
+        """
+        Lease due contacts per campaign within pacing and concurrency caps
+        Account ki limit call admission ke live counter se, campaign ki apni live calls se respect karta hai
+        """
+        if not campaigns:
+            return []
+
+        in_flight = self._in_flight_by_campaign(campaigns, now)
+        account_limit = {}
+        account_budget = {}
+        batches = []
+
+        for campaign in campaigns:
+            try:
+                account_id = campaign.ai_agent.client_id
+                if account_id not in account_budget:
+                    # Live calls from every dial path, not just this dialer's contacts
+                    account_limit[account_id] = call_admission.limit_for(campaign.ai_agent.client)
+                    account_budget[account_id] = max(0, account_limit[account_id] - call_admission.in_flight(account_id))
+
+                # Admission slots expire on a TTL; a campaign's own ringing contacts still count against it
+                campaign_capacity = max(0, account_limit[account_id] - in_flight.get(campaign.id, 0))
+                limit = min(account_budget[account_id], campaign_capacity)
+
+                # Pacing tokens decide how many of those slots this tick may use
+                granted = self.pacer.acquire(campaign, limit, now)
+                if granted <= 0:
+                    continue
+
+                contacts = campaign.contacts.claim_batch(self.worker_id, granted, self.lease_seconds, now)
+                self.pacer.refund(campaign, granted - len(contacts))
+                if not contacts:
+                    continue
+
+                account_budget[account_id] -= len(contacts)
+                batches.append((campaign, contacts))
+
+            except Exception as e:
+                logger.error(f"Error processing campaign {campaign.id}: {str(e)}")
+
+        return batches
+
+    def _in_flight_by_campaign(self, campaigns: List[AutoCallCampaign], now: datetime) -> Dict[Any, int]:
+        """Count calls still ringing or connected, per campaign, in one query"""
+        rows = AutoCampaignContact.objects.filter(
+            campaign__in=campaigns,
+            status='calling',
+            call_started_at__gte=now - timedelta(minutes=self.call_timeout_minutes)
+        ).values('campaign_id').annotate(total=Count('id'))
+        return {row['campaign_id']: row['total'] for row in rows}
+
+    def _is_within_working_hours(self, campaign: AutoCallCampaign, now: datetime) -> bool:
+        try:
+            start_time = datetime.strptime(campaign.working_hours_start, '%H:%M').time()
+            end_time = datetime.strptime(campaign.working_hours_end, '%H:%M').time()
+        except ValueError:
+            logger.error(f"Invalid working hours for campaign {campaign.id}")
+            return False
+        return start_time <= now.time() <= end_time
+
+    def _build_stats(self, results: List[Tuple[Optional[bool], float]], tick_started: float) -> Dict[str, Any]:
+        """Throughput and dial latency for one tick"""
+        duration = time.monotonic() - tick_started
+        latencies = sorted(latency for _, latency in results)
+        calls_started = sum(1 for success, _ in results if success)
+        calls_requeued = sum(1 for success, _ in results if success is None)
+
+        return {
+            'calls_started': calls_started,
+            'calls_failed': len(results) - calls_started - calls_requeued,
+            'calls_requeued': calls_requeued,
+            'duration_seconds': round(duration, 3),
+            'calls_per_second': round(len(results) / duration, 2) if duration > 0 else 0,
+            'avg_dial_latency_ms': round(sum(latencies) / len(latencies), 1) if latencies else 0,
+            'p95_dial_latency_ms': round(latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)], 1) if latencies else 0,
+            'max_dial_latency_ms': round(latencies[-1], 1) if latencies else 0,
+        }
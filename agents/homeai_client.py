@@ -0,0 +1,350 @@
+from abc import ABC, abstractmethod
+from django.conf import settings
+import asyncio
+import bisect
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in milliseconds (last bucket is +Inf)
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Provider throttling / overload - safe to retry, the request was not processed
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class HomeAIUnavailable(Exception):
+    """Circuit open or concurrency limit reached - the request was not sent"""
+
+
+class LatencyHistogram:
+    """Per-method latency histogram, in-process (each worker reports its own)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, method: str, seconds: float, ok: bool):
+        with self._lock:
+            stats = self._methods.setdefault(method, {
+                'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1), 'count': 0, 'errors': 0, 'sum_ms': 0.0
+            })
+            ms = seconds * 1000
+            stats['buckets'][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+            stats['count'] += 1
+            stats['sum_ms'] += ms
+            if not ok:
+                stats['errors'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {}
+            for method, stats in self._methods.items():
+                labels = [f'le_{bound}' for bound in LATENCY_BUCKETS_MS] + ['le_inf']
+                snapshot[method] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['sum_ms'] / stats['count'], 1) if stats['count'] else None,
+                    'buckets_ms': dict(zip(labels, stats['buckets'])),
+                }
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker: opens after N consecutive failures, lets one trial request through after the cool-down
+    HumeAI ka ek slow endpoint baqi calls ko nahi rokta
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_running: Dict[str, bool] = {}
+
+    def allow(self, endpoint: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.reset_seconds or self._trial_running.get(endpoint):
+                return False
+            self._trial_running[endpoint] = True  # Half-open
+            return True
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._failures.pop(endpoint, None)
+            self._opened_at.pop(endpoint, None)
+            self._trial_running.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            self._trial_running.pop(endpoint, None)
+            if failures >= self.failure_threshold or endpoint in self._opened_at:
+                if endpoint not in self._opened_at:
+                    logger.warning(f"HomeAI circuit opened for '{endpoint}' after {failures} failures")
+                self._opened_at[endpoint] = time.monotonic()
+
+    def state(self, endpoint: str) -> str:
+        with self._lock:
+            if endpoint not in self._opened_at:
+                return 'closed'
+            if time.monotonic() - self._opened_at[endpoint] < self.reset_seconds:
+                return 'open'
+            return 'half_open'
+
+    def states(self) -> Dict[str, str]:
+        """Endpoints with recent failures and their state"""
+        with self._lock:
+            endpoints = list(self._failures)
+        return {endpoint: self.state(endpoint) for endpoint in endpoints}
+
+
+class _HomeAIClientBase(ABC):
+    """Shared policy for the sync and async clients - timeouts, retries, breaker, metrics"""
+
+    def __init__(self, base_url: Optional[str] = None, breaker: Optional[CircuitBreaker] = None,
+                 histogram: Optional[LatencyHistogram] = None):
+        self.base_url = (base_url or getattr(settings, 'HOMEAI_BASE_URL', 'https://api.homeai.com/v1')).rstrip('/')
+        self.max_retries = settings.HOMEAI_MAX_RETRIES
+        self.retry_backoff = settings.HOMEAI_RETRY_BACKOFF
+        self.max_concurrency = settings.HOMEAI_MAX_CONCURRENCY
+        self.breaker = breaker or CircuitBreaker(settings.HOMEAI_BREAKER_FAILURES, settings.HOMEAI_BREAKER_RESET_SECONDS)
+        self.histogram = histogram or LatencyHistogram()
+
+    def timeout_for(self, endpoint: str) -> float:
+        timeouts = settings.HOMEAI_TIMEOUTS
+        return timeouts.get(endpoint, timeouts['default'])
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter so retries from many workers don't arrive together
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _should_retry(self, method: str, endpoint: str, attempt: int, response=None, error: Exception = None) -> bool:
+        if attempt >= self.max_retries or self.breaker.state(endpoint) == 'open':
+            return False
+        if response is not None:
+            return response.status_code in RETRY_STATUSES
+        # A read timeout on a POST may already have been processed - only retry failed connects
+        return method == 'GET' or self._is_connect_error(error)
+
+    @abstractmethod
+    def _is_connect_error(self, error: Exception) -> bool:
+        """True when the request never reached HomeAI (connect failed / timed out), so even a POST is safe to retry"""
+
+    def _check_circuit(self, endpoint: str):
+        if not self.breaker.allow(endpoint):
+            raise HomeAIUnavailable(f"HomeAI circuit open for '{endpoint}'")
+
+    def _record(self, endpoint: str, started: float, response=None):
+        ok = response is not None and response.status_code < 500
+        self.histogram.observe(endpoint, time.monotonic() - started, ok)
+        if ok:
+            self.breaker.record_success(endpoint)
+        else:
+            self.breaker.record_failure(endpoint)
+
+
+class HomeAIClient(_HomeAIClientBase):
+    """
+    Keep-alive HTTP client for HomeAI
+    Ek shared connection pool - har conversation turn par naya TCP/TLS handshake nahi
+    """
+
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.HOMEAI_POOL_SIZE, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def get(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', endpoint, path, **kwargs)
+
+    def post(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', endpoint, path, **kwargs)
+
+    def request(self, method: str, endpoint: str, path: str, **kwargs) -> requests.Response:
+        """
+        One logical call with retries; `endpoint` names the timeout, breaker and histogram entry
+        Raises HomeAIUnavailable or the last requests error when every attempt failed
+        """
+        if not self._slots.acquire(timeout=settings.HOMEAI_CONNECT_TIMEOUT):
+            raise HomeAIUnavailable(f"HomeAI concurrency limit ({self.max_concurrency}) reached")
+
+        try:
+            # Breaker after the slot: a half-open trial that is let through always reaches _record
+            self._check_circuit(endpoint)
+            timeout = (settings.HOMEAI_CONNECT_TIMEOUT, self.timeout_for(endpoint))
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                try:
+                    response = self.session.request(method, self._url(path), timeout=timeout, **kwargs)
+                except requests.RequestException as e:
+                    self._record(endpoint, started)
+                    if not self._should_retry(method, endpoint, attempt, error=e):
+                        raise
+                else:
+                    self._record(endpoint, started, response)
+                    if not self._should_retry(method, endpoint, attempt, response=response):
+                        return response
+
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self.session.close()
+
+    def _is_connect_error(self, error: Exception) -> bool:
+        """
+        True only when the connection was never established
+        A dropped keep-alive (RemoteDisconnected) is also a ConnectionError, but the request may have been processed
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.ConnectionError) or not error.args:
+            return False
+        reason = error.args[0]
+        # With max_retries=0 urllib3 wraps connect failures in MaxRetryError
+        reason = getattr(reason, 'reason', reason)
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class AsyncHomeAIClient(_HomeAIClientBase):
+    """
+    httpx.AsyncClient variant for async callers (ASGI views, media bridges)
+    Same timeouts, retries and breaker as HomeAIClient
+    """
+
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._client = None
+        self._slots = None
+
+    async def get(self, endpoint: str, path: str, **kwargs):
+        return await self.request('GET', endpoint, path, **kwargs)
+
+    async def post(self, endpoint: str, path: str, **kwargs):
+        return await self.request('POST', endpoint, path, **kwargs)
+
+    async def request(self, method: str, endpoint: str, path: str, **kwargs):
+        import httpx
+
+        client = self._get_client()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=settings.HOMEAI_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HomeAIUnavailable(f"HomeAI concurrency limit ({self.max_concurrency}) reached")
+
+        try:
+            self._check_circuit(endpoint)
+            timeout = httpx.Timeout(self.timeout_for(endpoint), connect=settings.HOMEAI_CONNECT_TIMEOUT)
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                try:
+                    response = await client.request(method, self._url(path), timeout=timeout, **kwargs)
+                except httpx.HTTPError as e:
+                    self._record(endpoint, started)
+                    if not self._should_retry(method, endpoint, attempt, error=e):
+                        raise
+                else:
+                    self._record(endpoint, started, response)
+                    if not self._should_retry(method, endpoint, attempt, response=response):
+                        return response
+
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            self._slots.release()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self):
+        # Created lazily inside the running event loop
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=settings.HOMEAI_POOL_SIZE,
+                max_keepalive_connections=settings.HOMEAI_POOL_SIZE
+            ))
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _is_connect_error(self, error: Exception) -> bool:
+        import httpx
+
+        return isinstance(error, httpx.ConnectError) or isinstance(error, httpx.ConnectTimeout)
+
+
+# Process-wide clients: one pool, one breaker and one histogram per worker
+_breaker = None
+_histogram = LatencyHistogram()
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _shared_breaker() -> CircuitBreaker:
+    global _breaker
+
+    if _breaker is None:
+        _breaker = CircuitBreaker(settings.HOMEAI_BREAKER_FAILURES, settings.HOMEAI_BREAKER_RESET_SECONDS)
+    return _breaker
+
+
+def get_homeai_client() -> HomeAIClient:
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HomeAIClient(breaker=_shared_breaker(), histogram=_histogram)
+    return _client
+
+
+def get_async_homeai_client() -> AsyncHomeAIClient:
+    global _async_client
+
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncHomeAIClient(breaker=_shared_breaker(), histogram=_histogram)
+    return _async_client
+
+
+def homeai_client_metrics() -> Dict[str, Any]:
+    """Latency histograms and breaker state for this worker process"""
+    return {
+        'methods': _histogram.snapshot(),
+        'circuits': _shared_breaker().states(),
+        'bucket_bounds_ms': LATENCY_BUCKETS_MS,
+    }
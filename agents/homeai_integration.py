@@ -1,9 +1,10 @@
-import requests
 import json
 from django.conf import settings
 from typing import Dict, Any, Optional
 import logging
 
+from .homeai_client import get_async_homeai_client, get_homeai_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,6 +18,15 @@ class HomeAIService:
         self.api_key = getattr(settings, 'HOMEAI_API_KEY', '')
         self.base_url = getattr(settings, 'HOMEAI_BASE_URL', 'https://api.homeai.com/v1')
         self.model = getattr(settings, 'HOMEAI_MODEL', 'gpt-4-voice')
+        self.headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+    
+    @property
+    def client(self):
+        """Process-wide pooled client (timeouts, retries, circuit breaker)"""
+        return get_homeai_client()
         
     def create_agent_persona(self, agent_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,12 +36,9 @@ class HomeAIService:
         persona_prompt = self._build_persona_prompt(agent_config)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/personas",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'persona', "/personas",
+                headers=self.headers,
                 json={
                     'name': agent_config.get('name', 'AI Sales Agent'),
                     'personality_type': agent_config.get('personality_type', 'friendly'),
@@ -61,12 +68,9 @@ class HomeAIService:
         try:
             conversation_context = self._build_conversation_context(customer_context)
             
-            response = requests.post(
-                f"{self.base_url}/conversations",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'conversation', "/conversations",
+                headers=self.headers,
                 json={
                     'persona_id': persona_id,
                     'context': conversation_context,
@@ -98,12 +102,37 @@ class HomeAIService:
         Customer ka response process kar ke AI ka reply generate karta hai
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/conversations/{conversation_id}/respond",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'respond', f"/conversations/{conversation_id}/respond",
+                headers=self.headers,
+                json={
+                    'customer_input': customer_input,
+                    'context_update': context or {},
+                    'analyze_sentiment': True,
+                    'detect_intent': True,
+                    'generate_insights': True
+                }
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"HomeAI response processing failed: {response.text}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"HomeAI response processing error: {str(e)}")
+            return None
+    
+    async def aprocess_customer_response(self, conversation_id: str, customer_input: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Async version of process_customer_response for ASGI callers
+        Event loop block kiye baghair conversation turn process karta hai
+        """
+        try:
+            response = await get_async_homeai_client().post(
+                'respond', f"/conversations/{conversation_id}/respond",
+                headers=self.headers,
                 json={
                     'customer_input': customer_input,
                     'context_update': context or {},
@@ -129,12 +158,9 @@ class HomeAIService:
         Customer ke objections ko handle karta hai
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/conversations/{conversation_id}/handle-objection",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'objection', f"/conversations/{conversation_id}/handle-objection",
+                headers=self.headers,
                 json={
                     'objection': objection_text,
                     'customer_profile': customer_context,
@@ -160,12 +186,9 @@ class HomeAIService:
         Customer ki preference ke according callback schedule karta hai
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/conversations/{conversation_id}/schedule-callback",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'callback', f"/conversations/{conversation_id}/schedule-callback",
+                headers=self.headers,
                 json={
                     'customer_availability': customer_preference.get('availability', {}),
                     'urgency_level': customer_preference.get('urgency', 'medium'),
@@ -192,12 +215,9 @@ class HomeAIService:
         Conversation analyze kar ke insights nikalta hai
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/conversations/{conversation_id}/analysis",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.get(
+                'analysis', f"/conversations/{conversation_id}/analysis",
+                headers=self.headers,
                 params={
                     'include_sentiment': True,
                     'include_intent': True,
@@ -224,12 +244,9 @@ class HomeAIService:
         AI agent ko conversation outcomes se sikhata hai
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/personas/{persona_id}/learn",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'learn', f"/personas/{persona_id}/learn",
+                headers=self.headers,
                 json={
                     'learning_data': conversation_outcomes,
                     'learning_type': 'conversation_outcomes',
@@ -322,12 +339,9 @@ Remember: You're representing a real business with real solutions. Be authentic,
             }
         
         try:
-            response = requests.post(
-                f"{self.base_url}/generate",
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
+            response = self.client.post(
+                'generate', "/generate",
+                headers=self.headers,
                 json={
                     'message': message,
                     'context': context or {},
@@ -402,6 +416,9 @@ class MockHomeAIService(HomeAIService):
                 'suggested_action': 'continue_conversation'
             }
     
+    async def aprocess_customer_response(self, conversation_id: str, customer_input: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        return self.process_customer_response(conversation_id, customer_input, context)
+    
     def handle_objection(self, conversation_id: str, objection_text: str, customer_context: Dict[str, Any]) -> Dict[str, Any]:
         return {
             'objection_response': "I completely understand your concern. Many of our clients had similar thoughts initially. Let me share how we've helped others in your situation...",
@@ -0,0 +1,199 @@
+from django.conf import settings
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+from .ai_agent_models import AIAgent
+from .agent_memory import AgentMemory
+
+logger = logging.getLogger(__name__)
+
+
+class _LocalLearningStore:
+    """In-process buffer for tests and single-process development (not shared across nodes)"""
+
+    def __init__(self):
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def push(self, agent_id: str, events: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            queue = self._events.setdefault(agent_id, [])
+            queue.extend(events)
+            return len(queue)
+
+    def take(self, agent_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._events.pop(agent_id, [])
+
+    def dirty_agents(self) -> List[str]:
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+class _RedisLearningStore:
+    """
+    Per-agent Redis list plus a set of agents with buffered events
+    Push and take are MULTI transactions, so a flush never loses or repeats an event
+    """
+
+    DIRTY_KEY = 'learning:dirty'
+    KEY_PREFIX = 'learning:events:'
+
+    def __init__(self, client):
+        self.client = client
+
+    def push(self, agent_id: str, events: List[Dict[str, Any]]) -> int:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(self._key(agent_id), *[json.dumps(event) for event in events])
+        pipe.sadd(self.DIRTY_KEY, agent_id)
+        length, _ = pipe.execute()
+        return length
+
+    def take(self, agent_id: str) -> List[Dict[str, Any]]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self._key(agent_id), 0, -1)
+        pipe.delete(self._key(agent_id))
+        pipe.srem(self.DIRTY_KEY, agent_id)
+        raw, _, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def dirty_agents(self) -> List[str]:
+        return [agent_id.decode() for agent_id in self.client.smembers(self.DIRTY_KEY)]
+
+    def _key(self, agent_id: str) -> str:
+        return f'{self.KEY_PREFIX}{agent_id}'
+
+
+_local_store = _LocalLearningStore()
+_redis_store = None
+_redis_retry_at = 0.0
+
+
+class LearningBuffer:
+    """
+    Write-behind buffer for real-time learning events
+    Call ke dauran events jama hote hain aur har few seconds (ya call end par) ek batch mein DB mein jaate hain
+    """
+
+    @property
+    def backend(self) -> str:
+        return settings.LEARNING_BUFFER_BACKEND
+
+    @property
+    def max_events(self) -> int:
+        return settings.LEARNING_BUFFER_MAX_EVENTS
+
+    def push(self, agent: AIAgent, events: List[Dict[str, Any]]):
+        """Buffer events for an agent; falls back to writing them straight through"""
+        if not events:
+            return
+
+        agent_id = str(agent.pk)
+        store = self._store()
+        if store is None:
+            self._apply(agent, events)
+            return
+
+        try:
+            length = store.push(agent_id, events)
+        except Exception as e:
+            self._mark_redis_down(e)
+            self._apply(agent, events)
+            return
+
+        # A very chatty call shouldn't wait for the beat
+        if length >= self.max_events:
+            self.flush(agent_id, agent=agent)
+
+    def flush(self, agent_id, agent: AIAgent = None) -> int:
+        """Fold everything buffered for one agent; returns the number of events applied"""
+        store = self._store()
+        if store is None:
+            return 0
+
+        try:
+            events = store.take(str(agent_id))
+        except Exception as e:
+            self._mark_redis_down(e)
+            return 0
+        if not events:
+            return 0
+
+        try:
+            agent = agent or AIAgent.objects.only('id', 'conversation_memory').get(pk=agent_id)
+            self._apply(agent, events)
+        except Exception:
+            # Put the batch back for the next flush rather than dropping it
+            store.push(str(agent_id), events)
+            raise
+        return len(events)
+
+    def flush_all(self) -> Dict[str, int]:
+        store = self._store()
+        stats = {'agents': 0, 'events': 0}
+        if store is None:
+            return stats
+
+        try:
+            agent_ids = store.dirty_agents()
+        except Exception as e:
+            self._mark_redis_down(e)
+            return stats
+
+        for agent_id in agent_ids:
+            try:
+                applied = self.flush(agent_id)
+            except AIAgent.DoesNotExist:
+                store.take(agent_id)  # Agent deleted - drop its events
+                continue
+            except Exception as e:
+                logger.error(f"Learning buffer flush failed for agent {agent_id}: {str(e)}")
+                continue
+            if applied:
+                stats['agents'] += 1
+                stats['events'] += applied
+        return stats
+
+    def _apply(self, agent: AIAgent, events: List[Dict[str, Any]]):
+        # Inserts per table + one UPDATE of conversation_memory for the whole batch
+        memory = AgentMemory(agent)
+        memory.fold(events)
+        memory.refresh_summary()
+
+    def _store(self):
+        if self.backend == 'local':
+            return _local_store
+        if self.backend != 'redis' or time.monotonic() < _redis_retry_at:
+            return None
+        return self._get_redis_store()
+
+    def _mark_redis_down(self, error: Exception):
+        """Write through for a while instead of paying the connect timeout on every event"""
+        global _redis_retry_at
+        _redis_retry_at = time.monotonic() + 30
+        logger.warning(f"Redis learning buffer unavailable, writing through: {str(error)}")
+
+    def _get_redis_store(self):
+        global _redis_store
+
+        if _redis_store is None:
+            try:
+                import redis
+                _redis_store = _RedisLearningStore(redis.Redis.from_url(
+                    settings.LEARNING_BUFFER_REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+                ))
+            except Exception as e:
+                logger.warning(f"Redis client unavailable for learning buffer, writing through: {str(e)}")
+                _redis_store = False
+
+        return _redis_store or None
+
+
+learning_buffer = LearningBuffer()
@@ -0,0 +1,63 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+import time
+
+from agents.phone_numbers import PHONE_FIELDS, normalize_phone_number
+
+
+class Command(BaseCommand):
+    help = 'Fill the indexed E.164 phone columns for existing rows, streaming each table in primary key chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows read and updated per statement')
+        parser.add_argument('--model', action='append', choices=list(PHONE_FIELDS),
+                            help='Only backfill this model (repeatable); default is every registered model')
+        parser.add_argument('--all', action='store_true', help='Recompute rows that already have a canonical number')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        for label in options['model'] or PHONE_FIELDS:
+            self.backfill(label, PHONE_FIELDS[label], options)
+        self.stdout.write(self.style.SUCCESS(f'✅ Phone backfill finished in {time.monotonic() - started:.1f}s'))
+
+    def backfill(self, label, fields, options):
+        """Keyset walk over the table - each chunk is one indexed range read and one bulk UPDATE"""
+        model = apps.get_model(label)
+        raw_fields, canonical_fields = list(fields), list(fields.values())
+
+        rows = model.objects.all()
+        if not options['all']:
+            pending = Q()
+            for canonical_field in canonical_fields:
+                pending |= Q(**{f'{canonical_field}__isnull': True})
+            rows = rows.filter(pending)
+
+        scanned = updated = invalid = 0
+        last_pk = None
+        while True:
+            chunk = rows.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk = list(chunk.values_list('pk', *raw_fields, *canonical_fields)[:options['chunk_size']])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            scanned += len(chunk)
+
+            changed = []
+            for row in chunk:
+                pk, raw, current = row[0], row[1:1 + len(raw_fields)], row[1 + len(raw_fields):]
+                canonical = [normalize_phone_number(value) for value in raw]
+                invalid += sum(1 for value, source in zip(canonical, raw) if source and value is None)
+                if list(current) != canonical:
+                    changed.append(model(pk=pk, **dict(zip(canonical_fields, canonical))))
+
+            if changed and not options['dry_run']:
+                model.objects.bulk_update(changed, canonical_fields)
+            updated += len(changed)
+            self.stdout.write(f'  {label}: {scanned:,} scanned, {updated:,} updated', ending='\r')
+
+        verb = 'would update' if options['dry_run'] else 'updated'
+        self.stdout.write(f'\n{label}: {scanned:,} rows scanned, {updated:,} {verb}, {invalid:,} not valid E.164')
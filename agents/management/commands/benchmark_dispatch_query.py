@@ -0,0 +1,149 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from agents.ai_agent_models import AIAgent, CustomerProfile
+from agents.auto_campaign_models import AutoCallCampaign, AutoCampaignContact
+from datetime import timedelta
+import random
+import statistics
+import time
+
+User = get_user_model()
+
+BENCHMARK_EMAIL = 'dispatch-benchmark@example.invalid'
+DISPATCH_INDEXES = ['autocontact_dispatch_idx', 'autocontact_status_idx']
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic campaign contacts and benchmark the dialer dispatch query with and without its indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contacts', type=int, default=1000000, help='Number of campaign contacts to seed')
+        parser.add_argument('--campaigns', type=int, default=20, help='Number of campaigns to spread contacts over')
+        parser.add_argument('--customers', type=int, default=5000, help='Distinct customer profiles to reference')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create batch size')
+        parser.add_argument('--runs', type=int, default=50, help='Timed dispatch queries per phase')
+        parser.add_argument('--limit', type=int, default=50, help='Contacts fetched per dispatch query')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan for each phase')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data after the run')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email=BENCHMARK_EMAIL).exists():
+            self.stdout.write(self.style.WARNING('Removing data left over from a previous benchmark run...'))
+            self.cleanup()
+
+        agent, campaigns = self.seed(options)
+
+        try:
+            indexes = [index for index in AutoCampaignContact._meta.indexes if index.name in DISPATCH_INDEXES]
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(AutoCampaignContact, index)
+            self.analyze()
+            before = self.measure(campaigns, options, 'without indexes')
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(AutoCampaignContact, index)
+            self.analyze()
+            after = self.measure(campaigns, options, 'with indexes')
+
+            speedup = before['p50'] / after['p50'] if after['p50'] else 0
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'\n✅ Dispatch query p50: {before["p50"]:.2f}ms → {after["p50"]:.2f}ms '
+                    f'(p95 {before["p95"]:.2f}ms → {after["p95"]:.2f}ms, {speedup:.1f}x faster)'
+                )
+            )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, options):
+        """Create one benchmark agent with campaigns, customers and contacts"""
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        user = User.objects.create_user(email=BENCHMARK_EMAIL, password=None)
+        agent = AIAgent.objects.create(client=user, name='Dispatch Benchmark Agent')
+
+        customers = CustomerProfile.objects.bulk_create([
+            CustomerProfile(ai_agent=agent, phone_number=f'+1999{i:07d}', name=f'Benchmark {i}')
+            for i in range(options['customers'])
+        ], batch_size=batch_size)
+
+        campaigns = AutoCallCampaign.objects.bulk_create([
+            AutoCallCampaign(ai_agent=agent, name=f'Benchmark Campaign {i}', calls_per_hour=600)
+            for i in range(options['campaigns'])
+        ])
+
+        # Realistic mix: most contacts are already dialed, a fifth still pending
+        statuses = ['completed'] * 6 + ['failed'] * 2 + ['pending'] * 2
+        remaining = options['contacts']
+        while remaining > 0:
+            chunk = min(batch_size, remaining)
+            AutoCampaignContact.objects.bulk_create([
+                AutoCampaignContact(
+                    campaign=random.choice(campaigns),
+                    customer_profile=random.choice(customers),
+                    status=random.choice(statuses),
+                    priority=random.randint(1, 5),
+                    scheduled_datetime=now + timedelta(minutes=random.randint(-10080, 10080))
+                )
+                for _ in range(chunk)
+            ], batch_size=batch_size)
+            remaining -= chunk
+            self.stdout.write(f'  Seeded {options["contacts"] - remaining:,}/{options["contacts"]:,} contacts', ending='\r')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSeeded {options["contacts"]:,} contacts in {time.monotonic() - started:.1f}s')
+        )
+        return agent, campaigns
+
+    def measure(self, campaigns, options, label):
+        """Time the exact query the dialer uses to pick due contacts"""
+        timings = []
+        now = timezone.now()
+
+        for _ in range(options['runs']):
+            campaign = random.choice(campaigns)
+            queryset = campaign.contacts.filter(
+                status='pending',
+                scheduled_datetime__lte=now
+            ).order_by('-priority', 'scheduled_datetime').values_list('id', flat=True)[:options['limit']]
+
+            started = time.perf_counter()
+            list(queryset)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        result = {
+            'avg': statistics.mean(timings),
+            'p50': timings[len(timings) // 2],
+            'p95': timings[max(0, int(len(timings) * 0.95) - 1)],
+        }
+        self.stdout.write(
+            f'\n📊 Dispatch query {label}: avg {result["avg"]:.2f}ms, '
+            f'p50 {result["p50"]:.2f}ms, p95 {result["p95"]:.2f}ms over {options["runs"]} runs'
+        )
+
+        if options['explain']:
+            self.stdout.write(queryset.explain())
+
+        return result
+
+    def analyze(self):
+        """Refresh planner statistics so the index is actually considered"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(AutoCampaignContact._meta.db_table)}')
+
+    def cleanup(self):
+        """Remove everything the benchmark created"""
+        AutoCampaignContact.objects.filter(campaign__ai_agent__client__email=BENCHMARK_EMAIL).delete()
+        AutoCallCampaign.objects.filter(ai_agent__client__email=BENCHMARK_EMAIL).delete()
+        CustomerProfile.objects.filter(ai_agent__client__email=BENCHMARK_EMAIL).delete()
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        self.stdout.write('Benchmark data removed')
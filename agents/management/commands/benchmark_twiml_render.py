@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from agents.twilio_service import TwilioCallService
+from agents.twiml_templates import TwiMLTemplate, render_twiml, twiml_cache
+import statistics
+import time
+
+CALL_SID = 'CA0123456789abcdef0123456789abcdef'
+
+# (template name, builder, variant, values) - one entry per live webhook branch
+CASES = [
+    ('inbound', TwilioCallService._inbound_template, (), {
+        'call_sid': CALL_SID, 'greeting': 'Hello! This is Ava from Acme Solar. How are you doing today?'
+    }),
+    ('speech', TwilioCallService._speech_template, ('interested',), {'call_sid': CALL_SID}),
+    ('objection', TwilioCallService._objection_template, ('price',), {'call_sid': CALL_SID}),
+    ('callback_time', TwilioCallService._callback_time_template, (), {'callback_time': 'tomorrow morning between 9 and 12'}),
+    ('end_call', TwilioCallService._end_call_template, ('converted',), {}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request TwiML render cost: VoiceResponse build + serialize vs cached templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help='Renders per branch and mode')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed rounds per branch and mode (median is reported)')
+
+    def handle(self, *args, **options):
+        twiml_cache.clear()
+        totals = {'built': [], 'cached': []}
+
+        for name, builder, variant, values in CASES:
+            # Same output both ways - the cache must not change what Twilio receives
+            assert TwiMLTemplate(builder(*variant)).render(**values) == render_twiml(name, builder, variant, **values)
+
+            built = self.measure(lambda: TwiMLTemplate(builder(*variant)).render(**values), options)
+            cached = self.measure(lambda: render_twiml(name, builder, variant, **values), options)
+            totals['built'].append(built)
+            totals['cached'].append(cached)
+
+            self.stdout.write(
+                f'📊 {name:<14} build+serialize {built:8.2f}µs   cached {cached:6.2f}µs   '
+                f'({built / cached:.0f}x faster)'
+            )
+
+        built, cached = statistics.mean(totals['built']), statistics.mean(totals['cached'])
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Average per-request render: {built:.2f}µs → {cached:.2f}µs ({built / cached:.0f}x faster), '
+            f'cache {twiml_cache.stats()}'
+        ))
+
+    def measure(self, render, options):
+        """Median microseconds per render over `repeat` rounds of `iterations` calls"""
+        rounds = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                render()
+            rounds.append((time.perf_counter() - started) * 1e6 / options['iterations'])
+        return statistics.median(rounds)
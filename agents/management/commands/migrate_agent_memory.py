@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand
+import json
+import time
+
+from agents.ai_agent_models import AIAgent
+from agents.agent_memory import AgentMemory, LEGACY_MEMORY_KEYS
+
+
+class Command(BaseCommand):
+    help = 'Move learning data out of AIAgent.conversation_memory into the agent memory tables (run once after deploy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-legacy', action='store_true', help='Import but leave the old keys in conversation_memory')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        migrated = 0
+
+        for agent in AIAgent.objects.only('id', 'conversation_memory').iterator():
+            legacy = {key: value for key, value in (agent.conversation_memory or {}).items() if key in LEGACY_MEMORY_KEYS}
+            if not legacy:
+                continue
+
+            memory = AgentMemory(agent)
+            self._import(memory, legacy)
+            memory.update_memory(
+                {'learning_summary': memory.build_summary()},
+                remove=[] if options['keep_legacy'] else LEGACY_MEMORY_KEYS
+            )
+            migrated += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Migrated learning memory for {migrated} agents in {time.monotonic() - started:.1f}s')
+        )
+
+    def _import(self, memory, legacy):
+        """Replay the old blob through the store so retention and aggregates apply"""
+        for key, objection in legacy.get('real_time_objections', {}).items():
+            for response in objection.get('responses', []):
+                memory.record_objection(
+                    objection.get('objection_text') or key,
+                    response=response.get('response', ''),
+                    effectiveness=response.get('effectiveness', 0),
+                    customer_reaction=response.get('customer_reaction', '')
+                )
+
+        for key, pattern in legacy.get('objection_patterns', {}).items():
+            for _ in range(pattern.get('count', 0)):
+                memory.record_objection(key.replace('_', ' '))
+
+        for pattern in legacy.get('successful_patterns', []):
+            memory.record_successful_pattern(
+                'real_time', pattern.get('approach', ''), pattern.get('effectiveness', 8),
+                context=pattern.get('context', ''),
+                customer_reaction=pattern.get('customer_reaction', ''),
+                customer_interest_level=pattern.get('customer_profile', {}).get('interest_level') or ''
+            )
+
+        learning = legacy.get('automatic_learning', {})
+        for pattern in learning.get('successful_patterns', []):
+            memory.record_successful_pattern(
+                'call_outcome', pattern.get('approach_used', ''), pattern.get('effectiveness_score', 6),
+                customer_reaction=pattern.get('customer_response') or '',
+                outcome=pattern.get('outcome') or '',
+                customer_interest_level=pattern.get('customer_interest') or '',
+                duration_seconds=pattern.get('duration') or 0
+            )
+        for pattern in learning.get('failed_patterns', []):
+            memory.record_failure(pattern.get('what_went_wrong', 'No interest generated'))
+        for record in learning.get('performance_metrics', {}).get('sentiment_analysis_history', []):
+            memory.record_satisfaction(record.get('satisfaction_score', 5))
+
+        for technique in legacy.get('successful_techniques', []):
+            memory.record_successful_pattern(
+                'dynamic', technique.get('response', ''), technique.get('effectiveness_score', 5),
+                unique=True, context=technique.get('context', '')
+            )
+
+        for technique in legacy.get('proven_techniques', []):
+            value = technique.get('technique')
+            memory.record_successful_pattern(
+                'post_call', value if isinstance(value, str) else json.dumps(value), 8, unique=True
+            )
+
+        sentiment = legacy.get('sentiment_learning', {})
+        for trigger in sentiment.get('positive_triggers', []) + sentiment.get('negative_triggers', []):
+            memory.record_sentiment_change(
+                trigger.get('from', ''), trigger.get('to', ''), trigger.get('trigger', ''), trigger.get('score_change', 0)
+            )
+
+        for pair in legacy.get('conversation_patterns', {}).get('question_response_pairs', []):
+            memory.record_question_response(
+                pair.get('agent_question', ''), pair.get('customer_response', ''), pair.get('effectiveness', 5)
+            )
+
+        for area_type, area in legacy.get('focus_areas', {}).items():
+            for instance in area.get('instances', []):
+                memory.record_focus_area(area_type, instance.get('suggestion', ''))
+
+        for state, pattern in legacy.get('emotional_patterns', {}).items():
+            conversions = round(pattern.get('conversion_rate', 0) * pattern.get('count', 0))
+            for index in range(pattern.get('count', 0)):
+                memory.record_emotional_state(state, converted=index < conversions)
+
+        sessions = legacy.get('learning_metrics', {})
+        for _ in range(sessions.get('total_learning_sessions', 0)):
+            memory.record_learning_session(sessions.get('improvement_score', 0))
@@ -0,0 +1,370 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+import asyncio
+import base64
+import io
+import json
+import logging
+import time
+import warnings
+import wave
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .homeai_client import LatencyHistogram
+
+with warnings.catch_warnings():
+    # audioop is stdlib up to 3.12; on 3.13+ install the audioop-lts backport
+    warnings.simplefilter('ignore', DeprecationWarning)
+    import audioop
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'twilio-media-stream'
+TWILIO_SAMPLE_RATE = 8000  # Media Streams are 8 kHz mu-law, 20 ms / 160 byte frames
+
+
+def stream_token(call_sid: str) -> str:
+    """Signed token passed as a <Stream> <Parameter> so only our TwiML can open a bridge"""
+    return signing.dumps(call_sid, salt=TOKEN_SALT)
+
+
+def verify_stream_token(token: str, call_sid: str) -> bool:
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=settings.MEDIA_BRIDGE_TOKEN_MAX_AGE) == call_sid
+    except signing.BadSignature:
+        return False
+
+
+# Process-wide metrics (each ASGI worker reports its own)
+_turn_latency = LatencyHistogram()
+_counters = {'active_sessions': 0, 'sessions_started': 0, 'sessions_rejected': 0, 'dropped_frames': 0, 'dropped_learning_events': 0}
+
+
+def media_bridge_metrics() -> Dict[str, Any]:
+    return {'turn_latency': _turn_latency.snapshot().get('turn'), **_counters}
+
+
+class HumeEVIBackend:
+    """
+    HumeAI EVI speech-to-speech session over WebSocket
+    Twilio ka mu-law audio linear16 mein bhejta hai aur EVI ka audio wapas mu-law mein deta hai
+    """
+
+    def __init__(self, context: Dict[str, Any]):
+        self.context = context
+        self.ws = None
+        self._rate_state = None
+
+    async def connect(self):
+        import websockets
+
+        url = f"{settings.HUME_AI_EVI_URL}?api_key={settings.HUME_AI_API_KEY}"
+        if settings.HUME_AI_EVI_CONFIG_ID:
+            url += f"&config_id={settings.HUME_AI_EVI_CONFIG_ID}"
+        self.ws = await websockets.connect(
+            url, open_timeout=settings.MEDIA_BRIDGE_CONNECT_TIMEOUT, max_queue=settings.MEDIA_BRIDGE_OUTBOUND_CHUNKS
+        )
+
+        session_settings = {
+            'type': 'session_settings',
+            'audio': {'encoding': 'linear16', 'sample_rate': TWILIO_SAMPLE_RATE, 'channels': 1},
+        }
+        if self.context.get('system_prompt'):
+            session_settings['system_prompt'] = self.context['system_prompt']
+        await self.ws.send(json.dumps(session_settings))
+
+    async def send_audio(self, mulaw: bytes):
+        pcm = audioop.ulaw2lin(mulaw, 2)
+        await self.ws.send(json.dumps({'type': 'audio_input', 'data': base64.b64encode(pcm).decode()}))
+
+    async def events(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Normalized events: ('audio', mulaw bytes), ('user_text', str), ('agent_text', str), ('interrupt', None)"""
+        async for raw in self.ws:
+            message = json.loads(raw)
+            message_type = message.get('type')
+
+            if message_type == 'audio_output':
+                yield 'audio', self._to_mulaw(base64.b64decode(message['data']))
+            elif message_type == 'user_message' and not message.get('interim'):
+                yield 'user_text', message.get('message', {}).get('content', '')
+            elif message_type == 'assistant_message':
+                yield 'agent_text', message.get('message', {}).get('content', '')
+            elif message_type == 'user_interruption':
+                yield 'interrupt', None
+            elif message_type == 'error':
+                logger.error(f"HumeAI EVI error: {message.get('code')} {message.get('message')}")
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def _to_mulaw(self, audio: bytes) -> bytes:
+        # EVI sends WAV chunks; Twilio wants raw 8 kHz mono mu-law
+        rate, width = TWILIO_SAMPLE_RATE, 2
+        if audio[:4] == b'RIFF':
+            with wave.open(io.BytesIO(audio)) as wav:
+                rate, width, channels = wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+                audio = wav.readframes(wav.getnframes())
+            if channels == 2:
+                audio = audioop.tomono(audio, width, 0.5, 0.5)
+        if rate != TWILIO_SAMPLE_RATE:
+            audio, self._rate_state = audioop.ratecv(audio, width, 1, rate, TWILIO_SAMPLE_RATE, self._rate_state)
+        return audioop.lin2ulaw(audio, width)
+
+
+class MediaBridge:
+    """
+    One Twilio Media Stream <-> AI voice backend session
+    Bounded queues: customer audio drops its oldest frames instead of growing, agent audio applies
+    back-pressure to the backend socket, and learning events never block the audio path
+    """
+
+    backend_class = HumeEVIBackend
+
+    def __init__(self, send):
+        self.send = send
+        self.stream_sid = None
+        self.call_sid = None
+        self.call_session = None
+        self.backend = None
+        self.inbound = asyncio.Queue(maxsize=settings.MEDIA_BRIDGE_INBOUND_FRAMES)
+        self.outbound = asyncio.Queue(maxsize=settings.MEDIA_BRIDGE_OUTBOUND_CHUNKS)
+        self.learning = asyncio.Queue(maxsize=settings.MEDIA_BRIDGE_LEARNING_EVENTS)
+        self.tasks: List[asyncio.Task] = []
+        self.learning_task: Optional[asyncio.Task] = None
+        self.close_task: Optional[asyncio.Task] = None
+        self.turn_started: Optional[float] = None
+        self.turn_latencies_ms: List[float] = []
+        self.transcript: List[str] = []
+        self.last_agent_text = ''
+
+    async def run(self, receive):
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] != 'websocket.receive' or not message.get('text'):
+                    continue
+
+                frame = json.loads(message['text'])
+                event = frame.get('event')
+                if event == 'media':
+                    self._queue_inbound(base64.b64decode(frame['media']['payload']))
+                elif event == 'start':
+                    if not await self._start(frame['start']):
+                        await self.send({'type': 'websocket.close', 'code': 4403})
+                        break
+                elif event == 'stop':
+                    break
+        finally:
+            await self._finish()
+
+    # Twilio -> backend
+
+    async def _start(self, start: Dict[str, Any]) -> bool:
+        self.stream_sid = start.get('streamSid')
+        self.call_sid = start.get('callSid', '')
+        token = start.get('customParameters', {}).get('token', '')
+
+        if not verify_stream_token(token, self.call_sid):
+            logger.warning(f"Media stream rejected, bad token for call {self.call_sid}")
+            return False
+
+        self.call_session, context = await sync_to_async(self._load_call)()
+        if self.call_session is None:
+            logger.warning(f"Media stream for unknown call {self.call_sid}")
+            return False
+
+        self.backend = self.backend_class(context)
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            logger.error(f"Media bridge backend connect failed for call {self.call_sid}: {str(e)}")
+            return False
+
+        self.tasks = [
+            asyncio.create_task(self._pump_to_backend()),
+            asyncio.create_task(self._pump_from_backend()),
+            asyncio.create_task(self._pump_to_twilio()),
+        ]
+        for task in self.tasks:
+            task.add_done_callback(self._on_pump_done)
+        self.learning_task = asyncio.create_task(self._pump_learning())
+        return True
+
+    def _queue_inbound(self, mulaw: bytes):
+        if self.backend is None:
+            return
+        if self.inbound.full():
+            # Backend is behind - stale caller audio is worth less than fresh audio
+            self.inbound.get_nowait()
+            _counters['dropped_frames'] += 1
+        self.inbound.put_nowait(mulaw)
+
+    async def _pump_to_backend(self):
+        while True:
+            chunk = [await self.inbound.get()]
+            # Coalesce whatever queued up meanwhile into one backend message
+            while not self.inbound.empty() and len(chunk) < settings.MEDIA_BRIDGE_FRAMES_PER_SEND:
+                chunk.append(self.inbound.get_nowait())
+            await self.backend.send_audio(b''.join(chunk))
+
+    # Backend -> Twilio
+
+    async def _pump_from_backend(self):
+        async for kind, value in self.backend.events():
+            if kind == 'audio':
+                if self.turn_started is not None:
+                    self._record_turn_latency(time.monotonic() - self.turn_started)
+                    self.turn_started = None
+                await self.outbound.put(value)  # Blocks reading the backend when Twilio is behind
+            elif kind == 'user_text':
+                self.turn_started = time.monotonic()
+                self.transcript.append(f"Customer: {value}")
+                self._queue_learning(value)
+            elif kind == 'agent_text':
+                self.last_agent_text = value
+                self.transcript.append(f"Agent: {value}")
+            elif kind == 'interrupt':
+                await self._clear_playback()
+
+    async def _pump_to_twilio(self):
+        while True:
+            payload = await self.outbound.get()
+            await self.send({'type': 'websocket.send', 'text': json.dumps({
+                'event': 'media',
+                'streamSid': self.stream_sid,
+                'media': {'payload': base64.b64encode(payload).decode()}
+            })})
+
+    async def _clear_playback(self):
+        """Customer barged in - drop queued agent audio and tell Twilio to stop playing"""
+        while not self.outbound.empty():
+            self.outbound.get_nowait()
+        await self.send({'type': 'websocket.send', 'text': json.dumps({'event': 'clear', 'streamSid': self.stream_sid})})
+
+    def _record_turn_latency(self, seconds: float):
+        # Customer finished speaking -> first agent audio
+        _turn_latency.observe('turn', seconds, True)
+        self.turn_latencies_ms.append(round(seconds * 1000, 1))
+
+    # Learning
+
+    def _queue_learning(self, customer_said: str):
+        if not self.last_agent_text:
+            return
+        event = {
+            'learning_event': 'conversation_turn',
+            'conversation_turn': {'agent_said': self.last_agent_text, 'customer_said': customer_said},
+        }
+        try:
+            self.learning.put_nowait(event)
+        except asyncio.QueueFull:
+            _counters['dropped_learning_events'] += 1
+
+    async def _pump_learning(self):
+        while True:
+            data = await self.learning.get()
+            if data is None:  # Call finished and everything before it is applied
+                return
+            try:
+                await sync_to_async(self._apply_learning)(data)
+            except Exception as e:
+                logger.error(f"Media bridge learning event failed for call {self.call_sid}: {str(e)}")
+
+    def _apply_learning(self, data: Dict[str, Any]):
+        from .real_time_learning import RealTimeCallLearningAPIView
+
+        RealTimeCallLearningAPIView().process_learning_event(self.call_session.ai_agent, self.call_session, data)
+
+    # Lifecycle
+
+    def _on_pump_done(self, task: asyncio.Task):
+        """A pump that stops on its own leaves the call half dead - log it and hang up the stream"""
+        if task.cancelled() or self.close_task is not None:
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(f"Media bridge {task.get_coro().__name__} failed for call {self.call_sid}: {error!r}")
+        else:
+            logger.warning(f"Media bridge {task.get_coro().__name__} ended early for call {self.call_sid}")
+        # Twilio answers the close with websocket.disconnect, which ends run() and cleans up
+        self.close_task = asyncio.create_task(self.send({'type': 'websocket.close', 'code': 1011}))
+
+    async def _finish(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        # Let queued learning events finish - the call's last turns are the most useful
+        if self.learning_task is not None:
+            await self.learning.put(None)
+            await self.learning_task
+
+        if self.backend is not None:
+            try:
+                await self.backend.close()
+            except Exception:
+                pass
+
+        if self.call_session is not None:
+            await sync_to_async(self._save_call_stats)()
+
+    def _load_call(self):
+        """(call_session, backend context) - runs in the sync thread, like every ORM access here"""
+        from .ai_agent_models import CallSession
+
+        call_session = CallSession.objects.select_related('ai_agent', 'customer_profile').filter(
+            twilio_call_sid=self.call_sid
+        ).first()
+        if call_session is None:
+            return None, None
+        return call_session, {
+            'system_prompt': call_session.ai_agent.get_personalized_script_for_customer(call_session.customer_profile),
+            'call_sid': self.call_sid,
+        }
+
+    def _save_call_stats(self):
+        from .ai_agent_models import CallSession
+        from .learning_buffer import learning_buffer
+
+        latencies = sorted(self.turn_latencies_ms)
+        insights = dict(self.call_session.extracted_insights or {})
+        if latencies:
+            insights['turn_latency_ms'] = {
+                'turns': len(latencies),
+                'p50': latencies[len(latencies) // 2],
+                'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                'max': latencies[-1],
+            }
+
+        transcript = '\n'.join(filter(None, [self.call_session.conversation_transcript, *self.transcript]))
+        CallSession.objects.filter(pk=self.call_session.pk).update(
+            conversation_transcript=transcript, extracted_insights=insights
+        )
+        learning_buffer.flush(self.call_session.ai_agent_id, agent=self.call_session.ai_agent)
+
+
+async def media_stream_app(scope, receive, send):
+    """
+    ASGI app for Twilio <Connect><Stream> WebSockets
+    Ek process mein MEDIA_BRIDGE_MAX_SESSIONS tak calls
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    if _counters['active_sessions'] >= settings.MEDIA_BRIDGE_MAX_SESSIONS:
+        _counters['sessions_rejected'] += 1
+        await send({'type': 'websocket.close', 'code': 1013})  # Try again later
+        return
+
+    await send({'type': 'websocket.accept'})
+    _counters['active_sessions'] += 1
+    _counters['sessions_started'] += 1
+    try:
+        await MediaBridge(send).run(receive)
+    finally:
+        _counters['active_sessions'] -= 1
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0004_autocallcampaign_autocampaigncontact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autocampaigncontact',
+            name='claimed_by',
+            field=models.CharField(blank=True, help_text='Dialer worker lease token', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='autocampaigncontact',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0005_autocampaigncontact_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='autocampaigncontact',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['campaign', '-priority', 'scheduled_datetime'], name='autocontact_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autocampaigncontact',
+            index=models.Index(fields=['campaign', 'status', 'call_started_at'], name='autocontact_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autocampaigncontact',
+            index=models.Index(condition=models.Q(('status', 'calling')), fields=['lease_expires_at'], name='autocontact_lease_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaigncontact',
+            index=models.Index(fields=['campaign', 'call_status', 'next_attempt_at'], name='campcontact_dispatch_idx'),
+        ),
+    ]
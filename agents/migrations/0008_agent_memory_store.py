@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0007_contactimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentMemoryAggregate',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('objection', 'Objection'), ('emotional_state', 'Customer Emotional State'), ('focus_area', 'Improvement Focus Area'), ('failure', 'Failed Approach'), ('satisfaction', 'Customer Satisfaction'), ('learning_session', 'Learning Sessions')], max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('label', models.TextField(blank=True, help_text='Display text, e.g. the original objection')),
+                ('frequency', models.IntegerField(default=0)),
+                ('scored', models.IntegerField(default=0, help_text='Events that carried a score')),
+                ('total_score', models.FloatField(default=0)),
+                ('avg_score', models.FloatField(default=0)),
+                ('conversions', models.IntegerField(default=0)),
+                ('best_response', models.TextField(blank=True)),
+                ('best_score', models.FloatField(blank=True, null=True)),
+                ('last_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('ai_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memory_aggregates', to='agents.aiagent')),
+            ],
+            options={
+                'db_table': 'agent_memory_aggregates',
+                'constraints': [models.UniqueConstraint(fields=('ai_agent', 'kind', 'key'), name='unique_agent_memory_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ObjectionResponse',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('objection_key', models.CharField(max_length=50)),
+                ('objection_text', models.TextField(blank=True)),
+                ('response', models.TextField(blank=True)),
+                ('effectiveness', models.FloatField(default=0)),
+                ('customer_reaction', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ai_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='objection_responses', to='agents.aiagent')),
+                ('call_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.callsession')),
+            ],
+            options={
+                'db_table': 'agent_objection_responses',
+                'indexes': [models.Index(fields=['ai_agent', 'objection_key', '-effectiveness'], name='objection_resp_rank_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionResponsePair',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('agent_question', models.TextField()),
+                ('customer_response', models.TextField(blank=True)),
+                ('effectiveness', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ai_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_response_pairs', to='agents.aiagent')),
+                ('call_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.callsession')),
+            ],
+            options={
+                'db_table': 'agent_question_response_pairs',
+                'indexes': [models.Index(fields=['ai_agent', '-created_at'], name='qa_pair_recent_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SentimentTrigger',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('polarity', models.CharField(choices=[('positive', 'Positive'), ('negative', 'Negative')], max_length=10)),
+                ('from_sentiment', models.CharField(blank=True, max_length=30)),
+                ('to_sentiment', models.CharField(blank=True, max_length=30)),
+                ('trigger', models.TextField(blank=True)),
+                ('score_change', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ai_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sentiment_triggers', to='agents.aiagent')),
+                ('call_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.callsession')),
+            ],
+            options={
+                'db_table': 'agent_sentiment_triggers',
+                'indexes': [models.Index(fields=['ai_agent', 'polarity', '-score_change'], name='sentiment_trigger_rank_idx'), models.Index(fields=['ai_agent', 'polarity', '-created_at'], name='sentiment_trigger_recent_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SuccessfulPattern',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source', models.CharField(choices=[('real_time', 'Real-time Learning'), ('call_outcome', 'Call Outcome'), ('dynamic', 'Dynamic Learning'), ('post_call', 'Post-call Analysis')], max_length=20)),
+                ('approach', models.TextField()),
+                ('context', models.TextField(blank=True)),
+                ('customer_reaction', models.TextField(blank=True)),
+                ('outcome', models.CharField(blank=True, max_length=30)),
+                ('customer_interest_level', models.CharField(blank=True, max_length=20)),
+                ('duration_seconds', models.IntegerField(default=0)),
+                ('effectiveness', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ai_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='successful_patterns', to='agents.aiagent')),
+                ('call_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agents.callsession')),
+            ],
+            options={
+                'db_table': 'agent_successful_patterns',
+                'indexes': [models.Index(fields=['ai_agent', '-effectiveness'], name='success_pattern_rank_idx'), models.Index(fields=['ai_agent', 'customer_interest_level', '-effectiveness'], name='success_pattern_interest_idx')],
+            },
+        ),
+    ]
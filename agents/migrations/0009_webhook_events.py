@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0008_agent_memory_store'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='callsession',
+            name='twilio_call_sid',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('provider', models.CharField(choices=[('hume_ai', 'HumeAI'), ('twilio', 'Twilio')], max_length=20)),
+                ('event_type', models.CharField(max_length=50)),
+                ('dedupe_key', models.CharField(help_text='Provider event id, or CallSid:CallStatus', max_length=200, unique=True)),
+                ('call_sid', models.CharField(blank=True, max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed'), ('ignored', 'Ignored')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('ai_agent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='webhook_events', to='agents.aiagent')),
+            ],
+            options={
+                'db_table': 'webhook_events',
+                'indexes': [models.Index(fields=['ai_agent', 'status', 'received_at'], name='webhook_agent_queue_idx'), models.Index(fields=['status', 'received_at'], name='webhook_status_idx'), models.Index(fields=['processed_at'], name='webhook_processed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0009_webhook_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallSlot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=40, unique=True)),
+                ('call_sid', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='call_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'call_slots',
+                'indexes': [models.Index(fields=['user', 'expires_at'], name='callslot_user_expiry_idx')],
+            },
+        ),
+    ]
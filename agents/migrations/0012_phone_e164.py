@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0011_customer_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callsession',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='customerprofile',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['phone_e164'], name='ai_call_phone_e164_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerprofile',
+            index=models.Index(fields=['phone_e164'], name='customer_phone_e164_idx'),
+        ),
+    ]
@@ -220,6 +220,16 @@ from .ai_agent_models import (
     AIAgentTraining,
     ScheduledCallback
 )
+from .contact_import_models import ContactImport
+from .agent_memory_models import (
+    ObjectionResponse,
+    SuccessfulPattern,
+    SentimentTrigger,
+    QuestionResponsePair,
+    AgentMemoryAggregate
+)
+from .webhook_models import WebhookEvent
+from .call_admission_models import CallSlot
 
 # Add to __all__ if exists
 __all__ = [
@@ -229,5 +239,13 @@ __all__ = [
     'CustomerProfile', 
     'AICallSession',
     'AIAgentTraining',
-    'ScheduledCallback'
+    'ScheduledCallback',
+    'ContactImport',
+    'ObjectionResponse',
+    'SuccessfulPattern',
+    'SentimentTrigger',
+    'QuestionResponsePair',
+    'AgentMemoryAggregate',
+    'WebhookEvent',
+    'CallSlot'
 ]
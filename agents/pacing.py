@@ -0,0 +1,231 @@
+from datetime import datetime, time as dt_time
+from django.conf import settings
+from django.utils import timezone
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .auto_campaign_models import AutoCallCampaign
+
+logger = logging.getLogger(__name__)
+
+
+# Atomic refill + take, so every beat/worker node sees the same bucket.
+# KEYS[1] = bucket key
+# ARGV = rate (tokens/sec), capacity, now, window_start, window_end, requested, initial_tokens, ttl
+TOKEN_BUCKET_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+local ts = tonumber(redis.call('HGET', KEYS[1], 'ts'))
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local window_start = tonumber(ARGV[4])
+local window_end = tonumber(ARGV[5])
+local requested = tonumber(ARGV[6])
+
+if tokens == nil then
+    tokens = tonumber(ARGV[7])
+    ts = now
+end
+
+local since = math.max(ts, window_start)
+local till = math.min(now, window_end)
+if till > since then
+    tokens = math.min(capacity, tokens + (till - since) * rate)
+end
+
+local granted = math.min(requested, math.floor(tokens))
+if granted < 0 then
+    granted = 0
+end
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[8]))
+return {granted, tostring(tokens)}
+"""
+
+# Give back unused tokens, never past the burst capacity. Missing bucket = nothing to refund.
+# KEYS[1] = bucket key, ARGV = count, capacity
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens == nil then
+    return nil
+end
+tokens = math.min(tonumber(ARGV[2]), tokens + tonumber(ARGV[1]))
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens))
+return tostring(tokens)
+"""
+
+
+def _refill(tokens: float, ts: float, rate: float, capacity: float, now: float, window_start: float,
+            window_end: float) -> float:
+    """Tokens after accruing between max(last update, window start) and min(now, window end) (same rule as the Lua script)"""
+    since = max(ts, window_start)
+    till = min(now, window_end)
+    if till > since:
+        tokens = min(capacity, tokens + (till - since) * rate)
+    return tokens
+
+
+class _LocalBucketStore:
+    """In-process fallback when Redis is not reachable (development only, not shared across nodes)"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity, now, window_start, window_end, requested, initial_tokens) -> Tuple[int, float]:
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (initial_tokens, now))
+            tokens = _refill(tokens, ts, rate, capacity, now, window_start, window_end)
+            granted = max(0, min(requested, int(tokens)))
+            tokens -= granted
+            self._buckets[key] = (tokens, now)
+            return granted, tokens
+
+    def refund(self, key, count, capacity):
+        with self._lock:
+            if key in self._buckets:
+                tokens, ts = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + count), ts)
+
+    def peek(self, key) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            return self._buckets.get(key)
+
+
+_local_store = _LocalBucketStore()
+_redis_client = None
+_redis_retry_at = 0.0
+
+
+class CampaignPacer:
+    """
+    Token-bucket pacing for AutoCallCampaign.calls_per_hour
+    Har campaign ka bucket Redis mein rehta hai taake sab nodes same rate follow karein
+    """
+
+    KEY_PREFIX = 'pacing:campaign:'
+
+    def __init__(self):
+        self.redis_url = getattr(settings, 'PACING_REDIS_URL', getattr(settings, 'CELERY_BROKER_URL', ''))
+        self.max_carry_minutes = getattr(settings, 'PACING_MAX_CARRY_MINUTES', 15)
+        self.client = self._get_redis_client()
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT) if self.client else None
+        self._refund_script = self.client.register_script(REFUND_SCRIPT) if self.client else None
+
+    def acquire(self, campaign: AutoCallCampaign, requested: int, now: Optional[datetime] = None) -> int:
+        """
+        Take up to `requested` call tokens for a campaign
+        Jitne tokens mile utni calls is tick mein ho sakti hain
+        """
+        if requested <= 0:
+            return 0
+
+        granted, _ = self._take(campaign, requested, now or timezone.now())
+        return granted
+
+    def refund(self, campaign: AutoCallCampaign, count: int):
+        """Give back tokens that were acquired but not used (e.g. fewer pending contacts)"""
+        if count <= 0:
+            return
+
+        key = self._key(campaign)
+        capacity = self._capacity(campaign)
+        if self._redis_available():
+            try:
+                self._refund_script(keys=[key], args=[count, capacity])
+                return
+            except Exception as e:
+                self._mark_redis_down(e)
+        _local_store.refund(key, count, capacity)
+
+    def tokens_remaining(self, campaign: AutoCallCampaign, now: Optional[datetime] = None) -> float:
+        """
+        Tokens currently available to the campaign (refilled up to now, nothing taken)
+        Read-only - the stored bucket is not touched
+        """
+        now = now or timezone.now()
+        capacity = self._capacity(campaign)
+        key = self._key(campaign)
+
+        state = self._read_bucket(key)
+        tokens, ts = state if state is not None else (min(1.0, capacity), now.timestamp())
+        tokens = _refill(
+            tokens, ts, campaign.calls_per_hour / 3600.0, capacity, now.timestamp(), *self._window(campaign, now)
+        )
+        return round(tokens, 2)
+
+    def _read_bucket(self, key: str) -> Optional[Tuple[float, float]]:
+        if self._redis_available():
+            try:
+                tokens, ts = self.client.hmget(key, 'tokens', 'ts')
+                return (float(tokens), float(ts)) if tokens is not None else None
+            except Exception as e:
+                self._mark_redis_down(e)
+        return _local_store.peek(key)
+
+    def _capacity(self, campaign: AutoCallCampaign) -> float:
+        # Burst limit: at most max_carry_minutes worth of calls can pile up
+        return max(1.0, campaign.calls_per_hour * self.max_carry_minutes / 60.0)
+
+    def _take(self, campaign: AutoCallCampaign, requested: int, now: datetime) -> Tuple[int, float]:
+        rate = campaign.calls_per_hour / 3600.0
+        capacity = self._capacity(campaign)
+        window_start, window_end = self._window(campaign, now)
+        args = (rate, capacity, now.timestamp(), window_start, window_end, requested, min(1.0, capacity))
+        key = self._key(campaign)
+
+        if self._redis_available():
+            try:
+                granted, tokens = self._script(keys=[key], args=[*args, self._ttl()])
+                return int(granted), float(tokens)
+            except Exception as e:
+                self._mark_redis_down(e)
+
+        return _local_store.take(key, *args)
+
+    def _window(self, campaign: AutoCallCampaign, now: datetime) -> Tuple[float, float]:
+        """
+        (start, end) of today's working window - tokens only accrue inside working hours
+        Shaam ke baad aur raat ke time tokens jama nahi hote, is liye subah burst nahi aata
+        """
+        bounds = []
+        for value, default in ((campaign.working_hours_start, dt_time(0, 0)), (campaign.working_hours_end, dt_time(23, 59))):
+            try:
+                bound = datetime.strptime(value, '%H:%M').time()
+            except ValueError:
+                bound = default
+            bounds.append(now.replace(hour=bound.hour, minute=bound.minute, second=0, microsecond=0).timestamp())
+        return bounds[0], bounds[1]
+
+    def _key(self, campaign: AutoCallCampaign) -> str:
+        return f"{self.KEY_PREFIX}{campaign.id}"
+
+    def _ttl(self) -> int:
+        # A bucket untouched for a day is simply recreated on the next tick
+        return 24 * 3600
+
+    def _redis_available(self) -> bool:
+        return self.client is not None and time.monotonic() >= _redis_retry_at
+
+    def _mark_redis_down(self, error: Exception):
+        """Back off from Redis for a while instead of paying the connect timeout on every campaign"""
+        global _redis_retry_at
+        _redis_retry_at = time.monotonic() + 30
+        logger.warning(f"Redis pacing unavailable, using local bucket: {str(error)}")
+
+    def _get_redis_client(self):
+        global _redis_client
+
+        if _redis_client is None and self.redis_url.startswith('redis'):
+            try:
+                import redis
+                _redis_client = redis.Redis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            except Exception as e:
+                logger.warning(f"Redis client unavailable for pacing, using local bucket: {str(e)}")
+                _redis_client = False
+
+        return _redis_client or None
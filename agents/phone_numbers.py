@@ -0,0 +1,84 @@
+from django.conf import settings
+import re
+from typing import Optional
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone_number(raw: str, default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    Canonicalize a free-form phone number to E.164 (+<country><number>)
+    Returns None when the input cannot be a valid E.164 number.
+    """
+    if not raw:
+        return None
+
+    raw = str(raw).strip()
+    country_code = default_country_code or getattr(settings, 'DEFAULT_PHONE_COUNTRY_CODE', '1')
+
+    # Spreadsheets often turn numbers into floats ("15551234567.0")
+    if raw.endswith('.0') and raw[:-2].isdigit():
+        raw = raw[:-2]
+
+    has_plus = raw.startswith('+')
+    digits = NON_DIGITS.sub('', raw)
+
+    if not digits:
+        return None
+
+    if has_plus:
+        pass
+    elif digits.startswith('00'):
+        # International dialing prefix
+        digits = digits[2:]
+    elif country_code == '1' and len(digits) == 11 and digits.startswith('1'):
+        pass
+    else:
+        digits = country_code + digits.lstrip('0')
+
+    # E.164: country code cannot start with 0, at most 15 digits in total
+    if digits.startswith('0') or not 8 <= len(digits) <= 15:
+        return None
+
+    return f'+{digits}'
+
+
+# Free-form phone columns and the indexed E.164 column kept next to each
+# (ScheduledCallback has no number of its own - it matches through its CustomerProfile)
+PHONE_FIELDS = {
+    'agents.CustomerProfile': {'phone_number': 'phone_e164'},
+    'agents.CallSession': {'phone_number': 'phone_e164'},
+    'calls.CallSession': {'caller_number': 'caller_e164', 'callee_number': 'callee_e164'},
+}
+
+
+def canonicalize_phone_fields(sender, instance, **kwargs):
+    """pre_save: write-time E.164 for every registered phone column (None when not a valid number)"""
+    for raw_field, canonical_field in PHONE_FIELDS[sender._meta.label].items():
+        setattr(instance, canonical_field, normalize_phone_number(getattr(instance, raw_field)))
+
+
+def connect_phone_identity():
+    from django.apps import apps
+    from django.db.models.signals import pre_save
+
+    for label in PHONE_FIELDS:
+        pre_save.connect(
+            canonicalize_phone_fields, sender=apps.get_model(label), dispatch_uid=f'phone_identity:{label}'
+        )
+
+
+def match_customer(raw: str, ai_agent=None):
+    """
+    CustomerProfile for a caller's number, whatever format it arrives in
+    Canonical index par exact lookup - no fuzzy scan
+    """
+    from .ai_agent_models import CustomerProfile
+
+    canonical = normalize_phone_number(raw)
+    if not canonical:
+        return None
+    customers = CustomerProfile.objects.filter(phone_e164=canonical)
+    if ai_agent is not None:
+        customers = customers.filter(ai_agent=ai_agent)
+    return customers.select_related('ai_agent').first()
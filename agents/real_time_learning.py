@@ -8,6 +8,8 @@ import logging
 
 from .ai_agent_models import AIAgent, CallSession, AIAgentTraining
 from .homeai_integration import HomeAIService
+from .agent_memory import AgentMemory, objection_event, pattern_event, question_event, sentiment_event
+from .learning_buffer import learning_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +32,7 @@ class RealTimeCallLearningAPIView(APIView):
             
             call_session = CallSession.objects.get(id=call_id, ai_agent=agent)
             
-            # Process different learning events
-            if learning_event == 'customer_objection':
-                self._process_objection_learning(agent, call_session, data)
-            elif learning_event == 'successful_response':
-                self._process_success_learning(agent, call_session, data)
-            elif learning_event == 'conversation_turn':
-                self._process_conversation_learning(agent, call_session, data)
-            elif learning_event == 'call_sentiment_change':
-                self._process_sentiment_learning(agent, call_session, data)
+            self.process_learning_event(agent, call_session, data)
             
             return Response({
                 'message': 'Real-time learning processed',
@@ -53,177 +47,89 @@ class RealTimeCallLearningAPIView(APIView):
                 'error': f'Learning processing failed: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
     
+    def process_learning_event(self, agent, call_session, data):
+        """
+        Buffer one learning event - also used by the webhook processor
+        Events call ke dauran jama hote hain; learning_buffer unhe batch mein agent par fold karta hai
+        """
+        learning_event = data.get('learning_event')
+        
+        # Process different learning events
+        event = None
+        if learning_event == 'customer_objection':
+            event = self._process_objection_learning(agent, call_session, data)
+        elif learning_event == 'successful_response':
+            event = self._process_success_learning(agent, call_session, data)
+        elif learning_event == 'conversation_turn':
+            event = self._process_conversation_learning(agent, call_session, data)
+        elif learning_event == 'call_sentiment_change':
+            event = self._process_sentiment_learning(agent, call_session, data)
+        
+        if event:
+            learning_buffer.push(agent, [event])
+    
     def _process_objection_learning(self, agent, call_session, data):
         """Customer objection se sikhna"""
         objection_text = data.get('objection_text', '')
-        agent_response = data.get('agent_response', '')
         response_effectiveness = data.get('effectiveness_score', 0)  # 1-10
         
-        # Get current memory
-        memory = agent.conversation_memory or {}
-        
-        # Initialize objection patterns if not exists
-        if 'real_time_objections' not in memory:
-            memory['real_time_objections'] = {}
-        
-        objection_key = objection_text.lower()[:50].replace(' ', '_')
-        
-        if objection_key not in memory['real_time_objections']:
-            memory['real_time_objections'][objection_key] = {
-                'objection_text': objection_text,
-                'responses': [],
-                'best_response': None,
-                'avg_effectiveness': 0,
-                'frequency': 0
-            }
-        
-        # Add this response
-        response_data = {
-            'response': agent_response,
-            'effectiveness': response_effectiveness,
-            'call_id': str(call_session.id),
-            'timestamp': datetime.now().isoformat(),
-            'customer_reaction': data.get('customer_reaction', 'neutral')
-        }
-        
-        memory['real_time_objections'][objection_key]['responses'].append(response_data)
-        memory['real_time_objections'][objection_key]['frequency'] += 1
-        
-        # Update best response if this was more effective
-        current_best = memory['real_time_objections'][objection_key].get('best_response')
-        if not current_best or response_effectiveness > current_best.get('effectiveness', 0):
-            memory['real_time_objections'][objection_key]['best_response'] = response_data
-        
-        # Update average effectiveness
-        all_scores = [r['effectiveness'] for r in memory['real_time_objections'][objection_key]['responses']]
-        memory['real_time_objections'][objection_key]['avg_effectiveness'] = sum(all_scores) / len(all_scores)
-        
-        agent.conversation_memory = memory
-        agent.save()
-        
         logger.info(f"Agent learned from objection: {objection_text[:30]}... (effectiveness: {response_effectiveness})")
+        
+        return objection_event(
+            objection_text,
+            response=data.get('agent_response', ''),
+            effectiveness=response_effectiveness,
+            reaction=data.get('customer_reaction', 'neutral'),
+            call_session_id=call_session.pk
+        )
     
     def _process_success_learning(self, agent, call_session, data):
         """Successful response se sikhna"""
         successful_approach = data.get('approach_used', '')
-        context = data.get('context', '')
-        customer_positive_reaction = data.get('customer_reaction', '')
-        effectiveness_score = data.get('effectiveness_score', 8)
-        
-        memory = agent.conversation_memory or {}
-        
-        if 'successful_patterns' not in memory:
-            memory['successful_patterns'] = []
-        
-        success_pattern = {
-            'approach': successful_approach,
-            'context': context,
-            'customer_reaction': customer_positive_reaction,
-            'effectiveness': effectiveness_score,
-            'call_id': str(call_session.id),
-            'timestamp': datetime.now().isoformat(),
-            'customer_profile': {
-                'interest_level': call_session.customer_profile.interest_level,
-                'previous_calls': call_session.customer_profile.total_calls
-            }
-        }
-        
-        memory['successful_patterns'].append(success_pattern)
-        
-        # Keep only top 50 successful patterns (memory management)
-        if len(memory['successful_patterns']) > 50:
-            memory['successful_patterns'] = sorted(
-                memory['successful_patterns'], 
-                key=lambda x: x['effectiveness'], 
-                reverse=True
-            )[:50]
-        
-        agent.conversation_memory = memory
-        agent.save()
         
         logger.info(f"Agent learned successful pattern: {successful_approach[:30]}...")
+        
+        return pattern_event(
+            'real_time',
+            successful_approach,
+            data.get('effectiveness_score', 8),
+            call_session_id=call_session.pk,
+            context=data.get('context', ''),
+            customer_reaction=data.get('customer_reaction', ''),
+            customer_interest_level=call_session.customer_profile.interest_level
+        )
     
     def _process_conversation_learning(self, agent, call_session, data):
         """General conversation pattern se sikhna"""
         conversation_turn = data.get('conversation_turn', {})
-        customer_input = conversation_turn.get('customer_said', '')
         agent_response = conversation_turn.get('agent_said', '')
-        turn_effectiveness = data.get('turn_effectiveness', 5)
-        
-        memory = agent.conversation_memory or {}
-        
-        if 'conversation_patterns' not in memory:
-            memory['conversation_patterns'] = {
-                'effective_transitions': [],
-                'question_response_pairs': [],
-                'conversation_flow_analysis': {}
-            }
         
         # Analyze question-response effectiveness
         if '?' in agent_response:  # Agent asked a question
-            qr_pair = {
-                'agent_question': agent_response,
-                'customer_response': customer_input,
-                'effectiveness': turn_effectiveness,
-                'led_to_positive_outcome': turn_effectiveness > 6,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            memory['conversation_patterns']['question_response_pairs'].append(qr_pair)
-            
-            # Keep only recent 100 pairs
-            if len(memory['conversation_patterns']['question_response_pairs']) > 100:
-                memory['conversation_patterns']['question_response_pairs'] = \
-                    memory['conversation_patterns']['question_response_pairs'][-100:]
-        
-        agent.conversation_memory = memory
-        agent.save()
+            return question_event(
+                agent_response,
+                conversation_turn.get('customer_said', ''),
+                data.get('turn_effectiveness', 5),
+                call_session_id=call_session.pk
+            )
+        return None
     
     def _process_sentiment_learning(self, agent, call_session, data):
         """Customer sentiment changes se sikhna"""
         previous_sentiment = data.get('previous_sentiment', 'neutral')
         current_sentiment = data.get('current_sentiment', 'neutral')
-        trigger_action = data.get('trigger_action', '')  # What agent did that caused change
         sentiment_score = data.get('sentiment_score', 0)  # -5 to +5
         
-        memory = agent.conversation_memory or {}
-        
-        if 'sentiment_learning' not in memory:
-            memory['sentiment_learning'] = {
-                'positive_triggers': [],
-                'negative_triggers': [],
-                'sentiment_recovery_strategies': []
-            }
-        
-        sentiment_change = {
-            'from': previous_sentiment,
-            'to': current_sentiment,
-            'trigger': trigger_action,
-            'score_change': sentiment_score,
-            'call_id': str(call_session.id),
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Categorize as positive or negative trigger
-        if sentiment_score > 0:  # Positive change
-            memory['sentiment_learning']['positive_triggers'].append(sentiment_change)
-            # Keep top 30 positive triggers
-            if len(memory['sentiment_learning']['positive_triggers']) > 30:
-                memory['sentiment_learning']['positive_triggers'] = \
-                    sorted(memory['sentiment_learning']['positive_triggers'], 
-                           key=lambda x: x['score_change'], reverse=True)[:30]
-        
-        elif sentiment_score < 0:  # Negative change
-            memory['sentiment_learning']['negative_triggers'].append(sentiment_change)
-            # Keep top 30 negative triggers to avoid
-            if len(memory['sentiment_learning']['negative_triggers']) > 30:
-                memory['sentiment_learning']['negative_triggers'] = \
-                    memory['sentiment_learning']['negative_triggers'][-30:]
-        
-        agent.conversation_memory = memory
-        agent.save()
-        
         logger.info(f"Agent learned sentiment change: {previous_sentiment} -> {current_sentiment} (score: {sentiment_score})")
+        
+        # Positive triggers keep the strongest, negative triggers the most recent
+        return sentiment_event(
+            previous_sentiment,
+            current_sentiment,
+            data.get('trigger_action', ''),  # What agent did that caused change
+            sentiment_score,
+            call_session_id=call_session.pk
+        )
 
 
 class AutoCallAnalysisAPIView(APIView):
@@ -242,59 +148,9 @@ class AutoCallAnalysisAPIView(APIView):
             call_id = data.get('call_id')
             call_session = CallSession.objects.get(id=call_id, ai_agent=agent)
             
-            # Get call recording analysis from HumeAI
-            homeai_service = HomeAIService()
-            
-            # Analyze full conversation
-            analysis_result = homeai_service.analyze_conversation_for_learning(
-                conversation_id=data.get('conversation_id'),
-                full_transcript=data.get('full_transcript', ''),
-                call_outcome=call_session.outcome
-            )
-            
-            if analysis_result:
-                # Process comprehensive learning
-                learning_insights = self._extract_learning_insights(analysis_result)
-                
-                # Create detailed training session
-                training_session = AIAgentTraining.objects.create(
-                    ai_agent=agent,
-                    training_type='post_call_analysis',
-                    training_data={
-                        'call_analysis': analysis_result,
-                        'learning_insights': learning_insights,
-                        'call_metadata': {
-                            'call_id': str(call_session.id),
-                            'duration': call_session.duration_seconds,
-                            'outcome': call_session.outcome,
-                            'customer_satisfaction': data.get('customer_satisfaction', 5)
-                        },
-                        'improvement_recommendations': learning_insights.get('recommendations', [])
-                    },
-                    completion_percentage=100,
-                    is_completed=True
-                )
-                
-                # Update agent memory with insights
-                self._update_agent_memory_with_insights(agent, learning_insights)
-                
-                # Increment training level based on call quality
-                call_quality_score = self._calculate_call_quality_score(analysis_result)
-                if call_quality_score > 7:
-                    agent.training_level = min(agent.training_level + 1, 100)
-                    agent.save()
-                
-                return Response({
-                    'message': 'Post-call analysis completed',
-                    'training_session_id': str(training_session.id),
-                    'learning_insights': learning_insights,
-                    'call_quality_score': call_quality_score,
-                    'agent_improvement': {
-                        'new_training_level': agent.training_level,
-                        'insights_learned': len(learning_insights.get('key_learnings', [])),
-                        'recommendations': learning_insights.get('recommendations', [])
-                    }
-                }, status=status.HTTP_200_OK)
+            result = self.analyze_call(agent, call_session, data)
+            if result:
+                return Response(result, status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Auto call analysis error: {str(e)}")
@@ -302,6 +158,64 @@ class AutoCallAnalysisAPIView(APIView):
                 'error': f'Call analysis failed: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
     
+    def analyze_call(self, agent, call_session, data):
+        """Post-call analysis and learning - also used by the webhook processor"""
+        # Get call recording analysis from HumeAI
+        homeai_service = HomeAIService()
+        
+        # Analyze full conversation
+        analysis_result = homeai_service.analyze_conversation_for_learning(
+            conversation_id=data.get('conversation_id'),
+            full_transcript=data.get('full_transcript', ''),
+            call_outcome=call_session.outcome
+        )
+        
+        if analysis_result:
+            # Process comprehensive learning
+            learning_insights = self._extract_learning_insights(analysis_result)
+            
+            # Create detailed training session
+            training_session = AIAgentTraining.objects.create(
+                ai_agent=agent,
+                training_type='post_call_analysis',
+                training_data={
+                    'call_analysis': analysis_result,
+                    'learning_insights': learning_insights,
+                    'call_metadata': {
+                        'call_id': str(call_session.id),
+                        'duration': call_session.duration_seconds,
+                        'outcome': call_session.outcome,
+                        'customer_satisfaction': data.get('customer_satisfaction', 5)
+                    },
+                    'improvement_recommendations': learning_insights.get('recommendations', [])
+                },
+                completion_percentage=100,
+                is_completed=True
+            )
+            
+            # Update agent memory with insights
+            self._update_agent_memory_with_insights(agent, learning_insights)
+            
+            # Increment training level based on call quality
+            call_quality_score = self._calculate_call_quality_score(analysis_result)
+            if call_quality_score > 7:
+                agent.training_level = min(agent.training_level + 1, 100)
+                agent.save(update_fields=['training_level', 'updated_at'])
+            
+            return {
+                'message': 'Post-call analysis completed',
+                'training_session_id': str(training_session.id),
+                'learning_insights': learning_insights,
+                'call_quality_score': call_quality_score,
+                'agent_improvement': {
+                    'new_training_level': agent.training_level,
+                    'insights_learned': len(learning_insights.get('key_learnings', [])),
+                    'recommendations': learning_insights.get('recommendations', [])
+                }
+            }
+        
+        return None
+    
     def _extract_learning_insights(self, analysis_result):
         """Extract actionable learning insights from analysis"""
         insights = {
@@ -339,40 +253,22 @@ class AutoCallAnalysisAPIView(APIView):
     
     def _update_agent_memory_with_insights(self, agent, insights):
         """Update agent memory with comprehensive insights"""
-        memory = agent.conversation_memory or {}
-        
-        # Update successful techniques repository
-        if 'proven_techniques' not in memory:
-            memory['proven_techniques'] = []
+        memory = AgentMemory(agent)
         
+        # Successful techniques repository
         for technique in insights.get('successful_moments', []):
-            memory['proven_techniques'].append({
-                'technique': technique,
-                'learned_date': datetime.now().isoformat(),
-                'effectiveness_confirmed': True
-            })
-        
-        # Update improvement focus areas
-        if 'focus_areas' not in memory:
-            memory['focus_areas'] = {}
+            memory.record_successful_pattern(
+                'post_call',
+                technique if isinstance(technique, str) else json.dumps(technique),
+                8,
+                unique=True
+            )
         
+        # Improvement focus areas
         for area in insights.get('improvement_areas', []):
-            area_type = area.get('type', 'general')
-            if area_type not in memory['focus_areas']:
-                memory['focus_areas'][area_type] = {
-                    'priority': area.get('priority', 'medium'),
-                    'instances': [],
-                    'improvement_plan': []
-                }
-            
-            memory['focus_areas'][area_type]['instances'].append({
-                'identified_date': datetime.now().isoformat(),
-                'context': area.get('context', ''),
-                'suggestion': area.get('suggestion', '')
-            })
+            memory.record_focus_area(area.get('type', 'general'), area.get('suggestion', ''))
         
-        agent.conversation_memory = memory
-        agent.save()
+        memory.refresh_summary()
     
     def _calculate_call_quality_score(self, analysis_result):
         """Calculate overall call quality score (1-10)"""
@@ -5,7 +5,7 @@ import logging
 
 from .ai_agent_models import AIAgent, CallSession
 from .auto_campaign_models import AutoCallCampaign, AutoCampaignContact
-from .auto_call_system import AutoCallCampaignAPIView
+from .dialer import CampaignDialer
 
 logger = logging.getLogger(__name__)
 
@@ -14,64 +14,74 @@ logger = logging.getLogger(__name__)
 def process_scheduled_auto_calls():
     """
     Celery task to process scheduled automatic calls
-    Har 5 minute mein run hota hai
+    Har minute run hota hai, pacing token bucket se hoti hai
     """
     logger.info("Processing scheduled auto calls...")
     
-    # Get all active campaigns
-    active_campaigns = AutoCallCampaign.objects.filter(status='active')
+    # Fan due contacts out across the dialer worker pool
+    stats = CampaignDialer().run_tick()
     
-    total_calls_started = 0
+    logger.info(f"Scheduled auto calls completed. Started {stats['calls_started']} calls.")
+    return stats
+
+
+@shared_task
+def import_contacts(import_id):
+    """
+    Import an uploaded contacts file in the background
+    Bari lead lists request timeout ke baghair import hoti hain
+    """
+    from .contact_import import ContactImportService
+    from .contact_import_models import ContactImport
     
-    for campaign in active_campaigns:
-        try:
-            # Check if it's within working hours
-            current_time = timezone.now().time()
-            
-            # Parse working hours
-            start_time = datetime.strptime(campaign.working_hours_start, '%H:%M').time()
-            end_time = datetime.strptime(campaign.working_hours_end, '%H:%M').time()
-            
-            if not (start_time <= current_time <= end_time):
-                continue  # Skip if outside working hours
-            
-            # Calculate calls to make based on calls_per_hour
-            minutes_passed = timezone.now().minute
-            calls_this_interval = max(1, campaign.calls_per_hour // 12)  # 12 intervals per hour (5 min each)
-            
-            # Get pending contacts for this campaign
-            pending_contacts = campaign.contacts.filter(
-                status='pending',
-                scheduled_datetime__lte=timezone.now()
-            ).order_by('-priority', 'scheduled_datetime')[:calls_this_interval]
-            
-            # Start calls
-            for contact in pending_contacts:
-                try:
-                    # Update contact status
-                    contact.status = 'calling'
-                    contact.call_started_at = timezone.now()
-                    contact.save()
-                    
-                    # Initiate the actual call
-                    auto_call_view = AutoCallCampaignAPIView()
-                    auto_call_view._initiate_call(contact)
-                    
-                    total_calls_started += 1
-                    
-                    logger.info(f"Started auto call for {contact.customer_profile.phone_number}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to start call for contact {contact.id}: {str(e)}")
-                    contact.status = 'failed'
-                    contact.failure_reason = str(e)
-                    contact.save()
-        
-        except Exception as e:
-            logger.error(f"Error processing campaign {campaign.id}: {str(e)}")
+    contact_import = ContactImport.objects.select_related('ai_agent').get(id=import_id)
+    contact_import = ContactImportService(contact_import).run()
+    
+    logger.info(
+        f"Contact import {import_id} {contact_import.status}: "
+        f"{contact_import.contacts_created} created, {contact_import.contacts_updated} updated"
+    )
+    return {
+        'status': contact_import.status,
+        'contacts_created': contact_import.contacts_created,
+        'contacts_updated': contact_import.contacts_updated,
+        'duplicates_skipped': contact_import.duplicates_skipped,
+        'invalid_rows': contact_import.invalid_rows
+    }
+
+
+@shared_task
+def enroll_campaign_contacts(campaign_id):
+    """
+    Enroll customers matching a new auto campaign's filters
+    Contacts database mein hi bante hain, phir zaroorat ho to foran calls
+    """
+    from .campaign_enrollment import CampaignEnrollmentService
+    
+    campaign = AutoCallCampaign.objects.select_related('ai_agent').get(id=campaign_id)
+    enrollment = campaign.campaign_data.setdefault('enrollment', {})
+    
+    try:
+        enrolled = CampaignEnrollmentService(campaign).enroll()
+        enrollment.update({
+            'status': 'completed',
+            'enrolled': enrolled,
+            'completed_at': timezone.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Enrollment for campaign {campaign_id} failed: {str(e)}")
+        enrollment.update({'status': 'failed', 'error': str(e)})
+        campaign.save(update_fields=['campaign_data', 'updated_at'])
+        raise
+    
+    campaign.save(update_fields=['campaign_data', 'updated_at'])
+    
+    calls_started = 0
+    if enrollment.get('start_immediately') and enrolled:
+        calls_started = CampaignDialer().start_immediate_calls(campaign, enrollment.get('immediate_call_count', 5))
     
-    logger.info(f"Scheduled auto calls completed. Started {total_calls_started} calls.")
-    return {'calls_started': total_calls_started}
+    logger.info(f"Campaign {campaign_id}: enrolled {enrolled} customers, started {calls_started} calls")
+    return {'enrolled': enrolled, 'calls_started': calls_started}
 
 
 @shared_task
@@ -235,6 +245,63 @@ def update_customer_priorities():
     return {'customers_updated': updated_count}
 
 
+
+@shared_task
+def process_webhook_events(agent_id):
+    """
+    Process an agent's stored webhook events in the order they arrived
+    Routed to the agent's webhooks.<n> queue (see webhook_pipeline.queue_for_agent)
+    """
+    from django.conf import settings
+    from .webhook_pipeline import WebhookEventProcessor, dispatch_agent
+    
+    stats = WebhookEventProcessor(agent_id).drain(settings.WEBHOOK_DRAIN_BATCH_SIZE)
+    
+    # Hand the rest to a fresh task so one busy agent doesn't hold the queue
+    if stats['more']:
+        dispatch_agent(agent_id)
+    
+    logger.info(f"Webhook events for agent {agent_id}: {stats['processed']} processed, {stats['failed']} failed")
+    return stats
+
+
+@shared_task
+def sweep_webhook_events():
+    """
+    Re-dispatch webhook events that were never queued, stuck or failed
+    Broker down hone par bhi events DB mein safe rehte hain
+    """
+    from .webhook_pipeline import sweep_pending_events
+    
+    stats = sweep_pending_events()
+    logger.info(f"Webhook sweep: {stats}")
+    return stats
+
+
+@shared_task
+def reconcile_twilio_calls():
+    """
+    Settle in-flight calls whose final Twilio webhook never arrived
+    Missed webhooks se atke 'calling' contacts dialer capacity block nahi karte
+    """
+    from .call_reconciliation import CallReconciler
+    
+    return CallReconciler().run()
+
+
+@shared_task
+def flush_learning_buffers():
+    """
+    Fold every agent's buffered learning events into its memory
+    Har agent ke liye ek batch - per-event writes ki jagah
+    """
+    from .learning_buffer import learning_buffer
+    
+    stats = learning_buffer.flush_all()
+    if stats['events']:
+        logger.info(f"Learning buffers flushed: {stats}")
+    return stats
+
 # Celery Beat Schedule Configuration
 """
 Add this to your settings.py:
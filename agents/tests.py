@@ -1,3 +1,1468 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+from twilio.base.exceptions import TwilioRestException
+from twilio.twiml.voice_response import VoiceResponse
+from rest_framework.test import APIRequestFactory, force_authenticate
+from unittest import mock
+import asyncio
+import base64
+import io
+import json
+import requests
+from http.client import RemoteDisconnected
+from types import SimpleNamespace
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
 
-# Create your tests here.
+from calls.models import CallSession as InboxCallSession
+from dashboard.response_cache import dashboard_cache
+from subscriptions.models import Subscription, SubscriptionPlan
+from .ai_agent_models import AIAgent, CustomerProfile, CallSession
+from .agent_management_views import agent_list_page
+from .agent_memory import AgentMemory, SUMMARY_KEY
+from .auto_call_system import StartImmediateCallsAPIView
+from .auto_campaign_models import AutoCallCampaign, AutoCampaignContact, AutoCampaignContactQuerySet
+from .call_admission import call_admission
+from .call_admission_models import CallSlot
+from .call_reconciliation import CallReconciler
+from .customer_callback_crud import CustomerProfileCRUDAPIView, CustomerSearchAPIView
+from .campaign_models import Campaign, CampaignContact
+from .contact_import import ContactImportService
+from .contact_import_models import ContactImport
+from .homeai_client import HomeAIClient, HomeAIUnavailable
+from .learning_buffer import _local_store, learning_buffer
+from .models import Agent
+from .phone_numbers import match_customer
+from .media_bridge import MediaBridge, media_bridge_metrics, media_stream_app, stream_token
+from .agent_memory_models import (
+    AgentMemoryAggregate, ObjectionResponse, QuestionResponsePair, SentimentTrigger, SuccessfulPattern
+)
+from .pacing import CampaignPacer, _local_store as _local_bucket_store
+from .webhook_integration import hume_ai_webhook, twilio_status_webhook
+from .webhook_models import WebhookEvent
+from .real_time_learning import RealTimeCallLearningAPIView
+from .twilio_service import TwilioCallService
+from .twiml_templates import twiml_cache
+from .voice_call_integration import start_campaign_with_ai_voice
+from .webhook_pipeline import WebhookEventProcessor, queue_for_agent, webhook_metrics
+from .dialer import CampaignDialer
+from .tasks import import_contacts, enroll_campaign_contacts
+
+User = get_user_model()
+
+
+@override_settings(CALL_ADMISSION_BACKEND='db', DIALER_DEFAULT_CONCURRENT_CALLS=2)
+class CampaignDialerTests(TestCase):
+    """
+    Dialer ticks lease contacts within each account's concurrent call cap and report throughput
+    """
+
+    NOON = datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = User.objects.create_user(email='dialer@example.com', password=None)
+        plan = SubscriptionPlan.objects.create(name='Dialer', plan_type='pro', price=10, concurrent_calls=3)
+        Subscription.objects.create(
+            user=cls.tenant, plan=plan, status='active', current_period_end=timezone.now() + timedelta(days=30)
+        )
+        agent = AIAgent.objects.create(client=cls.tenant, name='Dialer Agent')
+        cls.first = cls.campaign(agent, 'First', 3)
+        cls.second = cls.campaign(agent, 'Second', 3)
+
+        # No subscription - DIALER_DEFAULT_CONCURRENT_CALLS applies
+        other = AIAgent.objects.create(
+            client=User.objects.create_user(email='dialer-free@example.com', password=None), name='Free Agent'
+        )
+        cls.free = cls.campaign(other, 'Free', 4)
+
+    @classmethod
+    def campaign(cls, agent, name, contacts):
+        campaign = AutoCallCampaign.objects.create(
+            ai_agent=agent, name=name, calls_per_hour=120, working_hours_start='00:00', working_hours_end='23:59'
+        )
+        for i in range(contacts):
+            customer = CustomerProfile.objects.create(
+                ai_agent=agent, phone_number=f'+1555030{CustomerProfile.objects.count():04d}', name=f'{name} {i}'
+            )
+            AutoCampaignContact.objects.create(
+                campaign=campaign, customer_profile=customer, scheduled_datetime=cls.NOON - timedelta(hours=1)
+            )
+        return campaign
+
+    def setUp(self):
+        self.dialer = CampaignDialer(max_workers=4)
+        # Pacing has its own tests - here every requested token is granted
+        mock.patch.object(self.dialer.pacer, 'acquire', side_effect=lambda campaign, n, now: n).start()
+        self.refund = mock.patch.object(self.dialer.pacer, 'refund').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def claimed(self, campaign):
+        return campaign.contacts.filter(status='calling').count()
+
+    def test_plan_respects_each_accounts_cap(self):
+        call_admission.acquire(self.tenant.id, 3)  # A call from another dial path is already live
+
+        batches = self.dialer._plan_batches([self.first, self.second, self.free], self.NOON)
+
+        self.assertEqual(
+            [(campaign.name, len(contacts)) for campaign, contacts in batches], [('First', 2), ('Free', 2)]
+        )
+        self.assertEqual((self.claimed(self.first), self.claimed(self.second), self.claimed(self.free)), (2, 0, 2))
+
+    def test_plan_counts_the_campaigns_own_live_calls(self):
+        # A First call still ringing after its admission slot expired
+        self.first.contacts.filter(pk=self.first.contacts.first().pk).update(status='calling', call_started_at=self.NOON)
+
+        batches = self.dialer._plan_batches([self.first, self.second], self.NOON)
+
+        self.assertEqual([(campaign.name, len(contacts)) for campaign, contacts in batches], [('First', 2), ('Second', 1)])
+
+    def test_contact_that_loses_the_admission_race_is_requeued_with_its_token(self):
+        contact = self.free.contacts.claim_batch('worker', 1, now=self.NOON)[0]
+        call_admission.acquire(contact.campaign.ai_agent.client_id, 1)
+
+        with mock.patch('agents.dialer.connection'):
+            success, _ = self.dialer._dial_contact(contact, 1)
+
+        contact.refresh_from_db()
+        self.assertIsNone(success)
+        self.assertEqual((contact.status, contact.attempts, contact.claimed_by), ('pending', 0, ''))
+        self.refund.assert_called_once_with(contact.campaign, 1)
+
+        stats = self.dialer._build_stats([(True, 1.0), (False, 1.0), (None, 1.0)], 0)
+        self.assertEqual((stats['calls_started'], stats['calls_failed'], stats['calls_requeued']), (1, 1, 1))
+
+    def test_unused_tokens_are_refunded(self):
+        self.free.contacts.exclude(pk=self.free.contacts.first().pk).update(status='completed')
+
+        self.dialer._plan_batches([self.free], self.NOON)
+
+        self.refund.assert_called_once_with(self.free, 1)
+
+    def test_tick_dials_and_reports_stats(self):
+        latencies = iter([40.0, 10.0, 30.0, 20.0, 50.0])
+
+        def fake_dial(contact, *args):
+            return not contact.customer_profile.name.endswith('0'), next(latencies)
+
+        with mock.patch('agents.dialer.timezone.now', return_value=self.NOON), \
+                mock.patch.object(self.dialer, '_dial_contact', side_effect=fake_dial) as dial:
+            stats = self.dialer.run_tick()
+
+        # 3 for the subscribed account (first campaign), 2 for the free one
+        self.assertEqual(dial.call_count, 5)
+        self.assertEqual((stats['campaigns_processed'], stats['contacts_reclaimed']), (2, 0))
+        self.assertEqual((stats['calls_started'], stats['calls_failed']), (3, 2))
+        self.assertEqual(stats['avg_dial_latency_ms'], 30.0)
+        self.assertEqual((stats['p95_dial_latency_ms'], stats['max_dial_latency_ms']), (50.0, 50.0))
+
+    def test_paused_and_off_hours_campaigns_are_skipped(self):
+        AutoCallCampaign.objects.filter(id=self.second.id).update(status='paused')
+        AutoCallCampaign.objects.filter(id=self.free.id).update(working_hours_start='13:00')
+
+        with mock.patch('agents.dialer.timezone.now', return_value=self.NOON), \
+                mock.patch.object(self.dialer, '_dial_contact', return_value=(True, 1.0)):
+            stats = self.dialer.run_tick()
+
+        self.assertEqual((stats['campaigns_processed'], stats['calls_started']), (1, 3))
+        self.assertEqual(self.claimed(self.free), 0)
+
+
+class ContactLeaseTests(TestCase):
+    """
+    Dialer workers lease due contacts atomically; expired leases go back to the pool
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        agent = AIAgent.objects.create(
+            client=User.objects.create_user(email='lease@example.com', password=None), name='Lease Agent'
+        )
+        cls.campaign = AutoCallCampaign.objects.create(ai_agent=agent, name='Leases')
+        for i, (priority, due_in) in enumerate([(1, -30), (5, -10), (3, -20), (5, -5), (5, 60)]):
+            customer = CustomerProfile.objects.create(ai_agent=agent, phone_number=f'+1555040{i:04d}', name=f'L{i}')
+            AutoCampaignContact.objects.create(
+                campaign=cls.campaign, customer_profile=customer, priority=priority,
+                scheduled_datetime=cls.now + timedelta(minutes=due_in)
+            )
+
+    def names(self, contacts):
+        return [contact.customer_profile.name for contact in contacts]
+
+    def test_claims_due_contacts_by_priority(self):
+        claimed = self.campaign.contacts.claim_batch('worker-a', 3, lease_seconds=60, now=self.now)
+
+        self.assertEqual(self.names(claimed), ['L1', 'L3', 'L2'])
+        contact = claimed[0]
+        self.assertEqual((contact.status, contact.attempts), ('calling', 1))
+        self.assertTrue(contact.claimed_by.startswith('worker-a/'))
+        self.assertEqual(contact.lease_expires_at, self.now + timedelta(seconds=60))
+
+    def test_workers_get_disjoint_batches(self):
+        first = self.campaign.contacts.claim_batch('worker-a', 2, now=self.now)
+        second = self.campaign.contacts.claim_batch('worker-b', 10, now=self.now)
+
+        self.assertEqual((self.names(first), self.names(second)), (['L1', 'L3'], ['L2', 'L0']))  # L4 not due yet
+        self.assertEqual(self.campaign.contacts.claim_batch('worker-c', 10, now=self.now), [])
+
+    def test_rows_taken_by_a_concurrent_worker_are_not_claimed(self):
+        original = QuerySet.values_list
+
+        def select_then_lose_race(queryset, *fields, **kwargs):
+            rows = list(original(queryset, *fields, **kwargs))
+            # Another worker claims the first row between our SELECT and UPDATE
+            AutoCampaignContact.objects.filter(id=rows[0]).update(status='calling', claimed_by='worker-b/x')
+            return rows
+
+        with mock.patch.object(AutoCampaignContactQuerySet, 'values_list', select_then_lose_race):
+            claimed = self.campaign.contacts.claim_batch('worker-a', 2, now=self.now)
+
+        self.assertEqual(self.names(claimed), ['L3'])
+        self.assertEqual(AutoCampaignContact.objects.get(customer_profile__name='L1').claimed_by, 'worker-b/x')
+
+    def test_expired_leases_are_reclaimed(self):
+        self.campaign.contacts.claim_batch('worker-a', 1, lease_seconds=60, now=self.now - timedelta(minutes=5))
+        self.campaign.contacts.claim_batch('worker-b', 1, lease_seconds=600, now=self.now)
+
+        self.assertEqual(AutoCampaignContact.objects.reclaim_expired(self.now), 1)
+        reclaimed = AutoCampaignContact.objects.get(customer_profile__name='L1')
+        self.assertEqual((reclaimed.status, reclaimed.claimed_by, reclaimed.lease_expires_at), ('pending', '', None))
+        self.assertEqual(AutoCampaignContact.objects.filter(status='calling').count(), 1)
+
+
+@override_settings(
+    CONTACT_IMPORT_CHUNK_SIZE=2,
+    STORAGES={'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+              'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class ContactImportTests(TestCase):
+    """
+    Uploaded lists are streamed in chunks; bad rows are counted and reported, not fatal
+    """
+
+    CSV = (
+        'Name,Phone,Email,Notes,Preferred Time\n'
+        'Alice,(555) 010-4001,alice@example.com,Met at expo,Morning\n'
+        ',5550104002,,,\n'
+        'Bob,not a phone,,,\n'
+        'Alice Again,555-010-4001,,,\n'
+        'Carol,+1 555 010 4003,,,midnight\n'
+        'Dan,5550104004,,,\n'
+        'Eve,5550104005,,,evening\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='importer@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.user, name='Import Agent')
+        other = AIAgent.objects.create(
+            client=User.objects.create_user(email='import-other@example.com', password=None), name='Other'
+        )
+        CustomerProfile.objects.create(ai_agent=other, phone_number='+15550104004', name='Not Yours')
+        CustomerProfile.objects.create(
+            ai_agent=cls.agent, phone_number='+15550104005', name='Eve Old', email='eve@example.com'
+        )
+
+    def run_import(self, content, file_type='csv'):
+        path = default_storage.save(f'contact_imports/test.{file_type}', ContentFile(content))
+        contact_import = ContactImport.objects.create(
+            user=self.user, ai_agent=self.agent, file_name=f'test.{file_type}', file_path=path, file_type=file_type
+        )
+        import_contacts(str(contact_import.id))
+        contact_import.refresh_from_db()
+        self.assertFalse(default_storage.exists(path))
+        return contact_import
+
+    def test_rows_are_upserted_and_errors_reported(self):
+        result = self.run_import(self.CSV.encode())
+
+        self.assertEqual(result.status, 'completed')
+        self.assertEqual((result.total_rows, result.processed_rows), (7, 7))
+        self.assertEqual((result.contacts_created, result.contacts_updated), (2, 1))
+        self.assertEqual((result.duplicates_skipped, result.invalid_rows), (1, 3))
+        self.assertEqual(result.progress_percentage, 100)
+        self.assertEqual(result.errors, [
+            'Row 2: Name and Phone are required',
+            'Row 3: Invalid phone number "not a phone"',
+            '+15550104004: belongs to another account',
+        ])
+
+        customers = {c.phone_number: c for c in CustomerProfile.objects.filter(ai_agent=self.agent)}
+        self.assertEqual(customers['+15550104001'].call_preference_time, 'morning')
+        self.assertEqual(customers['+15550104001'].conversation_notes['initial_notes'], 'Met at expo')
+        self.assertEqual(customers['+15550104003'].call_preference_time, 'anytime')
+        # Blank email in the file keeps the stored one
+        self.assertEqual((customers['+15550104005'].name, customers['+15550104005'].email), ('Eve', 'eve@example.com'))
+        self.assertEqual(CustomerProfile.objects.get(phone_number='+15550104004').name, 'Not Yours')
+
+    def test_quoted_newlines_count_as_one_row(self):
+        content = 'Name,Phone,Notes\nHal,5550104007,"Call after\nlunch"\n\nIvy,5550104008,\n'
+
+        result = self.run_import(content.encode())
+
+        self.assertEqual((result.total_rows, result.processed_rows, result.contacts_created), (2, 2, 2))
+        self.assertEqual(CustomerProfile.objects.get(phone_number='+15550104007').conversation_notes['initial_notes'], 'Call after\nlunch')
+
+    def test_number_taken_by_a_concurrent_insert_is_rechecked(self):
+        other = CustomerProfile.objects.get(phone_number='+15550104004').ai_agent
+        plan_chunk = ContactImportService._plan_chunk
+
+        def racing_plan_chunk(service, chunk):
+            plan = plan_chunk(service, chunk)
+            # Another account saves the number between the owner lookup and the upsert
+            if not CustomerProfile.objects.filter(phone_number='+15550104009').exists():
+                CustomerProfile.objects.create(ai_agent=other, phone_number='+15550104009', name='Raced')
+            return plan
+
+        with mock.patch.object(ContactImportService, '_plan_chunk', autospec=True, side_effect=racing_plan_chunk):
+            result = self.run_import(b'Name,Phone\nJay,5550104009\nKim,5550104010\n')
+
+        self.assertEqual(result.status, 'completed')
+        self.assertEqual((result.contacts_created, result.invalid_rows), (1, 1))
+        self.assertEqual(result.errors, ['+15550104009: belongs to another account'])
+        self.assertEqual(CustomerProfile.objects.get(phone_number='+15550104009').name, 'Raced')
+        self.assertTrue(CustomerProfile.objects.filter(ai_agent=self.agent, phone_number='+15550104010').exists())
+
+    def test_xlsx_is_streamed_too(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Name', 'Phone', 'Email'])
+        sheet.append(['Frank', 5550104006, 'frank@example.com'])
+        sheet.append(['Grace', None, None])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        result = self.run_import(content.getvalue(), file_type='xlsx')
+
+        self.assertEqual((result.status, result.contacts_created, result.invalid_rows), ('completed', 1, 1))
+        self.assertEqual(CustomerProfile.objects.get(phone_number='+15550104006').email, 'frank@example.com')
+
+    def test_unreadable_file_fails_the_import(self):
+        result = self.run_import(b'PK not really a workbook', file_type='xlsx')
+
+        self.assertEqual(result.status, 'failed')
+        self.assertTrue(result.errors[0].startswith('File processing error'))
+        self.assertIsNotNone(result.completed_at)
+
+
+def legacy_customer_priority(customer, now):
+    """The per-customer Python rule enrollment used before priorities moved into SQL"""
+    priority = {'hot': 5, 'warm': 3}.get(customer.interest_level, 1)
+    if customer.last_interaction and (now - customer.last_interaction).days < 7:
+        priority += 1
+    if customer.total_calls > customer.successful_calls * 2:
+        priority = max(1, priority - 1)
+    return min(5, priority)
+
+
+@override_settings(CAMPAIGN_ENROLLMENT_CHUNK_SIZE=2)
+class CampaignEnrollmentTests(TestCase):
+    """
+    Campaign contacts are inserted set-based with the priority computed in SQL
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.agent = AIAgent.objects.create(
+            client=User.objects.create_user(email='enroll@example.com', password=None), name='Enroll Agent'
+        )
+        profiles = []
+        for interest in ['hot', 'warm', 'cold', 'converted']:
+            for last_seen in [None, 2, 30]:
+                for total_calls, successful_calls in [(0, 0), (5, 1)]:
+                    profiles.append(CustomerProfile(
+                        ai_agent=cls.agent, phone_number=f'+1555050{len(profiles):04d}', interest_level=interest,
+                        last_interaction=cls.now - timedelta(days=last_seen) if last_seen else None,
+                        total_calls=total_calls, successful_calls=successful_calls,
+                        is_converted=interest == 'converted',
+                    ))
+        profiles.append(CustomerProfile(
+            ai_agent=cls.agent, phone_number='+15550509999', interest_level='hot', is_do_not_call=True
+        ))
+        CustomerProfile.objects.bulk_create(profiles)
+
+    def enroll(self, **filters):
+        campaign = AutoCallCampaign.objects.create(
+            ai_agent=self.agent, name='Enrollment', campaign_data={'customer_filters': filters}
+        )
+        result = enroll_campaign_contacts(str(campaign.id))
+        campaign.refresh_from_db()
+        return campaign, result
+
+    def test_sql_priority_matches_the_python_rule(self):
+        campaign, result = self.enroll()
+
+        self.assertEqual(result, {'enrolled': 24, 'calls_started': 0})
+        self.assertEqual(campaign.total_contacts, 24)
+        self.assertEqual(campaign.campaign_data['enrollment']['status'], 'completed')
+        contacts = campaign.contacts.select_related('customer_profile')
+        self.assertEqual(
+            {contact.customer_profile_id: contact.priority for contact in contacts},
+            {contact.customer_profile_id: legacy_customer_priority(contact.customer_profile, self.now)
+             for contact in contacts}
+        )
+        self.assertEqual(sorted({contact.priority for contact in contacts}), [1, 2, 3, 4, 5])
+        self.assertTrue(all(contact.status == 'pending' for contact in contacts))
+
+    def test_filters_and_limit(self):
+        campaign, _ = self.enroll(interest_levels=['hot', 'warm'], days_since_last_call=7)
+        self.assertEqual(campaign.total_contacts, 8)  # Do-not-call and recently contacted customers excluded
+
+        campaign, _ = self.enroll(only_unconverted=True, max_customers=5)
+        self.assertEqual(campaign.contacts.count(), 5)
+        self.assertFalse(campaign.contacts.filter(customer_profile__is_converted=True).exists())
+
+
+@override_settings(PACING_MAX_CARRY_MINUTES=15)
+class CampaignPacerTests(TestCase):
+    """
+    Token bucket per campaign: refills at calls_per_hour, only inside working hours, capped at the carry limit
+    """
+
+    def setUp(self):
+        patcher = mock.patch('agents.pacing._redis_client', False)  # Local bucket store
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _local_bucket_store._buckets.clear()
+        self.pacer = CampaignPacer()
+        self.campaign = AutoCallCampaign(name='Paced', calls_per_hour=60, working_hours_start='09:00')
+
+    def at(self, hour, minute=0, day=2):
+        return datetime(2026, 3, day, hour, minute, tzinfo=dt_timezone.utc)
+
+    def test_bucket_refills_at_the_hourly_rate(self):
+        self.assertEqual(self.pacer.acquire(self.campaign, 5, now=self.at(10)), 1)  # New bucket starts with one token
+        self.assertEqual(self.pacer.acquire(self.campaign, 10, now=self.at(10, 5)), 5)
+        self.assertEqual(self.pacer.acquire(self.campaign, 10, now=self.at(10, 5)), 0)
+
+    def test_carry_is_capped(self):
+        self.pacer.acquire(self.campaign, 1, now=self.at(10))
+        self.assertEqual(self.pacer.acquire(self.campaign, 100, now=self.at(13)), 15)
+
+    def test_tokens_only_accrue_inside_working_hours(self):
+        self.pacer.acquire(self.campaign, 1, now=self.at(17, day=1))
+        # Overnight gap would fill the bucket - only the 10 minutes since 09:00 count
+        self.assertEqual(self.pacer.acquire(self.campaign, 100, now=self.at(9, 10)), 10)
+
+    def test_tokens_stop_accruing_after_working_hours(self):
+        self.pacer.acquire(self.campaign, 1, now=self.at(16, 55))
+        # Only 16:55-17:00 counts, not the evening after the window closed
+        self.assertEqual(self.pacer.tokens_remaining(self.campaign, now=self.at(20)), 5)
+        self.assertEqual(self.pacer.acquire(self.campaign, 100, now=self.at(20)), 5)
+
+    def test_refunds_never_exceed_capacity(self):
+        self.pacer.acquire(self.campaign, 100, now=self.at(10))
+        self.pacer.refund(self.campaign, 10)
+        self.pacer.refund(self.campaign, 10)
+
+        self.assertEqual(self.pacer.tokens_remaining(self.campaign, now=self.at(10)), 15)
+        self.assertEqual(self.pacer.acquire(self.campaign, 100, now=self.at(10)), 15)
+
+    def test_tokens_remaining_is_read_only(self):
+        key = self.pacer._key(self.campaign)
+        self.assertEqual(self.pacer.tokens_remaining(self.campaign, now=self.at(10)), 1)
+        self.assertIsNone(_local_bucket_store.peek(key))
+
+        self.pacer.acquire(self.campaign, 1, now=self.at(10))
+        state = _local_bucket_store.peek(key)
+        self.assertEqual(self.pacer.tokens_remaining(self.campaign, now=self.at(10, 4)), 4)
+        self.assertEqual(_local_bucket_store.peek(key), state)
+
+
+class AgentMemoryTests(TestCase):
+    """
+    Learning store keeps bounded tables and incremental aggregates
+    Memory blob mein sirf chhota summary rehta hai
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='memory@example.com', password=None)
+        cls.agent = AIAgent.objects.create(
+            client=cls.client_user,
+            name='Memory Agent',
+            conversation_memory={'business_knowledge': {'company': 'Acme'}}
+        )
+        cls.customer = CustomerProfile.objects.create(
+            ai_agent=cls.agent, phone_number='+15550001111', interest_level='warm'
+        )
+        cls.call = CallSession.objects.create(
+            ai_agent=cls.agent,
+            customer_profile=cls.customer,
+            call_type='outbound',
+            phone_number=cls.customer.phone_number,
+            outcome='interested'
+        )
+
+    def setUp(self):
+        self.agent = AIAgent.objects.get(pk=self.agent.pk)
+        self.memory = AgentMemory(self.agent)
+
+    @override_settings(AGENT_MEMORY_OBJECTION_RESPONSES=3)
+    def test_objection_aggregates_and_retention(self):
+        for score in [4, 9, 2, 7, 5]:
+            self.memory.record_objection('Too expensive', response=f'response {score}', effectiveness=score)
+        self.memory.record_objection('Too expensive')  # Mentioned without a scored response
+
+        aggregate = AgentMemoryAggregate.objects.get(ai_agent=self.agent, kind='objection', key='too_expensive')
+        self.assertEqual(aggregate.frequency, 6)
+        self.assertEqual(aggregate.scored, 5)
+        self.assertAlmostEqual(aggregate.avg_score, 5.4)
+        self.assertEqual(aggregate.best_response, 'response 9')
+
+        kept = ObjectionResponse.objects.filter(ai_agent=self.agent).order_by('-effectiveness')
+        self.assertEqual([row.effectiveness for row in kept], [9, 7, 5])
+
+    @override_settings(AGENT_MEMORY_SUCCESSFUL_PATTERNS=2, AGENT_MEMORY_SENTIMENT_TRIGGERS=2)
+    def test_top_k_enforced_in_database(self):
+        for score in [6, 9, 3, 8]:
+            self.memory.record_successful_pattern('real_time', f'approach {score}', score)
+        self.assertEqual(
+            sorted(SuccessfulPattern.objects.values_list('effectiveness', flat=True)), [8, 9]
+        )
+
+        for score in [1, 4, 2]:
+            self.memory.record_sentiment_change('neutral', 'positive', f'trigger {score}', score)
+        for score in [-1, -4, -2]:
+            self.memory.record_sentiment_change('neutral', 'negative', f'trigger {score}', score)
+
+        positive = SentimentTrigger.objects.filter(polarity='positive')
+        negative = SentimentTrigger.objects.filter(polarity='negative')
+        self.assertEqual(sorted(positive.values_list('score_change', flat=True)), [2, 4])  # Strongest
+        self.assertEqual(sorted(negative.values_list('score_change', flat=True)), [-4, -2])  # Most recent
+
+    def test_summary_is_merged_into_memory(self):
+        self.memory.record_successful_pattern(
+            'call_outcome', 'Lead with savings', 8, customer_interest_level='warm'
+        )
+        self.memory.refresh_summary()
+
+        stored = AIAgent.objects.get(pk=self.agent.pk).conversation_memory
+        self.assertEqual(stored['business_knowledge'], {'company': 'Acme'})
+        self.assertEqual(stored[SUMMARY_KEY]['best_pattern_by_interest'], {'warm': 'Lead with savings'})
+
+        script = AIAgent.objects.get(pk=self.agent.pk).get_personalized_script_for_customer(self.customer)
+        self.assertIn('Lead with savings', script)
+
+    def test_update_learning_data_counts_in_sql(self):
+        self.agent.update_learning_data({
+            'outcome': 'interested', 'notes': 'Asked about their budget', 'call_duration': 120,
+            'customer_interest_level': 'warm', 'satisfaction': 8, 'successful': True
+        })
+        self.agent.update_learning_data({
+            'outcome': 'not_interested', 'call_duration': 60, 'satisfaction': 2, 'successful': False
+        })
+
+        agent = AIAgent.objects.get(pk=self.agent.pk)
+        self.assertEqual(agent.calls_handled, 2)
+        self.assertEqual(agent.successful_conversions, 1)
+        self.assertEqual(agent.conversion_rate, 50)
+        self.assertEqual(agent.avg_call_duration, 90)
+
+        summary = agent.conversation_memory[SUMMARY_KEY]
+        self.assertEqual(summary['pattern_count'], 1)
+        self.assertEqual(summary['failures'], {'count': 1, 'latest': 'Low customer satisfaction'})
+        self.assertEqual(summary['satisfaction'], {'count': 2, 'average': 5})
+
+
+@override_settings(LEARNING_BUFFER_BACKEND='local')
+class LearningBufferTests(TestCase):
+    """
+    Real-time learning events are buffered and folded per agent in one batch
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='buffer@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.client_user, name='Buffer Agent')
+        customer = CustomerProfile.objects.create(ai_agent=cls.agent, phone_number='+15550003333', interest_level='hot')
+        cls.call = CallSession.objects.create(
+            ai_agent=cls.agent, customer_profile=customer, call_type='outbound', phone_number=customer.phone_number
+        )
+
+    def setUp(self):
+        _local_store.clear()
+        self.addCleanup(_local_store.clear)
+        self.agent = AIAgent.objects.get(pk=self.agent.pk)
+        self.view = RealTimeCallLearningAPIView()
+
+    def learn(self, **data):
+        self.view.process_learning_event(self.agent, self.call, data)
+
+    def test_events_are_buffered_until_flush(self):
+        for score in [3, 8, 6]:
+            self.learn(learning_event='customer_objection', objection_text='Too expensive',
+                       agent_response=f'response {score}', effectiveness_score=score)
+        self.learn(learning_event='successful_response', approach_used='Offer a trial', effectiveness_score=9)
+        self.learn(learning_event='call_sentiment_change', previous_sentiment='neutral',
+                   current_sentiment='positive', trigger_action='Offer a trial', sentiment_score=3)
+
+        self.assertFalse(ObjectionResponse.objects.exists())
+        self.assertNotIn(SUMMARY_KEY, AIAgent.objects.get(pk=self.agent.pk).conversation_memory)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(learning_buffer.flush(self.agent.pk, agent=self.agent), 5)
+        agent_writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "ai_agents"')]
+        self.assertEqual(len(agent_writes), 1)  # One memory write for the whole batch
+
+        aggregate = AgentMemoryAggregate.objects.get(ai_agent=self.agent, kind='objection')
+        self.assertEqual((aggregate.frequency, aggregate.best_response), (3, 'response 8'))
+        pattern = SuccessfulPattern.objects.get(ai_agent=self.agent)
+        self.assertEqual(pattern.customer_interest_level, 'hot')
+
+        summary = AIAgent.objects.get(pk=self.agent.pk).conversation_memory[SUMMARY_KEY]
+        self.assertEqual(summary['best_pattern_by_interest'], {'hot': 'Offer a trial'})
+        self.assertEqual(learning_buffer.flush(self.agent.pk), 0)
+
+    @override_settings(LEARNING_BUFFER_MAX_EVENTS=2)
+    def test_full_buffer_flushes_inline(self):
+        self.learn(learning_event='customer_objection', objection_text='No budget', effectiveness_score=4)
+        self.assertFalse(ObjectionResponse.objects.exists())
+        self.learn(learning_event='customer_objection', objection_text='No budget', effectiveness_score=6)
+        self.assertEqual(ObjectionResponse.objects.count(), 2)
+        self.assertEqual(_local_store.dirty_agents(), [])
+
+    def test_flush_all_and_write_through(self):
+        self.learn(learning_event='customer_objection', objection_text='Call me later', effectiveness_score=5)
+        self.assertEqual(learning_buffer.flush_all(), {'agents': 1, 'events': 1})
+
+        with override_settings(LEARNING_BUFFER_BACKEND='none'):
+            self.learn(learning_event='customer_objection', objection_text='Call me later', effectiveness_score=7)
+        self.assertEqual(ObjectionResponse.objects.count(), 2)
+
+
+@override_settings(LEARNING_BUFFER_BACKEND='local', CALL_ADMISSION_BACKEND='db')
+@mock.patch('agents.webhook_pipeline.dispatch_agent')
+class WebhookPipelineTests(TestCase):
+    """
+    Webhooks are stored once and acked; processing happens in the agent's drain
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='webhooks@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.client_user, name='Webhook Agent')
+        customer = CustomerProfile.objects.create(ai_agent=cls.agent, phone_number='+15550002222')
+        cls.call = CallSession.objects.create(
+            ai_agent=cls.agent,
+            customer_profile=customer,
+            call_type='outbound',
+            phone_number=customer.phone_number,
+            outcome='answered',
+            twilio_call_sid='CA123'
+        )
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        _local_store.clear()
+        self.addCleanup(_local_store.clear)
+
+    def post_status(self, call_status, **extra):
+        request = self.factory.post('/webhooks/twilio/status/', {'CallSid': 'CA123', 'CallStatus': call_status, **extra})
+        return json.loads(twilio_status_webhook(request).content)
+
+    def post_hume(self, payload):
+        request = self.factory.post('/webhooks/hume-ai/', json.dumps(payload), content_type='application/json')
+        return hume_ai_webhook(request)
+
+    def test_twilio_retry_is_deduplicated_and_processing_deferred(self, dispatch):
+        self.assertEqual(self.post_status('completed', CallDuration='120')['status'], 'accepted')
+        self.assertEqual(self.post_status('completed', CallDuration='120')['status'], 'duplicate')
+
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        dispatch.assert_called_once_with(self.agent.pk)
+        self.call.refresh_from_db()
+        self.assertIsNone(self.call.ended_at)  # Not touched inside the request
+
+    def test_drain_processes_agent_events_in_order(self, dispatch):
+        self.post_hume({
+            'event_id': 'evt-1', 'event_type': 'customer_objection_detected', 'conversation_id': 'CA123',
+            'objection_text': 'Too expensive', 'agent_response': 'Here is the ROI', 'customer_engagement_score': 7
+        })
+        self.post_status('completed', CallDuration='120', RecordingUrl='https://example.com/rec.mp3')
+
+        stats = WebhookEventProcessor(self.agent.pk).drain(10)
+
+        self.assertEqual(stats, {'processed': 2, 'failed': 0, 'more': 0})
+        self.assertFalse(WebhookEvent.objects.exclude(status='processed').exists())
+        self.assertEqual(
+            AgentMemoryAggregate.objects.get(ai_agent=self.agent, kind='objection').best_response, 'Here is the ROI'
+        )
+        self.call.refresh_from_db()
+        self.assertEqual(self.call.duration_seconds, 120)
+        self.assertEqual(self.call.recording_url, 'https://example.com/rec.mp3')
+
+    def test_invalid_and_unknown_events(self, dispatch):
+        self.assertEqual(self.post_hume({'event_type': 'customer_objection_detected'}).status_code, 400)
+
+        self.post_hume({'event_id': 'evt-2', 'event_type': 'transcript_ready', 'conversation_id': 'CA123'})
+        self.assertEqual(WebhookEvent.objects.get().status, 'ignored')
+        dispatch.assert_not_called()
+
+    def test_failures_are_recorded_and_metrics_report_backlog(self, dispatch):
+        WebhookEvent.objects.create(
+            provider='hume_ai', event_type='conversation_ended', dedupe_key='hume_ai:lost',
+            ai_agent=self.agent, call_sid='CA-missing'
+        )
+        self.post_status('in-progress')
+
+        metrics = webhook_metrics()['providers']
+        self.assertEqual(metrics['hume_ai']['pending'], 1)
+        self.assertEqual(metrics['twilio']['pending'], 1)
+
+        # The older event fails, so the status update behind it waits for its retry
+        stats = WebhookEventProcessor(self.agent.pk).drain(10)
+        self.assertEqual((stats['processed'], stats['failed']), (0, 1))
+
+        failed = WebhookEvent.objects.get(dedupe_key='hume_ai:lost')
+        self.assertEqual((failed.status, failed.attempts), ('failed', 1))
+        self.assertEqual(WebhookEvent.objects.get(provider='twilio').status, 'pending')
+
+        # Out of attempts - the partition moves on
+        WebhookEvent.objects.filter(pk=failed.pk).update(attempts=settings.WEBHOOK_MAX_ATTEMPTS)
+        stats = WebhookEventProcessor(self.agent.pk).drain(10)
+        self.assertEqual((stats['processed'], stats['failed']), (1, 0))
+        self.assertEqual(webhook_metrics()['providers']['twilio']['processed_last_minute'], 1)
+
+    def test_agent_maps_to_a_stable_queue(self, dispatch):
+        self.assertEqual(queue_for_agent(self.agent.pk), queue_for_agent(str(self.agent.pk)))
+        self.assertTrue(queue_for_agent(self.agent.pk).startswith('webhooks.'))
+
+
+@override_settings(HOMEAI_RETRY_BACKOFF=0, HOMEAI_MAX_RETRIES=2, HOMEAI_BREAKER_FAILURES=3, HOMEAI_BREAKER_RESET_SECONDS=60)
+class HomeAIClientTests(TestCase):
+    """
+    Pooled HomeAI client retries transient failures and opens per-endpoint circuits
+    """
+
+    def setUp(self):
+        self.client_ = HomeAIClient(base_url='https://homeai.test/v1')
+        self.send = mock.patch.object(self.client_.session, 'request').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def response(self, status_code):
+        response = requests.Response()
+        response.status_code = status_code
+        return response
+
+    def test_retries_overload_then_succeeds(self):
+        self.send.side_effect = [self.response(503), self.response(200)]
+
+        response = self.client_.post('respond', '/conversations/c1/respond', json={})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.send.call_count, 2)
+        method, url = self.send.call_args.args
+        self.assertEqual((method, url), ('POST', 'https://homeai.test/v1/conversations/c1/respond'))
+        self.assertEqual(self.send.call_args.kwargs['timeout'], (3, 5))  # Connect, per-endpoint read
+
+        stats = self.client_.histogram.snapshot()['respond']
+        self.assertEqual((stats['count'], stats['errors']), (2, 1))
+
+    def test_post_read_timeout_is_not_retried(self):
+        self.send.side_effect = requests.ReadTimeout()
+        with self.assertRaises(requests.ReadTimeout):
+            self.client_.post('respond', '/conversations/c1/respond', json={})
+        self.assertEqual(self.send.call_count, 1)
+
+    def test_circuit_opens_per_endpoint(self):
+        self.send.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            self.client_.get('analysis', '/conversations/c1/analysis')
+        self.assertEqual(self.send.call_count, 3)
+        self.assertEqual(self.client_.breaker.state('analysis'), 'open')
+
+        with self.assertRaises(HomeAIUnavailable):
+            self.client_.get('analysis', '/conversations/c1/analysis')
+        self.assertEqual(self.send.call_count, 3)  # Not sent
+
+        self.send.side_effect = None
+        self.send.return_value = self.response(200)
+        self.assertEqual(self.client_.post('respond', '/conversations/c1/respond').status_code, 200)
+
+    def test_post_retries_only_connect_phase_errors(self):
+        refused = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused')))
+        self.send.side_effect = [refused, self.response(200)]
+        self.assertEqual(self.client_.post('respond', '/conversations/c1/respond').status_code, 200)
+        self.assertEqual(self.send.call_count, 2)
+
+        # Keep-alive dropped after the request went out - the turn may already have been processed
+        self.send.reset_mock()
+        self.send.side_effect = requests.ConnectionError(ProtocolError('Connection aborted.', RemoteDisconnected()))
+        with self.assertRaises(requests.ConnectionError):
+            self.client_.post('respond', '/conversations/c1/respond')
+        self.assertEqual(self.send.call_count, 1)
+
+    def test_half_open_trial_is_not_lost_when_no_slot_is_free(self):
+        breaker = self.client_.breaker
+        for _ in range(3):
+            breaker.record_failure('analysis')
+        breaker._opened_at['analysis'] -= 61
+        self.assertEqual(breaker.state('analysis'), 'half_open')
+
+        with mock.patch.object(self.client_._slots, 'acquire', return_value=False):
+            with self.assertRaises(HomeAIUnavailable):
+                self.client_.get('analysis', '/conversations/c1/analysis')
+
+        self.send.return_value = self.response(200)
+        self.assertEqual(self.client_.get('analysis', '/conversations/c1/analysis').status_code, 200)
+        self.assertEqual(breaker.state('analysis'), 'closed')
+
+
+class FakeVoiceBackend:
+    """Stands in for HumeAI EVI - the test feeds backend events through a queue"""
+
+    def __init__(self, context):
+        self.context = context
+        self.audio = []
+        self.queue = asyncio.Queue()
+        self.closed = False
+
+    async def connect(self):
+        FakeVoiceBackend.latest = self
+
+    async def send_audio(self, mulaw):
+        self.audio.append(mulaw)
+
+    async def events(self):
+        while True:
+            event = await self.queue.get()
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    async def close(self):
+        self.closed = True
+
+
+@override_settings(LEARNING_BUFFER_BACKEND='local')
+@mock.patch.object(MediaBridge, 'backend_class', FakeVoiceBackend)
+class MediaBridgeTests(TestCase):
+    """
+    Twilio Media Stream frames are relayed to the voice backend and back
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='bridge@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.client_user, name='Bridge Agent')
+        customer = CustomerProfile.objects.create(ai_agent=cls.agent, phone_number='+15550004444')
+        cls.call = CallSession.objects.create(
+            ai_agent=cls.agent, customer_profile=customer, call_type='inbound',
+            phone_number=customer.phone_number, twilio_call_sid='CA-stream'
+        )
+
+    def setUp(self):
+        _local_store.clear()
+        self.addCleanup(_local_store.clear)
+        FakeVoiceBackend.latest = None
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def twilio(self, event, **body):
+        self.incoming.put_nowait({'type': 'websocket.receive', 'text': json.dumps({'event': event, **body})})
+
+    def start(self, token):
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        self.twilio('start', start={
+            'streamSid': 'MZ1', 'callSid': 'CA-stream', 'customParameters': {'token': token}
+        })
+
+    async def wait_for(self, condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.005)
+        self.fail('Bridge did not get there in time')
+
+    async def test_audio_is_relayed_and_turns_are_learned(self):
+        self.start(stream_token('CA-stream'))
+        bridge = asyncio.create_task(media_stream_app({'type': 'websocket'}, self.receive, self.send))
+
+        for _ in range(3):
+            self.twilio('media', media={'payload': base64.b64encode(b'\x7f' * 160).decode()})
+        await self.wait_for(lambda: sum(map(len, getattr(FakeVoiceBackend.latest, 'audio', []))) == 480)
+        backend = FakeVoiceBackend.latest
+        self.assertEqual(b''.join(backend.audio), b'\x7f' * 480)
+
+        backend.queue.put_nowait(('agent_text', 'What is your budget?'))
+        backend.queue.put_nowait(('user_text', 'About five thousand'))
+        backend.queue.put_nowait(('audio', b'\xff' * 160))
+        await self.wait_for(lambda: any(m['type'] == 'websocket.send' for m in self.sent))
+
+        media = [json.loads(m['text']) for m in self.sent if m['type'] == 'websocket.send']
+        self.assertEqual(media[0]['event'], 'media')
+        self.assertEqual(base64.b64decode(media[0]['media']['payload']), b'\xff' * 160)
+
+        self.twilio('stop')
+        await bridge
+
+        self.assertTrue(backend.closed)
+        pair = await QuestionResponsePair.objects.aget(ai_agent=self.agent)
+        self.assertEqual(pair.customer_response, 'About five thousand')
+
+        call = await CallSession.objects.aget(pk=self.call.pk)
+        self.assertIn('Customer: About five thousand', call.conversation_transcript)
+        self.assertEqual(call.extracted_insights['turn_latency_ms']['turns'], 1)
+        self.assertEqual(media_bridge_metrics()['active_sessions'], 0)
+
+    async def test_failed_pump_closes_the_stream(self):
+        self.start(stream_token('CA-stream'))
+        bridge = asyncio.create_task(media_stream_app({'type': 'websocket'}, self.receive, self.send))
+        await self.wait_for(lambda: FakeVoiceBackend.latest is not None)
+
+        with self.assertLogs('agents.media_bridge', 'ERROR') as logs:
+            FakeVoiceBackend.latest.queue.put_nowait(ConnectionError('EVI socket dropped'))
+            await self.wait_for(lambda: {'type': 'websocket.close', 'code': 1011} in self.sent)
+        self.assertIn('_pump_from_backend failed for call CA-stream', logs.output[0])
+
+        self.incoming.put_nowait({'type': 'websocket.disconnect', 'code': 1011})
+        await bridge
+        self.assertTrue(FakeVoiceBackend.latest.closed)
+        self.assertEqual(media_bridge_metrics()['active_sessions'], 0)
+
+    async def test_bad_token_closes_stream(self):
+        self.start(stream_token('CA-other'))
+        await media_stream_app({'type': 'websocket'}, self.receive, self.send)
+
+        self.assertEqual(self.sent[-1], {'type': 'websocket.close', 'code': 4403})
+
+
+class TwiMLTemplateTests(TestCase):
+    """
+    Cached TwiML templates render the same documents VoiceResponse would build
+    """
+
+    def setUp(self):
+        twiml_cache.clear()
+        self.service = TwilioCallService()
+
+    def test_inbound_matches_voice_response(self):
+        expected = VoiceResponse()
+        expected.say('Hello! This is Ava from our company. How are you doing today?', voice='alice', language='en-US')
+        gather = expected.gather(
+            input='speech', timeout=10, action='/api/calls/twilio/process-speech/CA1/', method='POST', speech_timeout='auto'
+        )
+        gather.say("Please tell me how I can help you today.", voice='alice')
+        expected.say("I didn't hear anything. Please tell me how I can assist you.")
+        expected.redirect('/api/calls/twilio/handle-silence/CA1/')
+
+        rendered = self.service.handle_inbound_call('CA1', '+15550005555', {'name': 'Ava'})
+
+        self.assertEqual(rendered, expected.to_xml())
+        self.assertEqual(rendered.to_xml(xml_declaration=False), expected.to_xml(xml_declaration=False))
+
+    def test_templates_compile_once_per_branch(self):
+        first = self.service.process_speech_input('CA1', "I'm busy", {})
+        second = self.service.process_speech_input('CA2', 'Really busy today', {})
+        self.service.process_speech_input('CA3', 'Sounds interested', {})
+
+        self.assertIn('/handle-callback-request/CA1/', first)
+        self.assertIn('/handle-callback-request/CA2/', second)
+        self.assertEqual(twiml_cache.stats(), {'templates': 2, 'hits': 1, 'misses': 2})
+
+    def test_dynamic_text_is_escaped(self):
+        rendered = self.service.handle_inbound_call('CA"1&', '+15550005555', {
+            'name': 'R&D <Bot>', 'conversation_memory': {'business_info': {'company_name': 'Acme'}}
+        })
+        self.assertIn('R&amp;D &lt;Bot&gt;', rendered)
+        self.assertIn('/process-speech/CA&quot;1&amp;/', rendered)
+
+
+class FakeTwilioClient:
+    """Calls/recordings list APIs over an in-memory call table"""
+
+    def __init__(self, calls, recordings=()):
+        self.listed = []
+        self.fetched = []
+        self._calls = {call.sid: call for call in calls}
+        self._recordings = list(recordings)
+        self.calls = mock.Mock(side_effect=self._call, stream=self._stream_calls)
+        self.recordings = SimpleNamespace(stream=lambda **kwargs: iter(self._recordings))
+
+    def _stream_calls(self, start_time_after, start_time_before, page_size):
+        self.listed.append((start_time_after, start_time_before))
+        return iter([call for call in self._calls.values() if start_time_after <= call.start_time < start_time_before])
+
+    def _call(self, sid):
+        def fetch():
+            self.fetched.append(sid)
+            raise TwilioRestException(404, f'/Calls/{sid}.json')
+        return SimpleNamespace(fetch=fetch)
+
+
+def twilio_call(sid, status, started, duration=0):
+    return SimpleNamespace(sid=sid, status=status, duration=str(duration), start_time=started, end_time=started + timedelta(seconds=duration))
+
+
+@override_settings(
+    RECONCILE_STALE_MINUTES=5, RECONCILE_WINDOW_HOURS=1, DIALER_CALL_TIMEOUT_MINUTES=30, CALL_ADMISSION_BACKEND='db'
+)
+class CallReconcilerTests(TestCase):
+    """
+    Stale in-flight calls are settled from Twilio's call list in bulk
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='reconcile@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.client_user, name='Reconcile Agent')
+        cls.campaign = AutoCallCampaign.objects.create(ai_agent=cls.agent, name='Reconcile')
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def contact(self, sid, minutes_ago):
+        customer = CustomerProfile.objects.create(ai_agent=self.agent, phone_number=f'+1555{sid[-7:]}')
+        return AutoCampaignContact.objects.create(
+            campaign=self.campaign, customer_profile=customer, status='calling', twilio_call_sid=sid,
+            scheduled_datetime=self.now - timedelta(hours=1), call_started_at=self.now - timedelta(minutes=minutes_ago),
+            claimed_by='worker-1'
+        )
+
+    def session(self, sid, minutes_ago):
+        customer = CustomerProfile.objects.create(ai_agent=self.agent, phone_number=f'+1666{sid[-7:]}')
+        session = CallSession.objects.create(
+            ai_agent=self.agent, customer_profile=customer, call_type='outbound',
+            phone_number=customer.phone_number, outcome='calling', twilio_call_sid=sid
+        )
+        CallSession.objects.filter(id=session.id).update(initiated_at=self.now - timedelta(minutes=minutes_ago))
+        return session
+
+    def test_settles_contacts_and_sessions_from_call_list(self):
+        answered = self.contact('CA0000001', 20)
+        busy = self.contact('CA0000002', 20)
+        live = self.contact('CA0000003', 10)
+        fresh = self.contact('CA0000004', 1)
+        session = self.session('CA0000001', 20)
+        client = FakeTwilioClient(
+            [
+                twilio_call('CA0000001', 'completed', self.now - timedelta(minutes=20), duration=95),
+                twilio_call('CA0000002', 'busy', self.now - timedelta(minutes=20)),
+                twilio_call('CA0000003', 'in-progress', self.now - timedelta(minutes=10)),
+            ],
+            recordings=[SimpleNamespace(call_sid='CA0000001', uri='/2010-04-01/Accounts/AC1/Recordings/RE1.json')]
+        )
+
+        stats = CallReconciler(client=client).run(self.now)
+
+        self.assertEqual(stats['campaign_contacts'], 2)
+        self.assertEqual(client.fetched, [])  # Every stale SID came back from the list
+        answered.refresh_from_db()
+        busy.refresh_from_db()
+        live.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((answered.status, answered.call_duration, answered.claimed_by), ('completed', 95, ''))
+        self.assertEqual((busy.status, busy.call_outcome), ('failed', 'busy'))
+        self.assertEqual(live.status, 'calling')
+        self.assertEqual(fresh.status, 'calling')
+
+        session.refresh_from_db()
+        self.assertEqual((session.outcome, session.duration_seconds), ('answered', 95))
+        self.assertEqual(session.recording_url, 'https://api.twilio.com/2010-04-01/Accounts/AC1/Recordings/RE1.mp3')
+
+    def test_calls_settled_by_a_webhook_mid_run_are_left_alone(self):
+        contact = self.contact('CA0000008', 20)
+        session = self.session('CA0000008', 20)
+        client = FakeTwilioClient([twilio_call('CA0000008', 'completed', self.now - timedelta(minutes=20), duration=30)])
+        reconciler = CallReconciler(client=client)
+        fetch_states = reconciler.fetch_states
+
+        def webhook_lands_during_fetch(*args):
+            # The final status webhook arrives while the reconciler is talking to Twilio
+            AutoCampaignContact.objects.filter(pk=contact.pk).update(status='completed', call_duration=95)
+            CallSession.objects.filter(pk=session.pk).update(outcome='answered', duration_seconds=95)
+            return fetch_states(*args)
+
+        with mock.patch.object(reconciler, 'fetch_states', side_effect=webhook_lands_during_fetch):
+            stats = reconciler.run(self.now)
+
+        self.assertEqual((stats['campaign_contacts'], stats['call_sessions']), (0, 0))
+        contact.refresh_from_db()
+        session.refresh_from_db()
+        self.assertEqual(contact.call_duration, 95)
+        self.assertEqual((session.outcome, session.duration_seconds), ('answered', 95))
+
+    def test_unknown_calls_fail_after_timeout(self):
+        lost = self.contact('CA0000005', 45)
+        recent = self.contact('CA0000006', 10)
+        client = FakeTwilioClient([])
+
+        CallReconciler(client=client).run(self.now)
+
+        self.assertEqual(sorted(client.fetched), ['CA0000005', 'CA0000006'])
+        self.assertGreaterEqual(len(client.listed), 1)
+        lost.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((lost.status, lost.call_outcome), ('failed', 'not-found'))
+        self.assertEqual(recent.status, 'calling')
+
+    def test_inbox_call_frees_busy_agent(self):
+        user = User.objects.create_user(email='agent-reconcile@example.com', password=None)
+        agent = Agent.objects.create(user=user, employee_id='RC-1', status='on_call')
+        call = InboxCallSession.objects.create(
+            user=user, agent=agent, call_type='inbound', status='answered',
+            caller_number='+15550007777', callee_number='+15550008888', twilio_call_sid='CA0000007',
+            started_at=self.now - timedelta(minutes=15)
+        )
+        client = FakeTwilioClient([twilio_call('CA0000007', 'no-answer', self.now - timedelta(minutes=15))])
+
+        CallReconciler(client=client).run(self.now)
+
+        call.refresh_from_db()
+        agent.refresh_from_db()
+        self.assertEqual(call.status, 'no_answer')
+        self.assertEqual(agent.status, 'available')
+
+
+@override_settings(CALL_ADMISSION_BACKEND='db', CALL_ADMISSION_SLOT_TTL_SECONDS=600)
+class CallAdmissionTests(TestCase):
+    """
+    Tenants get at most concurrent_calls slots; terminal statuses and expiry give them back
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = User.objects.create_user(email='admission@example.com', password=None)
+        plan = SubscriptionPlan.objects.create(name='Starter', plan_type='starter', price=10, concurrent_calls=2)
+        Subscription.objects.create(
+            user=cls.tenant, plan=plan, status='active', current_period_end=timezone.now() + timedelta(days=30)
+        )
+
+    def test_limit_comes_from_plan(self):
+        self.assertEqual(call_admission.limit_for(self.tenant), 2)
+        other = User.objects.create_user(email='no-plan@example.com', password=None)
+        with override_settings(DIALER_DEFAULT_CONCURRENT_CALLS=7):
+            self.assertEqual(call_admission.limit_for(other), 7)
+
+    def test_admits_up_to_limit_and_releases_on_terminal_status(self):
+        first = call_admission.acquire(self.tenant.id, 2)
+        second = call_admission.acquire(self.tenant.id, 2)
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(call_admission.acquire(self.tenant.id, 2))
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 2)
+
+        call_admission.bind(self.tenant.id, first, 'CA-admit-1')
+        call_admission.release(self.tenant.id, second)  # Dial failed
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 1)
+
+        request = RequestFactory().post(
+            '/api/agents/webhooks/twilio/status/', {'CallSid': 'CA-admit-1', 'CallStatus': 'completed'}
+        )
+        twilio_status_webhook(request)
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 0)
+
+    def test_expired_slots_heal(self):
+        call_admission.acquire(self.tenant.id, 2)
+        call_admission.acquire(self.tenant.id, 2)
+        CallSlot.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 0)
+        self.assertIsNotNone(call_admission.acquire(self.tenant.id, 2))
+        self.assertEqual(CallSlot.objects.count(), 1)
+
+    def start_campaign(self, *outcomes):
+        agent = AIAgent.objects.create(client=self.tenant, name='Dialer')
+        campaign = Campaign.objects.create(name='Spring', created_by=self.tenant, assigned_agent_ai=agent)
+        for i in range(len(outcomes)):
+            customer = CustomerProfile.objects.create(ai_agent=agent, phone_number=f'+1555020000{i}', name=f'C{i}')
+            CampaignContact.objects.create(campaign=campaign, customer_profile=customer)
+
+        request = APIRequestFactory().post('/', {'campaign_id': str(campaign.id)}, format='json')
+        force_authenticate(request, user=self.tenant)
+        with mock.patch('agents.voice_call_integration.HomeAIService'), \
+                mock.patch('agents.voice_call_integration.TwilioCallService') as service:
+            service.return_value.phone_number = '+15550000000'
+            service.return_value.initiate_call.side_effect = outcomes
+            return start_campaign_with_ai_voice(request)
+
+    def test_dial_errors_give_the_slot_back(self):
+        response = self.start_campaign(TwilioRestException(500, '/Calls', 'boom'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['calls_failed'], 1)
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 0)
+
+    def test_dial_error_after_a_placed_call_releases_only_its_own_slot(self):
+        response = self.start_campaign({'call_sid': 'CA-placed', 'status': 'queued'}, RuntimeError('boom'))
+
+        self.assertEqual((response.data['calls_initiated'], response.data['calls_failed']), (1, 1))
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 1)
+
+    def test_rejected_dial_result_gives_the_slot_back(self):
+        response = self.start_campaign({'error': 'Invalid number', 'call_sid': None, 'status': 'failed'})
+
+        self.assertEqual((response.data['calls_initiated'], response.data['calls_failed']), (0, 1))
+        self.assertEqual(call_admission.in_flight(self.tenant.id), 0)
+
+    def test_immediate_calls_bind_placed_calls_and_release_rejected_ones(self):
+        agent = AIAgent.objects.create(client=self.tenant, name='Immediate')
+        for phone in ('+15550210001', '+15550210002'):
+            CustomerProfile.objects.create(ai_agent=agent, phone_number=phone, name=phone)
+
+        request = APIRequestFactory().post('/', {'call_count': 2}, format='json')
+        force_authenticate(request, user=self.tenant)
+        with mock.patch('agents.auto_call_system.TwilioCallService') as service:
+            service.return_value.initiate_call.side_effect = [
+                {'call_sid': 'CA-immediate', 'status': 'queued'},
+                {'error': 'Invalid number', 'call_sid': None, 'status': 'failed'},
+            ]
+            response = StartImmediateCallsAPIView.as_view()(request)
+
+        self.assertEqual(response.data['success_count'], 1)
+        self.assertEqual(CallSlot.objects.get().call_sid, 'CA-immediate')
+
+    @override_settings(CALL_ADMISSION_BACKEND='redis', CALL_ADMISSION_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_falls_back_to_database_when_redis_is_down(self):
+        with mock.patch('agents.call_admission._redis_counter', None), \
+                mock.patch('agents.call_admission._redis_retry_at', 0.0):
+            token = call_admission.acquire(self.tenant.id, 2)
+
+        self.assertTrue(CallSlot.objects.filter(token=token).exists())
+
+
+@override_settings(DASHBOARD_CACHE_ENABLED=True, AGENT_DIRECTORY_FACET_TTL=60)
+class AgentDirectoryTests(TestCase):
+    """
+    Agent list is one UNION page with SQL campaign counts and cached facets
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='directory-admin@example.com', password=None, role='admin')
+        for i in range(4):
+            user = User.objects.create_user(
+                email=f'human{i}@example.com', password=None, first_name='Human', last_name=f'Agent {i}'
+            )
+            agent = Agent.objects.create(
+                user=user, employee_id=f'EMP-{i}', department=['Sales', 'Support'][i % 2],
+                status=['available', 'offline'][i % 2], total_calls=10 * i, customer_satisfaction=4.0
+            )
+            client = User.objects.create_user(email=f'client{i}@example.com', password=None)
+            ai_agent = AIAgent.objects.create(client=client, name=f'AI Agent {i}', status='active', calls_handled=i)
+            Campaign.objects.create(name=f'Campaign {i}', created_by=user, assigned_agent_human=agent, status='active')
+            Campaign.objects.create(name=f'Draft {i}', created_by=user, assigned_agent_human=agent)
+            AutoCallCampaign.objects.create(ai_agent=ai_agent, name=f'Auto {i}', status='active')
+        cls.human = Agent.objects.get(employee_id='EMP-0')
+
+    def setUp(self):
+        dashboard_cache.clear()
+
+    def get(self, user=None, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=user or self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = agent_list_page(request)
+            response.render()
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data, len(queries)
+
+    def test_union_page_with_campaign_counts(self):
+        data, queries = self.get()
+
+        self.assertEqual(len(data['agents']), 8)
+        self.assertEqual([agent['name'] for agent in data['agents']][:2], ['AI Agent 0', 'AI Agent 1'])
+        self.assertTrue(all(agent['active_campaigns'] == 1 for agent in data['agents']))
+        self.assertEqual(data['summary']['total_agents'], 8)
+        self.assertEqual(data['summary']['active_agents'], 6)
+        self.assertEqual(data['summary']['paused_agents'], 2)
+        self.assertEqual(sorted(data['filters']['departments']), ['AI Operations', 'Sales', 'Support'])
+        self.assertLessEqual(queries, 7)
+
+    def test_facets_are_cached(self):
+        _, cold = self.get()
+        data, warm = self.get(sort='calls')
+
+        self.assertLess(warm, cold)
+        self.assertEqual(data['agents'][0]['name'], 'Human Agent 3')
+
+    def test_type_filter(self):
+        data, _ = self.get(type='ai')
+        self.assertEqual({agent['type'] for agent in data['agents']}, {'AI Agent'})
+
+        request = APIRequestFactory().get('/', {'type': 'robot'})
+        force_authenticate(request, user=self.admin)
+        response = agent_list_page(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('type', response.data)
+
+    def test_cursor_walks_both_agent_types(self):
+        first, _ = self.get(page_size=5)
+        second, _ = self.get(page_size=5, cursor=first['pagination']['next_cursor'])
+
+        names = [agent['name'] for agent in first['agents'] + second['agents']]
+        self.assertEqual(len(names), 8)
+        self.assertEqual(names, sorted(names))
+        self.assertIsNone(second['pagination']['next_cursor'])
+
+    def test_filters_apply_to_both_branches(self):
+        humans, _ = self.get(type='human', department='Sales')
+        self.assertEqual([agent['employee_id'] for agent in humans['agents']], ['EMP-0', 'EMP-2'])
+
+        active, _ = self.get(status='active')
+        self.assertEqual({agent['type'] for agent in active['agents']}, {'AI Agent'})
+
+    def test_non_admin_sees_only_own_agents(self):
+        data, _ = self.get(user=self.human.user)
+
+        self.assertEqual([agent['id'] for agent in data['agents']], [str(self.human.id)])
+        self.assertEqual(data['summary']['total_agents'], 1)
+
+
+class CustomerSearchTests(TestCase):
+    """
+    Customer type-ahead hits the trigram index, stays in sync on every write and ranks in SQL
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='search-owner@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.user, name='Search Agent')
+        other = AIAgent.objects.create(
+            client=User.objects.create_user(email='search-other@example.com', password=None), name='Other Agent'
+        )
+        CustomerProfile.objects.bulk_create([
+            CustomerProfile(ai_agent=cls.agent, phone_number='+1 (555) 010-2030', name='Alice Walker', email='alice@acme.io'),
+            CustomerProfile(ai_agent=cls.agent, phone_number='+15550102031', name='Bob Alison', email='bob@example.com'),
+            CustomerProfile(ai_agent=cls.agent, phone_number='+15559990000', name='Carol Smith', email='carol@acme.io'),
+            CustomerProfile(ai_agent=other, phone_number='+15550102032', name='Alice Other', email='alice@other.io'),
+        ])
+
+    def search(self, q, **params):
+        request = APIRequestFactory().get('/', {'q': q, **params})
+        force_authenticate(request, user=self.user)
+        response = CustomerSearchAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def names(self, q, **params):
+        return [row['name'] for row in self.search(q, **params)['results']]
+
+    def test_substring_matches_are_ranked(self):
+        self.assertEqual(self.names('ali'), ['Alice Walker', 'Bob Alison'])
+        self.assertEqual(self.names('acme'), ['Alice Walker', 'Carol Smith'])
+
+    def test_phone_queries_ignore_formatting(self):
+        self.assertEqual(self.names('555-010-2031'), ['Bob Alison'])
+        self.assertEqual(self.names('(555) 010'), ['Alice Walker', 'Bob Alison'])
+
+    def test_short_queries_use_prefixes(self):
+        self.assertEqual(self.names('ca'), ['Carol Smith'])
+        self.assertEqual(self.names('15'), ['Alice Walker', 'Bob Alison', 'Carol Smith'])
+
+    def test_name_prefix_is_a_lowercase_like(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.names('CA'), ['Carol Smith'])
+
+        sql = next(q['sql'] for q in queries if 'customer_profiles' in q['sql'] and 'LIKE' in q['sql'])
+        self.assertIn('LOWER("customer_profiles"."name") LIKE', sql)
+        self.assertNotIn('UPPER(', sql)
+
+    def test_index_follows_saves_updates_and_deletes(self):
+        customer = CustomerProfile.objects.create(ai_agent=self.agent, phone_number='+15551112222', name='Dana Quill')
+        self.assertEqual(self.names('quill'), ['Dana Quill'])
+
+        CustomerProfile.objects.filter(id=customer.id).update(name='Dana Rowe')
+        self.assertEqual(self.names('quill'), [])
+        self.assertEqual(self.names('rowe'), ['Dana Rowe'])
+
+        customer.delete()
+        self.assertEqual(self.names('rowe'), [])
+
+    def test_results_page_with_cursor(self):
+        first = self.search('555', page_size=2)
+        second = self.search('555', page_size=2, cursor=first['pagination']['next_cursor'])
+
+        self.assertEqual(len(first['results']) + len(second['results']), 3)
+        self.assertIsNone(second['pagination']['next_cursor'])
+
+    def test_crud_list_is_lean_and_paginated(self):
+        request = APIRequestFactory().get('/', {'search': 'alice', 'page_size': 1})
+        force_authenticate(request, user=self.user)
+        data = CustomerProfileCRUDAPIView.as_view()(request).data
+
+        self.assertEqual([row['name'] for row in data['customers']], ['Alice Walker'])
+        self.assertNotIn('conversation_notes', data['customers'][0])
+        self.assertEqual(data['total_count'], 1)
+
+
+class PhoneIdentityTests(TestCase):
+    """
+    Every phone column gets an indexed E.164 twin on save, shared by import, lookups and webhooks
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='phone-owner@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.user, name='Phone Agent')
+        cls.customer = CustomerProfile.objects.create(
+            ai_agent=cls.agent, phone_number='+1 (555) 010-2030', name='Alice Walker'
+        )
+
+    def test_saves_store_the_canonical_number(self):
+        self.assertEqual(self.customer.phone_e164, '+15550102030')
+
+        call = InboxCallSession.objects.create(
+            user=self.user, call_type='inbound', caller_number='555.010.2030', callee_number='not a number'
+        )
+        call.refresh_from_db()
+        self.assertEqual((call.caller_e164, call.callee_e164), ('+15550102030', None))
+
+    def test_match_customer_ignores_formatting(self):
+        for raw in ['5550102030', '+1-555-010-2030', '001 555 010 2030']:
+            self.assertEqual(match_customer(raw), self.customer)
+        self.assertEqual(match_customer('(555) 010-2030', ai_agent=self.agent), self.customer)
+        other = AIAgent.objects.create(
+            client=User.objects.create_user(email='phone-other@example.com', password=None), name='Other Agent'
+        )
+        self.assertIsNone(match_customer('5550102030', ai_agent=other))
+        self.assertIsNone(match_customer('12'))
+
+    def test_lookup_uses_the_canonical_index(self):
+        plan = CustomerProfile.objects.filter(phone_e164='+15550102030').explain()
+        self.assertIn('customer_phone_e164_idx', plan)
+
+    def test_import_updates_the_existing_contact(self):
+        contact_import = ContactImport.objects.create(
+            user=self.user, ai_agent=self.agent, file_name='contacts.csv', file_path='imports/contacts.csv'
+        )
+        service = ContactImportService(contact_import)
+        service._upsert_chunk([service._parse_row(2, {'Name': 'Alice W.', 'Phone': '555-010-2030'})])
+
+        self.assertEqual(CustomerProfile.objects.filter(ai_agent=self.agent).count(), 1)
+        self.assertEqual(CustomerProfile.objects.get(pk=self.customer.pk).name, 'Alice W.')
+        self.assertEqual((contact_import.contacts_created, contact_import.contacts_updated), (0, 1))
+
+    def test_backfill_fills_missing_canonical_numbers(self):
+        InboxCallSession.objects.create(
+            user=self.user, call_type='outbound', caller_number='+15550000000', callee_number='(555) 010-2030'
+        )
+        CustomerProfile.objects.update(phone_e164=None)
+        InboxCallSession.objects.update(caller_e164=None, callee_e164=None)
+
+        call_command('backfill_phone_numbers', chunk_size=1, stdout=io.StringIO())
+
+        self.assertEqual(CustomerProfile.objects.get().phone_e164, '+15550102030')
+        self.assertEqual(
+            list(InboxCallSession.objects.values_list('caller_e164', 'callee_e164')), [('+15550000000', '+15550102030')]
+        )
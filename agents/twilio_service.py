@@ -4,6 +4,8 @@ from django.conf import settings
 import logging
 from typing import Dict, Any, Optional
 
+from .twiml_templates import RenderedTwiML, render_twiml
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,22 +66,113 @@ class TwilioCallService:
                 'status': 'failed'
             }
     
-    def handle_inbound_call(self, call_sid: str, from_number: str, agent_config: Dict[str, Any]) -> VoiceResponse:
+    def initiate_auto_call(self, to_number: str, agent_config: Dict[str, Any], hume_ai_config: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Initiate outbound call for an auto campaign contact
+        Campaign dialer ke liye call start karta hai aur success flag deta hai
+        """
+        call_context = {'hume_ai_config': hume_ai_config or {}}
+        result = self.initiate_call(to_number, {'id': agent_config.get('agent_id'), **agent_config}, call_context)
+        result['success'] = bool(result.get('call_sid'))
+        return result
+
+    def handle_inbound_call(self, call_sid: str, from_number: str, agent_config: Dict[str, Any]) -> RenderedTwiML:
         """
         Handle inbound call with AI agent
         Inbound call ko AI agent handle karta hai
         """
+        return render_twiml(
+            'inbound', self._inbound_template,
+            call_sid=call_sid, greeting=self._generate_greeting(agent_config)
+        )
+    
+    def process_speech_input(self, call_sid: str, speech_result: str, agent_config: Dict[str, Any]) -> RenderedTwiML:
+        """
+        Process customer speech and generate AI response
+        Customer ki speech process kar ke AI response generate karta hai
+        """
+        # Here you would integrate with HomeAI to process speech
+        # For now, simple rule-based responses
+        speech = speech_result.lower()
+        
+        if 'busy' in speech:
+            branch = 'busy'
+        elif 'not interested' in speech:
+            branch = 'not_interested'
+        elif 'interested' in speech:
+            branch = 'interested'
+        else:
+            # Generic response
+            branch = 'generic'
+        
+        return render_twiml('speech', self._speech_template, (branch,), call_sid=call_sid)
+    
+    def handle_callback_request(self, call_sid: str, response_text: str) -> RenderedTwiML:
+        """
+        Handle callback scheduling
+        Callback scheduling handle karta hai
+        """
+        accepted = 'yes' in response_text.lower()
+        return render_twiml('callback_request', self._callback_request_template, (accepted,), call_sid=call_sid)
+    
+    def schedule_callback_time(self, call_sid: str, time_preference: str) -> RenderedTwiML:
+        """
+        Schedule specific callback time
+        Specific callback time schedule karta hai
+        """
+        # Parse time preference and schedule
+        if 'morning' in time_preference.lower():
+            callback_time = "tomorrow morning between 9 and 12"
+        elif 'afternoon' in time_preference.lower():
+            callback_time = "tomorrow afternoon between 1 and 5"
+        elif 'evening' in time_preference.lower():
+            callback_time = "tomorrow evening between 5 and 7"
+        else:
+            callback_time = "tomorrow at a convenient time"
+        
+        # Here you would create the scheduled callback in database
+        
+        return render_twiml('callback_time', self._callback_time_template, callback_time=callback_time)
+    
+    def handle_objection(self, call_sid: str, objection_text: str) -> RenderedTwiML:
+        """
+        Handle customer objections
+        Customer ke objections handle karta hai
+        """
+        # Simple objection handling - in real app, use HomeAI
+        objection = objection_text.lower()
+        if 'price' in objection or 'cost' in objection:
+            branch = 'price'
+        elif 'time' in objection:
+            branch = 'time'
+        else:
+            branch = 'generic'
+        
+        return render_twiml('objection', self._objection_template, (branch,), call_sid=call_sid)
+    
+    def end_call_positively(self, call_sid: str, outcome: str) -> RenderedTwiML:
+        """
+        End call with positive message
+        Call ko positive note pe end karta hai
+        """
+        if outcome not in ('converted', 'callback_scheduled', 'interested'):
+            outcome = 'other'
+        return render_twiml('end_call', self._end_call_template, (outcome,))
+    
+    # TwiML templates - built and serialized once per branch, {{placeholders}} filled per request
+    
+    @staticmethod
+    def _inbound_template() -> VoiceResponse:
         response = VoiceResponse()
         
         # Start with greeting
-        greeting = self._generate_greeting(agent_config)
-        response.say(greeting, voice='alice', language='en-US')
+        response.say('{{greeting}}', voice='alice', language='en-US')
         
         # Gather customer response
         gather = response.gather(
             input='speech',
             timeout=10,
-            action=f'/api/calls/twilio/process-speech/{call_sid}/',
+            action='/api/calls/twilio/process-speech/{{call_sid}}/',
             method='POST',
             speech_timeout='auto'
         )
@@ -88,133 +181,102 @@ class TwilioCallService:
         
         # If no input, try again
         response.say("I didn't hear anything. Please tell me how I can assist you.")
-        response.redirect(f'/api/calls/twilio/handle-silence/{call_sid}/')
+        response.redirect('/api/calls/twilio/handle-silence/{{call_sid}}/')
         
         return response
     
-    def process_speech_input(self, call_sid: str, speech_result: str, agent_config: Dict[str, Any]) -> VoiceResponse:
-        """
-        Process customer speech and generate AI response
-        Customer ki speech process kar ke AI response generate karta hai
-        """
+    @staticmethod
+    def _speech_template(branch: str) -> VoiceResponse:
         response = VoiceResponse()
         
-        # Here you would integrate with HomeAI to process speech
-        # For now, simple rule-based responses
-        
-        if 'busy' in speech_result.lower():
+        if branch == 'busy':
             response.say("I understand you're busy. Would you like me to call you back at a better time?", voice='alice')
             
             gather = response.gather(
                 input='speech',
                 timeout=5,
-                action=f'/api/calls/twilio/handle-callback-request/{call_sid}/',
+                action='/api/calls/twilio/handle-callback-request/{{call_sid}}/',
                 method='POST'
             )
             gather.say("Please say yes or no.")
             
-        elif 'not interested' in speech_result.lower():
+        elif branch == 'not_interested':
             response.say("I appreciate your honesty. May I ask what your main concern is?", voice='alice')
             
-            gather = response.gather(
+            response.gather(
                 input='speech',
                 timeout=10,
-                action=f'/api/calls/twilio/handle-objection/{call_sid}/',
+                action='/api/calls/twilio/handle-objection/{{call_sid}}/',
                 method='POST'
             )
             
-        elif 'interested' in speech_result.lower():
+        elif branch == 'interested':
             response.say("That's wonderful! Let me share how we can help you specifically.", voice='alice')
             response.say("What's your biggest challenge right now?", voice='alice')
             
-            gather = response.gather(
+            response.gather(
                 input='speech',
                 timeout=15,
-                action=f'/api/calls/twilio/continue-conversation/{call_sid}/',
+                action='/api/calls/twilio/continue-conversation/{{call_sid}}/',
                 method='POST'
             )
             
         else:
-            # Generic response
             response.say("Thank you for sharing that with me.", voice='alice')
             response.say("Let me ask you - what would be the ideal solution for your situation?", voice='alice')
             
-            gather = response.gather(
+            response.gather(
                 input='speech',
                 timeout=15,
-                action=f'/api/calls/twilio/continue-conversation/{call_sid}/',
+                action='/api/calls/twilio/continue-conversation/{{call_sid}}/',
                 method='POST'
             )
         
         return response
     
-    def handle_callback_request(self, call_sid: str, response_text: str) -> VoiceResponse:
-        """
-        Handle callback scheduling
-        Callback scheduling handle karta hai
-        """
+    @staticmethod
+    def _callback_request_template(accepted: bool) -> VoiceResponse:
         response = VoiceResponse()
         
-        if 'yes' in response_text.lower():
+        if accepted:
             response.say("Perfect! What time would work best for you? Morning, afternoon, or evening?", voice='alice')
             
-            gather = response.gather(
+            response.gather(
                 input='speech',
                 timeout=10,
-                action=f'/api/calls/twilio/schedule-callback/{call_sid}/',
+                action='/api/calls/twilio/schedule-callback/{{call_sid}}/',
                 method='POST'
             )
             
         else:
             response.say("No problem. Is there anything quick I can help you with right now?", voice='alice')
             
-            gather = response.gather(
+            response.gather(
                 input='speech',
                 timeout=10,
-                action=f'/api/calls/twilio/final-attempt/{call_sid}/',
+                action='/api/calls/twilio/final-attempt/{{call_sid}}/',
                 method='POST'
             )
         
         return response
     
-    def schedule_callback_time(self, call_sid: str, time_preference: str) -> VoiceResponse:
-        """
-        Schedule specific callback time
-        Specific callback time schedule karta hai
-        """
+    @staticmethod
+    def _callback_time_template() -> VoiceResponse:
         response = VoiceResponse()
-        
-        # Parse time preference and schedule
-        if 'morning' in time_preference.lower():
-            callback_time = "tomorrow morning between 9 and 12"
-        elif 'afternoon' in time_preference.lower():
-            callback_time = "tomorrow afternoon between 1 and 5"
-        elif 'evening' in time_preference.lower():
-            callback_time = "tomorrow evening between 5 and 7"
-        else:
-            callback_time = "tomorrow at a convenient time"
-        
-        response.say(f"Excellent! I'll call you back {callback_time}.", voice='alice')
+        response.say("Excellent! I'll call you back {{callback_time}}.", voice='alice')
         response.say("Thank you for your time today. Have a great day!", voice='alice')
-        
-        # Here you would create the scheduled callback in database
-        
         response.hangup()
         return response
     
-    def handle_objection(self, call_sid: str, objection_text: str) -> VoiceResponse:
-        """
-        Handle customer objections
-        Customer ke objections handle karta hai
-        """
+    @staticmethod
+    def _objection_template(branch: str) -> VoiceResponse:
         response = VoiceResponse()
         
-        # Simple objection handling - in real app, use HomeAI
-        if 'price' in objection_text.lower() or 'cost' in objection_text.lower():
+        if branch == 'price':
             response.say("I understand cost is important. Let me share how our clients typically see a return on their investment.", voice='alice')
             response.say("What specific results would make this worthwhile for you?", voice='alice')
             
-        elif 'time' in objection_text.lower():
+        elif branch == 'time':
             response.say("I appreciate that you're busy. That's exactly why our solution is designed to save you time.", voice='alice')
             response.say("What's taking up most of your time right now?", voice='alice')
             
@@ -222,20 +284,17 @@ class TwilioCallService:
             response.say("I completely understand your concern. Many clients had similar thoughts initially.", voice='alice')
             response.say("What would need to change for this to be a perfect fit for you?", voice='alice')
         
-        gather = response.gather(
+        response.gather(
             input='speech',
             timeout=15,
-            action=f'/api/calls/twilio/continue-conversation/{call_sid}/',
+            action='/api/calls/twilio/continue-conversation/{{call_sid}}/',
             method='POST'
         )
         
         return response
     
-    def end_call_positively(self, call_sid: str, outcome: str) -> VoiceResponse:
-        """
-        End call with positive message
-        Call ko positive note pe end karta hai
-        """
+    @staticmethod
+    def _end_call_template(outcome: str) -> VoiceResponse:
         response = VoiceResponse()
         
         if outcome == 'converted':
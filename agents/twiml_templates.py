@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from django.conf import settings
+import re
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+from xml.sax.saxutils import escape
+
+from twilio.twiml.voice_response import VoiceResponse
+
+# {{name}} survives VoiceResponse serialization untouched, so it marks where request values go
+PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+
+
+class RenderedTwiML(str):
+    """Serialized TwiML; keeps VoiceResponse's to_xml() so callers don't change"""
+
+    def to_xml(self, xml_declaration: bool = True) -> str:
+        if xml_declaration or not self.startswith(XML_DECLARATION):
+            return str(self)
+        return self[len(XML_DECLARATION):]
+
+
+class TwiMLTemplate:
+    """
+    A VoiceResponse serialized once, split around its placeholders
+    Render sirf strings jodta hai - koi object tree ya XML serialization nahi
+    """
+
+    def __init__(self, response: VoiceResponse):
+        self.parts = PLACEHOLDER.split(response.to_xml())
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(self.parts[1::2])
+
+    def render(self, **values) -> RenderedTwiML:
+        parts = self.parts[:]
+        for index in range(1, len(parts), 2):
+            # Same escaping ElementTree applies to text and attribute values
+            parts[index] = escape(str(values[parts[index]]), {'"': '&quot;'})
+        return RenderedTwiML(''.join(parts))
+
+
+class TwiMLTemplateCache:
+    """LRU of compiled templates keyed by (template name, static variant)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._templates: 'OrderedDict[Hashable, TwiMLTemplate]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, builder: Callable[..., VoiceResponse], *variant) -> TwiMLTemplate:
+        key = (name, variant)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+
+        template = TwiMLTemplate(builder(*variant))
+        with self._lock:
+            self.misses += 1
+            self._templates[key] = template
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'templates': len(self._templates), 'hits': self.hits, 'misses': self.misses}
+
+
+twiml_cache = TwiMLTemplateCache(settings.TWIML_TEMPLATE_CACHE_SIZE)
+
+
+def render_twiml(name: str, builder: Callable[..., VoiceResponse], variant: tuple = (), **values) -> RenderedTwiML:
+    """Compile on first use, then fill in call_sid and dynamic text"""
+    return twiml_cache.get(name, builder, *variant).render(**values)
@@ -16,6 +16,7 @@ from .ai_agent_crud import (
 )
 from .customer_callback_crud import (
     CustomerProfileCRUDAPIView,
+    CustomerSearchAPIView,
     CustomerProfileDetailAPIView,
     ScheduledCallbackCRUDAPIView,
     ScheduledCallbackDetailAPIView,
@@ -34,6 +35,8 @@ from .webhook_integration import (
     twilio_webhook,
     twilio_voice_webhook,
     twilio_status_webhook,
+    WebhookMetricsAPIView,
+    HomeAIClientMetricsAPIView,
     manual_learning_trigger
 )
 
@@ -68,9 +71,12 @@ urlpatterns = [
     path('webhooks/twilio/voice/', twilio_voice_webhook, name='twilio-voice-webhook'),
     path('webhooks/twilio/status/', twilio_status_webhook, name='twilio-status-webhook'),
     path('webhooks/manual-trigger/', manual_learning_trigger, name='manual-learning-trigger'),
+    path('webhooks/metrics/', WebhookMetricsAPIView.as_view(), name='webhook-metrics'),
+    path('homeai/metrics/', HomeAIClientMetricsAPIView.as_view(), name='homeai-client-metrics'),
     
     # Customer Profile CRUD
     path('ai/customers/', CustomerProfileCRUDAPIView.as_view(), name='customer-profile-list-create'),
+    path('ai/customers/search/', CustomerSearchAPIView.as_view(), name='customer-search'),
     path('ai/customers/<uuid:id>/', CustomerProfileDetailAPIView.as_view(), name='customer-profile-detail'),
     
     # Scheduled Callback CRUD
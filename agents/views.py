@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 
 from .models import Agent, AgentPerformance
 from calls.models import CallSession
+from core.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -284,7 +285,9 @@ class AgentCallHistoryAPIView(APIView):
     
     @swagger_auto_schema(
         parameters=[
-            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Calls per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) total count", type=openapi.TYPE_BOOLEAN),
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by call status", type=openapi.TYPE_STRING),
         ],
         responses={
@@ -306,34 +309,30 @@ class AgentCallHistoryAPIView(APIView):
         
         # Filter parameters
         status_filter = request.query_params.get('status')
-        page = int(request.query_params.get('page', 1))
-        limit = 20
-        offset = (page - 1) * limit
         
         # Base queryset
-        calls = CallSession.objects.filter(agent=agent).order_by('-started_at')
+        calls = CallSession.objects.filter(agent=agent).select_related('user')
         
         # Apply status filter
         if status_filter:
             calls = calls.filter(status=status_filter)
         
-        # Get total count and paginate
-        total_count = calls.count()
-        calls = calls[offset:offset + limit]
+        # Keyset pagination on (started_at, id)
+        calls, pagination = KeysetPaginator(('-started_at', '-id')).paginate(calls, request)
         
         call_data = []
         for call in calls:
             call_data.append({
                 'id': str(call.id),
                 'call_type': call.call_type,
-                'phone_number': call.phone_number,
+                'phone_number': call.callee_number if call.call_type == 'outbound' else call.caller_number,
                 'status': call.status,
                 'started_at': call.started_at.isoformat(),
                 'ended_at': call.ended_at.isoformat() if call.ended_at else None,
                 'duration': call.call_duration_formatted,
-                'customer_satisfaction': call.customer_satisfaction,
-                'ai_transcript': call.ai_transcript[:200] + '...' if call.ai_transcript and len(call.ai_transcript) > 200 else call.ai_transcript,
-                'recording_url': call.recording_url,
+                'ai_sentiment': call.ai_sentiment,
+                'ai_summary': call.ai_summary[:200] + '...' if len(call.ai_summary) > 200 else call.ai_summary,
+                'recording_url': call.twilio_recording_url,
                 'user': {
                     'id': str(call.user.id),
                     'name': call.user.get_full_name(),
@@ -343,10 +342,5 @@ class AgentCallHistoryAPIView(APIView):
         
         return Response({
             'calls': call_data,
-            'pagination': {
-                'current_page': page,
-                'total_count': total_count,
-                'total_pages': (total_count + limit - 1) // limit,
-                'per_page': limit
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
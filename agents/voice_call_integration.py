@@ -8,6 +8,7 @@ from .ai_agent_models import AIAgent, CustomerProfile
 from .campaign_models import Campaign, CampaignContact, BusinessKnowledge
 from .homeai_integration import HomeAIService
 from .twilio_service import TwilioCallService
+from .call_admission import call_admission
 from calls.models import CallSession
 import json
 
@@ -366,23 +367,32 @@ def start_campaign_with_ai_voice(request):
     
     initiated_calls = []
     failed_calls = []
+    deferred_calls = 0
+    concurrent_limit = call_admission.limit_for(user)
     
     for campaign_contact in campaign_contacts:
         customer = campaign_contact.customer_profile
+        call_placed = False
         
-        # Prepare call context with customer information
-        call_context = {
-            'customer_name': customer.name,
-            'customer_phone': customer.phone_number,
-            'customer_email': customer.email,
-            'lead_status': customer.lead_status,
-            'previous_notes': customer.notes,
-            'campaign_name': campaign.name,
-            'preferred_time': customer.contact_preferences.get('preferred_time', ''),
-            'business_context': agent_config['business_knowledge']
-        }
+        # Plan limit full - baqi contacts 'pending' rehte hain, agli baar dial honge
+        slot = call_admission.acquire(user.id, concurrent_limit)
+        if slot is None:
+            deferred_calls = len(campaign_contacts) - len(initiated_calls) - len(failed_calls)
+            break
         
         try:
+            # Prepare call context with customer information
+            call_context = {
+                'customer_name': customer.name,
+                'customer_phone': customer.phone_number,
+                'customer_email': customer.email,
+                'lead_status': customer.interest_level,
+                'previous_notes': customer.conversation_notes.get('initial_notes', ''),
+                'campaign_name': campaign.name,
+                'preferred_time': customer.call_preference_time,
+                'business_context': agent_config['business_knowledge']
+            }
+            
             # Initiate call using Twilio with HomeAI integration
             call_result = twilio_service.initiate_call(
                 to=customer.phone_number,
@@ -390,7 +400,11 @@ def start_campaign_with_ai_voice(request):
                 call_context=call_context
             )
             
-            if call_result.get('success'):
+            # initiate_call success flag nahi deta - placed call ki pehchan call_sid hai
+            if call_result.get('call_sid'):
+                call_admission.bind(user.id, slot, call_result.get('call_sid'))
+                call_placed = True
+                
                 # Create call session
                 call_session = CallSession.objects.create(
                     user=user,
@@ -416,6 +430,7 @@ def start_campaign_with_ai_voice(request):
                     'call_session_id': str(call_session.id)
                 })
             else:
+                call_admission.release(user.id, slot)
                 failed_calls.append({
                     'customer_name': customer.name,
                     'phone_number': customer.phone_number,
@@ -429,6 +444,8 @@ def start_campaign_with_ai_voice(request):
                 campaign_contact.save()
                 
         except Exception as e:
+            if not call_placed:
+                call_admission.release(user.id, slot)
             failed_calls.append({
                 'customer_name': customer.name,
                 'phone_number': customer.phone_number,
@@ -450,6 +467,7 @@ def start_campaign_with_ai_voice(request):
         'ai_agent': ai_agent.name,
         'calls_initiated': len(initiated_calls),
         'calls_failed': len(failed_calls),
+        'calls_deferred': deferred_calls,
         'initiated_calls': initiated_calls,
         'failed_calls': failed_calls,
         'homeai_integrated': bool(agent_config.get('homeai_persona_id')),
@@ -1,12 +1,25 @@
+from django.conf import settings
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db import models
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 import json
 import logging
+from xml.sax.saxutils import escape
+
+from accounts.permissions import IsAdmin
 from .real_time_learning import RealTimeCallLearningAPIView
 from .ai_agent_models import AIAgent, CallSession
+from .call_admission import call_admission
+from .call_reconciliation import FINAL_STATUSES
+from .homeai_client import homeai_client_metrics
+from .media_bridge import media_bridge_metrics, stream_token
+from .phone_numbers import match_customer
+from .webhook_pipeline import HUME_LEARNING_EVENTS, body_dedupe_key, ingest_event, webhook_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,103 +28,29 @@ logger = logging.getLogger(__name__)
 def hume_ai_webhook(request):
     """
     HumeAI webhook endpoint
-    Jab HumeAI mein koi event hota hai, ye automatically call hoti hai
+    Event store ho kar foran ack hota hai - learning Celery worker mein hoti hai
     """
     try:
         data = json.loads(request.body)
-        event_type = data.get('event_type')
-        conversation_id = data.get('conversation_id')
-        
-        # Find the corresponding call session
-        try:
-            call_session = CallSession.objects.get(
-                twilio_call_sid=conversation_id
-            )
-            agent = call_session.ai_agent
-        except CallSession.DoesNotExist:
-            logger.error(f"Call session not found for conversation: {conversation_id}")
-            return JsonResponse({'status': 'error', 'message': 'Call session not found'})
-        
-        # Process different HumeAI events
-        if event_type == 'customer_objection_detected':
-            # Customer ne objection diya
-            learning_data = {
-                'call_id': str(call_session.id),
-                'learning_event': 'customer_objection',
-                'objection_text': data.get('objection_text', ''),
-                'agent_response': data.get('agent_response', ''),
-                'effectiveness_score': data.get('customer_engagement_score', 5),
-                'customer_reaction': data.get('customer_sentiment_after', 'neutral')
-            }
-            
-            # Call real-time learning
-            learning_view = RealTimeCallLearningAPIView()
-            learning_view.request = type('MockRequest', (), {
-                'user': call_session.ai_agent.client,
-                'data': learning_data
-            })()
-            learning_view.post(learning_view.request)
-            
-        elif event_type == 'sentiment_change_detected':
-            # Customer ka mood change hua
-            learning_data = {
-                'call_id': str(call_session.id),
-                'learning_event': 'call_sentiment_change',
-                'previous_sentiment': data.get('previous_sentiment', 'neutral'),
-                'current_sentiment': data.get('current_sentiment', 'neutral'),
-                'trigger_action': data.get('agent_last_response', ''),
-                'sentiment_score': data.get('sentiment_score_change', 0)
-            }
-            
-            learning_view = RealTimeCallLearningAPIView()
-            learning_view.request = type('MockRequest', (), {
-                'user': agent.client,
-                'data': learning_data
-            })()
-            learning_view.post(learning_view.request)
-            
-        elif event_type == 'successful_response_detected':
-            # Agent ka response successful raha
-            learning_data = {
-                'call_id': str(call_session.id),
-                'learning_event': 'successful_response',
-                'approach_used': data.get('agent_response', ''),
-                'context': data.get('conversation_context', ''),
-                'customer_reaction': data.get('customer_positive_reaction', ''),
-                'effectiveness_score': data.get('effectiveness_score', 8)
-            }
-            
-            learning_view = RealTimeCallLearningAPIView()
-            learning_view.request = type('MockRequest', (), {
-                'user': agent.client,
-                'data': learning_data
-            })()
-            learning_view.post(learning_view.request)
-            
-        elif event_type == 'conversation_ended':
-            # Call khatam ho gayi - comprehensive analysis
-            from .real_time_learning import AutoCallAnalysisAPIView
-            
-            analysis_data = {
-                'call_id': str(call_session.id),
-                'conversation_id': conversation_id,
-                'full_transcript': data.get('full_transcript', ''),
-                'customer_satisfaction': data.get('customer_satisfaction_score', 5)
-            }
-            
-            analysis_view = AutoCallAnalysisAPIView()
-            analysis_view.request = type('MockRequest', (), {
-                'user': agent.client,
-                'data': analysis_data
-            })()
-            analysis_view.post(analysis_view.request)
-        
-        logger.info(f"Processed HumeAI webhook event: {event_type}")
-        return JsonResponse({'status': 'success', 'event_processed': event_type})
-        
-    except Exception as e:
-        logger.error(f"HumeAI webhook error: {str(e)}")
-        return JsonResponse({'status': 'error', 'message': str(e)})
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON body'}, status=400)
+    
+    if not isinstance(data, dict) or not data.get('event_type') or not data.get('conversation_id'):
+        return JsonResponse({'status': 'error', 'message': 'event_type and conversation_id are required'}, status=400)
+    
+    event_type = data['event_type']
+    dedupe_key = f"hume_ai:{data['event_id']}" if data.get('event_id') else body_dedupe_key('hume_ai', request.body)
+    
+    event, created = ingest_event(
+        'hume_ai', event_type, dedupe_key, data['conversation_id'], data,
+        learning=event_type in HUME_LEARNING_EVENTS
+    )
+    
+    return JsonResponse({
+        'status': 'accepted' if created else 'duplicate',
+        'event_id': event.id if event else None,
+        'event_type': event_type
+    })
 
 
 @csrf_exempt 
@@ -169,16 +108,25 @@ def twilio_voice_webhook(request):
         try:
             call_session = CallSession.objects.get(twilio_call_sid=call_sid)
         except CallSession.DoesNotExist:
-            # This might be an inbound call - create new session
-            # You'd typically have logic here to find the appropriate agent
-            logger.info(f"New inbound call from {from_number} to {to_number}")
+            # Inbound call - identify the caller by canonical number (exact index hit)
+            customer = match_customer(from_number)
+            if customer:
+                logger.info(
+                    f"New inbound call from {from_number} to {to_number}: "
+                    f"customer {customer.id} of agent {customer.ai_agent_id}"
+                )
+            else:
+                logger.info(f"New inbound call from unknown caller {from_number} to {to_number}")
         
-        # Return TwiML response to connect to HumeAI
+        # Return TwiML response to stream the call through our media bridge to HumeAI EVI
+        stream_url = escape(settings.MEDIA_BRIDGE_URL, {'"': '&quot;'})
         twiml_response = f'''<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Say voice="Polly.Joanna">Please hold while I connect you to our AI assistant.</Say>
     <Connect>
-        <Stream url="wss://api.hume.ai/v0/evi/chat" />
+        <Stream url="{stream_url}">
+            <Parameter name="token" value="{escape(stream_token(call_sid))}" />
+        </Stream>
     </Connect>
     <Say voice="Polly.Joanna">Thank you for calling. Have a great day!</Say>
 </Response>'''
@@ -199,71 +147,85 @@ def twilio_voice_webhook(request):
 def twilio_status_webhook(request):
     """
     Twilio Status webhook - tracks call progress and completion
+    Status update store hota hai; CallSession update Celery worker karta hai
     """
-    try:
-        call_sid = request.POST.get('CallSid', '')
-        call_status = request.POST.get('CallStatus', '')
-        call_duration = request.POST.get('CallDuration', '0')
-        recording_url = request.POST.get('RecordingUrl', '')
-        
-        logger.info(f"Twilio status update: {call_sid} - {call_status}")
-        
-        # Update call session status
-        try:
-            call_session = CallSession.objects.get(twilio_call_sid=call_sid)
-            
-            if call_status == 'in-progress' and not call_session.connected_at:
-                call_session.connected_at = timezone.now()
-                
-            elif call_status == 'completed':
-                call_session.ended_at = timezone.now()
-                call_session.duration_seconds = int(call_duration) if call_duration.isdigit() else 0
-                
-                # Set outcome based on duration
-                if call_session.duration_seconds > 60:  # More than 1 minute
-                    call_session.outcome = 'answered'
-                else:
-                    call_session.outcome = 'no_answer'
-                
-                # Save recording URL if available
-                if recording_url:
-                    if not call_session.agent_notes:
-                        call_session.agent_notes = {}
-                    call_session.agent_notes['recording_url'] = recording_url
-            
-            elif call_status in ['busy', 'no-answer', 'failed']:
-                call_session.outcome = call_status.replace('-', '_')
-                call_session.ended_at = timezone.now()
-            
-            call_session.save()
-            
-            # Trigger automatic learning for completed calls
-            if call_status == 'completed' and call_session.duration_seconds > 30:
-                # Basic learning data from call metadata
-                learning_data = {
-                    'call_id': str(call_session.id),
-                    'learning_event': 'call_completed',
-                    'call_duration': call_session.duration_seconds,
-                    'call_outcome': call_session.outcome,
-                    'automated_learning': True
-                }
-                
-                # Trigger basic learning
-                learning_view = RealTimeCallLearningAPIView()
-                mock_request = type('MockRequest', (), {
-                    'user': call_session.ai_agent.client,
-                    'data': learning_data
-                })()
-                learning_view.post(mock_request)
-            
-        except CallSession.DoesNotExist:
-            logger.warning(f"Call session not found for Twilio SID: {call_sid}")
-        
-        return JsonResponse({'status': 'success', 'call_status': call_status})
-        
-    except Exception as e:
-        logger.error(f"Twilio status webhook error: {str(e)}")
-        return JsonResponse({'status': 'error', 'message': str(e)})
+    call_sid = request.POST.get('CallSid', '')
+    call_status = request.POST.get('CallStatus', '')
+    
+    if not call_sid or not call_status:
+        return JsonResponse({'status': 'error', 'message': 'CallSid and CallStatus are required'}, status=400)
+    
+    if not _valid_twilio_signature(request):
+        return JsonResponse({'status': 'error', 'message': 'Invalid Twilio signature'}, status=403)
+    
+    logger.info(f"Twilio status update: {call_sid} - {call_status}")
+    
+    # Twilio retries repeat the same CallSid + CallStatus
+    event, created = ingest_event(
+        'twilio', call_status, f'twilio:{call_sid}:{call_status}', call_sid, request.POST.dict()
+    )
+    
+    # Call khatam - tenant ka concurrent slot turant free (release idempotent hai)
+    if call_status in FINAL_STATUSES:
+        call_admission.release_call(call_sid)
+    
+    return JsonResponse({
+        'status': 'accepted' if created else 'duplicate',
+        'call_status': call_status
+    })
+
+
+def _valid_twilio_signature(request):
+    """X-Twilio-Signature check, enabled with WEBHOOK_VALIDATE_TWILIO_SIGNATURE"""
+    if not settings.WEBHOOK_VALIDATE_TWILIO_SIGNATURE:
+        return True
+    
+    from twilio.request_validator import RequestValidator
+    
+    validator = RequestValidator(settings.TWILIO_AUTH_TOKEN)
+    return validator.validate(
+        request.build_absolute_uri(),
+        request.POST.dict(),
+        request.headers.get('X-Twilio-Signature', '')
+    )
+
+
+class WebhookMetricsAPIView(APIView):
+    """
+    Webhook ingestion lag and throughput per provider
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    
+    @swagger_auto_schema(
+        tags=['AI Agents'],
+        operation_summary="Webhook Pipeline Metrics",
+        operation_description="Backlog, lag and throughput of stored HumeAI / Twilio webhook events",
+        responses={
+            200: "Webhook metrics",
+            403: "Forbidden - Admin access required"
+        }
+    )
+    def get(self, request):
+        return Response(webhook_metrics(), status=status.HTTP_200_OK)
+
+
+class HomeAIClientMetricsAPIView(APIView):
+    """
+    HomeAI client latency histograms, circuit state and media bridge turn latency for the serving worker
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    
+    @swagger_auto_schema(
+        tags=['AI Agents'],
+        operation_summary="HomeAI Client Metrics",
+        operation_description="Per-method latency histograms, error counts and open circuits of this worker's HomeAI client",
+        responses={
+            200: "HomeAI client metrics",
+            403: "Forbidden - Admin access required"
+        }
+    )
+    def get(self, request):
+        return Response({**homeai_client_metrics(), 'media_bridge': media_bridge_metrics()}, status=status.HTTP_200_OK)
 
 
 # Manual trigger for testing
@@ -299,15 +261,10 @@ def manual_learning_trigger(request):
             }
         ]
         
+        learning_view = RealTimeCallLearningAPIView()
         for event_data in learning_events:
             event_data['call_id'] = call_id
-            
-            learning_view = RealTimeCallLearningAPIView()
-            learning_view.request = type('MockRequest', (), {
-                'user': agent.client,
-                'data': event_data
-            })()
-            result = learning_view.post(learning_view.request)
+            learning_view.process_learning_event(agent, call_session, event_data)
         
         return JsonResponse({
             'status': 'success',
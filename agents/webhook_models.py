@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw provider webhook, stored before any processing
+    Webhook turant ack hota hai, learning pipeline Celery mein chalti hai
+    """
+    PROVIDERS = [
+        ('hume_ai', 'HumeAI'),
+        ('twilio', 'Twilio'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+        ('ignored', 'Ignored'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    provider = models.CharField(max_length=20, choices=PROVIDERS)
+    event_type = models.CharField(max_length=50)
+    dedupe_key = models.CharField(max_length=200, unique=True, help_text="Provider event id, or CallSid:CallStatus")
+
+    # Resolved from the call at ingest (or later by the sweeper) - events are processed in order per agent
+    ai_agent = models.ForeignKey('AIAgent', on_delete=models.CASCADE, null=True, blank=True, related_name='webhook_events')
+    call_sid = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'webhook_events'
+        indexes = [
+            models.Index(fields=['ai_agent', 'status', 'received_at'], name='webhook_agent_queue_idx'),
+            models.Index(fields=['status', 'received_at'], name='webhook_status_idx'),
+            models.Index(fields=['processed_at'], name='webhook_processed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_type} - {self.status}"
@@ -0,0 +1,327 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from datetime import timedelta
+import hashlib
+import logging
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from subscriptions.metering import record_call_usage
+from .ai_agent_models import CallSession
+from .learning_buffer import learning_buffer
+from .webhook_models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# HumeAI events that feed the learning pipeline - anything else is stored as 'ignored'
+HUME_LEARNING_EVENTS = {
+    'customer_objection_detected',
+    'sentiment_change_detected',
+    'successful_response_detected',
+    'conversation_ended',
+}
+
+
+# Ingest (runs inside the webhook request - one lookup and one INSERT)
+
+def resolve_call(call_sid: str) -> Tuple[Optional[str], Optional[str]]:
+    """(call_session_id, ai_agent_id) for a Twilio/HumeAI call id, or (None, None)"""
+    if not call_sid:
+        return None, None
+    row = CallSession.objects.filter(twilio_call_sid=call_sid).values_list('id', 'ai_agent_id').first()
+    return row if row else (None, None)
+
+
+def ingest_event(provider: str, event_type: str, dedupe_key: str, call_sid: str,
+                 payload: Dict[str, Any], learning: bool = True) -> Tuple[Optional[WebhookEvent], bool]:
+    """
+    Persist a raw webhook and queue it for its agent
+    Returns (event, created); a provider retry of the same event returns (None, False)
+    """
+    _, agent_id = resolve_call(call_sid)
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider,
+                event_type=event_type or '',
+                dedupe_key=dedupe_key[:200],
+                ai_agent_id=agent_id,
+                call_sid=call_sid or '',
+                payload=payload,
+                status='pending' if learning else 'ignored'
+            )
+    except IntegrityError:
+        logger.info(f"Duplicate {provider} webhook ignored: {dedupe_key}")
+        return None, False
+
+    if learning and agent_id:
+        dispatch_agent(agent_id)
+    return event, True
+
+
+def body_dedupe_key(provider: str, body: bytes) -> str:
+    """Fallback dedupe key when the provider sends no event id"""
+    return f'{provider}:sha256:{hashlib.sha256(body).hexdigest()}'
+
+
+# Dispatch
+
+def queue_for_agent(agent_id) -> str:
+    """
+    Stable Celery queue for an agent: webhooks.0 ... webhooks.N-1
+    Each queue is consumed by one worker with concurrency 1, so one agent's events stay in order
+    """
+    partition = zlib.crc32(str(agent_id).encode()) % settings.WEBHOOK_QUEUE_PARTITIONS
+    return f'{settings.WEBHOOK_QUEUE_PREFIX}.{partition}'
+
+
+def dispatch_agent(agent_id):
+    """Queue a drain of the agent's pending events; the sweeper picks them up if the broker is down"""
+    from .tasks import process_webhook_events
+
+    try:
+        process_webhook_events.apply_async(args=[str(agent_id)], queue=queue_for_agent(agent_id))
+    except Exception as e:
+        logger.warning(f"Could not queue webhook events for agent {agent_id}: {str(e)}")
+
+
+def retry_filter() -> Q:
+    """Events a drain may (re)claim"""
+    return Q(status='pending') | Q(status='failed', attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS)
+
+
+def sweep_pending_events() -> Dict[str, int]:
+    """
+    Recover events the fast path could not queue:
+    reclaim stuck 'processing' rows, resolve late call SIDs, re-dispatch agents with a backlog
+    """
+    now = timezone.now()
+
+    reclaimed = WebhookEvent.objects.filter(
+        status='processing',
+        started_at__lt=now - timedelta(seconds=settings.WEBHOOK_PROCESSING_TIMEOUT)
+    ).update(status='pending')
+
+    # Twilio can call back before the dialer stored the CallSid
+    resolved = 0
+    for event in WebhookEvent.objects.filter(ai_agent__isnull=True, status='pending').exclude(call_sid='')[:500]:
+        _, agent_id = resolve_call(event.call_sid)
+        if agent_id:
+            WebhookEvent.objects.filter(pk=event.pk).update(ai_agent_id=agent_id)
+            resolved += 1
+        elif event.received_at < now - timedelta(seconds=settings.WEBHOOK_PROCESSING_TIMEOUT):
+            WebhookEvent.objects.filter(pk=event.pk).update(status='ignored', error='Call session not found')
+
+    agent_ids = list(
+        WebhookEvent.objects.filter(retry_filter(), ai_agent__isnull=False)
+        .values_list('ai_agent_id', flat=True).distinct().order_by()
+    )
+    for agent_id in agent_ids:
+        dispatch_agent(agent_id)
+
+    deleted, _ = WebhookEvent.objects.filter(
+        processed_at__lt=now - timedelta(days=settings.WEBHOOK_EVENT_RETENTION_DAYS)
+    ).delete()
+
+    return {'reclaimed': reclaimed, 'resolved': resolved, 'dispatched': len(agent_ids), 'deleted': deleted}
+
+
+# Processing (Celery worker)
+
+class WebhookEventProcessor:
+    """
+    Drains one agent's pending webhook events oldest first
+    Provider payload ko wahi learning events mein badalta hai jo API views use karte hain
+    """
+
+    def __init__(self, agent_id):
+        self.agent_id = agent_id
+
+    def drain(self, limit: int) -> Dict[str, int]:
+        """
+        Process up to `limit` events; returns counts and whether more are waiting
+        Pehla failure drain rok deta hai - baad ke events us se pehle apply nahi hote, sweeper retry karta hai
+        """
+        stats = {'processed': 0, 'failed': 0, 'more': 0}
+
+        candidates = list(
+            WebhookEvent.objects.filter(retry_filter(), ai_agent_id=self.agent_id)
+            .order_by('received_at', 'id').values_list('id', flat=True)[:limit + 1]
+        )
+        if len(candidates) > limit:
+            stats['more'] = 1
+            candidates = candidates[:limit]
+
+        for event_id in candidates:
+            # Claim with a conditional UPDATE so a duplicate drain can't process it twice
+            claimed = WebhookEvent.objects.filter(retry_filter(), pk=event_id).update(
+                status='processing', attempts=F('attempts') + 1, started_at=timezone.now()
+            )
+            if not claimed:
+                continue
+
+            event = WebhookEvent.objects.get(pk=event_id)
+            try:
+                self.process(event)
+            except Exception as e:
+                logger.error(f"Webhook event {event_id} ({event.event_type}) failed: {str(e)}")
+                WebhookEvent.objects.filter(pk=event_id).update(status='failed', error=str(e)[:1000])
+                stats['failed'] += 1
+                # Later events must not overtake it; once it runs out of attempts the queue moves on
+                break
+            else:
+                WebhookEvent.objects.filter(pk=event_id).update(status='processed', error='', processed_at=timezone.now())
+                stats['processed'] += 1
+
+        return stats
+
+    def process(self, event: WebhookEvent):
+        call_session = CallSession.objects.select_related('ai_agent', 'customer_profile').get(
+            twilio_call_sid=event.call_sid
+        )
+        if event.provider == 'twilio':
+            self._twilio_status(call_session, event.payload)
+        else:
+            self._hume_event(call_session, event.event_type, event.payload)
+
+    def _hume_event(self, call_session, event_type, data):
+        from .real_time_learning import RealTimeCallLearningAPIView, AutoCallAnalysisAPIView
+
+        agent = call_session.ai_agent
+
+        if event_type == 'customer_objection_detected':
+            # Customer ne objection diya
+            learning_data = {
+                'learning_event': 'customer_objection',
+                'objection_text': data.get('objection_text', ''),
+                'agent_response': data.get('agent_response', ''),
+                'effectiveness_score': data.get('customer_engagement_score', 5),
+                'customer_reaction': data.get('customer_sentiment_after', 'neutral')
+            }
+        elif event_type == 'sentiment_change_detected':
+            # Customer ka mood change hua
+            learning_data = {
+                'learning_event': 'call_sentiment_change',
+                'previous_sentiment': data.get('previous_sentiment', 'neutral'),
+                'current_sentiment': data.get('current_sentiment', 'neutral'),
+                'trigger_action': data.get('agent_last_response', ''),
+                'sentiment_score': data.get('sentiment_score_change', 0)
+            }
+        elif event_type == 'successful_response_detected':
+            # Agent ka response successful raha
+            learning_data = {
+                'learning_event': 'successful_response',
+                'approach_used': data.get('agent_response', ''),
+                'context': data.get('conversation_context', ''),
+                'customer_reaction': data.get('customer_positive_reaction', ''),
+                'effectiveness_score': data.get('effectiveness_score', 8)
+            }
+        elif event_type == 'conversation_ended':
+            # Call khatam ho gayi - buffered learning pehle fold, phir comprehensive analysis
+            learning_buffer.flush(agent.pk, agent=agent)
+            AutoCallAnalysisAPIView().analyze_call(agent, call_session, {
+                'conversation_id': data.get('conversation_id'),
+                'full_transcript': data.get('full_transcript', ''),
+                'customer_satisfaction': data.get('customer_satisfaction_score', 5)
+            })
+            return
+        else:
+            return
+
+        RealTimeCallLearningAPIView().process_learning_event(agent, call_session, learning_data)
+
+    def _twilio_status(self, call_session, data):
+        call_status = data.get('CallStatus', '')
+        call_duration = data.get('CallDuration', '0')
+        recording_url = data.get('RecordingUrl', '')
+
+        if call_status == 'in-progress' and not call_session.connected_at:
+            call_session.connected_at = timezone.now()
+
+        elif call_status == 'completed':
+            call_session.ended_at = timezone.now()
+            call_session.duration_seconds = int(call_duration) if call_duration.isdigit() else 0
+
+            # Set outcome based on duration
+            call_session.outcome = 'answered' if call_session.duration_seconds > 60 else 'no_answer'
+
+            # Save recording URL if available
+            if recording_url:
+                call_session.recording_url = recording_url
+
+            record_call_usage(
+                call_session.ai_agent.client_id, call_session.twilio_call_sid,
+                call_session.duration_seconds, agent_id=call_session.ai_agent_id
+            )
+
+            learning_buffer.flush(call_session.ai_agent_id, agent=call_session.ai_agent)
+
+        elif call_status in ['busy', 'no-answer', 'failed']:
+            call_session.outcome = call_status.replace('-', '_')
+            call_session.ended_at = timezone.now()
+
+        call_session.save()
+
+
+# Metrics
+
+def webhook_metrics() -> Dict[str, Any]:
+    """
+    Backlog, lag and throughput per provider
+    lag = how old the oldest waiting event is; processing_lag = received -> processed for recent events
+    """
+    now = timezone.now()
+    minute_ago = now - timedelta(minutes=1)
+    hour_ago = now - timedelta(hours=1)
+
+    backlog = {
+        row['provider']: row
+        for row in WebhookEvent.objects.filter(status__in=['pending', 'processing', 'failed'])
+        .values('provider').annotate(
+            pending=Count('id', filter=Q(status='pending')),
+            processing=Count('id', filter=Q(status='processing')),
+            failed=Count('id', filter=Q(status='failed')),
+            dead=Count('id', filter=Q(status='failed', attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS)),
+            oldest=Min('received_at', filter=Q(status='pending')),
+        ).order_by()
+    }
+
+    throughput = {
+        row['provider']: row
+        for row in WebhookEvent.objects.filter(Q(received_at__gte=hour_ago) | Q(processed_at__gte=hour_ago))
+        .values('provider').annotate(
+            received_last_minute=Count('id', filter=Q(received_at__gte=minute_ago)),
+            received_last_hour=Count('id', filter=Q(received_at__gte=hour_ago)),
+            processed_last_minute=Count('id', filter=Q(processed_at__gte=minute_ago)),
+            processed_last_hour=Count('id', filter=Q(processed_at__gte=hour_ago)),
+            retried=Count('id', filter=Q(attempts__gt=1, processed_at__gte=hour_ago)),
+            avg_processing_lag=Avg(F('processed_at') - F('received_at'), filter=Q(processed_at__gte=hour_ago)),
+        ).order_by()
+    }
+
+    providers = {}
+    for provider, _ in WebhookEvent.PROVIDERS:
+        waiting = backlog.get(provider, {})
+        recent = throughput.get(provider, {})
+        lag = recent.get('avg_processing_lag')
+        providers[provider] = {
+            'pending': waiting.get('pending', 0),
+            'processing': waiting.get('processing', 0),
+            'failed': waiting.get('failed', 0),
+            'dead_lettered': waiting.get('dead', 0),
+            'lag_seconds': round((now - waiting['oldest']).total_seconds(), 1) if waiting.get('oldest') else 0,
+            'avg_processing_lag_seconds': round(lag.total_seconds(), 3) if lag else None,
+            'received_last_minute': recent.get('received_last_minute', 0),
+            'received_last_hour': recent.get('received_last_hour', 0),
+            'processed_last_minute': recent.get('processed_last_minute', 0),
+            'processed_last_hour': recent.get('processed_last_hour', 0),
+            'retried_last_hour': recent.get('retried', 0),
+        }
+
+    return {
+        'providers': providers,
+        'queue_partitions': settings.WEBHOOK_QUEUE_PARTITIONS,
+        'generated_at': now.isoformat()
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CallsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calls'
+
+    def ready(self):
+        # Per-user call counters on accounts.User
+        from . import signals  # noqa: F401
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from typing import Iterable
+
+from .models import CallSession
+
+User = get_user_model()
+
+
+def refresh_call_stats(user_ids: Iterable) -> int:
+    """
+    Recompute User.call_count / call_seconds from the user's call sessions
+    Admin user list in counters par sort karti hai - bulk writes ke baad isko khud call karein
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return 0
+
+    calls = CallSession.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    return User.objects.filter(pk__in=user_ids).update(
+        call_count=Coalesce(Subquery(calls.annotate(total=Count('pk')).values('total')), 0),
+        call_seconds=Coalesce(Subquery(calls.annotate(total=Sum('duration')).values('total')), 0),
+    )
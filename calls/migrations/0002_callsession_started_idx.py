@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0007_contactimport'),
+        ('calls', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['started_at'], name='callsession_started_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0010_call_slots'),
+        ('calls', '0002_callsession_started_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['user', '-started_at', '-id'], name='callsession_user_hist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['agent', '-started_at', '-id'], name='callsession_agent_hist_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0012_phone_e164'),
+        ('calls', '0003_call_history_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callsession',
+            name='callee_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='callsession',
+            name='caller_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['caller_e164'], name='callsession_caller_e164_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='callsession',
+            index=models.Index(fields=['callee_e164'], name='callsession_callee_e164_idx'),
+        ),
+    ]
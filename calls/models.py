@@ -34,6 +34,8 @@ class CallSession(models.Model):
     # Contact information
     caller_number = models.CharField(max_length=20)
     callee_number = models.CharField(max_length=20)
+    caller_e164 = models.CharField(max_length=16, null=True, blank=True, editable=False)  # Canonical forms, set on save
+    callee_e164 = models.CharField(max_length=16, null=True, blank=True, editable=False)
     caller_name = models.CharField(max_length=100, blank=True)
     
     # Twilio related
@@ -55,6 +57,18 @@ class CallSession(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Daily rollups and "calls today" scan one day of calls at a time
+            models.Index(fields=['started_at'], name='callsession_started_idx'),
+            # Keyset pagination of per-user / per-agent call history on (started_at, id)
+            models.Index(fields=['user', '-started_at', '-id'], name='callsession_user_hist_idx'),
+            models.Index(fields=['agent', '-started_at', '-id'], name='callsession_agent_hist_idx'),
+            # Caller history / matching by canonical number
+            models.Index(fields=['caller_e164'], name='callsession_caller_e164_idx'),
+            models.Index(fields=['callee_e164'], name='callsession_callee_e164_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.call_type.title()} - {self.caller_number} to {self.callee_number}"
     
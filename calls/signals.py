@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .call_stats import refresh_call_stats
+from .models import CallSession
+
+
+@receiver(post_save, sender=CallSession)
+def refresh_user_call_stats(sender, instance, created=False, update_fields=None, **kwargs):
+    """New calls and duration changes move the user's admin list counters"""
+    if created or update_fields is None or 'duration' in update_fields:
+        refresh_call_stats([instance.user_id])
+
+
+@receiver(post_delete, sender=CallSession)
+def refresh_user_call_stats_on_delete(sender, instance, **kwargs):
+    refresh_call_stats([instance.user_id])
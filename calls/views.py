@@ -14,6 +14,8 @@ from twilio.twiml.voice_response import VoiceResponse
 
 from .models import CallSession, CallQueue, QuickAction
 from agents.models import Agent
+from agents.call_admission import call_admission
+from agents.call_reconciliation import FINAL_STATUSES
 
 User = get_user_model()
 
@@ -216,6 +218,10 @@ class TwilioWebhookAPIView(APIView):
         call_sid = request.data.get('CallSid')
         call_status = request.data.get('CallStatus')
         
+        # Free the tenant's concurrent call slot whether or not we track this call here
+        if call_sid and call_status in FINAL_STATUSES:
+            call_admission.release_call(call_sid)
+        
         # Find the call session
         try:
             call_session = CallSession.objects.get(twilio_call_sid=call_sid)
@@ -3,4 +3,35 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django setup - the bridge uses models and settings
+from django.conf import settings  # noqa: E402
+from agents.media_bridge import media_stream_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """
+    HTTP goes to Django; Twilio Media Stream WebSockets go to the media bridge
+    Run with an ASGI server, e.g. uvicorn core.asgi:application --workers 4
+    """
+    if scope['type'] == 'http':
+        return await django_application(scope, receive, send)
+
+    if scope['type'] == 'websocket':
+        if scope['path'] == settings.MEDIA_BRIDGE_PATH:
+            return await media_stream_app(scope, receive, send)
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                from agents.homeai_client import get_async_homeai_client
+
+                await get_async_homeai_client().aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from datetime import date, datetime
+import base64
+import binascii
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination on a unique ordering, e.g. (-started_at, -id)
+    Har page ek index range seek hai - OFFSET aur per-page COUNT nahi, isliye deep pages bhi utne hi fast
+    """
+
+    def __init__(self, ordering: Sequence[str] = ('-started_at', '-id'), page_size: Optional[int] = None,
+                 max_page_size: Optional[int] = None):
+        # Every field must be non-null and the last one unique (normally the primary key)
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.page_size = page_size or settings.PAGINATION_PAGE_SIZE
+        self.max_page_size = max_page_size or settings.PAGINATION_MAX_PAGE_SIZE
+
+    def paginate(self, queryset: QuerySet, request) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        One page of `queryset` for the request's `cursor` / `page_size` / `include_count` params
+        Returns (rows, pagination block for the response)
+        """
+        return self._paginate([queryset], request, lambda branches: branches[0])
+
+    def paginate_union(self, querysets: Sequence[QuerySet], request) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Same, over UNION ALL of `.values()` querysets with matching columns
+        Seek har branch mein push hota hai, taaki har table apna index use kare
+        """
+        return self._paginate(list(querysets), request, lambda branches: branches[0].union(*branches[1:], all=True))
+
+    def _paginate(self, querysets: List[QuerySet], request, combine) -> Tuple[List[Any], Dict[str, Any]]:
+        params = request.query_params
+        limit = self._page_size(params.get('page_size'))
+        direction, position = self.decode_cursor(params.get('cursor'))
+
+        ordering = self.ordering
+        if direction == 'prev':
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+        branches = querysets
+        if position is not None:
+            branches = [queryset.filter(self._seek(ordering, position)) for queryset in querysets]
+
+        # One extra row tells us whether another page exists, without counting
+        rows = list(combine(branches).order_by(*ordering)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if direction == 'prev':
+            rows.reverse()
+
+        has_next = has_more if direction == 'next' else position is not None
+        has_previous = position is not None if direction == 'next' else has_more
+
+        pagination = {
+            'per_page': limit,
+            'next_cursor': self.encode_cursor('next', rows[-1]) if rows and has_next else None,
+            'previous_cursor': self.encode_cursor('prev', rows[0]) if rows and has_previous else None,
+        }
+        if params.get('include_count', '').lower() in ('1', 'true', 'yes'):
+            counts = [approximate_count(queryset) for queryset in querysets]
+            pagination['total_count'] = sum(count for count, _ in counts)
+            pagination['total_count_is_approximate'] = any(approximate for _, approximate in counts)
+        return rows, pagination
+
+    def encode_cursor(self, direction: str, row) -> str:
+        """Opaque, URL-safe cursor holding the ordering values of `row`"""
+        payload = {'d': direction, 'k': [_to_json(_resolve(row, field)) for field in self.fields]}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: Optional[str]) -> Tuple[str, Optional[List[Any]]]:
+        if not cursor:
+            return 'next', None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, position = payload['d'], payload['k']
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+            raise ValidationError({'cursor': 'Invalid cursor'})
+        if direction not in ('next', 'prev') or not isinstance(position, list) or len(position) != len(self.fields):
+            raise ValidationError({'cursor': 'Invalid cursor'})
+        return direction, position
+
+    def _seek(self, ordering: Sequence[str], position: List[Any]) -> Q:
+        """
+        Rows strictly after `position` in `ordering`:
+        (a > x) OR (a = x AND b > y) OR ...  - with < for descending fields
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[index]})
+            for previous, value in zip(self.fields[:index], position[:index]):
+                term &= Q(**{previous: value})
+            condition |= term
+
+        # Redundant bound on the leading field, so the planner can seek the index instead of filtering the OR
+        leading = ordering[0]
+        bound = Q(**{f"{self.fields[0]}__{'lte' if leading.startswith('-') else 'gte'}": position[0]})
+        return bound & condition
+
+    def _page_size(self, value: Optional[str]) -> int:
+        if not value:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({'page_size': 'Must be an integer'})
+        return max(1, min(size, self.max_page_size))
+
+
+def approximate_count(queryset: QuerySet) -> Tuple[int, bool]:
+    """
+    Row count for a list endpoint, only when the client asks for it
+    PostgreSQL par planner estimate (no scan); baaki databases par PAGINATION_COUNT_CAP tak exact count
+    """
+    if connection.vendor == 'postgresql':
+        try:
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            if isinstance(plan, list):
+                plan = plan[0]
+            return int(plan['Plan']['Plan Rows']), True
+        except Exception as e:
+            logger.warning(f"Count estimate failed, falling back to a capped count: {str(e)}")
+
+    cap = settings.PAGINATION_COUNT_CAP
+    count = queryset.order_by().values('pk')[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def _resolve(row, field: str):
+    """Follow `a__b` lookups on a model instance; `.values()` rows are plain dicts"""
+    if isinstance(row, dict):
+        return row[field]
+    value = row
+    for part in field.split('__'):
+        value = getattr(value, part)
+    return value
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from decimal import Decimal
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -77,6 +78,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'  # Needed for the Twilio media bridge
 
 # Database
 DATABASES = {
@@ -94,6 +96,23 @@ DATABASES = {
     # }
 }
 
+# Cache
+# Dashboard responses use the shared 'dashboard' alias (Redis when CACHE_REDIS_URL is set, locmem otherwise)
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'salesaice',
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+    },
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -240,10 +259,10 @@ CELERY_TIMEZONE = 'UTC'
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
-    # Process auto calls every 5 minutes during business hours
+    # Process auto calls every minute during business hours (token buckets pace each campaign)
     'process-auto-calls': {
         'task': 'agents.tasks.process_scheduled_auto_calls',
-        'schedule': crontab(minute='*/5', hour='9-17'),  # Every 5 minutes, 9 AM - 5 PM
+        'schedule': crontab(minute='*', hour='9-17'),  # Every minute, 9 AM - 5 PM
     },
     
     # Process callback reminders every 10 minutes
@@ -263,14 +282,156 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'agents.tasks.update_customer_priorities',
         'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
     },
+    
+    # Recover webhook events that were not queued or failed
+    'sweep-webhook-events': {
+        'task': 'agents.tasks.sweep_webhook_events',
+        'schedule': crontab(minute='*'),
+    },
+    
+    # Settle calls whose final Twilio webhook was missed
+    'reconcile-twilio-calls': {
+        'task': 'agents.tasks.reconcile_twilio_calls',
+        'schedule': crontab(minute='*/2'),
+    },
+    
+    # Fold metered usage into subscription counters
+    'aggregate-usage': {
+        'task': 'subscriptions.tasks.aggregate_usage',
+        'schedule': config('USAGE_AGGREGATION_SECONDS', default=60, cast=int),  # Seconds
+    },
+    
+    # Invoice overage minutes accumulated since the last run
+    'bill-overages': {
+        'task': 'subscriptions.tasks.bill_overages',
+        'schedule': crontab(minute=15),
+    },
+    
+    # Fold buffered real-time learning events into agent memory
+    'flush-learning-buffers': {
+        'task': 'agents.tasks.flush_learning_buffers',
+        'schedule': config('LEARNING_BUFFER_FLUSH_SECONDS', default=10, cast=int),  # Seconds
+    },
+    
+    # Refresh admin dashboard daily rollups every 15 minutes
+    'rollup-daily-metrics': {
+        'task': 'dashboard.tasks.rollup_daily_metrics',
+        'schedule': crontab(minute='*/15'),
+    },
+}
+
+# Outbound Dialer Configuration
+DIALER_MAX_WORKERS = config('DIALER_MAX_WORKERS', default=20, cast=int)  # Worker pool size per beat tick
+DIALER_DEFAULT_CONCURRENT_CALLS = config('DIALER_DEFAULT_CONCURRENT_CALLS', default=5, cast=int)  # Accounts without a subscription
+DIALER_CALL_TIMEOUT_MINUTES = config('DIALER_CALL_TIMEOUT_MINUTES', default=30, cast=int)  # Unknown 'calling' calls older than this are failed by the reconciler
+DIALER_LEASE_SECONDS = config('DIALER_LEASE_SECONDS', default=300, cast=int)  # Claimed contacts not dialed by then are reclaimed
+
+# Call Admission (per-tenant SubscriptionPlan.concurrent_calls)
+CALL_ADMISSION_BACKEND = config('CALL_ADMISSION_BACKEND', default='redis')  # 'redis', or 'db' to always use CallSlot rows
+CALL_ADMISSION_REDIS_URL = config('CALL_ADMISSION_REDIS_URL', default=CELERY_BROKER_URL)
+CALL_ADMISSION_SLOT_TTL_SECONDS = config('CALL_ADMISSION_SLOT_TTL_SECONDS', default=3600, cast=int)  # Slot freed after this if no terminal status arrives
+
+# Usage Metering (UsageRecord events folded into Subscription counters)
+USAGE_AGGREGATION_BATCH_SIZE = config('USAGE_AGGREGATION_BATCH_SIZE', default=5000, cast=int)  # Records per transaction
+USAGE_OVERAGE_RATE = config('USAGE_OVERAGE_RATE', default='0.02', cast=Decimal)  # USD per overage minute
+USAGE_WARNING_PERCENT = config('USAGE_WARNING_PERCENT', default=80, cast=int)
+
+# Overage Billing (periodic Stripe invoice items for overage minutes)
+OVERAGE_BILLING_MAX_WORKERS = config('OVERAGE_BILLING_MAX_WORKERS', default=8, cast=int)  # Parallel Stripe requests
+OVERAGE_BILLING_BATCH_SIZE = config('OVERAGE_BILLING_BATCH_SIZE', default=100, cast=int)  # Charges per parallel batch
+OVERAGE_BILLING_RATE_LIMIT = config('OVERAGE_BILLING_RATE_LIMIT', default=20, cast=float)  # Stripe requests/second (test mode allows 25)
+OVERAGE_BILLING_MAX_ATTEMPTS = config('OVERAGE_BILLING_MAX_ATTEMPTS', default=5, cast=int)
+
+# Keyset Pagination (history / admin list endpoints)
+PAGINATION_PAGE_SIZE = config('PAGINATION_PAGE_SIZE', default=20, cast=int)
+PAGINATION_MAX_PAGE_SIZE = config('PAGINATION_MAX_PAGE_SIZE', default=100, cast=int)
+PAGINATION_COUNT_CAP = config('PAGINATION_COUNT_CAP', default=10000, cast=int)  # Exact counts stop here where no planner estimate exists
+AGENT_DIRECTORY_FACET_TTL = config('AGENT_DIRECTORY_FACET_TTL', default=60, cast=int)  # Agent list summary / filter options
+
+# Call Reconciliation (missed Twilio status webhooks)
+RECONCILE_STALE_MINUTES = config('RECONCILE_STALE_MINUTES', default=5, cast=int)  # In-flight this long without a final webhook
+RECONCILE_MAX_WORKERS = config('RECONCILE_MAX_WORKERS', default=8, cast=int)  # Parallel Twilio API requests
+RECONCILE_PAGE_SIZE = config('RECONCILE_PAGE_SIZE', default=1000, cast=int)  # Calls / recordings per Twilio list page
+RECONCILE_WINDOW_HOURS = config('RECONCILE_WINDOW_HOURS', default=6, cast=int)  # Date range per list request
+
+# Campaign Pacing (token bucket per campaign, shared through Redis)
+PACING_REDIS_URL = config('PACING_REDIS_URL', default=CELERY_BROKER_URL)
+PACING_MAX_CARRY_MINUTES = config('PACING_MAX_CARRY_MINUTES', default=15, cast=int)  # Unused capacity carried forward
+
+# Contact Imports
+CONTACT_IMPORT_CHUNK_SIZE = config('CONTACT_IMPORT_CHUNK_SIZE', default=1000, cast=int)  # Rows upserted per statement
+DEFAULT_PHONE_COUNTRY_CODE = config('DEFAULT_PHONE_COUNTRY_CODE', default='1')  # Used for numbers without a country code
+
+# Dashboard Response Cache
+DASHBOARD_CACHE_ENABLED = config('DASHBOARD_CACHE_ENABLED', default=True, cast=bool)
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)  # Seconds in the shared tier
+DASHBOARD_CACHE_ADMIN_TTL = config('DASHBOARD_CACHE_ADMIN_TTL', default=120, cast=int)  # Admin call counts refresh on TTL only
+DASHBOARD_CACHE_LOCAL_TTL = config('DASHBOARD_CACHE_LOCAL_TTL', default=5, cast=int)  # In-process tier, bounds cross-node staleness
+DASHBOARD_CACHE_LOCAL_MAX_ENTRIES = config('DASHBOARD_CACHE_LOCAL_MAX_ENTRIES', default=1000, cast=int)
+
+# Dashboard Rollups
+DAILY_METRICS_ROLLUP_DAYS = config('DAILY_METRICS_ROLLUP_DAYS', default=2, cast=int)  # Days recomputed by each beat run
+
+# Webhook Ingestion
+# Run one worker per partition queue with concurrency 1 so each agent's events stay in order:
+#   celery -A core worker -Q webhooks.0 -c 1   (... webhooks.N-1)
+WEBHOOK_QUEUE_PREFIX = 'webhooks'
+WEBHOOK_QUEUE_PARTITIONS = config('WEBHOOK_QUEUE_PARTITIONS', default=4, cast=int)
+WEBHOOK_DRAIN_BATCH_SIZE = config('WEBHOOK_DRAIN_BATCH_SIZE', default=100, cast=int)  # Events per task before re-queueing
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)  # Failed events then stay for inspection
+WEBHOOK_PROCESSING_TIMEOUT = config('WEBHOOK_PROCESSING_TIMEOUT', default=300, cast=int)  # Seconds before a claimed event is reclaimed
+WEBHOOK_EVENT_RETENTION_DAYS = config('WEBHOOK_EVENT_RETENTION_DAYS', default=7, cast=int)  # Also the dedupe window
+WEBHOOK_VALIDATE_TWILIO_SIGNATURE = config('WEBHOOK_VALIDATE_TWILIO_SIGNATURE', default=False, cast=bool)
+
+# Learning Buffer (write-behind for real-time learning events)
+LEARNING_BUFFER_BACKEND = config('LEARNING_BUFFER_BACKEND', default='redis')  # 'redis', 'local' (single process) or 'none' to write through
+LEARNING_BUFFER_REDIS_URL = config('LEARNING_BUFFER_REDIS_URL', default=CELERY_BROKER_URL)
+LEARNING_BUFFER_MAX_EVENTS = config('LEARNING_BUFFER_MAX_EVENTS', default=200, cast=int)  # Flushed inline once an agent has this many
+
+# Agent Learning Memory (top-K retention per agent, enforced on every insert)
+AGENT_MEMORY_OBJECTION_RESPONSES = config('AGENT_MEMORY_OBJECTION_RESPONSES', default=20, cast=int)  # Best responses kept per objection
+AGENT_MEMORY_SUCCESSFUL_PATTERNS = config('AGENT_MEMORY_SUCCESSFUL_PATTERNS', default=50, cast=int)
+AGENT_MEMORY_SENTIMENT_TRIGGERS = config('AGENT_MEMORY_SENTIMENT_TRIGGERS', default=30, cast=int)  # Per polarity
+AGENT_MEMORY_QA_PAIRS = config('AGENT_MEMORY_QA_PAIRS', default=100, cast=int)
+
+# HomeAI Client (shared keep-alive pool, per-endpoint timeouts, retries and circuit breaker)
+HOMEAI_POOL_SIZE = config('HOMEAI_POOL_SIZE', default=20, cast=int)  # Keep-alive connections per worker process
+HOMEAI_MAX_CONCURRENCY = config('HOMEAI_MAX_CONCURRENCY', default=20, cast=int)  # In-flight requests per worker process
+HOMEAI_CONNECT_TIMEOUT = config('HOMEAI_CONNECT_TIMEOUT', default=3, cast=float)
+HOMEAI_TIMEOUTS = {  # Read timeout in seconds per endpoint
+    'default': config('HOMEAI_DEFAULT_TIMEOUT', default=10, cast=float),
+    'respond': config('HOMEAI_RESPOND_TIMEOUT', default=5, cast=float),  # Live conversation turn
+    'objection': config('HOMEAI_OBJECTION_TIMEOUT', default=5, cast=float),
+    'generate': config('HOMEAI_GENERATE_TIMEOUT', default=8, cast=float),
+    'analysis': config('HOMEAI_ANALYSIS_TIMEOUT', default=30, cast=float),
+    'learn': config('HOMEAI_LEARN_TIMEOUT', default=30, cast=float),
 }
+HOMEAI_MAX_RETRIES = config('HOMEAI_MAX_RETRIES', default=2, cast=int)
+HOMEAI_RETRY_BACKOFF = config('HOMEAI_RETRY_BACKOFF', default=0.2, cast=float)  # Seconds, doubled per attempt with full jitter
+HOMEAI_BREAKER_FAILURES = config('HOMEAI_BREAKER_FAILURES', default=5, cast=int)  # Consecutive failures before an endpoint opens
+HOMEAI_BREAKER_RESET_SECONDS = config('HOMEAI_BREAKER_RESET_SECONDS', default=30, cast=int)
 
 # HumeAI Configuration
 HUME_AI_API_KEY = config('HUME_AI_API_KEY', default='mb5K22hbrOAvddJfkP4ZlScpMVHItgw0jfyxj0F1byGJ7j1w')
 HUME_AI_BASE_URL = config('HUME_AI_BASE_URL', default='https://api.hume.ai/v0')
 HUME_AI_MODEL = config('HUME_AI_MODEL', default='evi-2')
+HUME_AI_EVI_URL = config('HUME_AI_EVI_URL', default='wss://api.hume.ai/v0/evi/chat')
+HUME_AI_EVI_CONFIG_ID = config('HUME_AI_EVI_CONFIG_ID', default='')
+
+# Media Bridge (Twilio Media Streams <-> HumeAI EVI, served by core/asgi.py)
+MEDIA_BRIDGE_PATH = '/ws/twilio/media/'
+MEDIA_BRIDGE_URL = config('MEDIA_BRIDGE_URL', default='wss://yourdomain.com/ws/twilio/media/')  # Public wss:// URL put in the TwiML
+MEDIA_BRIDGE_MAX_SESSIONS = config('MEDIA_BRIDGE_MAX_SESSIONS', default=300, cast=int)  # Concurrent calls per ASGI process
+MEDIA_BRIDGE_INBOUND_FRAMES = config('MEDIA_BRIDGE_INBOUND_FRAMES', default=50, cast=int)  # 20 ms caller frames buffered (oldest dropped)
+MEDIA_BRIDGE_FRAMES_PER_SEND = config('MEDIA_BRIDGE_FRAMES_PER_SEND', default=5, cast=int)  # Frames coalesced per backend message
+MEDIA_BRIDGE_OUTBOUND_CHUNKS = config('MEDIA_BRIDGE_OUTBOUND_CHUNKS', default=50, cast=int)  # Agent audio chunks before back-pressure
+MEDIA_BRIDGE_LEARNING_EVENTS = config('MEDIA_BRIDGE_LEARNING_EVENTS', default=100, cast=int)
+MEDIA_BRIDGE_CONNECT_TIMEOUT = config('MEDIA_BRIDGE_CONNECT_TIMEOUT', default=5, cast=float)
+MEDIA_BRIDGE_TOKEN_MAX_AGE = config('MEDIA_BRIDGE_TOKEN_MAX_AGE', default=300, cast=int)  # Seconds between TwiML and stream start
 
 # Twilio Configuration
+TWIML_TEMPLATE_CACHE_SIZE = config('TWIML_TEMPLATE_CACHE_SIZE', default=256, cast=int)  # Compiled TwiML templates per process
 TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
 TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
 TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from subscriptions.models import Subscription, SubscriptionPlan, BillingHistory
 from calls.models import CallSession
 from accounts.permissions import IsAdmin
+from .rollups import platform_trends
+from .response_cache import cached_dashboard, dashboard_cache
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import json
@@ -50,6 +52,7 @@ class AdminDashboardAPIView(APIView):
             403: "Forbidden - Admin access required"
         }
     )
+    @cached_dashboard('admin', scope='admin')
     def get(self, request):
         try:
             # Date ranges
@@ -137,45 +140,24 @@ class AdminDashboardAPIView(APIView):
             )
     
     def generate_trends(self, start_date, end_date):
-        """Generate trend data for the last 30 days"""
-        from datetime import date
-        
-        # Generate date range (last 30 days)
-        date_range = []
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-        
-        while current_date <= end_date_only:
-            date_range.append(current_date)
-            current_date += timedelta(days=1)
-        
-        # MRR trend (daily active subscription revenue)
-        mrr_trend = []
-        for i, date_point in enumerate(date_range):
-            daily_mrr = Subscription.objects.filter(
-                status='active',
-                created_at__date__lte=date_point
-            ).aggregate(mrr=Sum('plan__price'))['mrr'] or 0
-            mrr_trend.append({'x': i, 'y': float(daily_mrr)})
-        
-        # Calls trend (daily call count)
-        calls_trend = []
-        for i, date_point in enumerate(date_range):
-            daily_calls = CallSession.objects.filter(
-                started_at__date=date_point
-            ).count()
-            calls_trend.append({'x': i, 'y': daily_calls})
-        
-        # Users trend (cumulative user count)
-        users_trend = []
-        for i, date_point in enumerate(date_range):
-            cumulative_users = User.objects.filter(
-                date_joined__date__lte=date_point
-            ).count()
-            users_trend.append({'x': i, 'y': cumulative_users})
-        
-        return {
-            'mrr': mrr_trend,
-            'calls': calls_trend,
-            'users': users_trend
+        """Generate trend data for the last 30 days from the daily rollup table"""
+        return platform_trends(timezone.localdate(start_date), timezone.localdate(end_date))
+
+
+class DashboardCacheStatsAPIView(APIView):
+    """
+    Dashboard response cache hit/miss metrics for this worker process
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    
+    @swagger_auto_schema(
+        tags=['Dashboard'],
+        operation_summary="Dashboard Cache Metrics",
+        operation_description="Hit/miss counters per dashboard view for the serving worker process",
+        responses={
+            200: "Cache metrics",
+            403: "Forbidden - Admin access required"
         }
+    )
+    def get(self, request):
+        return Response(dashboard_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,62 @@
+from django.db.models import Count, Q
+from typing import Dict, Iterable, Optional
+
+
+def choice_values(model, field_name: str) -> list:
+    """Stored values of a choices field, e.g. ['active', 'cancelled', ...]"""
+    return [value for value, _ in model._meta.get_field(field_name).choices or []]
+
+
+def count_if(**lookups) -> Count:
+    """Count rows matching the lookups - one column of a conditional aggregate"""
+    return Count('pk', filter=Q(**lookups))
+
+
+def choice_counts(field_name: str, values: Iterable, prefix: Optional[str] = None) -> Dict[str, Count]:
+    """
+    One conditional Count per choice value, keyed '<prefix>__<value>'
+    Poori breakdown ek hi aggregate query mein
+    """
+    prefix = prefix or field_name
+    return {f'{prefix}__{value}': count_if(**{field_name: value}) for value in values}
+
+
+def breakdown(counts: Dict[str, int], values: Iterable, prefix: str) -> Dict[str, int]:
+    """
+    Pick a choice breakdown back out of an aggregate() result
+    Zero rows are left out, matching the old values().annotate(Count) shape
+    """
+    return {
+        value: counts[f'{prefix}__{value}']
+        for value in values
+        if counts.get(f'{prefix}__{value}')
+    }
+
+
+def counter_family(queryset, field_name: str, total: bool = True, **extra) -> Dict[str, int]:
+    """
+    Total, per-choice and any extra conditional counts for a queryset in one query
+    extra: name=Q(...) or name=<aggregate expression>
+    """
+    values = choice_values(queryset.model, field_name)
+    aggregates = choice_counts(field_name, values)
+    if total:
+        aggregates['total'] = Count('pk')
+    for name, condition in extra.items():
+        aggregates[name] = Count('pk', filter=condition) if isinstance(condition, Q) else condition
+
+    counts = queryset.aggregate(**aggregates)
+    counts['by_' + field_name] = breakdown(counts, values, field_name)
+    return counts
+
+
+def customer_summary_aggregates() -> Dict[str, Count]:
+    """Customer profile counters shown on every customer list / dashboard"""
+    return {
+        'total': Count('pk'),
+        'hot_leads': count_if(interest_level='hot'),
+        'warm_leads': count_if(interest_level='warm'),
+        'cold_leads': count_if(interest_level='cold'),
+        'converted': count_if(is_converted=True),
+        'do_not_call': count_if(is_do_not_call=True),
+    }
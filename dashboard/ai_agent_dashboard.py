@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count, Avg, Sum
+from django.db.models import Count, Avg, Sum, Q
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from datetime import datetime, timedelta
@@ -12,6 +12,8 @@ from agents.ai_agent_models import (
     AIAgent, CustomerProfile, CallSession, 
     AIAgentTraining, ScheduledCallback
 )
+from .aggregates import count_if, customer_summary_aggregates
+from .response_cache import cached_dashboard
 
 User = get_user_model()
 
@@ -31,6 +33,7 @@ class AIAgentDashboardAPIView(APIView):
         operation_description="Get complete AI Agent dashboard - agent status, performance, calls, learning",
         tags=['Dashboard']
     )
+    @cached_dashboard('ai_agent')
     def get(self, request):
         user = request.user
         
@@ -62,26 +65,28 @@ class AIAgentDashboardAPIView(APIView):
         }
         
         # 2. PERFORMANCE METRICS
+        # Saare call counters ek hi query mein
+        call_counts = CallSession.objects.filter(ai_agent=agent).aggregate(
+            today=count_if(initiated_at__date=today),
+            this_month=count_if(initiated_at__gte=this_month),
+            this_week=count_if(initiated_at__gte=timezone.now() - timedelta(days=7)),
+            avg_duration_today=Avg('duration_seconds', filter=Q(initiated_at__date=today, duration_seconds__gt=0))
+        )
+        
         performance = {
             'total_calls_handled': agent.calls_handled,
             'successful_conversions': agent.successful_conversions,
             'conversion_rate': agent.conversion_rate,
             'avg_call_duration': agent.avg_call_duration,
             'customer_satisfaction': agent.customer_satisfaction,
-            'today_calls': CallSession.objects.filter(
-                ai_agent=agent,
-                initiated_at__date=today
-            ).count(),
-            'this_month_calls': CallSession.objects.filter(
-                ai_agent=agent,
-                initiated_at__gte=this_month
-            ).count()
+            'today_calls': call_counts['today'],
+            'this_month_calls': call_counts['this_month']
         }
         
         # 3. RECENT CALLS
         recent_calls = CallSession.objects.filter(
             ai_agent=agent
-        ).order_by('-initiated_at')[:10]
+        ).select_related('customer_profile').order_by('-initiated_at')[:10]
         
         calls_data = []
         for call in recent_calls:
@@ -99,13 +104,14 @@ class AIAgentDashboardAPIView(APIView):
         
         # 4. CUSTOMER PROFILES
         customers = CustomerProfile.objects.filter(ai_agent=agent)
+        customer_counts = customers.aggregate(**customer_summary_aggregates())
         customer_stats = {
-            'total_customers': customers.count(),
-            'hot_leads': customers.filter(interest_level='hot').count(),
-            'warm_leads': customers.filter(interest_level='warm').count(),
-            'cold_leads': customers.filter(interest_level='cold').count(),
-            'converted': customers.filter(is_converted=True).count(),
-            'do_not_call': customers.filter(is_do_not_call=True).count()
+            'total_customers': customer_counts['total'],
+            'hot_leads': customer_counts['hot_leads'],
+            'warm_leads': customer_counts['warm_leads'],
+            'cold_leads': customer_counts['cold_leads'],
+            'converted': customer_counts['converted'],
+            'do_not_call': customer_counts['do_not_call']
         }
         
         # Recent customers
@@ -127,7 +133,7 @@ class AIAgentDashboardAPIView(APIView):
             ai_agent=agent,
             status='scheduled',
             scheduled_datetime__gte=timezone.now()
-        ).order_by('scheduled_datetime')[:10]
+        ).select_related('customer_profile').order_by('scheduled_datetime')[:10]
         
         callbacks_data = []
         for callback in upcoming_callbacks:
@@ -146,17 +152,21 @@ class AIAgentDashboardAPIView(APIView):
             ai_agent=agent
         ).order_by('-created_at')
         
+        training_counts = training_sessions.aggregate(
+            total=Count('id'),
+            completed=count_if(is_completed=True)
+        )
         training_data = {
-            'total_sessions': training_sessions.count(),
-            'completed_sessions': training_sessions.filter(is_completed=True).count(),
+            'total_sessions': training_counts['total'],
+            'completed_sessions': training_counts['completed'],
             'training_types': list(training_sessions.values('training_type').annotate(
                 count=Count('id')
-            )),
+            ).order_by()),
             'latest_training': None
         }
         
-        if training_sessions.exists():
-            latest = training_sessions.first()
+        latest = training_sessions.first()
+        if latest:
             training_data['latest_training'] = {
                 'type': latest.training_type,
                 'completion': latest.completion_percentage,
@@ -259,15 +269,8 @@ class AIAgentDashboardAPIView(APIView):
         call_stats = {
             'by_outcome': list(CallSession.objects.filter(ai_agent=agent).values('outcome').annotate(count=Count('id'))),
             'by_type': list(CallSession.objects.filter(ai_agent=agent).values('call_type').annotate(count=Count('id'))),
-            'this_week': CallSession.objects.filter(
-                ai_agent=agent,
-                initiated_at__gte=timezone.now() - timedelta(days=7)
-            ).count(),
-            'avg_duration_today': CallSession.objects.filter(
-                ai_agent=agent,
-                initiated_at__date=today,
-                duration_seconds__gt=0
-            ).aggregate(avg=Avg('duration_seconds'))['avg'] or 0
+            'this_week': call_counts['this_week'],
+            'avg_duration_today': call_counts['avg_duration_today'] or 0
         }
         
         dashboard_data = {
@@ -323,6 +326,7 @@ class CustomerProfilesAPIView(APIView):
                 customers = customers.filter(is_converted=converted.lower() == 'true')
             
             customers = customers.order_by('-last_interaction', '-created_at')
+            summary = customers.aggregate(**customer_summary_aggregates())
             
             customers_data = []
             for customer in customers:
@@ -347,10 +351,10 @@ class CustomerProfilesAPIView(APIView):
                 'customers': customers_data,
                 'total_count': len(customers_data),
                 'summary': {
-                    'total': customers.count(),
-                    'hot_leads': customers.filter(interest_level='hot').count(),
-                    'converted': customers.filter(is_converted=True).count(),
-                    'do_not_call': customers.filter(is_do_not_call=True).count()
+                    'total': summary['total'],
+                    'hot_leads': summary['hot_leads'],
+                    'converted': summary['converted'],
+                    'do_not_call': summary['do_not_call']
                 }
             }, status=status.HTTP_200_OK)
             
@@ -392,7 +396,12 @@ class ScheduledCallbacksAPIView(APIView):
                     scheduled_datetime__lt=timezone.now()
                 )
             
-            callbacks = callbacks.order_by('scheduled_datetime')
+            callbacks = callbacks.select_related('customer_profile').order_by('scheduled_datetime')
+            summary = callbacks.aggregate(
+                scheduled=count_if(status='scheduled'),
+                completed=count_if(status='completed'),
+                overdue=count_if(status='scheduled', scheduled_datetime__lt=timezone.now())
+            )
             
             callbacks_data = []
             for callback in callbacks:
@@ -417,12 +426,9 @@ class ScheduledCallbacksAPIView(APIView):
                 'callbacks': callbacks_data,
                 'total_count': len(callbacks_data),
                 'summary': {
-                    'scheduled': callbacks.filter(status='scheduled').count(),
-                    'completed': callbacks.filter(status='completed').count(),
-                    'overdue': callbacks.filter(
-                        status='scheduled',
-                        scheduled_datetime__lt=timezone.now()
-                    ).count()
+                    'scheduled': summary['scheduled'],
+                    'completed': summary['completed'],
+                    'overdue': summary['overdue']
                 }
             }, status=status.HTTP_200_OK)
             
@@ -12,6 +12,9 @@ from accounts.models import User
 from accounts.permissions import IsAdmin
 from subscriptions.models import Subscription, BillingHistory, UsageRecord, SubscriptionPlan
 from calls.models import CallSession, CallQueue
+from .aggregates import count_if
+from .timeseries import bucketed_series, bucket_floor, resolve_timezone
+from .response_cache import cached_dashboard
 
 User = get_user_model()
 
@@ -27,6 +30,9 @@ class ComprehensiveDashboardAPIView(APIView):
         tags=['Dashboard'],
         operation_summary="User Dashboard Data",
         operation_description="Get comprehensive dashboard data for the authenticated user",
+        manual_parameters=[
+            openapi.Parameter('tz', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="IANA timezone for chart buckets, e.g. America/New_York"),
+        ],
         responses={
             200: openapi.Response(
                 description="Dashboard data",
@@ -94,6 +100,7 @@ class ComprehensiveDashboardAPIView(APIView):
             404: "Data not found"
         }
     )
+    @cached_dashboard('comprehensive')
     def get(self, request):
         """Get comprehensive dashboard data for the authenticated user"""
         user = request.user
@@ -144,11 +151,12 @@ class ComprehensiveDashboardAPIView(APIView):
                 renewal_date = billing_end
                 billing_cycle_start = billing_start
             
-            # Generate chart data for user
-            weekly_trends = self._get_weekly_call_trends_user(user)
-            hourly_activity = self._get_hourly_activity_user(user)
-            call_distribution = self._get_call_type_distribution_user(user)
-            monthly_usage = self._get_monthly_usage_user(user)
+            # Generate chart data for user - one bucketed query per chart
+            tz = resolve_timezone(request)
+            weekly_trends = self._get_weekly_call_trends_user(user, tz)
+            hourly_activity = self._get_hourly_activity_user(user, tz)
+            call_distribution = self._get_call_type_distribution_user(user, tz)
+            monthly_usage = self._get_monthly_usage_user(user, tz)
             
             dashboard_data = {
                 # Summary Stats for User
@@ -181,67 +189,55 @@ class ComprehensiveDashboardAPIView(APIView):
                 'error': f'Error generating dashboard data: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _get_weekly_call_trends_user(self, user):
+    def _get_weekly_call_trends_user(self, user, tz):
         """Generate weekly call trends for the last 7 days for specific user"""
-        trends = []
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=6)  # Last 7 days
-        
-        for i in range(7):
-            current_date = start_date + timedelta(days=i)
-            day_calls = CallSession.objects.filter(
-                user=user,  # Filter by user
-                started_at__date=current_date
-            )
-            
-            inbound = day_calls.filter(call_type='inbound').count()
-            outbound = day_calls.filter(call_type='outbound').count()
-            total = inbound + outbound
-            
-            trends.append({
-                'day': current_date.strftime('%a'),  # Mon, Tue, etc.
-                'inbound': inbound,
-                'outbound': outbound,
-                'total': total
-            })
+        start = bucket_floor(timezone.now().astimezone(tz), 'day') - timedelta(days=6)
+        series = bucketed_series(
+            CallSession.objects.filter(user=user), 'started_at', 'day', start, 7,
+            inbound=count_if(call_type='inbound'),
+            outbound=count_if(call_type='outbound')
+        )
         
-        return trends
+        return [
+            {
+                'day': day.strftime('%a'),  # Mon, Tue, etc.
+                'inbound': values['inbound'],
+                'outbound': values['outbound'],
+                'total': values['inbound'] + values['outbound']
+            }
+            for day, values in series
+        ]
     
-    def _get_hourly_activity_user(self, user):
-        """Generate hourly activity for the last 24 hours for specific user"""
-        activity = []
-        now = timezone.now()
-        
-        for hour in range(24):
-            hour_start = now.replace(hour=hour, minute=0, second=0, microsecond=0)
-            hour_end = hour_start + timedelta(hours=1)
-            
-            calls = CallSession.objects.filter(
-                user=user,  # Filter by user
-                started_at__gte=hour_start,
-                started_at__lt=hour_end
-            ).count()
-            
-            activity.append({
-                'hour': f"{hour:02d}:00",
-                'calls': calls
-            })
+    def _get_hourly_activity_user(self, user, tz):
+        """Generate hourly activity for today (in the user's timezone) for specific user"""
+        start = bucket_floor(timezone.now().astimezone(tz), 'day')
+        series = bucketed_series(
+            CallSession.objects.filter(user=user), 'started_at', 'hour', start, 24,
+            calls=Count('id')
+        )
         
-        return activity
+        return [
+            {
+                'hour': f"{hour.hour:02d}:00",
+                'calls': values['calls']
+            }
+            for hour, values in series
+        ]
     
-    def _get_call_type_distribution_user(self, user):
+    def _get_call_type_distribution_user(self, user, tz):
         """Generate call type distribution data for specific user"""
-        today = timezone.now().date()
-        current_month_start = today.replace(day=1)
+        current_month_start = bucket_floor(timezone.now().astimezone(tz), 'month')
         
-        month_calls = CallSession.objects.filter(
+        counts = CallSession.objects.filter(
             user=user,  # Filter by user
-            started_at__date__gte=current_month_start,
-            started_at__date__lte=today
+            started_at__gte=current_month_start
+        ).aggregate(
+            inbound=count_if(call_type='inbound'),
+            outbound=count_if(call_type='outbound')
         )
         
-        inbound_count = month_calls.filter(call_type='inbound').count()
-        outbound_count = month_calls.filter(call_type='outbound').count()
+        inbound_count = counts['inbound']
+        outbound_count = counts['outbound']
         total = inbound_count + outbound_count
         
         if total == 0:
@@ -262,40 +258,24 @@ class ComprehensiveDashboardAPIView(APIView):
         
         return distribution
     
-    def _get_monthly_usage_user(self, user):
+    def _get_monthly_usage_user(self, user, tz):
         """Generate monthly usage data for the last 6 months for specific user"""
-        usage = []
-        current_date = timezone.now().date()
+        this_month = bucket_floor(timezone.now().astimezone(tz), 'month')
+        start = this_month
+        for _ in range(5):
+            start = bucket_floor(start - timedelta(days=1), 'month')
         
-        for i in range(6):
-            # Calculate month start and end
-            if i == 0:
-                month_start = current_date.replace(day=1)
-                month_end = current_date
-            else:
-                month_date = current_date.replace(day=1) - timedelta(days=i*30)
-                month_start = month_date.replace(day=1)
-                # Get last day of month
-                if month_start.month == 12:
-                    month_end = month_start.replace(year=month_start.year+1, month=1, day=1) - timedelta(days=1)
-                else:
-                    month_end = month_start.replace(month=month_start.month+1, day=1) - timedelta(days=1)
-            
-            # User's calls for this month
-            month_calls = CallSession.objects.filter(
-                user=user,  # Filter by user
-                started_at__date__gte=month_start,
-                started_at__date__lte=month_end
-            )
-            
-            total_calls = month_calls.count()
-            total_duration = month_calls.aggregate(total=Sum('duration'))['total'] or 0
-            total_minutes = round(total_duration / 60, 2) if total_duration else 0
-            
-            usage.append({
-                'month': month_start.strftime('%b %Y'),  # Jan 2024
-                'minutes': total_minutes,
-                'calls': total_calls
-            })
+        series = bucketed_series(
+            CallSession.objects.filter(user=user), 'started_at', 'month', start, 6,
+            calls=Count('id'),
+            duration=Sum('duration')
+        )
         
-        return list(reversed(usage))  # Oldest first
+        return [
+            {
+                'month': month.strftime('%b %Y'),  # Jan 2024
+                'minutes': round(values['duration'] / 60, 2) if values['duration'] else 0,
+                'calls': values['calls']
+            }
+            for month, values in series
+        ]  # Oldest first
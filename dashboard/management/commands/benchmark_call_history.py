@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from calls.call_stats import refresh_call_stats
+from calls.models import CallSession
+from core.pagination import KeysetPaginator
+from datetime import timedelta
+from types import SimpleNamespace
+import random
+import statistics
+import time
+
+User = get_user_model()
+
+BENCHMARK_EMAIL = 'call-history-benchmark@example.invalid'
+DEPTHS = [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.99]
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic call sessions and compare keyset vs OFFSET pagination latency at increasing page depth'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=5000000, help='Number of call sessions to seed')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create batch size')
+        parser.add_argument('--page-size', type=int, default=20, help='Rows per page')
+        parser.add_argument('--runs', type=int, default=20, help='Timed page fetches per depth')
+        parser.add_argument('--explain', action='store_true', help='Print the deepest keyset query plan')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data after the run')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email=BENCHMARK_EMAIL).exists():
+            self.stdout.write(self.style.WARNING('Removing data left over from a previous benchmark run...'))
+            self.cleanup()
+
+        user = self.seed(options)
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(CallSession._meta.db_table)}')
+
+            paginator = KeysetPaginator(('-started_at', '-id'), page_size=options['page_size'])
+            calls = CallSession.objects.filter(user=user)
+            keyset, offset = [], []
+
+            self.stdout.write(f'\n{"depth":>8} {"row":>12} {"keyset p50":>12} {"offset p50":>12}')
+            for depth in DEPTHS:
+                row = int(options['calls'] * depth)
+                cursor = self.cursor_at(paginator, calls, row)
+                keyset_ms = self.measure(options['runs'], lambda: paginator.paginate(
+                    calls, SimpleNamespace(query_params={'cursor': cursor} if cursor else {})
+                ))
+                offset_ms = self.measure(options['runs'], lambda: list(
+                    calls.order_by('-started_at', '-id')[row:row + options['page_size']]
+                ))
+                keyset.append(keyset_ms)
+                offset.append(offset_ms)
+                self.stdout.write(f'{depth:>8.0%} {row:>12,} {keyset_ms:>10.2f}ms {offset_ms:>10.2f}ms')
+
+            if options['explain']:
+                deepest = paginator.decode_cursor(cursor)[1]
+                self.stdout.write(calls.filter(paginator._seek(paginator.ordering, deepest))
+                                  .order_by(*paginator.ordering)[:options['page_size']].explain())
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'\n✅ Deepest page p50: keyset {keyset[-1]:.2f}ms vs OFFSET {offset[-1]:.2f}ms '
+                    f'(keyset spread across depths {max(keyset) / min(keyset):.1f}x, '
+                    f'OFFSET {max(offset) / min(offset):.1f}x)'
+                )
+            )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, options):
+        """One tenant with `--calls` call sessions spread over the last year"""
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        user = User.objects.create_user(email=BENCHMARK_EMAIL, password=None)
+        statuses = ['completed'] * 7 + ['failed', 'busy', 'no_answer']
+
+        remaining = options['calls']
+        while remaining > 0:
+            chunk = min(batch_size, remaining)
+            CallSession.objects.bulk_create([
+                CallSession(
+                    user=user,
+                    call_type=random.choice(['inbound', 'outbound']),
+                    status=random.choice(statuses),
+                    caller_number='+15550000000',
+                    callee_number=f'+1999{random.randint(0, 9999999):07d}',
+                    # Second resolution, so plenty of started_at ties for the id tie-breaker
+                    started_at=(now - timedelta(seconds=random.randint(0, 365 * 86400))).replace(microsecond=0),
+                    duration=random.randint(0, 900)
+                )
+                for _ in range(chunk)
+            ], batch_size=batch_size)
+            remaining -= chunk
+            self.stdout.write(f'  Seeded {options["calls"] - remaining:,}/{options["calls"]:,} calls', ending='\r')
+        refresh_call_stats([user.pk])  # bulk_create skips the post_save counters
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSeeded {options["calls"]:,} calls in {time.monotonic() - started:.1f}s')
+        )
+        return user
+
+    def cursor_at(self, paginator, calls, row):
+        """Cursor a client would hold after paging down to `row` (looked up once, not timed)"""
+        if row == 0:
+            return None
+        previous = calls.order_by(*paginator.ordering)[row - 1]
+        return paginator.encode_cursor('next', previous)
+
+    def measure(self, runs, fetch):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def cleanup(self):
+        """Remove everything the benchmark created"""
+        CallSession.objects.filter(user__email=BENCHMARK_EMAIL).delete()
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        self.stdout.write('Benchmark data removed')
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('calls', models.IntegerField(default=0)),
+                ('call_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('new_users', models.IntegerField(default=0)),
+                ('total_users', models.IntegerField(default=0, help_text='Cumulative users (platform rows only)')),
+                ('active_subscriptions', models.IntegerField(default=0)),
+                ('mrr', models.DecimalField(decimal_places=2, default=0, help_text='Active subscription MRR in USD', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'daily_metrics',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='dailymetric_date_user_uniq'), models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('date',), name='dailymetric_platform_date_uniq')],
+            },
+        ),
+    ]
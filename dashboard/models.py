@@ -140,3 +140,41 @@ class ActivityLog(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - {self.action} - {self.created_at}"
+
+
+class DailyMetric(models.Model):
+    """
+    Pre-aggregated daily rollup for admin trend charts
+    Rows with user=None are platform totals, baqi rows per tenant (client)
+    Kept current by dashboard.tasks.rollup_daily_metrics
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_metrics')
+    
+    # Activity during the day
+    calls = models.IntegerField(default=0)
+    call_minutes = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    new_users = models.IntegerField(default=0)
+    
+    # End of day snapshot
+    total_users = models.IntegerField(default=0, help_text="Cumulative users (platform rows only)")
+    active_subscriptions = models.IntegerField(default=0)
+    mrr = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Active subscription MRR in USD")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'daily_metrics'
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='dailymetric_date_user_uniq'),
+            models.UniqueConstraint(
+                fields=['date'],
+                condition=models.Q(user__isnull=True),
+                name='dailymetric_platform_date_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.user.email if self.user else 'platform'}"
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .timeseries import resolve_timezone
+
+logger = logging.getLogger(__name__)
+
+# Admin dashboards are shared by every admin - one cache scope for the role
+ADMIN_SCOPE = 'admin'
+
+
+class LocalLRUCache:
+    """
+    Small thread-safe in-process LRU with per-entry expiry
+    Har worker process ki apni copy - Redis round trip se bhi pehle
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DashboardCache:
+    """
+    Two tier dashboard response cache
+    L1: in-process LRU (short TTL), L2: shared 'dashboard' cache alias (Redis, locmem in dev/tests)
+
+    Invalidation bumps a per-scope version in L2, so every node's L2 entries go stale at once;
+    other nodes' L1 entries expire within DASHBOARD_CACHE_LOCAL_TTL seconds.
+    """
+
+    def __init__(self):
+        self.local = LocalLRUCache(getattr(settings, 'DASHBOARD_CACHE_LOCAL_MAX_ENTRIES', 1000))
+        self.local_ttl = getattr(settings, 'DASHBOARD_CACHE_LOCAL_TTL', 5)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'dashboard')]
+
+    # Lookups
+
+    def get_or_compute(self, view_name: str, scope: str, params: str, ttl: int, compute) -> Tuple[Any, str]:
+        """Returns (value, 'local' | 'shared' | 'miss'); compute() result is cached unless None"""
+        local_key = self._local_key(scope, view_name, params)
+
+        value = self.local.get(local_key)
+        if value is not None:
+            self._record(view_name, 'local_hits')
+            return value, 'local'
+
+        shared_key = f'{local_key}:v{self._version(scope)}'
+        value = self._shared_call('get', shared_key)
+        if value is not None:
+            self.local.set(local_key, value, min(self.local_ttl, ttl))
+            self._record(view_name, 'shared_hits')
+            return value, 'shared'
+
+        self._record(view_name, 'misses')
+        value = compute()
+        if value is not None:
+            self._shared_call('set', shared_key, value, ttl)
+            self.local.set(local_key, value, min(self.local_ttl, ttl))
+        return value, 'miss'
+
+    # Invalidation
+
+    def invalidate(self, scope: str):
+        """Drop every cached dashboard for a scope (a user id or ADMIN_SCOPE)"""
+        version_key = self._version_key(scope)
+        try:
+            self.shared.incr(version_key)
+        except ValueError:
+            # No version yet - anything cached was stored under version 0
+            self.shared.set(version_key, 1, None)
+        except Exception as e:
+            logger.warning(f"Dashboard cache invalidation failed for {scope}: {str(e)}")
+        self.local.delete_prefix(f'dashboard:{scope}:')
+        self._record('_all', 'invalidations')
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+        with self._stats_lock:
+            self._stats.clear()
+
+    # Metrics
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            views = {name: dict(counters) for name, counters in self._stats.items() if name != '_all'}
+            invalidations = self._stats.get('_all', {}).get('invalidations', 0)
+
+        for counters in views.values():
+            hits = counters.get('local_hits', 0) + counters.get('shared_hits', 0)
+            lookups = hits + counters.get('misses', 0)
+            counters['hit_rate'] = round(hits / lookups * 100, 2) if lookups else 0
+
+        return {
+            'pid': os.getpid(),
+            'local_entries': len(self.local),
+            'invalidations': invalidations,
+            'views': views
+        }
+
+    # Internals
+
+    def _local_key(self, scope: str, view_name: str, params: str) -> str:
+        digest = hashlib.md5(params.encode()).hexdigest()[:12] if params else '-'
+        return f'dashboard:{scope}:{view_name}:{digest}'
+
+    def _version_key(self, scope: str) -> str:
+        return f'dashboard:version:{scope}'
+
+    def _version(self, scope: str) -> int:
+        return self._shared_call('get', self._version_key(scope)) or 0
+
+    def _shared_call(self, method: str, *args):
+        """Shared tier errors (e.g. Redis down) degrade to a miss instead of failing the request"""
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            logger.warning(f"Dashboard cache {method} failed: {str(e)}")
+            return None
+
+    def _record(self, view_name: str, counter: str):
+        with self._stats_lock:
+            counters = self._stats.setdefault(view_name, {})
+            counters[counter] = counters.get(counter, 0) + 1
+
+
+dashboard_cache = DashboardCache()
+
+
+def cache_params(request) -> str:
+    """
+    Cache key part for a request: its query params plus the resolved chart timezone
+    Timezone ?tz= ya X-Timezone header dono se aa sakta hai, isliye raw query string kaafi nahi
+    """
+    tz = resolve_timezone(request)
+    params = sorted((key, value) for key, value in request.query_params.items() if key != 'tz')
+    params.append(('tz', getattr(tz, 'key', None) or str(tz)))
+    return '&'.join(f'{key}={value}' for key, value in params)
+
+
+def cached_dashboard(view_name: str, ttl: Optional[int] = None, scope: str = 'user'):
+    """
+    Cache a dashboard APIView.get response per user (scope='user') or for all admins (scope='admin')
+    Only 200 responses are cached; X-Dashboard-Cache header shows local / shared / miss
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not getattr(settings, 'DASHBOARD_CACHE_ENABLED', True):
+                return method(self, request, *args, **kwargs)
+
+            cache_scope = ADMIN_SCOPE if scope == 'admin' else str(request.user.pk)
+            params = cache_params(request)
+            timeout = ttl or getattr(settings, 'DASHBOARD_CACHE_ADMIN_TTL' if scope == 'admin' else 'DASHBOARD_CACHE_TTL', 60)
+
+            computed = {}
+
+            def compute():
+                computed['response'] = method(self, request, *args, **kwargs)
+                if computed['response'].status_code == status.HTTP_200_OK:
+                    return computed['response'].data
+                return None
+
+            data, source = dashboard_cache.get_or_compute(view_name, cache_scope, params, timeout, compute)
+            response = computed.get('response') or Response(data, status=status.HTTP_200_OK)
+            response['X-Dashboard-Cache'] = source
+            return response
+        return wrapper
+    return decorator
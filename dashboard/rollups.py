@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import logging
+from typing import Dict, List
+
+from subscriptions.models import Subscription
+from calls.models import CallSession
+from .models import DailyMetric
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+TENANT_FIELDS = ['calls', 'call_minutes', 'active_subscriptions', 'mrr', 'updated_at']
+
+
+def day_bounds(day: date):
+    """[start, end) of a calendar day in the current timezone"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+class DailyMetricRollup:
+    """
+    Builds DailyMetric rows for a day
+    Har din ka kaam sirf us din ke rows scan karta hai - history barhne se cost nahi barhti
+    """
+
+    def rollup_range(self, start_date: date, end_date: date) -> int:
+        """Roll up every day from start_date to end_date (oldest first so totals chain)"""
+        days = 0
+        current = start_date
+        while current <= end_date:
+            self.rollup_day(current)
+            current += timedelta(days=1)
+            days += 1
+        return days
+
+    @transaction.atomic
+    def rollup_day(self, day: date) -> DailyMetric:
+        start, end = day_bounds(day)
+
+        # Calls and minutes per tenant, only this day's rows
+        calls = {
+            row['user']: row
+            for row in CallSession.objects.filter(started_at__gte=start, started_at__lt=end)
+            .values('user').annotate(calls=Count('id'), seconds=Sum('duration')).order_by()
+        }
+
+        # Active subscription MRR per tenant as of the end of the day
+        subscriptions = {
+            row['user']: row
+            for row in Subscription.objects.filter(status='active', created_at__lt=end)
+            .values('user').annotate(count=Count('id'), mrr=Sum('plan__price')).order_by()
+        }
+
+        tenant_rows = []
+        for user_id in calls.keys() | subscriptions.keys():
+            call_row = calls.get(user_id, {})
+            subscription_row = subscriptions.get(user_id, {})
+            tenant_rows.append(DailyMetric(
+                date=day,
+                user_id=user_id,
+                calls=call_row.get('calls', 0),
+                call_minutes=self._minutes(call_row.get('seconds')),
+                active_subscriptions=subscription_row.get('count', 0),
+                mrr=subscription_row.get('mrr') or 0
+            ))
+
+        DailyMetric.objects.filter(date=day, user__isnull=False).exclude(
+            user_id__in=[row.user_id for row in tenant_rows]
+        ).delete()
+        if tenant_rows:
+            DailyMetric.objects.bulk_create(
+                tenant_rows,
+                update_conflicts=True,
+                unique_fields=['date', 'user'],
+                update_fields=TENANT_FIELDS
+            )
+
+        # Platform totals are the sum of the tenant rows plus user growth
+        new_users = User.objects.filter(date_joined__gte=start, date_joined__lt=end).count()
+        previous = DailyMetric.objects.filter(date=day - timedelta(days=1), user__isnull=True).first()
+        if previous:
+            total_users = previous.total_users + new_users
+        else:
+            total_users = User.objects.filter(date_joined__lt=end).count()
+
+        platform, _ = DailyMetric.objects.update_or_create(
+            date=day,
+            user=None,
+            defaults={
+                'calls': sum(row.calls for row in tenant_rows),
+                'call_minutes': sum((row.call_minutes for row in tenant_rows), Decimal('0')),
+                'new_users': new_users,
+                'total_users': total_users,
+                'active_subscriptions': sum(row.active_subscriptions for row in tenant_rows),
+                'mrr': sum((Decimal(row.mrr) for row in tenant_rows), Decimal('0'))
+            }
+        )
+        return platform
+
+    def _minutes(self, seconds) -> Decimal:
+        return (Decimal(seconds or 0) / 60).quantize(Decimal('0.01'))
+
+
+def platform_trends(start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+    """
+    Spark points for the admin trend charts, read from the rollup table
+    Missing days carry the last snapshot forward (MRR, users) and count zero calls
+    """
+    metrics = {
+        metric.date: metric
+        for metric in DailyMetric.objects.filter(user__isnull=True, date__range=(start_date, end_date))
+    }
+
+    # Beat may not have run yet today (e.g. local development)
+    if end_date not in metrics:
+        metrics[end_date] = DailyMetricRollup().rollup_day(end_date)
+
+    last = DailyMetric.objects.filter(user__isnull=True, date__lt=start_date).order_by('-date').first()
+    mrr = float(last.mrr) if last else 0.0
+    users = last.total_users if last else 0
+
+    trends = {'mrr': [], 'calls': [], 'users': []}
+    day = start_date
+    index = 0
+    while day <= end_date:
+        metric = metrics.get(day)
+        if metric:
+            mrr = float(metric.mrr)
+            users = metric.total_users
+        trends['mrr'].append({'x': index, 'y': mrr})
+        trends['calls'].append({'x': index, 'y': metric.calls if metric else 0})
+        trends['users'].append({'x': index, 'y': users})
+        day += timedelta(days=1)
+        index += 1
+
+    return trends
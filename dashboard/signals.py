@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.models import Agent
+from agents.ai_agent_models import AIAgent, CustomerProfile, ScheduledCallback, CallSession as AgentCallSession
+from calls.models import CallSession
+from subscriptions.models import Subscription
+from .response_cache import dashboard_cache, ADMIN_SCOPE
+
+
+def _agent_client_id(instance):
+    """Tenant (client user) of an AI agent owned row"""
+    return instance.ai_agent.client_id
+
+
+@receiver(post_save, sender=CallSession)
+def invalidate_call_dashboards(sender, instance, **kwargs):
+    """Call activity changes the user's dashboards; admin call charts refresh on TTL"""
+    dashboard_cache.invalidate(str(instance.user_id))
+
+
+@receiver(post_save, sender=AgentCallSession)
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_save, sender=ScheduledCallback)
+def invalidate_agent_dashboards(sender, instance, **kwargs):
+    dashboard_cache.invalidate(str(_agent_client_id(instance)))
+
+
+@receiver(post_save, sender=Subscription)
+def invalidate_subscription_dashboards(sender, instance, **kwargs):
+    """Plan / status changes show up on the user's and the admin dashboards"""
+    dashboard_cache.invalidate(str(instance.user_id))
+    dashboard_cache.invalidate(ADMIN_SCOPE)
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_save, sender=AIAgent)
+@receiver(post_delete, sender=Agent)
+@receiver(post_delete, sender=AIAgent)
+def invalidate_agent_directory(sender, instance, created=True, **kwargs):
+    """New or removed agents change the directory facets; status churn refreshes on AGENT_DIRECTORY_FACET_TTL"""
+    if not created:
+        return
+    owner_id = instance.user_id if sender is Agent else instance.client_id
+    dashboard_cache.invalidate(str(owner_id))
+    dashboard_cache.invalidate(ADMIN_SCOPE)
@@ -0,0 +1,24 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+from .rollups import DailyMetricRollup
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rollup_daily_metrics(days=None):
+    """
+    Keep the DailyMetric rollup current
+    Sirf aaj aur kal ke din dobara calculate hote hain (late events bhi aa jate hain)
+    """
+    days = days or getattr(settings, 'DAILY_METRICS_ROLLUP_DAYS', 2)
+    today = timezone.localdate()
+    
+    rolled_up = DailyMetricRollup().rollup_range(today - timedelta(days=days - 1), today)
+    
+    logger.info(f"Rolled up daily metrics for {rolled_up} days")
+    return {'days_rolled_up': rolled_up}
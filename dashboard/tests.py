@@ -1,3 +1,437 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import zoneinfo
 
-# Create your tests here.
+from agents.ai_agent_models import AIAgent, CustomerProfile, CallSession, AIAgentTraining, ScheduledCallback
+from agents.customer_callback_crud import CustomerProfileCRUDAPIView
+from subscriptions.models import SubscriptionPlan, Subscription, BillingHistory
+from calls import models as calls
+from .admin_dashboard_api import AdminDashboardAPIView, DashboardCacheStatsAPIView
+from .aggregates import count_if
+from .comprehensive_dashboard import ComprehensiveDashboardAPIView
+from .ai_agent_dashboard import AIAgentDashboardAPIView, CustomerProfilesAPIView, ScheduledCallbacksAPIView
+from .models import DailyMetric
+from .response_cache import dashboard_cache
+from .rollups import DailyMetricRollup
+from .timeseries import bucketed_series
+from .views import DashboardStatsAPIView, UserCallHistoryAPIView
+
+User = get_user_model()
+
+
+@override_settings(DASHBOARD_CACHE_ENABLED=False)
+class DashboardQueryBudgetTests(TestCase):
+    """
+    Dashboard endpoints must stay within a fixed number of queries
+    Data barhne se queries nahi barhni chahiye (no per-row / per-status counts)
+    """
+
+    # Hard query budgets per endpoint
+    ADMIN_STATS_BUDGET = 8
+    AI_AGENT_DASHBOARD_BUDGET = 12
+    CUSTOMER_LIST_BUDGET = 3
+    CALLBACK_LIST_BUDGET = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password=None, role='admin')
+        cls.client_user = User.objects.create_user(email='client@example.com', password=None, role='user')
+        cls.agent = AIAgent.objects.create(client=cls.client_user, name='Budget Agent')
+        cls.plan = SubscriptionPlan.objects.create(name='Pro', plan_type='pro', price=Decimal('99.00'))
+        cls.seed(0)
+
+    @classmethod
+    def seed(cls, offset, count=5):
+        """Add `count` rows of every kind the dashboards read"""
+        now = timezone.now()
+        for i in range(offset, offset + count):
+            user = User.objects.create_user(email=f'user{i}@example.com', password=None)
+            subscription = Subscription.objects.create(
+                user=user,
+                plan=cls.plan,
+                status=['active', 'trialing', 'canceled'][i % 3],
+                current_period_end=now + timedelta(days=30)
+            )
+            BillingHistory.objects.create(subscription=subscription, amount=Decimal('99.00'), status='paid')
+
+            customer = CustomerProfile.objects.create(
+                ai_agent=cls.agent,
+                phone_number=f'+1555000{i:04d}',
+                name=f'Customer {i}',
+                interest_level=['hot', 'warm', 'cold', 'converted'][i % 4]
+            )
+            CallSession.objects.create(
+                ai_agent=cls.agent,
+                customer_profile=customer,
+                call_type='outbound',
+                phone_number=customer.phone_number,
+                outcome='answered',
+                duration_seconds=60
+            )
+            ScheduledCallback.objects.create(
+                ai_agent=cls.agent,
+                customer_profile=customer,
+                scheduled_datetime=now + timedelta(days=1 if i % 2 else -1),
+                reason='Follow up'
+            )
+            AIAgentTraining.objects.create(ai_agent=cls.agent, training_type='script', training_data={})
+
+    def get(self, view, user):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=User.objects.get(pk=user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertWithinBudget(self, view, user, budget):
+        """Budget holds, and stays flat when the amount of data grows"""
+        before = self.get(view, user)
+        self.assertLessEqual(before, budget)
+
+        self.seed(100, count=10)
+        after = self.get(view, user)
+        self.assertLessEqual(after, budget)
+        self.assertEqual(before, after)
+
+    def test_admin_stats_query_budget(self):
+        self.assertWithinBudget(DashboardStatsAPIView.as_view(), self.admin, self.ADMIN_STATS_BUDGET)
+
+    def test_ai_agent_dashboard_query_budget(self):
+        self.assertWithinBudget(AIAgentDashboardAPIView.as_view(), self.client_user, self.AI_AGENT_DASHBOARD_BUDGET)
+
+    def test_customer_crud_list_query_budget(self):
+        self.assertWithinBudget(CustomerProfileCRUDAPIView.as_view(), self.client_user, self.CUSTOMER_LIST_BUDGET)
+
+    def test_customer_profiles_query_budget(self):
+        self.assertWithinBudget(CustomerProfilesAPIView.as_view(), self.client_user, self.CUSTOMER_LIST_BUDGET)
+
+    def test_scheduled_callbacks_query_budget(self):
+        self.assertWithinBudget(ScheduledCallbacksAPIView.as_view(), self.client_user, self.CALLBACK_LIST_BUDGET)
+
+    def test_admin_stats_breakdown(self):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.admin)
+        data = DashboardStatsAPIView.as_view()(request).data
+
+        self.assertEqual(data['overview']['total_subscriptions'], 5)
+        self.assertEqual(data['overview']['active_subscriptions'], 2)
+        self.assertEqual(data['breakdown']['subscriptions_by_status'], {'trialing': 2, 'active': 2, 'canceled': 1})
+        self.assertEqual(data['overview']['total_revenue'], 495.0)
+
+
+@override_settings(DASHBOARD_CACHE_ENABLED=False)
+class DailyMetricRollupTests(TestCase):
+    """Admin trend charts read the DailyMetric rollup, not the raw tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password=None, role='admin')
+        cls.plan = SubscriptionPlan.objects.create(name='Pro', plan_type='pro', price=Decimal('50.00'))
+        cls.seed_history(days=10)
+
+    @classmethod
+    def seed_history(cls, days, offset=0):
+        now = timezone.now()
+        for i in range(offset, offset + days):
+            user = User.objects.create_user(email=f'tenant{i}@example.com', password=None)
+            User.objects.filter(pk=user.pk).update(date_joined=now - timedelta(days=i))
+            subscription = Subscription.objects.create(
+                user=user, plan=cls.plan, status='active', current_period_end=now + timedelta(days=30)
+            )
+            Subscription.objects.filter(pk=subscription.pk).update(created_at=now - timedelta(days=i))
+            calls.CallSession.objects.create(
+                user=user, call_type='outbound', caller_number='+15550000000',
+                callee_number=f'+1555100{i:04d}', duration=120, started_at=now - timedelta(days=i)
+            )
+
+    def get_dashboard(self):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = AdminDashboardAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, len(queries)
+
+    def test_rollup_matches_raw_tables(self):
+        DailyMetricRollup().rollup_range(timezone.localdate() - timedelta(days=29), timezone.localdate())
+        today = DailyMetric.objects.get(date=timezone.localdate(), user__isnull=True)
+
+        self.assertEqual(today.calls, 1)
+        self.assertEqual(today.call_minutes, Decimal('2.00'))
+        self.assertEqual(today.total_users, User.objects.count())
+        self.assertEqual(today.active_subscriptions, 10)
+        self.assertEqual(today.mrr, Decimal('500.00'))
+        self.assertEqual(DailyMetric.objects.filter(date=timezone.localdate(), user__isnull=False).count(), 10)
+
+        trends = self.get_dashboard()[0]['trends']
+        self.assertEqual([point['y'] for point in trends['calls']][-10:], [1] * 10)
+        self.assertEqual(trends['mrr'][-1]['y'], 500.0)
+        self.assertEqual(trends['mrr'][-2]['y'], 450.0)
+
+    def test_trend_cost_is_flat_as_history_grows(self):
+        DailyMetricRollup().rollup_range(timezone.localdate() - timedelta(days=29), timezone.localdate())
+        _, before = self.get_dashboard()
+
+        self.seed_history(days=20, offset=10)
+        DailyMetricRollup().rollup_range(timezone.localdate() - timedelta(days=29), timezone.localdate())
+        _, after = self.get_dashboard()
+
+        self.assertEqual(before, after)
+        self.assertLessEqual(after, 12)
+
+
+@override_settings(DASHBOARD_CACHE_ENABLED=False)
+class BucketedSeriesTests(TestCase):
+    """Comprehensive dashboard charts: one zero-filled, timezone-aware query per chart"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='charts@example.com', password=None)
+
+    def add_call(self, started_at, call_type='inbound', duration=60):
+        return calls.CallSession.objects.create(
+            user=self.user, call_type=call_type, caller_number='+15550000000',
+            callee_number='+15550000001', duration=duration, started_at=started_at
+        )
+
+    def test_buckets_follow_requested_timezone(self):
+        tz = zoneinfo.ZoneInfo('America/New_York')
+        start = datetime(2024, 3, 4, tzinfo=tz)
+        # 01:30 UTC on the 5th is still the 4th in New York
+        self.add_call(datetime(2024, 3, 5, 1, 30, tzinfo=dt_timezone.utc))
+        self.add_call(datetime(2024, 3, 6, 12, 0, tzinfo=dt_timezone.utc), call_type='outbound')
+
+        with CaptureQueriesContext(connection) as queries:
+            series = bucketed_series(
+                calls.CallSession.objects.filter(user=self.user), 'started_at', 'day', start, 7,
+                inbound=count_if(call_type='inbound'),
+                outbound=count_if(call_type='outbound')
+            )
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(series), 7)
+        self.assertEqual([values['inbound'] for _, values in series], [1, 0, 0, 0, 0, 0, 0])
+        self.assertEqual([values['outbound'] for _, values in series], [0, 0, 1, 0, 0, 0, 0])
+
+    def test_month_buckets_are_calendar_months(self):
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.add_call(datetime(2024, 1, 31, 23, 0, tzinfo=dt_timezone.utc), duration=120)
+        self.add_call(datetime(2024, 3, 1, 0, 30, tzinfo=dt_timezone.utc), duration=60)
+
+        series = bucketed_series(
+            calls.CallSession.objects.filter(user=self.user), 'started_at', 'month', start, 6,
+            calls=Count('id'), duration=Sum('duration')
+        )
+
+        self.assertEqual([month.strftime('%b') for month, _ in series], ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'])
+        self.assertEqual([values['calls'] for _, values in series], [1, 0, 1, 0, 0, 0])
+        self.assertEqual(series[0][1]['duration'], 120)
+
+    def test_comprehensive_dashboard_charts(self):
+        now = timezone.now()
+        self.add_call(now)
+        self.add_call(now - timedelta(days=2), call_type='outbound')
+
+        request = APIRequestFactory().get('/', {'tz': 'Asia/Karachi'})
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = ComprehensiveDashboardAPIView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['hourlyActivity']), 24)
+        self.assertEqual(len(response.data['weeklyCallTrends']), 7)
+        self.assertEqual(len(response.data['monthlyUsage']), 6)
+        self.assertEqual(sum(day['total'] for day in response.data['weeklyCallTrends']), 2)
+        self.assertLessEqual(len(queries), 10)
+
+
+class DashboardResponseCacheTests(TestCase):
+    """Tiered dashboard cache: local/shared hits, signal invalidation, metrics"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password=None, role='admin')
+        cls.user = User.objects.create_user(email='cached@example.com', password=None)
+        cls.other = User.objects.create_user(email='other@example.com', password=None)
+        cls.agent = AIAgent.objects.create(client=cls.user, name='Cached Agent')
+
+    def setUp(self):
+        dashboard_cache.clear()
+
+    def get(self, view, user, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=User.objects.get(pk=user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, len(queries)
+
+    def test_repeat_requests_hit_the_local_tier(self):
+        view = ComprehensiveDashboardAPIView.as_view()
+        first, first_queries = self.get(view, self.user)
+        second, second_queries = self.get(view, self.user)
+
+        self.assertEqual(first['X-Dashboard-Cache'], 'miss')
+        self.assertEqual(second['X-Dashboard-Cache'], 'local')
+        self.assertGreater(first_queries, 0)
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(first.data, second.data)
+
+    def test_shared_tier_serves_other_processes(self):
+        view = ComprehensiveDashboardAPIView.as_view()
+        self.get(view, self.user)
+        dashboard_cache.local.clear()  # as seen from another worker process
+
+        response, queries = self.get(view, self.user)
+        self.assertEqual(response['X-Dashboard-Cache'], 'shared')
+        self.assertEqual(queries, 0)
+
+    def test_cache_is_per_user_and_per_params(self):
+        view = ComprehensiveDashboardAPIView.as_view()
+        self.get(view, self.user)
+
+        self.assertEqual(self.get(view, self.other)[0]['X-Dashboard-Cache'], 'miss')
+        self.assertEqual(self.get(view, self.user, tz='Asia/Karachi')[0]['X-Dashboard-Cache'], 'miss')
+
+    def test_cache_is_per_resolved_timezone(self):
+        view = ComprehensiveDashboardAPIView.as_view()
+
+        def get_with_header(name):
+            request = APIRequestFactory().get('/', HTTP_X_TIMEZONE=name)
+            force_authenticate(request, user=User.objects.get(pk=self.user.pk))
+            return view(request)['X-Dashboard-Cache']
+
+        self.assertEqual(get_with_header('America/New_York'), 'miss')
+        self.assertEqual(get_with_header('Asia/Karachi'), 'miss')
+        self.assertEqual(get_with_header('America/New_York'), 'local')
+        # Same zone via ?tz= shares the entry
+        self.assertEqual(self.get(view, self.user, tz='Asia/Karachi')[0]['X-Dashboard-Cache'], 'local')
+
+    def test_post_save_invalidates_only_that_users_dashboards(self):
+        view = AIAgentDashboardAPIView.as_view()
+        comprehensive = ComprehensiveDashboardAPIView.as_view()
+        self.get(view, self.user)
+        self.get(comprehensive, self.other)
+
+        CustomerProfile.objects.create(ai_agent=self.agent, phone_number='+15550009999', interest_level='hot')
+
+        response, _ = self.get(view, self.user)
+        self.assertEqual(response['X-Dashboard-Cache'], 'miss')
+        self.assertEqual(response.data['customer_stats']['hot_leads'], 1)
+        self.assertEqual(self.get(comprehensive, self.other)[0]['X-Dashboard-Cache'], 'local')
+
+        calls.CallSession.objects.create(
+            user=self.other, call_type='inbound', caller_number='+15550000000', callee_number='+15550000001'
+        )
+        self.assertEqual(self.get(comprehensive, self.other)[0]['X-Dashboard-Cache'], 'miss')
+
+    def test_subscription_change_invalidates_admin_dashboard(self):
+        view = AdminDashboardAPIView.as_view()
+        self.get(view, self.admin)
+        self.assertEqual(self.get(view, self.admin)[0]['X-Dashboard-Cache'], 'local')
+
+        plan = SubscriptionPlan.objects.create(name='Pro', plan_type='pro', price=Decimal('10.00'))
+        Subscription.objects.create(
+            user=self.user, plan=plan, status='active', current_period_end=timezone.now() + timedelta(days=30)
+        )
+        response, _ = self.get(view, self.admin)
+        self.assertEqual(response['X-Dashboard-Cache'], 'miss')
+        self.assertEqual(response.data['metrics']['mrrUsd'], 10.0)
+
+    def test_stats_endpoint(self):
+        view = ComprehensiveDashboardAPIView.as_view()
+        self.get(view, self.user)
+        self.get(view, self.user)
+
+        stats = self.get(DashboardCacheStatsAPIView.as_view(), self.admin)[0].data
+        self.assertEqual(stats['views']['comprehensive']['misses'], 1)
+        self.assertEqual(stats['views']['comprehensive']['local_hits'], 1)
+        self.assertEqual(stats['views']['comprehensive']['hit_rate'], 50.0)
+
+
+@override_settings(PAGINATION_COUNT_CAP=100)
+class KeysetPaginationTests(TestCase):
+    """
+    History endpoints page with opaque (started_at, id) cursors instead of OFFSET
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='history@example.com', password=None)
+        cls.other = User.objects.create_user(email='history-other@example.com', password=None)
+        started = timezone.now().replace(microsecond=0)
+        for i in range(7):
+            # Pairs of calls share a started_at, so the id tie-breaker matters
+            calls.CallSession.objects.create(
+                user=cls.user, call_type='outbound', status='completed', caller_number='+15550000000',
+                callee_number=f'+1555000{i:04d}', started_at=started - timedelta(minutes=i // 2)
+            )
+        calls.CallSession.objects.create(
+            user=cls.other, call_type='inbound', caller_number='+15550009999', callee_number='+15550000000'
+        )
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        response = UserCallHistoryAPIView.as_view()(request)
+        response.render()
+        return response
+
+    def expected_ids(self):
+        return [
+            str(pk) for pk in calls.CallSession.objects.filter(user=self.user)
+            .order_by('-started_at', '-id').values_list('id', flat=True)
+        ]
+
+    def test_walks_every_call_once_in_order(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            data = self.get(page_size=3, **({'cursor': cursor} if cursor else {})).data
+            seen += [call['id'] for call in data['calls']]
+            pages += 1
+            cursor = data['pagination']['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.expected_ids())
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.get(page_size=3).data
+        self.assertIsNone(first['pagination']['previous_cursor'])
+
+        second = self.get(page_size=3, cursor=first['pagination']['next_cursor']).data
+        back = self.get(page_size=3, cursor=second['pagination']['previous_cursor']).data
+
+        self.assertEqual([c['id'] for c in back['calls']], [c['id'] for c in first['calls']])
+        self.assertIsNone(back['pagination']['previous_cursor'])
+
+    def test_count_only_when_requested(self):
+        self.assertNotIn('total_count', self.get().data['pagination'])
+
+        pagination = self.get(include_count='true').data['pagination']
+        self.assertEqual((pagination['total_count'], pagination['total_count_is_approximate']), (7, False))
+
+        with override_settings(PAGINATION_COUNT_CAP=5):
+            pagination = self.get(include_count='true').data['pagination']
+        self.assertEqual((pagination['total_count'], pagination['total_count_is_approximate']), (5, True))
+
+    def test_deep_page_uses_no_offset(self):
+        cursor = self.get(page_size=6).data['pagination']['next_cursor']
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(page_size=6, cursor=cursor).data
+
+        self.assertEqual([c['id'] for c in data['calls']], self.expected_ids()[6:])
+        self.assertTrue(all('OFFSET' not in query['sql'] for query in queries))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get(cursor='not-a-cursor').status_code, 400)
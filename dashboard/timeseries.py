@@ -0,0 +1,90 @@
+from django.db.models.functions import TruncHour, TruncDay, TruncMonth
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone, tzinfo
+from typing import Any, Dict, List, Tuple
+import zoneinfo
+
+TRUNC_FUNCTIONS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'month': TruncMonth,
+}
+
+
+def resolve_timezone(request) -> tzinfo:
+    """
+    Timezone for bucketing a user's charts
+    Frontend browser ka timezone ?tz=America/New_York se bhejta hai, warna server timezone
+    """
+    name = request.query_params.get('tz') or request.headers.get('X-Timezone')
+    if name:
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_current_timezone()
+
+
+def bucket_floor(moment: datetime, unit: str) -> datetime:
+    """Start of the hour/day/month containing `moment` (keeps its timezone)"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if unit in ('day', 'month'):
+        moment = moment.replace(hour=0)
+    if unit == 'month':
+        moment = moment.replace(day=1)
+    return moment
+
+
+def bucket_starts(start: datetime, count: int, unit: str) -> List[datetime]:
+    """`count` consecutive bucket starts beginning at `start`"""
+    tz = start.tzinfo
+    if unit == 'hour':
+        # Real elapsed hours, so DST changes neither skip nor repeat a bucket
+        utc_start = start.astimezone(dt_timezone.utc)
+        return [(utc_start + timedelta(hours=i)).astimezone(tz) for i in range(count)]
+
+    # Days and months follow the wall clock
+    buckets = []
+    current = start.replace(tzinfo=None)
+    for _ in range(count):
+        buckets.append(current.replace(tzinfo=tz))
+        if unit == 'day':
+            current += timedelta(days=1)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return buckets
+
+
+def bucketed_series(queryset, field: str, unit: str, start: datetime, count: int,
+                    **aggregates) -> List[Tuple[datetime, Dict[str, Any]]]:
+    """
+    Zero-filled time series in a single GROUP BY query
+
+    queryset: rows to aggregate, e.g. CallSession.objects.filter(user=user)
+    field: datetime field to bucket on
+    unit: 'hour', 'day' or 'month'
+    start: first bucket start, aware in the timezone to bucket in (see bucket_floor)
+    count: number of buckets
+    aggregates: name=aggregate expression, e.g. calls=Count('id')
+
+    Returns [(bucket_start, {name: value}), ...] oldest first; empty buckets get 0.
+    """
+    tz = start.tzinfo
+    buckets = bucket_starts(start, count, unit)
+    end = bucket_starts(buckets[-1], 2, unit)[1]
+
+    rows = queryset.filter(**{
+        f'{field}__gte': start,
+        f'{field}__lt': end,
+    }).annotate(
+        bucket=TRUNC_FUNCTIONS[unit](field, tzinfo=tz)
+    ).values('bucket').annotate(**aggregates).order_by('bucket')
+
+    # Aware datetimes compare by instant, so DB and generated buckets line up
+    values = {row.pop('bucket'): row for row in rows}
+    zero = {name: 0 for name in aggregates}
+
+    return [
+        (bucket, {name: values.get(bucket, zero)[name] or 0 for name in aggregates})
+        for bucket in buckets
+    ]
@@ -1,5 +1,5 @@
 from django.urls import path
-from .admin_dashboard_api import AdminDashboardAPIView
+from .admin_dashboard_api import AdminDashboardAPIView, DashboardCacheStatsAPIView
 from .user_dashboard_enhanced import UserDashboardAPIView
 from .comprehensive_dashboard import ComprehensiveDashboardAPIView
 from .ai_agent_dashboard import (
@@ -15,6 +15,7 @@ urlpatterns = [
     
     # 2. ADMIN DASHBOARD - Admin metrics & management  
     path('admin/dashboard/', AdminDashboardAPIView.as_view(), name='admin-dashboard-api'),
+    path('admin/cache-stats/', DashboardCacheStatsAPIView.as_view(), name='dashboard-cache-stats'),
     
     # 3. COMPREHENSIVE DASHBOARD - All data in one API
     path('comprehensive/', ComprehensiveDashboardAPIView.as_view(), name='comprehensive-dashboard'),
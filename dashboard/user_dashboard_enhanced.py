@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from subscriptions.models import Subscription, SubscriptionPlan
 from calls.models import CallSession
 from agents.ai_agent_models import AIAgent
+from .response_cache import cached_dashboard
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -30,6 +31,7 @@ class UserDashboardAPIView(APIView):
             401: "Unauthorized - Authentication required"
         }
     )
+    @cached_dashboard('user_enhanced')
     def get(self, request):
         user = request.user
         today = timezone.now().date()
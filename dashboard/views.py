@@ -3,17 +3,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Max, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from accounts.permissions import IsAdmin
-from subscriptions.models import Subscription, BillingHistory, UsageMetrics
+from core.pagination import KeysetPaginator
+from subscriptions.models import Subscription, BillingHistory, UsageRecord
 from calls.models import CallSession, CallQueue, QuickAction
 from agents.models import Agent, AgentPerformance
 from .models import DashboardWidget, SystemNotification, ActivityLog
+from .aggregates import counter_family
 
 User = get_user_model()
 
@@ -47,15 +49,11 @@ class DashboardStatsAPIView(APIView):
         today = timezone.now().date()
         this_month = timezone.now().replace(day=1)
         
-        # User statistics
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        users_by_role = User.objects.values('role').annotate(count=Count('id'))
+        # User statistics - one query per counter family
+        user_counts = counter_family(User.objects.all(), 'role', active=Q(is_active=True))
         
         # Subscription statistics
-        subscription_stats = Subscription.objects.values('status').annotate(count=Count('id'))
-        active_subscriptions = Subscription.objects.filter(status='active').count()
-        total_subscriptions = Subscription.objects.count()
+        subscription_counts = counter_family(Subscription.objects.all(), 'status')
         
         # Subscription plans breakdown
         plan_breakdown = Subscription.objects.filter(status='active').values(
@@ -63,26 +61,26 @@ class DashboardStatsAPIView(APIView):
         ).annotate(count=Count('id'))
         
         # Agent statistics
-        total_agents = Agent.objects.filter(is_active=True).count()
-        agents_by_status = Agent.objects.values('status').annotate(count=Count('id'))
-        online_agents = Agent.objects.filter(status__in=['available', 'busy', 'on_call']).count()
+        agent_counts = counter_family(
+            Agent.objects.all(), 'status',
+            total=False,
+            active=Q(is_active=True),
+            online=Q(status__in=['available', 'busy', 'on_call'])
+        )
+        total_agents = agent_counts['active']
+        online_agents = agent_counts['online']
         
         # Call statistics
-        today_calls = CallSession.objects.filter(started_at__date=today).count()
-        total_calls = CallSession.objects.count()
-        calls_by_status = CallSession.objects.values('status').annotate(count=Count('id'))
-        active_calls = CallSession.objects.filter(status='answered').count()
+        call_counts = counter_family(CallSession.objects.all(), 'status', today=Q(started_at__date=today))
         queued_calls = CallQueue.objects.filter(status='waiting').count()
         
         # Revenue statistics
-        monthly_revenue = BillingHistory.objects.filter(
-            created_at__gte=this_month,
-            status='paid'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        total_revenue = BillingHistory.objects.filter(
-            status='paid'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        revenue = BillingHistory.objects.filter(status='paid').aggregate(
+            monthly=Sum('amount', filter=Q(created_at__gte=this_month)),
+            total=Sum('amount')
+        )
+        monthly_revenue = revenue['monthly'] or 0
+        total_revenue = revenue['total'] or 0
         
         # Recent subscriptions
         recent_subscriptions = []
@@ -100,25 +98,25 @@ class DashboardStatsAPIView(APIView):
         
         data = {
             'overview': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'total_subscriptions': total_subscriptions,
-                'active_subscriptions': active_subscriptions,
+                'total_users': user_counts['total'],
+                'active_users': user_counts['active'],
+                'total_subscriptions': subscription_counts['total'],
+                'active_subscriptions': subscription_counts['status__active'],
                 'total_agents': total_agents,
                 'online_agents': online_agents,
-                'today_calls': today_calls,
-                'total_calls': total_calls,
-                'active_calls': active_calls,
+                'today_calls': call_counts['today'],
+                'total_calls': call_counts['total'],
+                'active_calls': call_counts['status__answered'],
                 'queued_calls': queued_calls,
                 'monthly_revenue': float(monthly_revenue),
                 'total_revenue': float(total_revenue),
                 'agent_utilization': (online_agents / total_agents * 100) if total_agents > 0 else 0
             },
             'breakdown': {
-                'users_by_role': {item['role']: item['count'] for item in users_by_role},
-                'subscriptions_by_status': {item['status']: item['count'] for item in subscription_stats},
-                'agents_by_status': {item['status']: item['count'] for item in agents_by_status},
-                'calls_by_status': {item['status']: item['count'] for item in calls_by_status},
+                'users_by_role': user_counts['by_role'],
+                'subscriptions_by_status': subscription_counts['by_status'],
+                'agents_by_status': agent_counts['by_status'],
+                'calls_by_status': call_counts['by_status'],
                 'subscription_plans': list(plan_breakdown)
             },
             'recent_subscriptions': recent_subscriptions
@@ -136,23 +134,14 @@ class DashboardStatsAPIView(APIView):
         today = timezone.now().date()
         
         # Today's performance
-        today_calls = CallSession.objects.filter(
-            agent=agent,
-            started_at__date=today
-        ).count()
-        
-        completed_calls = CallSession.objects.filter(
-            agent=agent,
-            started_at__date=today,
-            status='completed'
-        ).count()
-        
-        # Average call duration today
-        avg_duration = CallSession.objects.filter(
-            agent=agent,
-            started_at__date=today,
-            status='completed'
-        ).aggregate(avg=Avg('duration'))['avg'] or 0
+        today_stats = CallSession.objects.filter(agent=agent, started_at__date=today).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            avg_duration=Avg('duration', filter=Q(status='completed'))
+        )
+        today_calls = today_stats['total']
+        completed_calls = today_stats['completed']
+        avg_duration = today_stats['avg_duration'] or 0
         
         # Queue status
         queued_calls = CallQueue.objects.filter(status='waiting').count()
@@ -177,10 +166,10 @@ class DashboardStatsAPIView(APIView):
         
         try:
             subscription = user.subscription
-            current_usage = UsageMetrics.objects.filter(
-                subscription=subscription,
-                date=timezone.now().date()
-            ).first()
+            today_calls = CallSession.objects.filter(
+                user=user,
+                started_at__date=timezone.now().date()
+            ).count()
             
             # Billing information
             last_payment = BillingHistory.objects.filter(
@@ -197,7 +186,7 @@ class DashboardStatsAPIView(APIView):
                 'usage_percentage': (subscription.minutes_used / subscription.plan.max_minutes * 100) if subscription.plan.max_minutes > 0 else 0,
                 'next_billing_date': subscription.next_billing_date.isoformat(),
                 'last_payment_amount': float(last_payment.amount) if last_payment else 0,
-                'today_calls': current_usage.inbound_calls + current_usage.outbound_calls if current_usage else 0
+                'today_calls': today_calls
             }
             
         except Subscription.DoesNotExist:
@@ -336,7 +325,9 @@ class AdminSubscriptionsAPIView(APIView):
         parameters=[
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
             openapi.Parameter('plan', openapi.IN_QUERY, description="Filter by plan type", type=openapi.TYPE_STRING),
-            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Rows per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) total count", type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             200: "List of all subscriptions",
@@ -360,15 +351,8 @@ class AdminSubscriptionsAPIView(APIView):
         if plan_filter:
             subscriptions = subscriptions.filter(plan__plan_type=plan_filter)
         
-        # Order by creation date
-        subscriptions = subscriptions.order_by('-created_at')
-        
-        # Pagination (simple limit/offset)
-        page = int(request.query_params.get('page', 1))
-        limit = 20
-        offset = (page - 1) * limit
-        total_count = subscriptions.count()
-        subscriptions = subscriptions[offset:offset + limit]
+        # Newest first - keyset pagination on (created_at, id)
+        subscriptions, pagination = KeysetPaginator(('-created_at', '-id')).paginate(subscriptions, request)
         
         data = []
         for sub in subscriptions:
@@ -402,12 +386,7 @@ class AdminSubscriptionsAPIView(APIView):
         
         return Response({
             'subscriptions': data,
-            'pagination': {
-                'current_page': page,
-                'total_count': total_count,
-                'total_pages': (total_count + limit - 1) // limit,
-                'per_page': limit
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
 
 
@@ -419,7 +398,9 @@ class AdminAgentsAPIView(APIView):
         parameters=[
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
             openapi.Parameter('department', openapi.IN_QUERY, description="Filter by department", type=openapi.TYPE_STRING),
-            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Rows per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) total count", type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             200: "List of all agents",
@@ -443,15 +424,8 @@ class AdminAgentsAPIView(APIView):
         if department_filter:
             agents = agents.filter(department=department_filter)
         
-        # Order by last activity
-        agents = agents.order_by('-last_activity')
-        
-        # Pagination
-        page = int(request.query_params.get('page', 1))
-        limit = 20
-        offset = (page - 1) * limit
-        total_count = agents.count()
-        agents = agents[offset:offset + limit]
+        # Most recently active first - keyset pagination on (last_activity, id)
+        agents, pagination = KeysetPaginator(('-last_activity', '-id')).paginate(agents, request)
         
         data = []
         today = timezone.now().date()
@@ -517,12 +491,7 @@ class AdminAgentsAPIView(APIView):
         
         return Response({
             'agents': data,
-            'pagination': {
-                'current_page': page,
-                'total_count': total_count,
-                'total_pages': (total_count + limit - 1) // limit,
-                'per_page': limit
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
 
 
@@ -534,7 +503,9 @@ class AdminUsersAPIView(APIView):
         parameters=[
             openapi.Parameter('role', openapi.IN_QUERY, description="Filter by role", type=openapi.TYPE_STRING),
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by active status", type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Rows per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) total count", type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             200: "List of all users",
@@ -558,15 +529,8 @@ class AdminUsersAPIView(APIView):
         if status_filter is not None:
             users = users.filter(is_active=status_filter.lower() == 'true')
             
-        # Order by creation date
-        users = users.order_by('-date_joined')
-        
-        # Pagination
-        page = int(request.query_params.get('page', 1))
-        limit = 20
-        offset = (page - 1) * limit
-        total_count = users.count()
-        users = users[offset:offset + limit]
+        # Newest first - keyset pagination on (date_joined, id)
+        users, pagination = KeysetPaginator(('-date_joined', '-id')).paginate(users, request)
         
         data = []
         for user in users:
@@ -615,12 +579,7 @@ class AdminUsersAPIView(APIView):
         
         return Response({
             'users': data,
-            'pagination': {
-                'current_page': page,
-                'total_count': total_count,
-                'total_pages': (total_count + limit - 1) // limit,
-                'per_page': limit
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
 
 
@@ -865,20 +824,27 @@ class UserSubscriptionManagementAPIView(APIView):
         # Usage for current period
         usage_data = None
         if current_subscription:
-            usage = UsageMetrics.objects.filter(
-                subscription=user.subscription
-            ).order_by('-period_start').first()
+            subscription = user.subscription
+            usage = UsageRecord.objects.filter(
+                subscription=subscription,
+                timestamp__gte=subscription.current_period_start
+            ).aggregate(
+                calls_made=Count('call_id', distinct=True),
+                call_minutes=Sum('minutes_used'),
+                api_requests=Sum('api_calls_made'),
+                storage_used=Max('storage_used_mb'),
+                agents_used=Max('agents_used')
+            )
             
-            if usage:
-                usage_data = {
-                    'calls_made': usage.calls_made,
-                    'call_minutes': usage.call_minutes,
-                    'api_requests': usage.api_requests,
-                    'storage_used': usage.storage_used,
-                    'agents_used': usage.agents_used,
-                    'period_start': usage.period_start.isoformat(),
-                    'period_end': usage.period_end.isoformat()
-                }
+            usage_data = {
+                'calls_made': usage['calls_made'],
+                'call_minutes': float(usage['call_minutes'] or 0),
+                'api_requests': usage['api_requests'] or 0,
+                'storage_used': usage['storage_used'] or 0,
+                'agents_used': usage['agents_used'] or 0,
+                'period_start': subscription.current_period_start.isoformat(),
+                'period_end': subscription.current_period_end.isoformat()
+            }
         
         return Response({
             'current_subscription': current_subscription,
@@ -957,7 +923,9 @@ class UserCallHistoryAPIView(APIView):
     
     @swagger_auto_schema(
         parameters=[
-            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a previous page", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Rows per page", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_count', openapi.IN_QUERY, description="Include (approximate) total count", type=openapi.TYPE_BOOLEAN),
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
             openapi.Parameter('date_from', openapi.IN_QUERY, description="From date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
             openapi.Parameter('date_to', openapi.IN_QUERY, description="To date (YYYY-MM-DD)", type=openapi.TYPE_STRING)
@@ -974,13 +942,12 @@ class UserCallHistoryAPIView(APIView):
         user = request.user
         
         # Filter parameters
-        page = int(request.query_params.get('page', 1))
         status_filter = request.query_params.get('status')
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         
         # Base queryset
-        calls = CallSession.objects.filter(user=user).order_by('-started_at')
+        calls = CallSession.objects.filter(user=user).select_related('agent__user')
         
         # Apply filters
         if status_filter:
@@ -990,24 +957,21 @@ class UserCallHistoryAPIView(APIView):
         if date_to:
             calls = calls.filter(started_at__date__lte=date_to)
         
-        # Pagination
-        limit = 20
-        offset = (page - 1) * limit
-        total_count = calls.count()
-        calls = calls[offset:offset + limit]
+        # Keyset pagination on (started_at, id)
+        calls, pagination = KeysetPaginator(('-started_at', '-id')).paginate(calls, request)
         
         call_data = []
         for call in calls:
             call_data.append({
                 'id': str(call.id),
-                'phone_number': call.phone_number,
+                'phone_number': call.callee_number if call.call_type == 'outbound' else call.caller_number,
                 'call_type': call.call_type,
                 'status': call.status,
                 'started_at': call.started_at.isoformat(),
                 'ended_at': call.ended_at.isoformat() if call.ended_at else None,
                 'duration': call.call_duration_formatted,
-                'customer_satisfaction': call.customer_satisfaction,
-                'recording_url': call.recording_url,
+                'ai_sentiment': call.ai_sentiment,
+                'recording_url': call.twilio_recording_url,
                 'agent': {
                     'name': call.agent.user.get_full_name(),
                     'employee_id': call.agent.employee_id
@@ -1016,10 +980,5 @@ class UserCallHistoryAPIView(APIView):
         
         return Response({
             'calls': call_data,
-            'pagination': {
-                'current_page': page,
-                'total_count': total_count,
-                'total_pages': (total_count + limit - 1) // limit,
-                'per_page': limit
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
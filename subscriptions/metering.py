@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from datetime import datetime
+from decimal import Decimal, ROUND_CEILING
+import logging
+import math
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .models import Subscription, UsageAlert, UsageRecord
+
+logger = logging.getLogger(__name__)
+
+CALL_MINUTES = 'call_minutes'
+
+
+def billable_minutes(duration_seconds: int) -> int:
+    """Calls are billed per started minute"""
+    return math.ceil(max(0, duration_seconds) / 60)
+
+
+def record_usage(subscription: Subscription, minutes, call_id: Optional[str] = None, agent_id: Optional[str] = None,
+                 feature: str = CALL_MINUTES, metadata: Optional[Dict[str, Any]] = None) -> Optional[UsageRecord]:
+    """
+    Append one immutable usage event - the only write on the call path
+    A call that was already metered (webhook retry, reconciler race) is not recorded twice -
+    the usage_record_once_per_call constraint decides, so concurrent writers can't both win
+    """
+    try:
+        with transaction.atomic():
+            return UsageRecord.objects.create(
+                subscription=subscription,
+                minutes_used=Decimal(str(minutes)),
+                call_id=call_id,
+                agent_id=agent_id,
+                feature_used=feature,
+                metadata=metadata or {}
+            )
+    except IntegrityError:
+        if not call_id:
+            raise
+        return None
+
+
+def record_call_usage(user_id, call_sid: str, duration_seconds: int, agent_id=None) -> Optional[UsageRecord]:
+    """Meter a completed call against the tenant's subscription, if it has one"""
+    if duration_seconds <= 0:
+        return None
+    subscription = Subscription.objects.filter(user_id=user_id).only('id').first()
+    if subscription is None:
+        return None
+    return record_usage(
+        subscription, billable_minutes(duration_seconds), call_id=call_sid,
+        agent_id=str(agent_id) if agent_id else None, metadata={'duration_seconds': duration_seconds}
+    )
+
+
+def period_usage(subscription: Subscription, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Exact usage for a billing period straight from the usage records (aggregated or not)
+    Billing isi se hoti hai - Subscription counters sirf dashboards aur alerts ke liye hain
+    """
+    start = start or subscription.current_period_start
+    end = end or subscription.current_period_end
+    totals = subscription.usage_records.filter(timestamp__gte=start, timestamp__lt=end).aggregate(
+        minutes=Sum('minutes_used'), records=Count('id')
+    )
+
+    minutes = totals['minutes'] or Decimal('0')
+    overage_minutes = max(Decimal('0'), minutes - subscription.plan.call_minutes_limit)
+    return {
+        'period_start': start,
+        'period_end': end,
+        'minutes': minutes,
+        'records': totals['records'],
+        'included_minutes': subscription.plan.call_minutes_limit,
+        'overage_minutes': overage_minutes,
+        'overage_charges': (overage_minutes * settings.USAGE_OVERAGE_RATE).quantize(Decimal('0.01')),
+    }
+
+
+class UsageAggregator:
+    """
+    Folds new UsageRecords into Subscription counters in batches
+    Har subscription ka ek atomic F() UPDATE per window, aur alerts bhi ek hi baar check hote hain
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or settings.USAGE_AGGREGATION_BATCH_SIZE
+        self.rate = settings.USAGE_OVERAGE_RATE
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or timezone.now()
+        stats = {'records': 0, 'batches': 0, 'subscriptions': 0, 'alerts': 0}
+        touched: Set[Any] = set()
+
+        while True:
+            applied, subscription_ids = self.apply_batch(now)
+            if not applied:
+                break
+            stats['records'] += applied
+            stats['batches'] += 1
+            touched |= subscription_ids
+            if applied < self.batch_size:
+                break
+
+        stats['subscriptions'] = len(touched)
+        stats['alerts'] = self.evaluate_alerts(touched)
+        logger.info(f"Usage aggregation: {stats}")
+        return stats
+
+    def apply_batch(self, now: datetime):
+        """Claim up to batch_size unaggregated records and add them to their subscriptions, in one transaction"""
+        with transaction.atomic():
+            pending = UsageRecord.objects.filter(aggregated_at__isnull=True).order_by('timestamp')
+            if connection.features.has_select_for_update_skip_locked:
+                # Concurrent aggregators take disjoint batches
+                pending = pending.select_for_update(skip_locked=True)
+            ids = list(pending.values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                return 0, set()
+
+            UsageRecord.objects.filter(id__in=ids).update(aggregated_at=now)
+            totals = list(
+                UsageRecord.objects.filter(id__in=ids)
+                .values('subscription_id', 'subscription__plan__call_minutes_limit')
+                .annotate(minutes=Sum('minutes_used')).order_by()
+            )
+
+            for row in totals:
+                # The counter holds whole minutes; call usage is metered in whole minutes, so nothing is rounded away
+                minutes = int(row['minutes'].to_integral_value(ROUND_CEILING))
+                overage = Greatest(F('minutes_used_this_month') + minutes - row['subscription__plan__call_minutes_limit'], 0)
+                Subscription.objects.filter(id=row['subscription_id']).update(
+                    minutes_used_this_month=F('minutes_used_this_month') + minutes,
+                    overage_minutes=overage,
+                    overage_charges=ExpressionWrapper(
+                        overage * Value(self.rate), output_field=DecimalField(max_digits=10, decimal_places=2)
+                    ),
+                    updated_at=now
+                )
+
+        return len(ids), {row['subscription_id'] for row in totals}
+
+    def evaluate_alerts(self, subscription_ids: Iterable[Any]) -> int:
+        """Warning / exceeded alerts, at most one of each per billing period"""
+        subscription_ids = list(subscription_ids)
+        if not subscription_ids:
+            return 0
+
+        subscriptions = list(Subscription.objects.filter(id__in=subscription_ids).select_related('plan'))
+        existing = set(
+            UsageAlert.objects.filter(
+                subscription_id__in=subscription_ids,
+                alert_type__in=['limit_warning', 'limit_exceeded'],
+                created_at__gte=F('subscription__current_period_start')
+            ).values_list('subscription_id', 'alert_type')
+        )
+
+        alerts = []
+        for subscription in subscriptions:
+            if subscription.usage_percentage > settings.USAGE_WARNING_PERCENT and \
+                    (subscription.id, 'limit_warning') not in existing:
+                alerts.append(UsageAlert(
+                    subscription=subscription,
+                    alert_type='limit_warning',
+                    message=f"You've used {subscription.usage_percentage:.0f}% of your monthly minutes."
+                ))
+            if subscription.is_usage_exceeded and (subscription.id, 'limit_exceeded') not in existing:
+                alerts.append(UsageAlert(
+                    subscription=subscription,
+                    alert_type='limit_exceeded',
+                    message=f"You've exceeded your monthly limit. Overage charges: ${subscription.overage_charges}"
+                ))
+
+        UsageAlert.objects.bulk_create(alerts)
+        return len(alerts)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:13
+
+from django.db import migrations, models
+
+
+def mark_existing_aggregated(apps, schema_editor):
+    # Earlier usage went straight into Subscription.minutes_used_this_month - don't count it twice
+    UsageRecord = apps.get_model('subscriptions', 'UsageRecord')
+    UsageRecord.objects.filter(aggregated_at__isnull=True).update(aggregated_at=models.F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0005_nullable_stripe_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usagerecord',
+            name='aggregated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='usagerecord',
+            index=models.Index(condition=models.Q(('aggregated_at__isnull', True)), fields=['timestamp'], name='usage_unaggregated_idx'),
+        ),
+        migrations.RunPython(mark_existing_aggregated, migrations.RunPython.noop),
+    ]
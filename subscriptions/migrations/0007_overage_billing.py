@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:15
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0006_usage_record_aggregation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverageBillingRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('partial', 'Completed with failures'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('subscriptions_billed', models.IntegerField(default=0)),
+                ('items_submitted', models.IntegerField(default=0)),
+                ('items_failed', models.IntegerField(default=0)),
+                ('minutes_billed', models.IntegerField(default=0)),
+                ('amount_billed', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OverageCharge',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('period_start', models.DateTimeField()),
+                ('billed_from', models.IntegerField()),
+                ('minutes', models.IntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('idempotency_key', models.CharField(max_length=200, unique=True)),
+                ('stripe_invoice_item_id', models.CharField(blank=True, max_length=100)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='charges', to='subscriptions.overagebillingrun')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overage_charges_billed', to='subscriptions.subscription')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['subscription', 'period_start'], name='overage_sub_period_idx'), models.Index(fields=['status', 'created_at'], name='overage_status_idx')],
+            },
+        ),
+    ]
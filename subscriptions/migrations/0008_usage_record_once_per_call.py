@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:44
+
+from django.db import migrations, models
+
+
+def drop_duplicate_call_usage(apps, schema_editor):
+    # Keep the first record for each metered call; later copies came from the webhook / reconciler race
+    UsageRecord = apps.get_model('subscriptions', 'UsageRecord')
+    duplicates = (
+        UsageRecord.objects.filter(call_id__isnull=False)
+        .values('subscription_id', 'call_id', 'feature_used')
+        .annotate(records=models.Count('id')).filter(records__gt=1).order_by()
+    )
+    for group in duplicates.iterator():
+        ids = list(
+            UsageRecord.objects.filter(
+                subscription_id=group['subscription_id'], call_id=group['call_id'], feature_used=group['feature_used']
+            ).order_by('timestamp', 'id').values_list('id', flat=True)
+        )
+        UsageRecord.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0007_overage_billing'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_call_usage, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usagerecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('call_id__isnull', False)), fields=('subscription', 'call_id', 'feature_used'), name='usage_record_once_per_call'),
+        ),
+    ]
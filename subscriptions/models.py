@@ -303,32 +303,14 @@ class Subscription(models.Model):
         except Exception as e:
             return False
     
-    def update_usage(self, minutes_used):
-        """Update usage and handle overages"""
-        self.minutes_used_this_month += minutes_used
+    def update_usage(self, minutes_used, **details):
+        """
+        Meter usage; counters and alerts are updated by the usage aggregator
+        Sirf ek UsageRecord append hota hai - koi read-modify-write nahi
+        """
+        from .metering import record_usage
         
-        # Calculate overage
-        if self.minutes_used_this_month > self.plan.call_minutes_limit:
-            self.overage_minutes = self.minutes_used_this_month - self.plan.call_minutes_limit
-            # $0.02 per overage minute
-            self.overage_charges = Decimal(str(self.overage_minutes * 0.02))
-        
-        self.save()
-        
-        # Create usage alerts
-        if self.usage_percentage > 80 and not self.usage_alerts.filter(alert_type='limit_warning').exists():
-            UsageAlert.objects.create(
-                subscription=self,
-                alert_type='limit_warning',
-                message=f"You've used {self.usage_percentage}% of your monthly minutes."
-            )
-        
-        if self.is_usage_exceeded and not self.usage_alerts.filter(alert_type='limit_exceeded').exists():
-            UsageAlert.objects.create(
-                subscription=self,
-                alert_type='limit_exceeded',
-                message=f"You've exceeded your monthly limit. Overage charges: ${self.overage_charges}"
-            )
+        return record_usage(self, minutes_used, **details)
 
 
 class BillingHistory(models.Model):
@@ -499,11 +481,24 @@ class UsageRecord(models.Model):
     
     timestamp = models.DateTimeField(auto_now_add=True)
     
+    # Set once the usage aggregator has folded this record into the Subscription counters
+    aggregated_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['subscription', 'timestamp']),
             models.Index(fields=['call_id']),
+            models.Index(
+                fields=['timestamp'], condition=models.Q(aggregated_at__isnull=True), name='usage_unaggregated_idx'
+            ),
+        ]
+        constraints = [
+            # A call is metered once per feature, even when the status webhook and the reconciler race
+            models.UniqueConstraint(
+                fields=['subscription', 'call_id', 'feature_used'], condition=models.Q(call_id__isnull=False),
+                name='usage_record_once_per_call'
+            ),
         ]
     
     def __str__(self):
@@ -558,3 +553,73 @@ class UserSubscriptionAddon(models.Model):
     
     def __str__(self):
         return f"{self.subscription.user.email} - {self.addon.name}"
+
+
+class OverageBillingRun(models.Model):
+    """One pass of the overage billing worker - what was submitted to Stripe and what failed"""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('partial', 'Completed with failures'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    
+    subscriptions_billed = models.IntegerField(default=0)
+    items_submitted = models.IntegerField(default=0)
+    items_failed = models.IntegerField(default=0)
+    minutes_billed = models.IntegerField(default=0)
+    amount_billed = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    error = models.TextField(blank=True)
+    
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Overage run {self.started_at:%Y-%m-%d %H:%M} - {self.status}"
+
+
+class OverageCharge(models.Model):
+    """
+    Overage minutes billed to Stripe for one subscription in one run
+    Har charge ka idempotency key fixed hai - retry par Stripe dobara charge nahi karta
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('submitted', 'Submitted'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run = models.ForeignKey(OverageBillingRun, on_delete=models.CASCADE, related_name='charges')
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name='overage_charges_billed')
+    
+    # Minutes (billed_from, billed_from + minutes] of the period's overage
+    period_start = models.DateTimeField()
+    billed_from = models.IntegerField()
+    minutes = models.IntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    idempotency_key = models.CharField(max_length=200, unique=True)
+    stripe_invoice_item_id = models.CharField(max_length=100, blank=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['subscription', 'period_start'], name='overage_sub_period_idx'),
+            models.Index(fields=['status', 'created_at'], name='overage_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subscription.user.email} - {self.minutes} overage mins - {self.status}"
@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import stripe
+
+from .models import BillingHistory, OverageBillingRun, OverageCharge, Subscription
+
+logger = logging.getLogger(__name__)
+
+# Stripe keeps idempotency keys for 24 hours - older unsubmitted charges are left for review, not retried
+IDEMPOTENCY_WINDOW = timedelta(hours=23)
+
+
+class _RateLimiter:
+    """Spaces requests across all worker threads to stay under Stripe's per-second limit"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class OverageBillingEngine:
+    """
+    Periodic overage invoicing
+    Har subscription ka sirf naya overage (delta) Stripe invoice item banta hai - call path par Stripe nahi
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 requests_per_second: Optional[float] = None):
+        self.max_workers = max_workers or settings.OVERAGE_BILLING_MAX_WORKERS
+        self.batch_size = batch_size or settings.OVERAGE_BILLING_BATCH_SIZE
+        self.max_attempts = settings.OVERAGE_BILLING_MAX_ATTEMPTS
+        self.rate = settings.USAGE_OVERAGE_RATE
+        self.limiter = _RateLimiter(requests_per_second or settings.OVERAGE_BILLING_RATE_LIMIT)
+
+    def run(self, now: Optional[datetime] = None) -> OverageBillingRun:
+        now = now or timezone.now()
+        run = OverageBillingRun.objects.create(started_at=now)
+        charges = []
+
+        try:
+            charges = self.plan_charges(run, now)
+            for start in range(0, len(charges), self.batch_size):
+                self.submit_batch(charges[start:start + self.batch_size])
+        except Exception as e:
+            logger.error(f"Overage billing run {run.id} failed: {str(e)}")
+            run.status = 'failed'
+            run.error = str(e)
+
+        submitted = [charge for charge in charges if charge.status == 'submitted']
+        run.items_submitted = len(submitted)
+        run.items_failed = len(charges) - len(submitted)
+        run.subscriptions_billed = len({charge.subscription_id for charge in submitted})
+        run.minutes_billed = sum(charge.minutes for charge in submitted)
+        run.amount_billed = sum((charge.amount for charge in submitted), Decimal('0'))
+        if run.status == 'running':
+            run.status = 'partial' if run.items_failed else 'completed'
+        run.finished_at = timezone.now()
+        run.save()
+
+        logger.info(
+            f"Overage billing run {run.id}: {run.items_submitted} items / ${run.amount_billed} submitted, "
+            f"{run.items_failed} failed"
+        )
+        return run
+
+    def plan_charges(self, run: OverageBillingRun, now: datetime) -> List[OverageCharge]:
+        """
+        Unsubmitted charges from earlier runs (same key, so Stripe can't bill twice),
+        plus one new charge per subscription whose overage grew since it was last billed
+        """
+        retries = list(
+            OverageCharge.objects.filter(
+                status__in=['pending', 'failed'], attempts__lt=self.max_attempts,
+                created_at__gte=now - IDEMPOTENCY_WINDOW
+            ).select_related('subscription')
+        )
+
+        candidates = list(
+            Subscription.objects.filter(overage_minutes__gt=0)
+            .exclude(Q(stripe_customer_id='') | Q(stripe_customer_id__isnull=True))
+        )
+        # Everything already allocated this period counts, submitted or not
+        billed = {
+            row['subscription_id']: row['minutes']
+            for row in OverageCharge.objects.filter(
+                subscription__in=candidates, period_start=F('subscription__current_period_start')
+            ).values('subscription_id').annotate(minutes=Sum('minutes')).order_by()
+        }
+
+        new_charges = []
+        for subscription in candidates:
+            billed_from = billed.get(subscription.id, 0)
+            minutes = subscription.overage_minutes - billed_from
+            if minutes <= 0:
+                continue
+            period = int(subscription.current_period_start.timestamp())
+            new_charges.append(OverageCharge(
+                run=run,
+                subscription=subscription,
+                period_start=subscription.current_period_start,
+                billed_from=billed_from,
+                minutes=minutes,
+                amount=(minutes * self.rate).quantize(Decimal('0.01')),
+                idempotency_key=f'overage:{subscription.id}:{period}:{billed_from}-{billed_from + minutes}'
+            ))
+
+        # A concurrent run that planned the same delta already owns that key
+        OverageCharge.objects.bulk_create(new_charges, ignore_conflicts=True)
+        planned = list(OverageCharge.objects.filter(run=run, status='pending').select_related('subscription'))
+        return retries + planned
+
+    def submit_batch(self, charges: List[OverageCharge]):
+        """Submit a batch in parallel, then write every result back in one UPDATE"""
+        if not charges:
+            return
+
+        workers = min(self.max_workers, len(charges))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='overage') as executor:
+            results = list(executor.map(self._submit, charges))
+
+        now = timezone.now()
+        history = []
+        for charge, (item_id, error) in zip(charges, results):
+            charge.attempts += 1
+            if item_id:
+                charge.status = 'submitted'
+                charge.stripe_invoice_item_id = item_id
+                charge.submitted_at = now
+                charge.error = ''
+                history.append(BillingHistory(
+                    subscription=charge.subscription,
+                    invoice_type='overage',
+                    amount=charge.amount,
+                    total_amount=charge.amount,
+                    status='pending',
+                    description=f'Overage charges for {charge.minutes} minutes',
+                    billing_period_start=charge.subscription.current_period_start,
+                    billing_period_end=charge.subscription.current_period_end,
+                    due_date=now + timedelta(days=7)
+                ))
+            else:
+                charge.status = 'failed'
+                charge.error = error[:1000]
+
+        OverageCharge.objects.bulk_update(
+            charges, ['status', 'stripe_invoice_item_id', 'submitted_at', 'attempts', 'error']
+        )
+        BillingHistory.objects.bulk_create(history)
+
+    def _submit(self, charge: OverageCharge) -> Tuple[Optional[str], str]:
+        """Create the Stripe invoice item (worker thread, no DB access); returns (item id, error)"""
+        error = ''
+        for attempt in range(3):
+            self.limiter.wait()
+            try:
+                item = stripe.InvoiceItem.create(
+                    customer=charge.subscription.stripe_customer_id,
+                    amount=int(charge.amount * 100),
+                    currency='usd',
+                    description=f'Overage charges: {charge.minutes} minutes',
+                    metadata={
+                        'subscription_id': str(charge.subscription_id),
+                        'overage_charge_id': str(charge.id),
+                        'overage_minutes': f'{charge.billed_from}-{charge.billed_from + charge.minutes}',
+                    },
+                    idempotency_key=charge.idempotency_key
+                )
+                return item.id, ''
+            except stripe.error.RateLimitError as e:
+                error = str(e)
+                time.sleep(self.limiter.interval * (2 ** attempt) * 10)
+            except stripe.error.StripeError as e:
+                logger.error(f"Stripe error billing overage {charge.idempotency_key}: {str(e)}")
+                return None, str(e)
+            except Exception as e:
+                logger.error(f"Error billing overage {charge.idempotency_key}: {str(e)}")
+                return None, str(e)
+        return None, error
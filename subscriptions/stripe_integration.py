@@ -156,6 +156,8 @@ class StripeWebhookAPIView(APIView):
             # Reset monthly usage if new billing period
             if subscription.current_period_start != stripe_invoice['period_start']:
                 subscription.minutes_used_this_month = 0
+                subscription.overage_minutes = 0
+                subscription.overage_charges = 0
                 subscription.current_period_start = stripe_invoice['period_start']
                 subscription.current_period_end = stripe_invoice['period_end']
                 subscription.save()
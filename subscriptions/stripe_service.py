@@ -411,37 +411,13 @@ class BillingService:
     
     @staticmethod
     def process_usage_billing(subscription, minutes_used):
-        """Process usage and overage billing"""
+        """
+        Meter usage; overage is invoiced in batches by the overage billing worker
+        Stripe call ab call-completion path par nahi hota
+        """
         try:
-            # Update usage
             subscription.update_usage(minutes_used)
-            
-            # Handle overage charges
-            if subscription.overage_charges > 0:
-                # Create invoice item for overage
-                stripe.InvoiceItem.create(
-                    customer=subscription.stripe_customer_id,
-                    amount=int(subscription.overage_charges * 100),
-                    currency='usd',
-                    description=f'Overage charges: {subscription.overage_minutes} minutes'
-                )
-                
-                # Create billing history
-                BillingHistory.objects.create(
-                    subscription=subscription,
-                    invoice_type='overage',
-                    amount=subscription.overage_charges,
-                    total_amount=subscription.overage_charges,
-                    status='pending',
-                    description=f'Overage charges for {subscription.overage_minutes} minutes',
-                    billing_period_start=subscription.current_period_start,
-                    billing_period_end=subscription.current_period_end,
-                    due_date=timezone.now() + timedelta(days=7)
-                )
-                
-                logger.info(f"Processed overage billing for user: {subscription.user.email}")
-            
-            return {'success': True, 'overage_charges': subscription.overage_charges}
+            return {'success': True, 'queued': True}
             
         except Exception as e:
             logger.error(f"Error processing usage billing: {str(e)}")
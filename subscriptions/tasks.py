@@ -0,0 +1,32 @@
+from celery import shared_task
+import logging
+
+from .metering import UsageAggregator
+from .overage_billing import OverageBillingEngine
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def aggregate_usage():
+    """
+    Fold new usage records into Subscription counters and check usage alerts
+    Call completion sirf UsageRecord likhta hai; counters yahan batch mein update hote hain
+    """
+    return UsageAggregator().run()
+
+
+@shared_task
+def bill_overages():
+    """
+    Invoice new overage minutes to Stripe and record the run
+    Sirf pichle run ke baad ka overage bill hota hai
+    """
+    run = OverageBillingEngine().run()
+    return {
+        'run_id': str(run.id),
+        'status': run.status,
+        'items_submitted': run.items_submitted,
+        'items_failed': run.items_failed,
+        'amount_billed': str(run.amount_billed),
+    }
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+import stripe
 
-# Create your tests here.
+from .metering import UsageAggregator, billable_minutes, period_usage, record_call_usage, record_usage
+from .models import BillingHistory, OverageCharge, Subscription, SubscriptionPlan, UsageAlert, UsageRecord
+from .overage_billing import OverageBillingEngine
+from .stripe_service import BillingService
+
+User = get_user_model()
+
+
+@override_settings(USAGE_OVERAGE_RATE=Decimal('0.02'), USAGE_WARNING_PERCENT=80)
+class UsageMeteringTests(TestCase):
+    """
+    Usage is appended as records and folded into Subscription counters in batches
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='metering@example.com', password=None)
+        cls.plan = SubscriptionPlan.objects.create(name='Starter', plan_type='starter', price=49, call_minutes_limit=10)
+
+    def setUp(self):
+        self.subscription = Subscription.objects.create(
+            user=self.user, plan=self.plan, status='active',
+            current_period_start=timezone.now() - timedelta(days=1),
+            current_period_end=timezone.now() + timedelta(days=29)
+        )
+
+    def test_update_usage_only_appends(self):
+        self.subscription.update_usage(3)
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.minutes_used_this_month, 0)
+        self.assertEqual(UsageRecord.objects.filter(aggregated_at__isnull=True).count(), 1)
+        self.assertFalse(UsageAlert.objects.exists())
+
+    def test_aggregation_folds_batches_and_overage(self):
+        for index in range(7):
+            record_call_usage(self.user.id, f'CA-meter-{index}', 95)  # 2 billable minutes each
+        record_call_usage(self.user.id, 'CA-meter-0', 95)  # Webhook retry
+
+        stats = UsageAggregator(batch_size=3).run()
+
+        self.assertEqual((stats['records'], stats['batches'], stats['subscriptions']), (7, 3, 1))
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.minutes_used_this_month, 14)
+        self.assertEqual(self.subscription.overage_minutes, 4)
+        self.assertEqual(self.subscription.overage_charges, Decimal('0.08'))
+        self.assertFalse(UsageRecord.objects.filter(aggregated_at__isnull=True).exists())
+
+    def test_alerts_once_per_period(self):
+        record_call_usage(self.user.id, 'CA-alert-1', 9 * 60)
+        UsageAggregator().run()
+        self.assertEqual(
+            sorted(UsageAlert.objects.values_list('alert_type', flat=True)), ['limit_warning']
+        )
+
+        record_call_usage(self.user.id, 'CA-alert-2', 5 * 60)
+        record_call_usage(self.user.id, 'CA-alert-3', 60)
+        stats = UsageAggregator().run()
+
+        self.assertEqual(stats['alerts'], 1)
+        self.assertEqual(
+            sorted(UsageAlert.objects.values_list('alert_type', flat=True)), ['limit_exceeded', 'limit_warning']
+        )
+
+    def test_period_usage_is_exact_before_aggregation(self):
+        record_call_usage(self.user.id, 'CA-period-1', 61)
+        self.subscription.update_usage(Decimal('9.5'), feature='manual_adjustment')
+
+        usage = period_usage(self.subscription)
+
+        self.assertEqual(usage['minutes'], Decimal('11.5'))
+        self.assertEqual(usage['records'], 2)
+        self.assertEqual(usage['overage_minutes'], Decimal('1.5'))
+        self.assertEqual(usage['overage_charges'], Decimal('0.03'))
+
+    def test_a_call_is_metered_once_even_when_writers_race(self):
+        self.assertIsNotNone(record_call_usage(self.user.id, 'CA-race', 120))
+        # Second writer already passed any application-level check - the constraint still rejects it
+        self.assertIsNone(record_usage(self.subscription, 2, call_id='CA-race'))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UsageRecord.objects.create(subscription=self.subscription, minutes_used=2, call_id='CA-race',
+                                       feature_used='call_minutes')
+
+        self.assertEqual(period_usage(self.subscription)['minutes'], Decimal('2'))
+        # Usage without a call id is never deduplicated
+        self.subscription.update_usage(1, feature='manual_adjustment')
+        self.subscription.update_usage(1, feature='manual_adjustment')
+        self.assertEqual(period_usage(self.subscription)['records'], 3)
+
+    def test_billable_minutes_round_up(self):
+        self.assertEqual([billable_minutes(s) for s in [0, 1, 60, 61, 3599]], [0, 1, 1, 2, 60])
+
+
+@override_settings(
+    USAGE_OVERAGE_RATE=Decimal('0.02'), OVERAGE_BILLING_MAX_WORKERS=4, OVERAGE_BILLING_BATCH_SIZE=2,
+    OVERAGE_BILLING_RATE_LIMIT=1000, OVERAGE_BILLING_MAX_ATTEMPTS=3
+)
+class OverageBillingTests(TestCase):
+    """
+    Overage deltas are invoiced once per run with stable idempotency keys
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = SubscriptionPlan.objects.create(name='Pro', plan_type='pro', price=99, call_minutes_limit=100)
+
+    def subscription(self, email, overage_minutes, customer='cus_test'):
+        return Subscription.objects.create(
+            user=User.objects.create_user(email=email, password=None), plan=self.plan, status='active',
+            stripe_customer_id=customer, overage_minutes=overage_minutes,
+            current_period_start=timezone.now() - timedelta(days=3),
+            current_period_end=timezone.now() + timedelta(days=27)
+        )
+
+    @mock.patch('subscriptions.overage_billing.stripe.InvoiceItem.create')
+    def test_bills_only_the_delta_since_last_run(self, create):
+        create.side_effect = lambda **kwargs: mock.Mock(id=f"ii_{kwargs['idempotency_key'][-5:]}")
+        first = self.subscription('overage-1@example.com', 30)
+        self.subscription('overage-2@example.com', 10)
+        self.subscription('overage-3@example.com', 5)
+        self.subscription('no-customer@example.com', 50, customer='')
+
+        run = OverageBillingEngine().run()
+
+        self.assertEqual((run.status, run.items_submitted, run.minutes_billed), ('completed', 3, 45))
+        self.assertEqual(run.amount_billed, Decimal('0.90'))
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(BillingHistory.objects.filter(invoice_type='overage').count(), 3)
+
+        Subscription.objects.filter(id=first.id).update(overage_minutes=42)
+        create.reset_mock()
+        run = OverageBillingEngine().run()
+
+        self.assertEqual(run.items_submitted, 1)
+        kwargs = create.call_args.kwargs
+        self.assertEqual((kwargs['amount'], kwargs['customer']), (24, 'cus_test'))
+        self.assertTrue(kwargs['idempotency_key'].endswith(':30-42'))
+
+    @mock.patch('subscriptions.overage_billing.stripe.InvoiceItem.create')
+    def test_failed_charge_is_retried_with_same_key(self, create):
+        self.subscription('retry@example.com', 7)
+        create.side_effect = stripe.error.APIConnectionError('Stripe unreachable')
+
+        run = OverageBillingEngine().run()
+        self.assertEqual((run.status, run.items_failed), ('partial', 1))
+        first_key = create.call_args.kwargs['idempotency_key']
+
+        create.side_effect = None
+        create.return_value = mock.Mock(id='ii_retry')
+        run = OverageBillingEngine().run()
+
+        self.assertEqual((run.status, run.items_submitted), ('completed', 1))
+        self.assertEqual(create.call_args.kwargs['idempotency_key'], first_key)
+        charge = OverageCharge.objects.get()
+        self.assertEqual((charge.status, charge.attempts, charge.stripe_invoice_item_id), ('submitted', 2, 'ii_retry'))
+
+    @mock.patch('subscriptions.overage_billing.stripe.InvoiceItem.create')
+    def test_usage_billing_no_longer_calls_stripe(self, create):
+        subscription = self.subscription('inline@example.com', 0)
+
+        result = BillingService.process_usage_billing(subscription, 250)
+
+        self.assertEqual(result, {'success': True, 'queued': True})
+        create.assert_not_called()
+        self.assertEqual(UsageRecord.objects.filter(subscription=subscription).count(), 1)